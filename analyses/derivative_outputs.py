@@ -61,29 +61,15 @@ def forest_extent_per_pixel_outputs(tile_id, input_pattern, output_patterns):
     in_src = rasterio.open(focal_tile)
     # Grabs metadata about the tif, like its location/projection/cellsize
     kwargs = in_src.meta
-    # Grabs the windows of the tile (stripes) so we can iterate over the entire tif without running out of memory
-    windows = in_src.block_windows(1)
+    # Grabs the windows of the tile (groups of stripes) so we can iterate over the entire tif without running out of memory
+    windows = uu.iterate_windows(in_src, tile_id, 'forest_extent_per_pixel_outputs')
 
     pixel_area_src = rasterio.open(pixel_area)
     tcd_src = rasterio.open(tcd)
 
-    try:
-        gain_src = rasterio.open(gain)
-        uu.print_log(f'    Gain tile found for {tile_id}')
-    except:
-        uu.print_log(f'    Gain tile not found for {tile_id}')
-
-    try:
-        mangrove_src = rasterio.open(mangrove)
-        uu.print_log(f'    Mangrove tile found for {tile_id}')
-    except:
-        uu.print_log(f'    Mangrove tile not found for {tile_id}')
-
-    try:
-        pre_2000_plantations_src = rasterio.open(pre_2000_plantations)
-        uu.print_log(f'  Pre-2000 plantation tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'  Pre-2000 plantation tile not found for {tile_id}')
+    gain_src = uu.open_optional_input(gain, tile_id, 'Gain')
+    mangrove_src = uu.open_optional_input(mangrove, tile_id, 'Mangrove')
+    pre_2000_plantations_src = uu.open_optional_input(pre_2000_plantations, tile_id, 'Pre-2000 plantation')
 
     uu.print_log(f'  Creating outputs for {focal_tile}...')
 
@@ -143,20 +129,9 @@ def forest_extent_per_pixel_outputs(tile_id, input_pattern, output_patterns):
         pixel_area_window = pixel_area_src.read(1, window=window)
         tcd_window = tcd_src.read(1, window=window)
 
-        try:
-            gain_window = gain_src.read(1, window=window)
-        except:
-            gain_window = np.zeros((window.height, window.width), dtype='uint8')
-
-        try:
-            mangrove_window = mangrove_src.read(1, window=window)
-        except:
-            mangrove_window = np.zeros((window.height, window.width), dtype='uint8')
-
-        try:
-            pre_2000_plantations_window = pre_2000_plantations_src.read(1, window=window)
-        except UnboundLocalError:
-            pre_2000_plantations_window = np.zeros((window.height, window.width), dtype=int)
+        gain_window = uu.read_optional_window(gain_src, window, 'uint8')
+        mangrove_window = uu.read_optional_window(mangrove_src, window, 'float32')
+        pre_2000_plantations_window = uu.read_optional_window(pre_2000_plantations_src, window, 'uint8')
 
         # Output window for per pixel full extent raster
         dst_window_per_pixel_full_extent = in_window * pixel_area_window / cn.m2_per_ha
@@ -204,7 +179,8 @@ def aggregate_within_tile(tile_id, download_pattern_name):
         return
 
     # Grabs the windows of the tile (stripes) in order to iterate over the entire tif without running out of memory
-    windows = in_src.block_windows(1)
+    # Keeps the tile's own windows because each window is summed into one pixel of the aggregated tile
+    windows = uu.iterate_windows(in_src, tile_id, 'aggregate_within_tile', legacy=True)
 
     # 2D array (250x250 cells) in which the 0.04x0.04 deg aggregated sums will be stored.
     sum_array = np.zeros([int(cn.tile_width/cn.agg_pixel_window),int(cn.tile_width/cn.agg_pixel_window)], 'float32')
@@ -22,7 +22,6 @@ python -m analyses.mp_derivative_outputs -t std -l 00N_000E -nu
 python -m analyses.mp_derivative_outputs -t std -l all
 """
 
-import multiprocessing
 from functools import partial
 import datetime
 import argparse
@@ -157,18 +156,10 @@ def mp_derivative_outputs(tile_id_list):
             for tile_id in tile_id_list_inner:
                 derivative_outputs.forest_extent_per_pixel_outputs(tile_id, input_pattern, output_patterns)
         else:
-            # 18 = >740 GB peak; 15=XXX GB peak
-            if cn.count == 96:
-                processes = 15
-            else:
-                processes = 2
-            uu.print_log(f'Creating derivative outputs for {input_pattern} with {processes} processors...')
-            pool = multiprocessing.Pool(processes)
-            pool.map(partial(derivative_outputs.forest_extent_per_pixel_outputs, input_pattern=input_pattern,
-                             output_patterns=output_patterns),
-                     tile_id_list_inner)
-            pool.close()
-            pool.join()
+            uu.print_log(f'Creating derivative outputs for {input_pattern}...')
+            uu.map_tiles(partial(derivative_outputs.forest_extent_per_pixel_outputs, input_pattern=input_pattern,
+                                 output_patterns=output_patterns),
+                         tile_id_list_inner, 'forest_extent_per_pixel_outputs')
 
 
         ### STEP 2: Converts the forest extent 10x10 degree Hansen tiles that
@@ -185,19 +176,8 @@ def mp_derivative_outputs(tile_id_list):
             for tile_id in tile_id_list_inner:
                 uu.rewindow(tile_id, download_pattern_name)
         else:
-            if cn.count == 96:
-                if cn.SENSIT_TYPE == 'biomass_swap':
-                    processes = 12  # 12 processors = XXX GB peak
-                else:
-                    processes = 14  # 14 processors = XXX GB peak
-            else:
-                processes = 8
-            uu.print_log(f'Rewindow max processors= {processes}')
-            pool = multiprocessing.Pool(processes)
-            pool.map(partial(uu.rewindow, download_pattern_name=download_pattern_name),
-                     tile_id_list_inner)
-            pool.close()
-            pool.join()
+            uu.map_tiles(partial(uu.rewindow, download_pattern_name=download_pattern_name),
+                         tile_id_list_inner, 'rewindow')
 
 
         ### STEP 3: Aggregates the rewindowed per-pixel values in each 160x160 window.
@@ -211,19 +191,8 @@ def mp_derivative_outputs(tile_id_list):
             for tile_id in tile_id_list_inner:
                 derivative_outputs.aggregate_within_tile(tile_id, download_pattern_name)
         else:
-            if cn.count == 96:
-                if cn.SENSIT_TYPE == 'biomass_swap':
-                    processes = 10  # 10 processors = XXX GB peak
-                else:
-                    processes = 11  # 16 processors = 180 GB peak; 16 = XXX GB peak; 20 = >750 GB (maxed out)
-            else:
-                processes = 8
-            uu.print_log(f'Aggregate max processors={processes}')
-            pool = multiprocessing.Pool(processes)
-            pool.map(partial(derivative_outputs.aggregate_within_tile, download_pattern_name=download_pattern_name),
-                     tile_id_list_inner)
-            pool.close()
-            pool.join()
+            uu.map_tiles(partial(derivative_outputs.aggregate_within_tile, download_pattern_name=download_pattern_name),
+                         tile_id_list_inner, 'aggregate_within_tile')
 
 
         ### STEP 4: Combines 10x10 deg aggregated tiles into a global aggregated map
@@ -255,12 +224,9 @@ def mp_derivative_outputs(tile_id_list):
                 for tile_id in tile_id_list_inner:
                     uu.check_and_delete_if_empty_light(tile_id, output_pattern)
             else:
-                processes = 55  # 50 processors = 560 GB peak for gross removals; 55 = XXX GB peak
-                uu.print_log(f'Checking for empty tiles of {output_pattern} pattern with {processes} processors...')
-                pool = multiprocessing.Pool(processes)
-                pool.map(partial(uu.check_and_delete_if_empty, output_pattern=output_pattern), tile_id_list_inner)
-                pool.close()
-                pool.join()
+                uu.print_log(f'Checking for empty tiles of {output_pattern} pattern...')
+                uu.map_tiles(partial(uu.check_and_delete_if_empty, output_pattern=output_pattern), tile_id_list_inner,
+                             'check_and_delete_if_empty')
 
 
     ### OPTIONAL STEP 7: Upload 0.00025x0.00025 deg and aggregated outputs to s3
@@ -337,6 +303,7 @@ if __name__ == '__main__':
                        help='Disables uploading of outputs to s3')
     parser.add_argument('--single-processor', '-sp', action='store_true',
                        help='Uses single processing rather than multiprocessing')
+    uu.add_tile_processing_arguments(parser)
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
@@ -345,6 +312,7 @@ if __name__ == '__main__':
     cn.NO_UPLOAD = args.no_upload
     cn.STD_NET_FLUX = args.std_net_flux_aggreg
     cn.SINGLE_PROCESSOR = args.single_processor
+    uu.set_tile_processing_arguments(args)
 
     tile_id_list = args.tile_id_list
 
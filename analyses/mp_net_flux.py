@@ -8,7 +8,6 @@ python -m analyses.mp_net_flux -t std -l all
 
 import argparse
 from functools import partial
-import multiprocessing
 import os
 import sys
 
@@ -74,19 +73,8 @@ def mp_net_flux(tile_id_list):
 
     else:
         pattern = output_pattern_list[0]
-        if cn.count == 96:
-            if cn.SENSIT_TYPE == 'biomass_swap':
-                processes = 32 # 32 processors = XXX GB peak
-            else:
-                processes = 40   # 38 = 690 GB peak; 40 = 715 GB peak
-        else:
-            processes = 9
-        uu.print_log(f'Net flux max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(net_flux.net_calc, pattern=pattern),
-                     tile_id_list)
-            pool.close()
-            pool.join()
+        uu.map_tiles(partial(net_flux.net_calc, pattern=pattern),
+                     tile_id_list, 'net_flux')
 
 
     # If cn.NO_UPLOAD flag is not activated (by choice or by lack of AWS credentials), output is uploaded
@@ -109,6 +97,7 @@ if __name__ == '__main__':
                        help='Disables uploading of outputs to s3')
     parser.add_argument('--single-processor', '-sp', action='store_true',
                        help='Uses single processing rather than multiprocessing')
+    uu.add_tile_processing_arguments(parser)
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
@@ -116,6 +105,7 @@ if __name__ == '__main__':
     cn.RUN_DATE = args.run_date
     cn.NO_UPLOAD = args.no_upload
     cn.SINGLE_PROCESSOR = args.single_processor
+    uu.set_tile_processing_arguments(args)
 
     tile_id_list = args.tile_id_list
 
@@ -3,7 +3,6 @@ Function to create net flux tiles
 """
 
 import datetime
-import numpy as np
 import rasterio
 import sys
 from memory_profiler import profile
@@ -34,42 +33,31 @@ def net_calc(tile_id, pattern):
     # Output net emissions file
     net_flux = uu.make_tile_name(tile_id, pattern)
 
-    try:
-        removals_src = rasterio.open(removals_in)
-        # Grabs metadata about the tif, like its location/projection/cellsize
-        kwargs = removals_src.meta
-        # Grabs the windows of the tile (stripes) so we can iterate over the entire tif without running out of memory
-        windows = removals_src.block_windows(1)
-        uu.print_log(f'   Gross removals tile found for {removals_in}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'   Gross removals tile not found for {removals_in}')
-
-    try:
-        emissions_src = rasterio.open(emissions_in)
-        # Grabs metadata about the tif, like its location/projection/cellsize
-        kwargs = emissions_src.meta
-        # Grabs the windows of the tile (stripes) so we can iterate over the entire tif without running out of memory
-        windows = emissions_src.block_windows(1)
-        uu.print_log(f'   Gross emissions tile found for {emissions_in}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'   Gross emissions tile not found for {emissions_in}')
+    removals_src = uu.open_optional_input(removals_in, tile_id, 'Gross removals')
+    emissions_src = uu.open_optional_input(emissions_in, tile_id, 'Gross emissions')
 
     # Skips the tile if there is neither a gross emissions nor a gross removals tile.
     # This should only occur for biomass_swap sensitivity analysis, which gets its net flux tile list from
     # the JPL tile list (some tiles of which have neither emissions nor removals), rather than the union of
     # emissions and removals tiles.
-    try:
-        kwargs.update(
-            driver='GTiff',
-            count=1,
-            compress='DEFLATE',
-            nodata=0,
-            dtype='float32'
-        )
-    except rasterio.errors.RasterioIOError:
+    if removals_src is None and emissions_src is None:
         uu.print_log(f'Gross emissions or gross removals not found for {tile_id}. Skipping tile.')
         return
 
+    # Grabs metadata about the tif, like its location/projection/cellsize, from the emissions tile if it exists
+    template_src = emissions_src if emissions_src is not None else removals_src
+    kwargs = template_src.meta
+    # Grabs the windows of the tile (groups of stripes) so we can iterate over the entire tif without running out of memory
+    windows = uu.iterate_windows(template_src, tile_id, 'net_calc')
+
+    kwargs.update(
+        driver='GTiff',
+        count=1,
+        compress='DEFLATE',
+        nodata=0,
+        dtype='float32'
+    )
+
     # Opens the output tile, giving it the arguments of the input tiles
     net_flux_dst = rasterio.open(net_flux, 'w', **kwargs)
 
@@ -86,18 +74,12 @@ def net_calc(tile_id, pattern):
 
     uu.check_memory()
 
-    # Iterates across the windows (1 pixel strips) of the input tile
+    # Iterates across the windows (groups of 1 pixel strips) of the input tile
     for idx, window in windows:
 
         # Creates windows for each input tile
-        try:
-            removals_window = removals_src.read(1, window=window).astype('float32')
-        except UnboundLocalError:
-            removals_window = np.zeros((window.height, window.width)).astype('float32')
-        try:
-            emissions_window = emissions_src.read(1, window=window).astype('float32')
-        except UnboundLocalError:
-            emissions_window = np.zeros((window.height, window.width)).astype('float32')
+        removals_window = uu.read_optional_window(removals_src, window, 'float32').astype('float32', copy=False)
+        emissions_window = uu.read_optional_window(emissions_src, window, 'float32').astype('float32', copy=False)
 
         # Subtracts removals from emissions to calculate net flux (negative is net sink, positive is net source)
         dst_data = emissions_window - removals_window
@@ -0,0 +1,341 @@
+"""
+Times the carbon pool stages (create_AGC, create_BGC, create_deadwood_litter, create_soil_emis_extent and
+create_total_C, and optionally create_carbon_pools_fused) on synthetic input tiles, so that carbon pool performance
+can be measured locally without the inputs on s3.
+The synthetic tiles are striped (1 row per block) and DEFLATE-compressed like the model's input tiles and have
+patchy forest, loss, mangrove and climate patterns, so they compress and process similarly to real tiles.
+They can be any size, from the 20x40000 pixel fragments like the ones in test/test_data up to a full 40000x40000 tile.
+They are written window by window, so even full tiles don't need to fit in memory.
+The mangrove ratios are made up for the synthetic continent-ecozone codes, so the mangrove spreadsheet isn't needed.
+
+Each stage runs in its own process. The report records wall time, peak resident memory (RSS) and
+bytes read and written by each stage, and can be compared to an earlier report to catch regressions.
+
+python -m benchmarks.carbon_pools
+python -m benchmarks.carbon_pools --height 40000 --width 40000 --folder /tmp/carbon_pool_benchmark --output full_tile.json
+python -m benchmarks.carbon_pools --baseline carbon_pool_benchmark.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import psutil
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+import constants_and_names as cn
+import universal_util as uu
+from carbon_pools import create_carbon_pools
+
+
+# Synthetic continent-ecozone codes and made-up mangrove BGB:AGB, deadwood:AGB and litter:AGB ratios for them
+CONT_ECO_CODES = [2101, 2102, 3101, 3102, 4103, 4201]
+MANG_BGB_AGB_RATIO = {0: 0, 2101: 0.96, 2102: 0.29, 3101: 0.96, 3102: 0.29, 4103: 0.44, 4201: 0.44}
+MANG_DEADWOOD_AGB_RATIO = {0: 0, 2101: 0.11, 2102: 0.2, 3101: 0.11, 3102: 0.2, 4103: 0.3, 4201: 0.3}
+MANG_LITTER_AGB_RATIO = {0: 0, 2101: 0.01, 2102: 0.02, 3101: 0.01, 3102: 0.02, 4103: 0.03, 4201: 0.03}
+
+# Size of the patches (pixels) that forest cover, loss, climate, etc. are uniform over in the synthetic tiles
+PATCH_SIZE = 400
+
+
+def input_tile_names(tile_id):
+    """
+    Names of the carbon pool input tiles, as the carbon pool functions look for them in the standard model
+    :param tile_id: tile to be processed, identified by its tile id
+    :return: dictionary of input names to tile names
+    """
+
+    return {
+        'model_extent': uu.make_tile_name(tile_id, cn.pattern_model_extent),
+        'loss_year': f'{cn.pattern_loss}_{tile_id}.tif',
+        'gain': uu.make_tile_name(tile_id, cn.pattern_gain_ec2),
+        'removal_forest_type': uu.make_tile_name(tile_id, cn.pattern_removal_forest_type),
+        'annual_gain_AGC': uu.make_tile_name(tile_id, cn.pattern_annual_gain_AGC_all_types),
+        'cumul_gain_AGCO2': uu.make_tile_name(tile_id, cn.pattern_cumul_gain_AGCO2_all_types),
+        'mangrove_biomass_2000': uu.make_tile_name(tile_id, cn.pattern_mangrove_biomass_2000),
+        'natrl_forest_biomass_2000': uu.make_tile_name(tile_id, cn.pattern_WHRC_biomass_2000_unmasked),
+        'cont_eco': uu.make_tile_name(tile_id, cn.pattern_cont_eco_processed),
+        'BGB_AGB_ratio': uu.make_tile_name(tile_id, cn.pattern_BGB_AGB_ratio),
+        'bor_tem_trop': uu.make_tile_name(tile_id, cn.pattern_bor_tem_trop_processed),
+        'precip': uu.make_tile_name(tile_id, cn.pattern_precip),
+        'elevation': uu.make_tile_name(tile_id, cn.pattern_elevation),
+        'soil_full_extent': uu.make_tile_name(tile_id, cn.pattern_soil_C_full_extent_2000)
+    }
+
+
+# Data types of the input tiles
+INPUT_DTYPES = {
+    'model_extent': 'uint8', 'loss_year': 'uint8', 'gain': 'uint8', 'removal_forest_type': 'uint8',
+    'annual_gain_AGC': 'float32', 'cumul_gain_AGCO2': 'float32', 'mangrove_biomass_2000': 'float32',
+    'natrl_forest_biomass_2000': 'float32', 'cont_eco': 'int16', 'BGB_AGB_ratio': 'float32',
+    'bor_tem_trop': 'int16', 'precip': 'int32', 'elevation': 'int16', 'soil_full_extent': 'int16'
+}
+
+
+def synthetic_windows(coarse, window, seed):
+    """
+    Makes the windows of all the synthetic input tiles for one window of rows
+    :param coarse: dictionary of patch-level random fields (one value per patch)
+    :param window: rasterio window of rows to make
+    :param seed: random seed
+    :return: dictionary of input names to arrays
+    """
+
+    # Pixel-level randomness is seeded by the first row so the tiles don't depend on the window size
+    rng = np.random.default_rng([seed, window.row_off])
+    shape = (window.height, window.width)
+
+    rows = np.arange(window.row_off, window.row_off + window.height) // PATCH_SIZE
+    cols = np.arange(window.width) // PATCH_SIZE
+    patch = {name: field[rows][:, cols] for name, field in coarse.items()}
+
+    forest = rng.random(shape) < patch['forest_cover']
+    mangrove = forest & (patch['mangrove'] < 0.05)
+    model_extent = forest | (rng.random(shape) < 0.01)
+
+    removal_forest_type = np.where(model_extent, 1 + (patch['forest_type'] * 5).astype('uint8'), 0)
+    removal_forest_type[mangrove] = cn.mangrove_rank
+
+    loss_year = np.where(model_extent & (rng.random(shape) < patch['loss_rate'] * 0.3),
+                         rng.integers(1, cn.loss_years + 1, shape), 0)
+    annual_gain_AGC = np.where(model_extent, 0.5 + 3 * patch['forest_type'], 0)
+    gain_years = np.where(loss_year > 0, loss_year - 1, cn.loss_years)
+
+    return {
+        'model_extent': model_extent,
+        'loss_year': loss_year,
+        'gain': model_extent & (rng.random(shape) < 0.02),
+        'removal_forest_type': removal_forest_type,
+        'annual_gain_AGC': annual_gain_AGC,
+        'cumul_gain_AGCO2': annual_gain_AGC * gain_years * cn.c_to_co2,
+        'mangrove_biomass_2000': np.where(mangrove, 100 + 150 * rng.random(shape), 0),
+        'natrl_forest_biomass_2000': np.where(forest, 50 + 300 * patch['biomass'] + 30 * rng.random(shape), 0),
+        'cont_eco': np.array(CONT_ECO_CODES)[(patch['cont_eco'] * len(CONT_ECO_CODES)).astype(int)],
+        'BGB_AGB_ratio': 0.2 + 0.2 * patch['forest_type'],
+        'bor_tem_trop': 1 + (patch['climate'] * 3).astype(int),
+        'precip': 3000 * patch['climate'] + 100 * rng.random(shape),
+        'elevation': 4000 * patch['elevation'] + 50 * rng.random(shape),
+        'soil_full_extent': 20 + 200 * patch['biomass'] + 20 * rng.random(shape)
+    }
+
+
+def make_synthetic_tiles(tile_id, height, width, seed):
+    """
+    Writes synthetic carbon pool input tiles to the current folder, window by window
+    :param tile_id: tile to be processed, identified by its tile id
+    :param height: tile height (pixels)
+    :param width: tile width (pixels)
+    :param seed: random seed
+    :return: total size of the input tiles (bytes)
+    """
+
+    rng = np.random.default_rng(seed)
+    coarse_shape = (-(-height // PATCH_SIZE), -(-width // PATCH_SIZE))
+    coarse = {name: rng.random(coarse_shape) for name in
+              ['forest_cover', 'mangrove', 'forest_type', 'loss_rate', 'biomass', 'cont_eco', 'climate', 'elevation']}
+
+    xmin, ymin, xmax, ymax = uu.coords(tile_id)
+    profile = dict(driver='GTiff', height=height, width=width, count=1, crs='EPSG:4326',
+                   transform=from_origin(xmin, ymax, cn.Hansen_res, cn.Hansen_res),
+                   blockxsize=width, blockysize=1, compress='DEFLATE', nodata=0)
+
+    tile_names = input_tile_names(tile_id)
+    dsts = {name: rasterio.open(tile, 'w', dtype=INPUT_DTYPES[name], **profile) for name, tile in tile_names.items()}
+
+    rows = uu.window_rows(width, 1, bytes_per_pixel=8 * len(dsts))
+    for row_off in range(0, height, rows):
+        window = Window(0, row_off, width, min(rows, height - row_off))
+        for name, array in synthetic_windows(coarse, window, seed).items():
+            dsts[name].write(np.broadcast_to(array, (window.height, window.width)).astype(INPUT_DTYPES[name]), 1, window=window)
+
+    for dst in dsts.values():
+        dst.close()
+
+    return sum(os.path.getsize(tile) for tile in tile_names.values())
+
+
+def tile_shape(tile):
+    """
+    Gets the shape of a tile
+    :param tile: tile name
+    :return: (height, width) of the tile
+    """
+
+    with rasterio.open(tile) as src:
+        return src.shape
+
+
+def run_stage(function, args, queue):
+    """
+    Runs a carbon pool stage and measures it. Runs in its own process so that peak memory is the stage's own.
+    :param function: carbon pool function
+    :param args: arguments for the function
+    :param queue: queue to put the measurements on
+    :return: None
+    """
+
+    process = psutil.Process()
+    start_rss = process.memory_info().rss
+    io_start = process.io_counters()
+    start = time.perf_counter()
+
+    function(*args)
+
+    wall_time = time.perf_counter() - start
+    io_end = process.io_counters()
+
+    # ru_maxrss is in kilobytes on Linux
+    queue.put({
+        'wall_time_s': round(wall_time, 3),
+        'peak_rss_MB': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        # RSS when the stage started (shared with the benchmark process), for comparison with the peak
+        'start_rss_MB': round(start_rss / 2**20, 1),
+        # Bytes passed through read and write calls, including reads served from the page cache
+        'bytes_read': getattr(io_end, 'read_chars', io_end.read_bytes) - getattr(io_start, 'read_chars', io_start.read_bytes),
+        'bytes_written': getattr(io_end, 'write_chars', io_end.write_bytes) - getattr(io_start, 'write_chars', io_start.write_bytes)
+    })
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """
+    Lists the stages that took longer or used more memory than in an earlier report
+    :param report: benchmark report
+    :param baseline: earlier benchmark report
+    :param tolerance: allowed fractional increase in wall time and peak RSS
+    :return: list of regression descriptions
+    """
+
+    regressions = []
+    for stage, result in report['stages'].items():
+        if stage not in baseline['stages']:
+            continue
+        for metric in ['wall_time_s', 'peak_rss_MB']:
+            before = baseline['stages'][stage][metric]
+            if result[metric] > before * (1 + tolerance):
+                regressions.append(f'{stage} {metric}: {before} -> {result[metric]}')
+
+    return regressions
+
+
+def main(tile_id, height, width, carbon_pool_extent, folder, output, fused, baseline, tolerance, seed):
+
+    output = os.path.abspath(output)
+    keep_folder = folder is not None
+    folder = os.path.abspath(folder) if keep_folder else tempfile.mkdtemp(prefix='carbon_pool_benchmark_')
+    os.makedirs(folder, exist_ok=True)
+    os.chdir(folder)
+
+    # Reuses input tiles of the same size from an earlier run, since full tiles take a while to make
+    tile_names = input_tile_names(tile_id)
+    if all(os.path.exists(tile) for tile in tile_names.values()) and \
+            tile_shape(tile_names['model_extent']) == (height, width):
+        print(f'Reusing synthetic input tiles in {folder}')
+        input_bytes = sum(os.path.getsize(tile) for tile in tile_names.values())
+    else:
+        print(f'Making {height}x{width} synthetic input tiles in {folder}')
+        input_bytes = make_synthetic_tiles(tile_id, height, width, seed)
+
+    mang_BGB_AGB_ratio, mang_deadwood_AGB_ratio, mang_litter_AGB_ratio = \
+        [uu.make_lookup_table(ratio) for ratio in [MANG_BGB_AGB_RATIO, MANG_DEADWOOD_AGB_RATIO, MANG_LITTER_AGB_RATIO]]
+
+    stages = [
+        ('create_AGC', create_carbon_pools.create_AGC, (tile_id, carbon_pool_extent)),
+        ('create_BGC', create_carbon_pools.create_BGC, (tile_id, mang_BGB_AGB_ratio, carbon_pool_extent)),
+        ('create_deadwood_litter', create_carbon_pools.create_deadwood_litter,
+         (tile_id, mang_deadwood_AGB_ratio, mang_litter_AGB_ratio, carbon_pool_extent))
+    ]
+    # Soil in the emissions year is only created for the loss extent
+    if 'loss' in carbon_pool_extent:
+        stages.append(('create_soil_emis_extent', create_carbon_pools.create_soil_emis_extent,
+                       (tile_id, cn.pattern_soil_C_emis_year_2000)))
+    stages.append(('create_total_C', create_carbon_pools.create_total_C, (tile_id, carbon_pool_extent)))
+    if fused:
+        stages.append(('create_carbon_pools_fused', create_carbon_pools.create_carbon_pools_fused,
+                       (tile_id, mang_BGB_AGB_ratio, mang_deadwood_AGB_ratio, mang_litter_AGB_ratio, carbon_pool_extent)))
+
+    report = {
+        'tile_id': tile_id,
+        'height': height,
+        'width': width,
+        'carbon_pool_extent': carbon_pool_extent,
+        'window_memory_budget_MB': cn.WINDOW_MEMORY_BUDGET,
+        'legacy_windows': cn.LEGACY_WINDOWS,
+        'input_bytes': input_bytes,
+        'stages': {}
+    }
+
+    for stage, function, args in stages:
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=run_stage, args=(function, args, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        report['stages'][stage] = result
+        print(f'{stage}: {result["wall_time_s"]:.2f} s, peak RSS {result["peak_rss_MB"]:,.0f} MB, '
+              f'{result["bytes_read"] / 2**20:,.1f} MB read, {result["bytes_written"] / 2**20:,.1f} MB written')
+
+    with open(output, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f'Report written to {output}')
+
+    if not keep_folder:
+        shutil.rmtree(folder)
+
+    if baseline:
+        with open(baseline) as baseline_file:
+            baseline_report = json.load(baseline_file)
+        if (baseline_report['height'], baseline_report['width']) != (height, width):
+            print(f'Warning: {baseline} is for {baseline_report["height"]}x{baseline_report["width"]} tiles, not {height}x{width}')
+        regressions = compare_to_baseline(report, baseline_report, tolerance)
+        if regressions:
+            print(f'Regressions of more than {tolerance:.0%} compared to {baseline}:')
+            for regression in regressions:
+                print(f'  {regression}')
+            sys.exit(1)
+        print(f'No regressions of more than {tolerance:.0%} compared to {baseline}')
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmarks the carbon pool stages on synthetic input tiles')
+    parser.add_argument('--tile-id', '-t', default='00N_000E',
+                        help='Tile id to name the synthetic tiles with')
+    parser.add_argument('--height', '-ht', type=int, default=20,
+                        help='Tile height in pixels (20 like the test fragments, 40000 for a full tile)')
+    parser.add_argument('--width', '-wd', type=int, default=40000,
+                        help='Tile width in pixels')
+    parser.add_argument('--carbon-pool-extent', '-ce', default='loss,2000',
+                        help='Extent over which carbon pools are calculated: loss, 2000, or loss,2000')
+    parser.add_argument('--folder', '-f', default=None,
+                        help='Folder for the synthetic input tiles and outputs. Kept (and reused) if given; otherwise a temporary folder is used and deleted.')
+    parser.add_argument('--output', '-o', default='carbon_pool_benchmark.json',
+                        help='JSON report to write')
+    parser.add_argument('--fused', '-fcp', action='store_true',
+                        help='Also times create_carbon_pools_fused')
+    parser.add_argument('--window-memory-budget', '-wmb', type=int, default=cn.WINDOW_MEMORY_BUDGET,
+                        help='Memory budget (MB) for each multi-row window of each tile')
+    parser.add_argument('--legacy-windows', '-lw', action='store_true',
+                        help='Iterates over tiles one block (row) at a time instead of in multi-row windows')
+    parser.add_argument('--baseline', '-b', default=None,
+                        help='Earlier JSON report to compare to. Exits with an error if any stage regressed.')
+    parser.add_argument('--tolerance', '-tol', type=float, default=0.25,
+                        help='Allowed fractional increase in wall time and peak RSS compared to the baseline')
+    parser.add_argument('--seed', '-s', type=int, default=0,
+                        help='Random seed for the synthetic tiles')
+    args = parser.parse_args()
+
+    cn.NO_UPLOAD = True
+    cn.SENSIT_TYPE = 'std'
+    cn.WINDOW_MEMORY_BUDGET = args.window_memory_budget
+    cn.LEGACY_WINDOWS = args.legacy_windows
+
+    main(args.tile_id, args.height, args.width, args.carbon_pool_extent, args.folder, args.output, args.fused,
+         args.baseline, args.tolerance, args.seed)
@@ -0,0 +1,113 @@
+"""
+Compares the time to calculate gross emissions for the same window with the C++ decision tree
+(the emissions extension, calculate_gross_emissions.calc_emissions_window) and with the NumPy decision tree
+(calculate_gross_emissions_numpy.calc_emissions_window). Also checks that both give the same outputs.
+Uses synthetic windows of the emissions inputs, so no input tiles are needed.
+The extension is compiled (or taken from the build cache) in a copy of emissions/cpp_util, so the repo isn't changed.
+
+python -m benchmarks.gross_emissions
+python -m benchmarks.gross_emissions --window-rows 400 --emitted-pools biomass_soil,biomass_only --build-profile release
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+
+import constants_and_names as cn
+from emissions import calculate_gross_emissions
+from emissions import calculate_gross_emissions_numpy
+
+
+def make_window(window_rows, window_cols, seed):
+    """
+    Makes a window of each emissions input, with all drivers, ecozones, climate zones and plantation types,
+    so that every decision tree node is used
+    :param window_rows: rows in the window
+    :param window_cols: columns in the window
+    :param seed: random seed
+    :return: list of arrays in the order and data types that calc_emissions_window() takes them
+    """
+
+    rng = np.random.default_rng(seed)
+    shape = (window_rows, window_cols)
+
+    def pool(high):
+        return np.where(rng.random(shape) < 0.8, rng.uniform(0, high, shape), 0)
+
+    loss = np.where(rng.random(shape) < 0.5, rng.integers(1, cn.loss_years + 1, shape), 0)
+
+    windows = [pool(300), pool(100), pool(30), pool(10), pool(400),
+               loss, np.where(rng.random(shape) < 0.3, loss, 0), rng.integers(0, 8, shape),
+               rng.random(shape) < 0.1, rng.random(shape) < 0.3, rng.integers(0, 4, shape),
+               rng.integers(0, 13, shape), rng.integers(0, 4, shape)]
+
+    return [window.astype(dtype) for window, dtype in zip(windows, calculate_gross_emissions.emissions_input_dtypes)]
+
+
+def main(window_rows, window_cols, windows, emitted_pools, build_profile, seed):
+
+    cn.EMISSIONS_BUILD_PROFILE = build_profile
+
+    # Compiles the extension in a copy of the emissions C++ so that the benchmark doesn't write into the repo
+    cpp_util_dir = tempfile.mkdtemp(prefix='gross_emissions_benchmark_')
+    shutil.copytree(os.path.join(os.path.dirname(calculate_gross_emissions.__file__), 'cpp_util'), cpp_util_dir,
+                    dirs_exist_ok=True)
+    cn.c_emis_compile_dst = cpp_util_dir
+    calculate_gross_emissions.compile_emissions_extension()
+    emissions_extension = calculate_gross_emissions.load_emissions_extension()
+
+    window_list = [make_window(window_rows, window_cols, seed + i) for i in range(windows)]
+
+    start = time.perf_counter()
+    extension_output = [calculate_gross_emissions.calc_emissions_window(emissions_extension, emitted_pools, *window)
+                        for window in window_list]
+    extension_time = time.perf_counter() - start
+
+    # The NumPy emission factor table is built once per run, like the extension's
+    start = time.perf_counter()
+    calculate_gross_emissions_numpy.emission_factor_array()
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    numpy_output = [calculate_gross_emissions_numpy.calc_emissions_window(emitted_pools, *window)
+                    for window in window_list]
+    numpy_time = time.perf_counter() - start
+
+    # Bit-for-bit comparison, so that 0 and -0 or different NaNs aren't counted as the same
+    identical = all(a.tobytes() == b.tobytes() for extension_windows, numpy_windows in zip(extension_output, numpy_output)
+                    for a, b in zip(extension_windows, numpy_windows))
+    nodes = np.unique(np.concatenate([outputs[5].ravel() for outputs in extension_output]))
+
+    shutil.rmtree(cpp_util_dir)
+
+    pixels = windows * window_rows * window_cols
+    print(f'Windows: {windows} of {window_rows}x{window_cols} pixels ({pixels} pixels); emitted pools: {emitted_pools}; '
+          f'decision tree nodes used: {np.count_nonzero(nodes)}')
+    print(f'C++ extension ({build_profile} build): {extension_time:.3f} s ({pixels / extension_time / 1e6:.1f} million pixels/s)')
+    print(f'NumPy: {numpy_time:.3f} s ({pixels / numpy_time / 1e6:.1f} million pixels/s), '
+          f'plus {build_time * 1000:.2f} ms to build the emission factor table once per run')
+    print(f'C++ speedup: {numpy_time / extension_time:.1f}x')
+    print(f'Outputs identical: {identical}')
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmarks the C++ gross emissions decision tree against the NumPy one')
+    parser.add_argument('--window-rows', '-wr', type=int, default=100,
+                        help='Rows in each window')
+    parser.add_argument('--window-cols', '-wc', type=int, default=40000,
+                        help='Columns in each window')
+    parser.add_argument('--windows', '-w', type=int, default=5,
+                        help='Number of windows to calculate')
+    parser.add_argument('--emitted-pools', '-p', default='biomass_soil',
+                        help='biomass_only, soil_only or biomass_soil, or several of them separated by commas')
+    parser.add_argument('--build-profile', '-ebp', default=cn.EMISSIONS_BUILD_PROFILE, choices=['default', 'release'],
+                        help='Build profile for the C++ extension')
+    parser.add_argument('--seed', '-s', type=int, default=0,
+                        help='Random seed for the synthetic windows')
+    args = parser.parse_args()
+
+    main(args.window_rows, args.window_cols, args.windows, args.emitted_pools, args.build_profile, args.seed)
@@ -0,0 +1,103 @@
+"""
+Compares the time to remap continent-ecozone codes to values with the per-key loops
+(for key, value in dict.items(): window[window == key] = value) and with lookup tables
+(uu.make_lookup_table and uu.apply_lookup_table).
+Uses synthetic windows of continent-ecozone-age codes, so no input tiles are needed.
+Also checks that both methods give the same output.
+
+python -m benchmarks.lookup_table_remap
+python -m benchmarks.lookup_table_remap --keys 400 --window-rows 1 --windows 500
+"""
+
+import argparse
+import time
+import numpy as np
+
+import universal_util as uu
+
+
+def remap_with_loop(window, code_dict):
+    """
+    Remaps codes in a window the way the pool and removal factor scripts did before lookup tables
+    :param window: array of codes
+    :param code_dict: dictionary of codes to values
+    :return: float32 array of values
+    """
+
+    remapped = window.astype('float32')
+    for key, value in code_dict.items():
+        remapped[remapped == key] = value
+
+    return remapped
+
+
+def make_codes(keys, seed):
+    """
+    Makes a dictionary of continent-ecozone-age codes to removal factors like the one from the removal factor spreadsheet
+    :param keys: number of continent-ecozone codes
+    :param seed: random seed
+    :return: dictionary of codes to values and array of codes
+    """
+
+    rng = np.random.default_rng(seed)
+
+    # Four-digit continent-ecozone codes plus the five-digit age category codes
+    cont_eco = np.sort(rng.choice(np.arange(1000, 10000), size=keys, replace=False))
+    codes = np.concatenate([cont_eco + age for age in [0, 10000, 20000, 30000]])
+    code_dict = {float(code): float(rate) for code, rate in zip(codes, rng.random(codes.size) * 10)}
+    code_dict[0.0] = 0
+
+    return code_dict, codes
+
+
+def main(keys, window_rows, window_cols, windows, seed):
+
+    code_dict, codes = make_codes(keys, seed)
+    rng = np.random.default_rng(seed)
+
+    # Windows of codes, including some pixels with codes that aren't in the dictionary
+    window_list = []
+    for i in range(windows):
+        window = rng.choice(codes, size=(window_rows, window_cols)).astype('int64')
+        window[rng.random(window.shape) < 0.01] = 0
+        window[rng.random(window.shape) < 0.001] = 99999
+        window_list.append(window)
+
+    start = time.perf_counter()
+    loop_output = [remap_with_loop(window, code_dict) for window in window_list]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lookup_table = uu.make_lookup_table(code_dict)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lookup_output = [uu.apply_lookup_table(window, lookup_table) for window in window_list]
+    lookup_time = time.perf_counter() - start
+
+    identical = all(np.array_equal(a, b) for a, b in zip(loop_output, lookup_output))
+
+    pixels = windows * window_rows * window_cols
+    print(f'Dictionary keys: {len(code_dict)}; windows: {windows} of {window_rows}x{window_cols} pixels ({pixels} pixels)')
+    print(f'Per-key loops: {loop_time:.3f} s ({pixels / loop_time / 1e6:.1f} million pixels/s)')
+    print(f'Lookup table: {lookup_time:.3f} s ({pixels / lookup_time / 1e6:.1f} million pixels/s), plus {build_time * 1000:.2f} ms to build once per run')
+    print(f'Speedup: {loop_time / lookup_time:.1f}x')
+    print(f'Outputs identical: {identical}')
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmarks per-key remapping loops against lookup tables')
+    parser.add_argument('--keys', '-k', type=int, default=100,
+                        help='Number of continent-ecozone codes (the dictionary has four times as many keys, one per age category)')
+    parser.add_argument('--window-rows', '-wr', type=int, default=1,
+                        help='Rows in each window')
+    parser.add_argument('--window-cols', '-wc', type=int, default=40000,
+                        help='Columns in each window')
+    parser.add_argument('--windows', '-w', type=int, default=200,
+                        help='Number of windows to remap')
+    parser.add_argument('--seed', '-s', type=int, default=0,
+                        help='Random seed for the synthetic codes')
+    args = parser.parse_args()
+
+    main(args.keys, args.window_rows, args.window_cols, args.windows, args.seed)
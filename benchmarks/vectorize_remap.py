@@ -0,0 +1,89 @@
+"""
+Compares the time to remap codes to values with np.vectorize(dict.get), as the forest age category and
+IPCC default removal factor scripts did, and with lookup tables (uu.make_lookup_table and uu.apply_lookup_table).
+Reads the continent-ecozone test fragment in test/test_data one row at a time, like the model's 40000x1 windows.
+Removal factors are made up for the codes in the fragment, so the removal factor spreadsheet isn't needed.
+
+np.vectorize takes its output dtype from the first pixel of each window. In windows that start with a
+continent-ecozone code of 0 (removal factor of int 0), every removal factor in the window is truncated to an integer.
+The lookup tables always give float removal factors, so rows where np.vectorize truncated are reported separately.
+
+python -m benchmarks.vectorize_remap
+python -m benchmarks.vectorize_remap --cont-eco test/test_data/00N_000E_fao_ecozones_continents_processed_top_005deg.tif
+"""
+
+import argparse
+import time
+import numpy as np
+import rasterio
+
+import universal_util as uu
+
+
+def main(cont_eco, seed):
+
+    with rasterio.open(cont_eco) as cont_eco_src:
+        cont_eco_array = cont_eco_src.read(1)
+
+    rng = np.random.default_rng(seed)
+
+    # Young secondary forest removal factors for the continent-ecozone codes in the fragment, set up like
+    # the dictionary in mp_forest_age_category_IPCC
+    codes = np.unique(cont_eco_array)
+    gain_table_dict = {int(code): float(rate) for code, rate in zip(codes, rng.random(codes.size) * 10)}
+    gain_table_dict[0] = 0
+
+    # Forest age category decision tree endpoints, as in annual_gain_rate_IPCC_defaults
+    age_dict = {0: 0, 1: 10000, 2: 20000, 3: 30000}
+    age_cat_array = rng.integers(0, 4, size=cont_eco_array.shape).astype('uint8')
+
+    window_list = [(cont_eco_array[row:row+1, :], age_cat_array[row:row+1, :]) for row in range(cont_eco_array.shape[0])]
+
+    start = time.perf_counter()
+    vectorize_output = [(np.vectorize(gain_table_dict.get)(cont_eco_window)*20,
+                         np.vectorize(age_dict.get)(age_cat_window)) for cont_eco_window, age_cat_window in window_list]
+    vectorize_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    gain_lookup_table = uu.make_lookup_table(gain_table_dict, default=float('nan'), dtype='float64')
+    age_lookup_table = uu.make_lookup_table(age_dict, dtype='int32')
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lookup_output = [(uu.apply_lookup_table(cont_eco_window, gain_lookup_table)*20,
+                      uu.apply_lookup_table(age_cat_window, age_lookup_table)) for cont_eco_window, age_cat_window in window_list]
+    lookup_time = time.perf_counter() - start
+
+    age_identical = all(np.array_equal(a[1], b[1]) for a, b in zip(vectorize_output, lookup_output))
+
+    # Rows where np.vectorize gave floats should match exactly; rows where it gave integers should match
+    # the truncated lookup table values
+    truncated_rows = 0
+    gain_identical = True
+    for (vectorize_gain, _), (lookup_gain, _) in zip(vectorize_output, lookup_output):
+        if vectorize_gain.dtype.kind == 'f':
+            gain_identical &= np.array_equal(vectorize_gain, lookup_gain, equal_nan=True)
+        else:
+            truncated_rows += 1
+            gain_identical &= np.array_equal(vectorize_gain, np.trunc(lookup_gain / 20) * 20)
+
+    pixels = cont_eco_array.size
+    print(f'Fragment: {cont_eco} ({cont_eco_array.shape[0]} windows of 1x{cont_eco_array.shape[1]} pixels)')
+    print(f'np.vectorize: {vectorize_time:.3f} s ({pixels / vectorize_time / 1e6:.2f} million pixels/s)')
+    print(f'Lookup table: {lookup_time:.3f} s ({pixels / lookup_time / 1e6:.2f} million pixels/s), plus {build_time * 1000:.2f} ms to build once per run')
+    print(f'Speedup: {vectorize_time / lookup_time:.1f}x')
+    print(f'Age category recodes identical: {age_identical}')
+    print(f'Removal factors x 20 identical (allowing for np.vectorize truncation): {gain_identical}')
+    print(f'Rows truncated to integers by np.vectorize: {truncated_rows} of {len(window_list)}')
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmarks np.vectorize(dict.get) remapping against lookup tables')
+    parser.add_argument('--cont-eco', '-ce', default='test/test_data/00N_000E_fao_ecozones_continents_processed_top_005deg.tif',
+                        help='Continent-ecozone tile or fragment to remap')
+    parser.add_argument('--seed', '-s', type=int, default=0,
+                        help='Random seed for the made-up removal factors and age categories')
+    args = parser.parse_args()
+
+    main(args.cont_eco, args.seed)
@@ -92,64 +92,23 @@ def create_AGC(tile_id, carbon_pool_extent):
     uu.print_log(f'  Reading input files for {tile_id}...')
 
     # Loss tile name depends on the sensitivity analysis
-    if cn.SENSIT_TYPE == 'legal_Amazon_loss':
-        uu.print_log(f'    Brazil-specific loss tile found for {tile_id}')
-        loss_year = f'{tile_id}_{cn.pattern_Brazil_annual_loss_processed}.tif'
-    elif os.path.exists(f'{tile_id}_{cn.pattern_Mekong_loss_processed}.tif'):
-        uu.print_log(f'    Mekong-specific loss tile found for {tile_id}')
-        loss_year = f'{tile_id}_{cn.pattern_Mekong_loss_processed}.tif'
-    else:
-        uu.print_log(f'    Hansen loss tile found for {tile_id}')
-        loss_year = f'{cn.pattern_loss}_{tile_id}.tif'
+    loss_year = loss_year_tile_name(tile_id)
 
     # Not actually used in the AGC creation but this tile should exist, so it can reliably be opened for metadata
     model_extent_src = rasterio.open(model_extent)
 
     # Opens the input tiles if they exist
-    try:
-        loss_year_src = rasterio.open(loss_year)
-        uu.print_log(f'    Loss year tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Loss year tile not found for {tile_id}')
-    try:
-        annual_gain_AGC_src = rasterio.open(annual_gain_AGC)
-        uu.print_log(f'    Aboveground removal factor tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Aboveground removal factor tile not found for {tile_id}')
-
-    try:
-        cumul_gain_AGCO2_src = rasterio.open(cumul_gain_AGCO2)
-        uu.print_log(f'    Gross aboveground removal tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Gross aboveground removal tile not found for {tile_id}')
-
-    try:
-        mangrove_biomass_2000_src = rasterio.open(mangrove_biomass_2000)
-        uu.print_log(f'    Mangrove tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Mangrove tile not found for {tile_id}')
-
-    try:
-        natrl_forest_biomass_2000_src = rasterio.open(natrl_forest_biomass_2000)
-        uu.print_log(f'    Biomass tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Biomass tile not found for {tile_id}')
-
-    try:
-        gain_src = rasterio.open(gain)
-        uu.print_log(f'    Gain tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Gain tile not found for {tile_id}')
-
-    try:
-        removal_forest_type_src = rasterio.open(removal_forest_type)
-        uu.print_log(f'    Removal type tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Removal type tile not found for {tile_id}')
+    loss_year_src = uu.open_optional_input(loss_year, tile_id, 'Loss year')
+    annual_gain_AGC_src = uu.open_optional_input(annual_gain_AGC, tile_id, 'Aboveground removal factor')
+    cumul_gain_AGCO2_src = uu.open_optional_input(cumul_gain_AGCO2, tile_id, 'Gross aboveground removal')
+    mangrove_biomass_2000_src = uu.open_optional_input(mangrove_biomass_2000, tile_id, 'Mangrove')
+    natrl_forest_biomass_2000_src = uu.open_optional_input(natrl_forest_biomass_2000, tile_id, 'Biomass')
+    gain_src = uu.open_optional_input(gain, tile_id, 'Gain')
+    removal_forest_type_src = uu.open_optional_input(removal_forest_type, tile_id, 'Removal type')
 
 
     # Grabs the windows of a tile to iterate over the entire tif without running out of memory
-    windows = model_extent_src.block_windows(1)
+    windows = uu.iterate_windows(model_extent_src, tile_id, 'create_AGC')
 
     # Grabs metadata for one of the input tiles, like its location/projection/cellsize
     kwargs = model_extent_src.meta
@@ -199,46 +158,25 @@ def create_AGC(tile_id, carbon_pool_extent):
 
     uu.check_memory()
 
-    # Iterates across the windows (1 pixel strips) of the input tiles
+    # Rows with carbon in loss pixels, for the AGC in emissions year row index
+    loss_carbon_rows = []
+
+    # Iterates across the windows (groups of 1 pixel strips) of the input tiles
     for idx, window in windows:
 
-        # Reads the input tiles' windows. For windows from tiles that may not exist, an array of all 0s is created.
-        try:
-            loss_year_window = loss_year_src.read(1, window=window)
-        except UnboundLocalError:
-            loss_year_window = np.zeros((window.height, window.width), dtype='uint8')
-        try:
-            annual_gain_AGC_window = annual_gain_AGC_src.read(1, window=window)
-        except UnboundLocalError:
-            annual_gain_AGC_window = np.zeros((window.height, window.width), dtype='float32')
-        try:
-            cumul_gain_AGCO2_window = cumul_gain_AGCO2_src.read(1, window=window)
-        except UnboundLocalError:
-            cumul_gain_AGCO2_window = np.zeros((window.height, window.width), dtype='float32')
-        try:
-            removal_forest_type_window = removal_forest_type_src.read(1, window=window)
-        except UnboundLocalError:
-            removal_forest_type_window = np.zeros((window.height, window.width), dtype='uint8')
-        try:
-            gain_window = gain_src.read(1, window=window)
-        except UnboundLocalError:
-            gain_window = np.zeros((window.height, window.width), dtype='uint8')
-        try:
-            mangrove_biomass_2000_window = mangrove_biomass_2000_src.read(1, window=window)
-        except UnboundLocalError:
-            mangrove_biomass_2000_window = np.zeros((window.height, window.width), dtype='uint8')
-        try:
-            natrl_forest_biomass_2000_window = natrl_forest_biomass_2000_src.read(1, window=window)
-        except UnboundLocalError:
-            natrl_forest_biomass_2000_window = np.zeros((window.height, window.width), dtype='uint8')
+        # Reads the input tiles' windows. For windows from tiles that don't exist, a read-only array of 0s is used.
+        loss_year_window = uu.read_optional_window(loss_year_src, window, 'uint8')
+        annual_gain_AGC_window = uu.read_optional_window(annual_gain_AGC_src, window, 'float32')
+        cumul_gain_AGCO2_window = uu.read_optional_window(cumul_gain_AGCO2_src, window, 'float32')
+        removal_forest_type_window = uu.read_optional_window(removal_forest_type_src, window, 'uint8')
+        gain_window = uu.read_optional_window(gain_src, window, 'uint8')
+        mangrove_biomass_2000_window = uu.read_optional_window(mangrove_biomass_2000_src, window, 'float32')
+        natrl_forest_biomass_2000_window = uu.read_optional_window(natrl_forest_biomass_2000_src, window, 'float32')
 
 
         # Creates aboveground carbon density in 2000. Where mangrove biomass is found, it is used. Otherwise, WHRC or JPL AGB is used.
         # This is necessary for calculating AGC in emissions year.
-        agc_2000_window = np.where(mangrove_biomass_2000_window != 0,
-                                   mangrove_biomass_2000_window * cn.biomass_to_c_mangrove,
-                                   natrl_forest_biomass_2000_window * cn.biomass_to_c_non_mangrove
-                                   ).astype('float32')
+        agc_2000_window = AGC_2000_calc(mangrove_biomass_2000_window, natrl_forest_biomass_2000_window)
 
         # Only writes AGC2000 window to raster if user asked for carbon emitted_pools in 2000
         if '2000' in carbon_pool_extent:
@@ -248,48 +186,21 @@ def create_AGC(tile_id, carbon_pool_extent):
         # From here on, AGC in the year of emissions is being calculated
         if 'loss' in carbon_pool_extent:
 
-            # Limits the AGC to the model extent
-            agc_2000_model_extent_window = np.where(removal_forest_type_window > 0, agc_2000_window, 0)
-            # print(agc_2000_model_extent_window[0][0:5])
-
-            # Creates a mask based on whether the pixels had loss-and-gain in them. Loss&gain pixels are 1, all else are 0.
-            # This is used to determine how much post-2000 carbon removals to add to AGC2000 pixels.
-            loss_gain_mask = np.ma.masked_where(loss_year_window == 0, gain_window).filled(0)
-
-            # Loss pixels that also have gain pixels are treated differently from loss-only pixels.
-            # Calculates AGC in emission year for pixels that don't have gain and loss (excludes loss_gain_mask = 1).
-            # To do this, it adds all the accumulated carbon after 2000 to the carbon in 2000 (all accumulated C is emitted).
-            AGC_emis_year_non_loss_and_gain = agc_2000_model_extent_window + (cumul_gain_AGCO2_window / cn.c_to_co2)
-            # print(AGC_emis_year_non_loss_and_gain[0][0:5])
-            AGC_emis_year_non_loss_and_gain_masked = np.ma.masked_where(loss_gain_mask == 1, AGC_emis_year_non_loss_and_gain).filled(0)
-            # print(AGC_emis_year_non_loss_and_gain_masked[0][0:5])
-
-
-            # Calculates AGC in emission year for pixels that had loss & gain (excludes loss_gain_mask = 0).
-            # To do this, it adds only the portion of the removals that occurred before the loss year to the carbon in 2000.
-            gain_before_loss = annual_gain_AGC_window * (loss_year_window - 1)
-            AGC_emis_year_loss_and_gain = agc_2000_model_extent_window + gain_before_loss
-            AGC_emis_year_loss_and_gain_masked = np.ma.masked_where(loss_gain_mask == 0, AGC_emis_year_loss_and_gain).filled(0)
-            # print(AGC_emis_year_loss_and_gain_masked[0][0:5])
-
-            # Adds the loss year pixels that had loss&gain to those that didn't have loss&gain.
-            # Each pixel falls into only one of those categories.
-            AGC_emis_year_all = AGC_emis_year_non_loss_and_gain_masked + AGC_emis_year_loss_and_gain_masked
-            # print(AGC_emis_year_all[0][0:5])
-
-            # Limits output to only pixels that had tree cover loss.
-            AGC_emis_year_all = np.where(loss_year_window > 0, AGC_emis_year_all, 0)
-            # print(AGC_emis_year_all[0][0:5])
-
-            # Converts the output to float32 since float64 is an unnecessary level of precision
-            AGC_emis_year_all = AGC_emis_year_all.astype('float32')
-            # print(AGC_emis_year_all[0][0:5])
+            AGC_emis_year_all = AGC_emis_year_calc(agc_2000_window, loss_year_window, gain_window,
+                                                   annual_gain_AGC_window, cumul_gain_AGCO2_window,
+                                                   removal_forest_type_window)
 
             # Writes AGC in emissions year to raster
             dst_AGC_emis_year.write_band(1, AGC_emis_year_all, window=window)
 
+            loss_carbon_rows.append(uu.nonzero_rows(AGC_emis_year_all, window))
 
 
+
+    # Indexes the rows that have carbon in loss pixels, so that gross emissions can skip the other rows
+    if 'loss' in carbon_pool_extent:
+        add_loss_carbon_rows_tag(dst_AGC_emis_year, loss_carbon_rows)
+
     # Prints information about the tile that was just processed
     if 'loss' in carbon_pool_extent:
         uu.end_of_fx_summary(start, tile_id, cn.pattern_AGC_emis_year)
@@ -297,11 +208,102 @@ def create_AGC(tile_id, carbon_pool_extent):
         uu.end_of_fx_summary(start, tile_id, cn.pattern_AGC_2000)
 
 
+def loss_year_tile_name(tile_id):
+    """
+    Names the loss year tile, which depends on the sensitivity analysis
+    :param tile_id: tile to be processed, identified by its tile id
+    :return: name of the loss year tile
+    """
+
+    if cn.SENSIT_TYPE == 'legal_Amazon_loss':
+        uu.print_log(f'    Brazil-specific loss tile found for {tile_id}')
+        loss_year = f'{tile_id}_{cn.pattern_Brazil_annual_loss_processed}.tif'
+    elif os.path.exists(f'{tile_id}_{cn.pattern_Mekong_loss_processed}.tif'):
+        uu.print_log(f'    Mekong-specific loss tile found for {tile_id}')
+        loss_year = f'{tile_id}_{cn.pattern_Mekong_loss_processed}.tif'
+    else:
+        uu.print_log(f'    Hansen loss tile found for {tile_id}')
+        loss_year = f'{cn.pattern_loss}_{tile_id}.tif'
+
+    return loss_year
+
+
+def add_loss_carbon_rows_tag(dst_AGC_emis_year, loss_carbon_rows):
+    """
+    Adds the row index of AGC in the year of emission to its tile as a metadata tag (cn.AGC_emis_year_rows_tag).
+    Gross emissions only read and calculate the indexed rows; the other rows don't have any loss pixels with carbon.
+    :param dst_AGC_emis_year: AGC in emissions year tile open for writing
+    :param loss_carbon_rows: list of arrays of rows with carbon in loss pixels, from uu.nonzero_rows()
+    :return: None
+    """
+
+    loss_carbon_rows = np.concatenate(loss_carbon_rows) if loss_carbon_rows else np.array([], dtype='int64')
+
+    dst_AGC_emis_year.update_tags(**{cn.AGC_emis_year_rows_tag: uu.encode_row_ranges(loss_carbon_rows)})
+
+    uu.print_log(f'    {loss_carbon_rows.size} of {dst_AGC_emis_year.height} rows have carbon in loss pixels')
+
+
+def AGC_2000_calc(mangrove_biomass_2000_window, natrl_forest_biomass_2000_window):
+    """
+    Calculates aboveground carbon density in 2000 for a window. Mangrove AGB has precedence over WHRC/JPL AGB.
+    :param mangrove_biomass_2000_window: array representing mangrove aboveground biomass in 2000
+    :param natrl_forest_biomass_2000_window: array representing WHRC or JPL aboveground biomass in 2000
+    :return: array of aboveground carbon density in 2000
+    """
+
+    agc_2000_window = np.where(mangrove_biomass_2000_window != 0,
+                               mangrove_biomass_2000_window * cn.biomass_to_c_mangrove,
+                               natrl_forest_biomass_2000_window * cn.biomass_to_c_non_mangrove
+                               ).astype('float32')
+
+    return agc_2000_window
+
+
+def AGC_emis_year_calc(agc_2000_window, loss_year_window, gain_window, annual_gain_AGC_window,
+                       cumul_gain_AGCO2_window, removal_forest_type_window):
+    """
+    Calculates aboveground carbon density in the year of loss for a window (loss pixels within the model extent only)
+    :param agc_2000_window: array representing aboveground carbon density in 2000
+    :param loss_year_window: array representing tree cover loss year
+    :param gain_window: array representing tree cover gain
+    :param annual_gain_AGC_window: array representing aboveground carbon removal factors
+    :param cumul_gain_AGCO2_window: array representing gross aboveground CO2 removals
+    :param removal_forest_type_window: array representing removal forest type (model extent)
+    :return: array of aboveground carbon density in the year of loss
+    """
+
+    # Works on a single float32 array in place, rather than on masked arrays and float64 intermediates,
+    # so each window needs only the output and a few boolean masks.
+    # AGC2000 is only added within the model extent.
+    model_extent_mask = removal_forest_type_window > 0
+
+    # Creates a mask of pixels that had loss-and-gain in them.
+    # This is used to determine how much post-2000 carbon removals to add to AGC2000 pixels.
+    loss_gain_mask = (loss_year_window != 0) & (gain_window == 1)
+
+    # Loss pixels that also have gain pixels are treated differently from loss-only pixels.
+    # Calculates AGC in emission year for pixels that don't have gain and loss.
+    # To do this, it adds all the accumulated carbon after 2000 to the carbon in 2000 (all accumulated C is emitted).
+    AGC_emis_year_all = (cumul_gain_AGCO2_window / cn.c_to_co2).astype('float32', copy=False)
+    np.add(AGC_emis_year_all, agc_2000_window, out=AGC_emis_year_all, where=model_extent_mask)
+
+    # Calculates AGC in emission year for pixels that had loss & gain, replacing the values above.
+    # To do this, it adds only the portion of the removals that occurred before the loss year to the carbon in 2000.
+    np.multiply(annual_gain_AGC_window, loss_year_window - 1, out=AGC_emis_year_all, where=loss_gain_mask)
+    np.add(AGC_emis_year_all, agc_2000_window, out=AGC_emis_year_all, where=loss_gain_mask & model_extent_mask)
+
+    # Limits output to only pixels that had tree cover loss.
+    AGC_emis_year_all[loss_year_window == 0] = 0
+
+    return AGC_emis_year_all
+
+
 def create_BGC(tile_id, mang_BGB_AGB_ratio, carbon_pool_extent):
     """
     Creates belowground carbon tiles (both in 2000 and loss year)
     :param tile_id: tile to be processed, identified by its tile id
-    :param mang_BGB_AGB_ratio: BGB:AGB ratio for mangroves
+    :param mang_BGB_AGB_ratio: lookup table (uu.make_lookup_table) of BGB:AGB ratios for mangroves by continent-ecozone
     :param carbon_pool_extent: carbon_pool_extent: the pixels and years for which carbon pools are caculated: loss or 2000
     :return: Belowground carbon density in the specified pixels for the specified years (Mg C/ha)
     """
@@ -319,7 +321,7 @@ def create_BGC(tile_id, mang_BGB_AGB_ratio, carbon_pool_extent):
         AGC_2000_src = rasterio.open(AGC_2000)
         kwargs = AGC_2000_src.meta
         kwargs.update(driver='GTiff', count=1, compress='DEFLATE', nodata=0)
-        windows = AGC_2000_src.block_windows(1)
+        windows = uu.iterate_windows(AGC_2000_src, tile_id, 'create_BGC')
         output_pattern_list = [cn.pattern_BGC_2000]
         if cn.SENSIT_TYPE != 'std':
             output_pattern_list = uu.alter_patterns(cn.SENSIT_TYPE, output_pattern_list)
@@ -341,7 +343,7 @@ def create_BGC(tile_id, mang_BGB_AGB_ratio, carbon_pool_extent):
         AGC_emis_year_src = rasterio.open(AGC_emis_year)
         kwargs = AGC_emis_year_src.meta
         kwargs.update(driver='GTiff', count=1, compress='DEFLATE', nodata=0)
-        windows = AGC_emis_year_src.block_windows(1)
+        windows = uu.iterate_windows(AGC_emis_year_src, tile_id, 'create_BGC')
         output_pattern_list = [cn.pattern_BGC_emis_year]
         if cn.SENSIT_TYPE != 'std':
             output_pattern_list = uu.alter_patterns(cn.SENSIT_TYPE, output_pattern_list)
@@ -359,62 +361,33 @@ def create_BGC(tile_id, mang_BGB_AGB_ratio, carbon_pool_extent):
     uu.print_log(f'  Reading input files for {tile_id}')
 
     # Opens inputs that are used regardless of whether calculating BGC2000 or BGC in emissions year
-    try:
-        cont_ecozone_src = rasterio.open(cont_ecozone)
-        uu.print_log(f'    Continent-ecozone tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Continent-ecozone tile not found for {tile_id}')
-
-    try:
-        removal_forest_type_src = rasterio.open(removal_forest_type)
-        uu.print_log(f'    Removal forest type tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Removal forest type tile not found for {tile_id}')
-
-    try:
-        BGB_AGB_ratio_src = rasterio.open(BGB_AGB_ratio)
-        uu.print_log(f'    BGB:AGB tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    BGB:AGB tile not found for {tile_id}. Using default BGB:AGB from Mokany instead.')
+    cont_ecozone_src = uu.open_optional_input(cont_ecozone, tile_id, 'Continent-ecozone')
+    removal_forest_type_src = uu.open_optional_input(removal_forest_type, tile_id, 'Removal forest type')
+    BGB_AGB_ratio_src = uu.open_optional_input(BGB_AGB_ratio, tile_id, 'BGB:AGB', missing_note='. Using default BGB:AGB from Mokany instead.')
 
     uu.print_log(f'  Creating belowground carbon density for {tile_id} using carbon_pool_extent {carbon_pool_extent}')
 
     uu.check_memory()
 
-    # Iterates across the windows (1 pixel strips) of the input tiles
+    # Iterates across the windows (groups of 1 pixel strips) of the input tiles
     for idx, window in windows:
 
         # Creates windows from inputs that are used regardless of whether calculating BGC2000 or BGC in emissions year
-        try:
-            cont_ecozone_window = cont_ecozone_src.read(1, window=window).astype('float32')
-        except UnboundLocalError:
-            cont_ecozone_window = np.zeros((window.height, window.width), dtype='float32')
-
-        try:
-            removal_forest_type_window = removal_forest_type_src.read(1, window=window)
-        except UnboundLocalError:
-            removal_forest_type_window = np.zeros((window.height, window.width))
-
-        try:
-            BGB_AGB_ratio_window = BGB_AGB_ratio_src.read(1, window=window)
-        except UnboundLocalError:
-            BGB_AGB_ratio_window = np.empty((window.height, window.width), dtype='float32')
-            BGB_AGB_ratio_window[:] = cn.below_to_above_non_mang
+        cont_ecozone_window = uu.read_optional_window(cont_ecozone_src, window, 'int16')
+        removal_forest_type_window = uu.read_optional_window(removal_forest_type_src, window, 'uint8')
+        BGB_AGB_ratio_window = uu.read_optional_window(BGB_AGB_ratio_src, window, 'float32', cn.below_to_above_non_mang)
 
         # Applies the mangrove BGB:AGB ratios (3 different ratios) to the ecozone raster to create a raster of BGB:AGB ratios
-        for key, value in mang_BGB_AGB_ratio.items():
-            cont_ecozone_window[cont_ecozone_window == key] = value
+        mang_BGB_AGB_ratio_window = uu.apply_lookup_table(cont_ecozone_window, mang_BGB_AGB_ratio)
+
+        # Combines the mangrove and non-mangrove ratios once for both BGC2000 and BGC in emissions year
+        BGB_AGB_ratio_all_window = BGB_AGB_ratio_calc(removal_forest_type_window, mang_BGB_AGB_ratio_window, BGB_AGB_ratio_window)
 
         # Calculates BGC2000 from AGC2000
         if '2000' in carbon_pool_extent:
             AGC_2000_window = AGC_2000_src.read(1, window=window)
 
-            # Applies mangrove-specific AGB:BGB ratios by ecozone (ratio applies to AGC:BGC as well)
-            mangrove_BGC_2000 = np.where(removal_forest_type_window == cn.mangrove_rank, AGC_2000_window * cont_ecozone_window, 0)
-            # Applies non-mangrove AGB:BGB ratio to all non-mangrove pixels
-            non_mangrove_BGC_2000 = np.where(removal_forest_type_window != cn.mangrove_rank, AGC_2000_window * BGB_AGB_ratio_window, 0)
-            # Combines mangrove and non-mangrove pixels
-            BGC_2000_window = mangrove_BGC_2000 + non_mangrove_BGC_2000
+            BGC_2000_window = BGC_calc(AGC_2000_window, BGB_AGB_ratio_all_window)
 
             dst_BGC_2000.write_band(1, BGC_2000_window, window=window)
 
@@ -422,9 +395,7 @@ def create_BGC(tile_id, mang_BGB_AGB_ratio, carbon_pool_extent):
         if 'loss' in carbon_pool_extent:
             AGC_emis_year_window = AGC_emis_year_src.read(1, window=window)
 
-            mangrove_BGC_emis_year = np.where(removal_forest_type_window == cn.mangrove_rank, AGC_emis_year_window * cont_ecozone_window, 0)
-            non_mangrove_BGC_emis_year = np.where(removal_forest_type_window != cn.mangrove_rank, AGC_emis_year_window * BGB_AGB_ratio_window, 0)
-            BGC_emis_year_window = mangrove_BGC_emis_year + non_mangrove_BGC_emis_year
+            BGC_emis_year_window = BGC_calc(AGC_emis_year_window, BGB_AGB_ratio_all_window)
 
             dst_BGC_emis_year.write_band(1, BGC_emis_year_window, window=window)
 
@@ -436,12 +407,43 @@ def create_BGC(tile_id, mang_BGB_AGB_ratio, carbon_pool_extent):
         uu.end_of_fx_summary(start, tile_id, cn.pattern_BGC_2000)
 
 
+def BGB_AGB_ratio_calc(removal_forest_type_window, mang_BGB_AGB_ratio_window, BGB_AGB_ratio_window):
+    """
+    Combines the mangrove and non-mangrove BGB:AGB ratios into one ratio window.
+    Calculated once per window and shared by BGC in 2000 and BGC in the emissions year.
+    :param removal_forest_type_window: array representing removal forest type
+    :param mang_BGB_AGB_ratio_window: array of mangrove BGB:AGB ratios (continent-ecozone codes remapped to ratios)
+    :param BGB_AGB_ratio_window: array of non-mangrove BGB:AGB ratios
+    :return: array of BGB:AGB ratios for all pixels
+    """
+
+    # Mangrove-specific AGB:BGB ratios by ecozone in mangrove pixels and the non-mangrove ratio everywhere else
+    BGB_AGB_ratio_all_window = np.where(removal_forest_type_window == cn.mangrove_rank,
+                                        mang_BGB_AGB_ratio_window, BGB_AGB_ratio_window)
+
+    return BGB_AGB_ratio_all_window
+
+
+def BGC_calc(AGC_window, BGB_AGB_ratio_all_window):
+    """
+    Calculates belowground carbon density from aboveground carbon density for a window
+    :param AGC_window: array representing aboveground carbon density (2000 or year of loss)
+    :param BGB_AGB_ratio_all_window: array of BGB:AGB ratios for all pixels (from BGB_AGB_ratio_calc)
+    :return: array of belowground carbon density
+    """
+
+    # Applies the BGB:AGB ratios (ratio applies to AGC:BGC as well)
+    BGC_window = (AGC_window * BGB_AGB_ratio_all_window).astype('float32')
+
+    return BGC_window
+
+
 def create_deadwood_litter(tile_id, mang_deadwood_AGB_ratio, mang_litter_AGB_ratio, carbon_pool_extent):
     """
     Creates deadwood and litter carbon tiles using AGC in 2000 (with loss extent or 2000 forest extent)
     :param tile_id: tile to be processed, identified by its tile id
-    :param mang_deadwood_AGB_ratio: ratio of deadwood carbon to aboveground carbon for mangroves
-    :param mang_litter_AGB_ratio: ratio of litter carbon to aboveground carbon for mangroves
+    :param mang_deadwood_AGB_ratio: lookup table (uu.make_lookup_table) of deadwood carbon to aboveground carbon ratios for mangroves
+    :param mang_litter_AGB_ratio: lookup table (uu.make_lookup_table) of litter carbon to aboveground carbon ratios for mangroves
     :param carbon_pool_extent: the pixels and years for which carbon pools are caculated: loss or 2000
     :return: Deadwood and litter carbon density tiles in the specified pixels for the specified years (Mg C/ha)
     """
@@ -462,7 +464,7 @@ def create_deadwood_litter(tile_id, mang_deadwood_AGB_ratio, mang_litter_AGB_rat
         AGC_2000_src = rasterio.open(AGC_2000)
         kwargs = AGC_2000_src.meta
         kwargs.update(driver='GTiff', count=1, compress='DEFLATE', nodata=0)
-        windows = AGC_2000_src.block_windows(1)
+        windows = uu.iterate_windows(AGC_2000_src, tile_id, 'create_deadwood_litter')
         output_pattern_list = [cn.pattern_deadwood_2000, cn.pattern_litter_2000]
         if cn.SENSIT_TYPE != 'std':
             output_pattern_list = uu.alter_patterns(cn.SENSIT_TYPE, output_pattern_list)
@@ -487,13 +489,16 @@ def create_deadwood_litter(tile_id, mang_deadwood_AGB_ratio, mang_litter_AGB_rat
         dst_litter_2000.update_tags(
             extent='aboveground biomass in 2000 (WHRC if standard model, JPL if biomass_swap sensitivity analysis) and mangrove AGB. Mangrove AGB has precedence.')
 
+    # AGC in emissions year is only used for deadwood and litter in emissions year
+    AGC_emis_year_src = None
+
     # For deadwood and litter in emissions year, opens AGC, names the output tiles, creates the output tiles
     if 'loss' in carbon_pool_extent:
         AGC_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_AGC_emis_year)
         AGC_emis_year_src = rasterio.open(AGC_emis_year)
         kwargs = AGC_emis_year_src.meta
         kwargs.update(driver='GTiff', count=1, compress='DEFLATE', nodata=0)
-        windows = AGC_emis_year_src.block_windows(1)
+        windows = uu.iterate_windows(AGC_emis_year_src, tile_id, 'create_deadwood_litter')
 
         output_pattern_list = [cn.pattern_deadwood_emis_year_2000, cn.pattern_litter_emis_year_2000]
         if cn.SENSIT_TYPE != 'std':
@@ -521,51 +526,30 @@ def create_deadwood_litter(tile_id, mang_deadwood_AGB_ratio, mang_litter_AGB_rat
 
     uu.print_log(f'  Reading input files for {tile_id}')
 
-    try:
-        precip_src = rasterio.open(precip)
-        uu.print_log(f'    Precipitation tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Precipitation tile not found for {tile_id}')
-
-    try:
-        elevation_src = rasterio.open(elevation)
-        uu.print_log(f'    Elevation tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Elevation tile not found for {tile_id}')
+    precip_src = uu.open_optional_input(precip, tile_id, 'Precipitation')
+    elevation_src = uu.open_optional_input(elevation, tile_id, 'Elevation')
 
     # Opens the mangrove biomass tile if it exists
-    try:
-        bor_tem_trop_src = rasterio.open(bor_tem_trop)
-        uu.print_log(f'    Boreal/temperate/tropical tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Boreal/temperate/tropical tile not found for {tile_id}')
+    bor_tem_trop_src = uu.open_optional_input(bor_tem_trop, tile_id, 'Boreal/temperate/tropical')
 
     # Opens the mangrove biomass tile if it exists
-    try:
-        mangrove_biomass_2000_src = rasterio.open(mangrove_biomass_2000)
-        uu.print_log(f'    Mangrove biomass tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Mangrove biomass tile not found for {tile_id}')
+    mangrove_biomass_2000_src = uu.open_optional_input(mangrove_biomass_2000, tile_id, 'Mangrove biomass')
 
     # Opens the WHRC/JPL biomass tile if it exists
-    try:
-        natrl_forest_biomass_2000_src = rasterio.open(natrl_forest_biomass_2000)
-        uu.print_log(f'    Biomass tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Biomass tile not found for {tile_id}')
+    natrl_forest_biomass_2000_src = uu.open_optional_input(natrl_forest_biomass_2000, tile_id, 'Biomass')
 
     # Opens the continent-ecozone tile if it exists
-    try:
-        cont_ecozone_src = rasterio.open(cont_eco)
-        uu.print_log(f'    Continent-ecozone tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'    Continent-ecozone tile not found for {tile_id}')
+    cont_ecozone_src = uu.open_optional_input(cont_eco, tile_id, 'Continent-ecozone')
+
+    # Which optional inputs exist is resolved once for the tile, not for every window
+    has_natrl_forest_biomass = natrl_forest_biomass_2000_src is not None
+    has_mangrove_biomass = mangrove_biomass_2000_src is not None
 
     uu.print_log(f'  Creating deadwood and litter carbon density for {tile_id} using carbon_pool_extent {carbon_pool_extent}')
 
     uu.check_memory()
 
-    # Iterates across the windows (1 pixel strips) of the input tiles
+    # Iterates across the windows (groups of 1 pixel strips) of the input tiles
     for idx, window in windows:
 
         # Populates the output raster's windows with 0s so that pixels without
@@ -582,29 +566,14 @@ def create_deadwood_litter(tile_id, mang_deadwood_AGB_ratio, mang_litter_AGB_rat
         #     AGC_2000_window = AGC_2000_src.read(1, window=window)
         # except UnboundLocalError:
         #     AGC_2000_window = np.zeros((window.height, window.width), dtype='float32')
-        try:
-            AGC_emis_year_window = AGC_emis_year_src.read(1, window=window)
-        except UnboundLocalError:
-            AGC_emis_year_window = np.zeros((window.height, window.width), dtype='float32')
-        try:
-            cont_ecozone_window = cont_ecozone_src.read(1, window=window).astype('float32')
-        except UnboundLocalError:
-            cont_ecozone_window = np.zeros((window.height, window.width), dtype='float32')
-        try:
-            bor_tem_trop_window = bor_tem_trop_src.read(1, window=window)
-        except UnboundLocalError:
-            bor_tem_trop_window = np.zeros((window.height, window.width))
-        try:
-            precip_window = precip_src.read(1, window=window)
-        except UnboundLocalError:
-            precip_window = np.zeros((window.height, window.width))
-        try:
-            elevation_window = elevation_src.read(1, window=window)
-        except UnboundLocalError:
-            elevation_window = np.zeros((window.height, window.width))
+        AGC_emis_year_window = uu.read_optional_window(AGC_emis_year_src, window, 'float32')
+        cont_ecozone_window = uu.read_optional_window(cont_ecozone_src, window, 'int16')
+        bor_tem_trop_window = uu.read_optional_window(bor_tem_trop_src, window, 'int16')
+        precip_window = uu.read_optional_window(precip_src, window, 'int32')
+        elevation_window = uu.read_optional_window(elevation_src, window, 'int16')
 
         # This allows the script to bypass the few tiles that have mangrove biomass but not WHRC biomass
-        if os.path.exists(natrl_forest_biomass_2000):
+        if has_natrl_forest_biomass:
 
             # Reads in the windows of each input file that definitely exist
             natrl_forest_biomass_window = natrl_forest_biomass_2000_src.read(1, window=window)
@@ -614,50 +583,19 @@ def create_deadwood_litter(tile_id, mang_deadwood_AGB_ratio, mang_litter_AGB_rat
                 litter_2000_output, natrl_forest_biomass_window, precip_window)
 
         # Replaces non-mangrove deadwood and litter with special mangrove deadwood and litter values if there is mangrove
-        if os.path.exists(mangrove_biomass_2000):
+        if has_mangrove_biomass:
 
             # Reads in the window for mangrove biomass if it exists
             mangrove_biomass_2000_window = mangrove_biomass_2000_src.read(1, window=window)
 
-            # Applies the mangrove deadwood:AGB ratios (2 different ratios) to the ecozone raster to create a raster of deadwood:AGB ratios
-            for key, value in mang_deadwood_AGB_ratio.items():
-                cont_ecozone_window[cont_ecozone_window == key] = value
-
-            # Multiplies the AGB in the loss year (2000 for deadwood) by the correct mangrove deadwood:AGB ratio to get an array of deadwood
-            mangrove_C_final = mangrove_biomass_2000_window * cont_ecozone_window * cn.biomass_to_c_mangrove
-
-            # Replaces non-mangrove deadwood with mangrove deadwood values
-            deadwood_2000_output = np.ma.masked_where(mangrove_biomass_2000_window > 0, deadwood_2000_output)
-            deadwood_2000_output = deadwood_2000_output.filled(0)
-
-            # Combines the mangrove and non-mangrove deadwood arrays into a single array
-            deadwood_2000_output = mangrove_C_final + deadwood_2000_output
-            deadwood_2000_output.astype('float32')
-
-            # # Masks the deadwood 2000 to the AGC2000 extent. This shouldn't actually change the extent of the deadwood at all.
-            # # Just doing it because it feels more complete.
-            # deadwood_2000_output = np.where(AGC_2000_window > 0, deadwood_2000_output, 0).astype('float32')
+            # Applies the mangrove deadwood:AGB and litter:AGB ratios (2 different ratios each) to the ecozone raster
+            # to create rasters of deadwood:AGB and litter:AGB ratios
+            mang_deadwood_AGB_ratio_window = uu.apply_lookup_table(cont_ecozone_window, mang_deadwood_AGB_ratio)
+            mang_litter_AGB_ratio_window = uu.apply_lookup_table(cont_ecozone_window, mang_litter_AGB_ratio)
 
-
-            # Same as above but for litter
-            try:
-                cont_ecozone_window = cont_ecozone_src.read(1, window=window).astype('float32')
-            except UnboundLocalError:
-                cont_ecozone_window = np.zeros((window.height, window.width), dtype='float32')
-
-            # Applies the mangrove deadwood:AGB ratios (2 different ratios) to the ecozone raster to create a raster of deadwood:AGB ratios
-            for key, value in mang_litter_AGB_ratio.items():
-                cont_ecozone_window[cont_ecozone_window == key] = value
-
-            mangrove_C_final = mangrove_biomass_2000_window * cont_ecozone_window * cn.biomass_to_c_mangrove
-
-            litter_2000_output = np.ma.masked_where(mangrove_biomass_2000_window > 0, litter_2000_output)
-            litter_2000_output = litter_2000_output.filled(0)
-
-            litter_2000_output = mangrove_C_final + litter_2000_output
-            litter_2000_output.astype('float32')
-
-            # litter_2000_output = np.where(AGC_2000_window > 0, litter_2000_output, 0).astype('float32')
+            deadwood_2000_output, litter_2000_output = mangrove_deadwood_litter_calc(
+                deadwood_2000_output, litter_2000_output, mangrove_biomass_2000_window,
+                mang_deadwood_AGB_ratio_window, mang_litter_AGB_ratio_window)
 
         # Only writes deadwood and litter 2000 to rasters if output in 2000 is desired
         if '2000' in carbon_pool_extent:
@@ -701,63 +639,64 @@ def deadwood_litter_equations(bor_tem_trop_window, deadwood_2000_output, elevati
 
     # The deadwood and litter conversions generally come from here: https://cdm.unfccc.int/methodologies/ARmethodologies/tools/ar-am-tool-12-v3.0.pdf, p. 17-18
     # They depend on the elevation, precipitation, and climate domain (boreal/temperate/tropical).
-    # For some reason, the masks need to be named different variables for each equation.
-    # If they all have the same name (e.g., elev_mask and condition_mask are reused), then at least the condition_mask_4
-    # equation won't work properly.)
-
-    # Equation for elevation <= 2000, precip <= 1000, bor/temp/trop = 1 (tropical)
-    elev_mask_1 = elevation_window <= 2000
-    precip_mask_1 = precip_window <= 1000
-    ecozone_mask_1 = bor_tem_trop_window == 1
-    condition_mask_1 = elev_mask_1 & precip_mask_1 & ecozone_mask_1
-    agb_masked_1 = np.ma.array(natrl_forest_biomass_window, mask=np.invert(condition_mask_1))
-    deadwood_masked = agb_masked_1 * 0.02 * cn.biomass_to_c_non_mangrove
-    deadwood_2000_output = deadwood_2000_output + deadwood_masked.filled(0)
-    litter_masked = agb_masked_1 * 0.04 * cn.biomass_to_c_non_mangrove_litter
-    litter_2000_output = litter_2000_output + litter_masked.filled(0)
-
-    # Equation for elevation <= 2000, 1000 < precip <= 1600, bor/temp/trop = 1 (tropical)
-    elev_mask_2 = elevation_window <= 2000
-    precip_mask_2 = (precip_window > 1000) & (precip_window <= 1600)
-    ecozone_mask_2 = bor_tem_trop_window == 1
-    condition_mask_2 = elev_mask_2 & precip_mask_2 & ecozone_mask_2
-    agb_masked_2 = np.ma.array(natrl_forest_biomass_window, mask=np.invert(condition_mask_2))
-    deadwood_masked = agb_masked_2 * 0.01 * cn.biomass_to_c_non_mangrove
-    deadwood_2000_output = deadwood_2000_output + deadwood_masked.filled(0)
-    litter_masked = agb_masked_2 * 0.01 * cn.biomass_to_c_non_mangrove_litter
-    litter_2000_output = litter_2000_output + litter_masked.filled(0)
-
-    # Equation for elevation <= 2000, precip > 1600, bor/temp/trop = 1 (tropical)
-    elev_mask_3 = elevation_window <= 2000
-    precip_mask_3 = precip_window > 1600
-    ecozone_mask_3 = bor_tem_trop_window == 1
-    condition_mask_3 = elev_mask_3 & precip_mask_3 & ecozone_mask_3
-    agb_masked_3 = np.ma.array(natrl_forest_biomass_window, mask=np.invert(condition_mask_3))
-    deadwood_masked = agb_masked_3 * 0.06 * cn.biomass_to_c_non_mangrove
-    deadwood_2000_output = deadwood_2000_output + deadwood_masked.filled(0)
-    litter_masked = agb_masked_3 * 0.01 * cn.biomass_to_c_non_mangrove_litter
-    litter_2000_output = litter_2000_output + litter_masked.filled(0)
-
-    # Equation for elevation > 2000, precip = any value, bor/temp/trop = 1 (tropical)
-    elev_mask_4 = elevation_window > 2000
-    ecozone_mask_4 = bor_tem_trop_window == 1
-    condition_mask_4 = elev_mask_4 & ecozone_mask_4
-    agb_masked_4 = np.ma.array(natrl_forest_biomass_window,  mask=np.invert(condition_mask_4))
-    deadwood_masked = agb_masked_4 * 0.07 * cn.biomass_to_c_non_mangrove
-    deadwood_2000_output = deadwood_2000_output + deadwood_masked.filled(0)
-    litter_masked = agb_masked_4 * 0.01 * cn.biomass_to_c_non_mangrove_litter
-    litter_2000_output = litter_2000_output + litter_masked.filled(0)
-
-    # Equation for elevation = any value, precip = any value, bor/temp/trop = 2 or 3 (boreal or temperate)
-    ecozone_mask_5 = bor_tem_trop_window != 1
-    condition_mask_5 = ecozone_mask_5
-    agb_masked_5 = np.ma.array(natrl_forest_biomass_window,  mask=np.invert(condition_mask_5))
-    deadwood_masked = agb_masked_5 * 0.08 * cn.biomass_to_c_non_mangrove
-    deadwood_2000_output = deadwood_2000_output + deadwood_masked.filled(0)
-    litter_masked = agb_masked_5 * 0.04 * cn.biomass_to_c_non_mangrove_litter
-    litter_2000_output = litter_2000_output + litter_masked.filled(0)
-    deadwood_2000_output = deadwood_2000_output.astype('float32')
-    litter_2000_output = litter_2000_output.astype('float32')
+    # Each pixel falls into exactly one of the conditions below, so each pixel is classified once
+    # and deadwood and litter are both calculated from that classification, without masked arrays.
+    # Condition 0: elevation <= 2000, precip <= 1000, bor/temp/trop = 1 (tropical)
+    # Condition 1: elevation <= 2000, 1000 < precip <= 1600, bor/temp/trop = 1 (tropical)
+    # Condition 2: elevation <= 2000, precip > 1600, bor/temp/trop = 1 (tropical)
+    # Condition 3: elevation > 2000, precip = any value, bor/temp/trop = 1 (tropical)
+    # Condition 4: elevation = any value, precip = any value, bor/temp/trop = 2 or 3 (boreal or temperate)
+    condition_index = np.select([bor_tem_trop_window != 1, elevation_window > 2000, precip_window <= 1000, precip_window <= 1600],
+                                [np.uint8(4), np.uint8(3), np.uint8(0), np.uint8(1)],
+                                default=np.uint8(2))
+
+    # Deadwood:AGB and litter:AGB ratios for each condition.
+    # Deadwood and litter are calculated in float64 and only converted to float32 at the end.
+    deadwood_AGB_ratio = np.array([0.02, 0.01, 0.06, 0.07, 0.08], dtype='float64')
+    litter_AGB_ratio = np.array([0.04, 0.01, 0.01, 0.01, 0.04], dtype='float64')
+
+    # Looks up each pixel's ratio and converts it to carbon in place
+    deadwood = deadwood_AGB_ratio[condition_index]
+    deadwood *= natrl_forest_biomass_window
+    deadwood *= cn.biomass_to_c_non_mangrove
+    deadwood += deadwood_2000_output
+    deadwood_2000_output = deadwood.astype('float32')
+
+    litter = litter_AGB_ratio[condition_index]
+    litter *= natrl_forest_biomass_window
+    litter *= cn.biomass_to_c_non_mangrove_litter
+    litter += litter_2000_output
+    litter_2000_output = litter.astype('float32')
+
+    return deadwood_2000_output, litter_2000_output
+
+
+def mangrove_deadwood_litter_calc(deadwood_2000_output, litter_2000_output, mangrove_biomass_2000_window,
+                                  mang_deadwood_AGB_ratio_window, mang_litter_AGB_ratio_window):
+    """
+    Replaces non-mangrove deadwood and litter with mangrove deadwood and litter where there is mangrove biomass
+    :param deadwood_2000_output: array representing the non-mangrove deadwood output
+    :param litter_2000_output: array representing the non-mangrove litter output
+    :param mangrove_biomass_2000_window: array representing mangrove aboveground biomass in 2000
+    :param mang_deadwood_AGB_ratio_window: array of mangrove deadwood:AGB ratios (continent-ecozone codes remapped to ratios)
+    :param mang_litter_AGB_ratio_window: array of mangrove litter:AGB ratios (continent-ecozone codes remapped to ratios)
+    :return: arrays of deadwood and litter carbon
+    """
+
+    # Multiplies the AGB in 2000 by the correct mangrove deadwood:AGB ratio to get an array of deadwood
+    mangrove_C_final = mangrove_biomass_2000_window * mang_deadwood_AGB_ratio_window * cn.biomass_to_c_mangrove
+
+    # Combines the mangrove and non-mangrove deadwood arrays into a single array.
+    # Non-mangrove deadwood is only kept where there is no mangrove biomass.
+    non_mangrove_mask = mangrove_biomass_2000_window <= 0
+    np.add(mangrove_C_final, deadwood_2000_output, out=mangrove_C_final, where=non_mangrove_mask)
+    deadwood_2000_output = mangrove_C_final.astype('float32')
+
+    # Same as above but for litter
+    mangrove_C_final = mangrove_biomass_2000_window * mang_litter_AGB_ratio_window * cn.biomass_to_c_mangrove
+
+    np.add(mangrove_C_final, litter_2000_output, out=mangrove_C_final, where=non_mangrove_mask)
+    litter_2000_output = mangrove_C_final.astype('float32')
 
     return deadwood_2000_output, litter_2000_output
 
@@ -792,8 +731,8 @@ def create_soil_emis_extent(tile_id, pattern):
 
     # Grabs metadata for one of the input tiles, like its location/projection/cellsize
     kwargs = AGC_emis_year_src.meta
-    # Grabs the windows of the tile (stripes) to iterate over the entire tif without running out of memory
-    windows = AGC_emis_year_src.block_windows(1)
+    # Grabs the windows of the tile (groups of stripes) to iterate over the entire tif without running out of memory
+    windows = uu.iterate_windows(AGC_emis_year_src, tile_id, 'create_soil_emis_extent')
 
     # Updates kwargs for the output dataset.
     # Need to update data type to float 32 so that it can handle fractional carbon emitted_pools
@@ -821,19 +760,14 @@ def create_soil_emis_extent(tile_id, pattern):
 
     uu.check_memory()
 
-    # Iterates across the windows (1 pixel strips) of the input tiles
+    # Iterates across the windows (groups of 1 pixel strips) of the input tiles
     for idx, window in windows:
 
         # Reads in the windows of each input file that definitely exist
         AGC_emis_year_window = AGC_emis_year_src.read(1, window=window)
         soil_full_extent_window = soil_full_extent_src.read(1, window=window)
 
-        # Removes AGC pixels that do not have a loss year and fills with 0s
-        soil_output = np.ma.masked_where(AGC_emis_year_window == 0, soil_full_extent_window)
-        soil_output = soil_output.filled(0)
-
-        # Converts the output to uint16 since the soil C density is integers
-        soil_output = soil_output.astype('uint16')
+        soil_output = soil_emis_year_calc(AGC_emis_year_window, soil_full_extent_window)
 
         # Writes the output window to the output file
         dst_soil_emis_year.write_band(1, soil_output, window=window)
@@ -842,6 +776,24 @@ def create_soil_emis_extent(tile_id, pattern):
     uu.end_of_fx_summary(start, tile_id, pattern)
 
 
+def soil_emis_year_calc(AGC_emis_year_window, soil_full_extent_window):
+    """
+    Calculates soil carbon density in loss pixels for a window
+    :param AGC_emis_year_window: array representing aboveground carbon density in the year of loss
+    :param soil_full_extent_window: array representing soil carbon density in 2000
+    :return: array of soil carbon density in the year of loss
+    """
+
+    # Removes AGC pixels that do not have a loss year and fills with 0s
+    soil_output = np.ma.masked_where(AGC_emis_year_window == 0, soil_full_extent_window)
+    soil_output = soil_output.filled(0)
+
+    # Converts the output to uint16 since the soil C density is integers
+    soil_output = soil_output.astype('uint16')
+
+    return soil_output
+
+
 def create_total_C(tile_id, carbon_pool_extent):
     """
     Creates total carbon tiles (both in 2000 and loss year)
@@ -867,15 +819,11 @@ def create_total_C(tile_id, carbon_pool_extent):
         BGC_2000_src = rasterio.open(BGC_2000)
         deadwood_2000_src = rasterio.open(deadwood_2000)
         litter_2000_src = rasterio.open(litter_2000)
-        try:
-            soil_2000_src = rasterio.open(soil_2000)
-            uu.print_log(f'   Soil C 2000 tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'    Soil C 2000 tile not found for {tile_id}')
+        soil_2000_src = uu.open_optional_input(soil_2000, tile_id, 'Soil C 2000')
 
         kwargs = AGC_2000_src.meta
         kwargs.update(driver='GTiff', count=1, compress='DEFLATE', nodata=0, bigtiff='YES')
-        windows = AGC_2000_src.block_windows(1)
+        windows = uu.iterate_windows(AGC_2000_src, tile_id, 'create_total_C')
         output_pattern_list = [cn.pattern_total_C_2000]
         if cn.SENSIT_TYPE != 'std':
             output_pattern_list = uu.alter_patterns(cn.SENSIT_TYPE, output_pattern_list)
@@ -894,22 +842,22 @@ def create_total_C(tile_id, carbon_pool_extent):
     if 'loss' in carbon_pool_extent:
         AGC_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_AGC_emis_year)
         BGC_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_BGC_emis_year)
-        deadwood_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_deadwood_emis_year_2000)
-        litter_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_litter_emis_year_2000)
-        soil_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_soil_C_emis_year_2000)
         AGC_emis_year_src = rasterio.open(AGC_emis_year)
         BGC_emis_year_src = rasterio.open(BGC_emis_year)
-        deadwood_emis_year_src = rasterio.open(deadwood_emis_year)
-        litter_emis_year_src = rasterio.open(litter_emis_year)
-        try:
-            soil_emis_year_src = rasterio.open(soil_emis_year)
-            uu.print_log(f'   Soil C emission year tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'    Soil C emission year tile not found for {tile_id}')
+
+        # Deadwood, litter, and soil in the emissions year are their 2000 densities clipped to AGC in the emissions year.
+        # If the 2000 windows are being read anyway, they are clipped in memory instead of being read again.
+        if '2000' not in carbon_pool_extent:
+            deadwood_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_deadwood_emis_year_2000)
+            litter_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_litter_emis_year_2000)
+            soil_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_soil_C_emis_year_2000)
+            deadwood_emis_year_src = rasterio.open(deadwood_emis_year)
+            litter_emis_year_src = rasterio.open(litter_emis_year)
+            soil_emis_year_src = uu.open_optional_input(soil_emis_year, tile_id, 'Soil C emission year')
 
         kwargs = AGC_emis_year_src.meta
         kwargs.update(driver='GTiff', count=1, compress='DEFLATE', nodata=0)
-        windows = AGC_emis_year_src.block_windows(1)
+        windows = uu.iterate_windows(AGC_emis_year_src, tile_id, 'create_total_C')
         output_pattern_list = [cn.pattern_total_C_emis_year]
         if cn.SENSIT_TYPE != 'std':
             output_pattern_list = uu.alter_patterns(cn.SENSIT_TYPE, output_pattern_list)
@@ -929,7 +877,7 @@ def create_total_C(tile_id, carbon_pool_extent):
 
     uu.check_memory()
 
-    # Iterates across the windows (1 pixel strips) of the input tiles
+    # Iterates across the windows (groups of 1 pixel strips) of the input tiles
     for idx, window in windows:
 
         if '2000' in carbon_pool_extent:
@@ -939,15 +887,10 @@ def create_total_C(tile_id, carbon_pool_extent):
             BGC_2000_window = BGC_2000_src.read(1, window=window)
             deadwood_2000_window = deadwood_2000_src.read(1, window=window)
             litter_2000_window = litter_2000_src.read(1, window=window)
-            try:
-                soil_2000_window = soil_2000_src.read(1, window=window)
-            except UnboundLocalError:
-                soil_2000_window = np.zeros((window.height, window.width))
-
-            total_C_2000_window = AGC_2000_window + BGC_2000_window + deadwood_2000_window + litter_2000_window + soil_2000_window
+            soil_2000_window = uu.read_optional_window(soil_2000_src, window, 'int16')
 
-            # Converts the output to float32 since float64 is an unnecessary level of precision
-            total_C_2000_window = total_C_2000_window.astype('float32')
+            total_C_2000_window = total_C_calc(AGC_2000_window, BGC_2000_window, deadwood_2000_window,
+                                               litter_2000_window, soil_2000_window)
 
             # Writes the output window to the output file
             dst_total_C_2000.write_band(1, total_C_2000_window, window=window)
@@ -958,17 +901,19 @@ def create_total_C(tile_id, carbon_pool_extent):
             # Reads in the windows of each input file that definitely exist
             AGC_emis_year_window = AGC_emis_year_src.read(1, window=window)
             BGC_emis_year_window = BGC_emis_year_src.read(1, window=window)
-            deadwood_emis_year_window = deadwood_emis_year_src.read(1, window=window)
-            litter_emis_year_window = litter_emis_year_src.read(1, window=window)
-            try:
-                soil_emis_year_window = soil_emis_year_src.read(1, window=window)
-            except UnboundLocalError:
-                soil_emis_year_window = np.zeros((window.height, window.width))
 
-            total_C_emis_year_window = AGC_emis_year_window + BGC_emis_year_window + deadwood_emis_year_window + litter_emis_year_window + soil_emis_year_window
+            # Same clipping to AGC_emis_year_window as in create_deadwood_litter and create_soil_emis_extent
+            if '2000' in carbon_pool_extent:
+                deadwood_emis_year_window = np.where(AGC_emis_year_window > 0, deadwood_2000_window, 0).astype('float32')
+                litter_emis_year_window = np.where(AGC_emis_year_window > 0, litter_2000_window, 0).astype('float32')
+                soil_emis_year_window = soil_emis_year_calc(AGC_emis_year_window, soil_2000_window)
+            else:
+                deadwood_emis_year_window = deadwood_emis_year_src.read(1, window=window)
+                litter_emis_year_window = litter_emis_year_src.read(1, window=window)
+                soil_emis_year_window = uu.read_optional_window(soil_emis_year_src, window, 'uint16')
 
-            # Converts the output to float32 since float64 is an unnecessary level of precision
-            total_C_emis_year_window = total_C_emis_year_window.astype('float32')
+            total_C_emis_year_window = total_C_calc(AGC_emis_year_window, BGC_emis_year_window, deadwood_emis_year_window,
+                                                    litter_emis_year_window, soil_emis_year_window)
 
             # Writes the output window to the output file
             dst_total_C_emis_year.write_band(1, total_C_emis_year_window, window=window)
@@ -979,3 +924,321 @@ def create_total_C(tile_id, carbon_pool_extent):
         uu.end_of_fx_summary(start, tile_id, cn.pattern_total_C_emis_year)
     else:
         uu.end_of_fx_summary(start, tile_id, cn.pattern_total_C_2000)
+
+
+def total_C_calc(AGC_window, BGC_window, deadwood_window, litter_window, soil_window):
+    """
+    Calculates total carbon density for a window
+    :param AGC_window: array representing aboveground carbon density
+    :param BGC_window: array representing belowground carbon density
+    :param deadwood_window: array representing deadwood carbon density
+    :param litter_window: array representing litter carbon density
+    :param soil_window: array representing soil carbon density
+    :return: array of total carbon density
+    """
+
+    total_C_window = AGC_window + BGC_window + deadwood_window + litter_window + soil_window
+
+    # Converts the output to float32 since float64 is an unnecessary level of precision
+    total_C_window = total_C_window.astype('float32')
+
+    return total_C_window
+
+
+def create_carbon_pools_fused(tile_id, mang_BGB_AGB_ratio, mang_deadwood_AGB_ratio, mang_litter_AGB_ratio, carbon_pool_extent):
+    """
+    Creates all carbon pools (aboveground, belowground, deadwood, litter, soil, and total) for a tile in a single pass.
+    Each input tile is opened and read once and the pools are calculated window by window from arrays in memory,
+    rather than writing AGC, BGC, deadwood, litter, and soil to disk and reading them back in for the later pools.
+    Outputs are the same as from create_AGC, create_BGC, create_deadwood_litter, create_soil_emis_extent, and create_total_C.
+    :param tile_id: tile to be processed, identified by its tile id
+    :param mang_BGB_AGB_ratio: lookup table (uu.make_lookup_table) of BGB:AGB ratios for mangroves by continent-ecozone
+    :param mang_deadwood_AGB_ratio: lookup table (uu.make_lookup_table) of deadwood carbon to aboveground carbon ratios for mangroves
+    :param mang_litter_AGB_ratio: lookup table (uu.make_lookup_table) of litter carbon to aboveground carbon ratios for mangroves
+    :param carbon_pool_extent: the pixels and years for which carbon pools are caculated: loss or 2000
+    :return: Carbon pool density tiles in the specified pixels for the specified years (Mg C/ha)
+    """
+
+    start = datetime.datetime.now()
+
+    # Names of the input tiles. Creates the names even if the files don't exist.
+    removal_forest_type = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_removal_forest_type)
+    mangrove_biomass_2000 = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_mangrove_biomass_2000)
+    gain = f'{tile_id}_{cn.pattern_gain_ec2}.tif'
+    annual_gain_AGC = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_annual_gain_AGC_all_types)
+    cumul_gain_AGCO2 = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_cumul_gain_AGCO2_all_types)
+    natrl_forest_biomass_2000 = uu.sensit_tile_rename_biomass(cn.SENSIT_TYPE, tile_id)
+    model_extent = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_model_extent)
+    cont_ecozone = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_cont_eco_processed)
+    BGB_AGB_ratio = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_BGB_AGB_ratio)
+    bor_tem_trop = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_bor_tem_trop_processed)
+    precip = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_precip)
+    elevation = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_elevation)
+    soil_full_extent = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_soil_C_full_extent_2000)
+
+    uu.print_log(f'  Reading input files for {tile_id}...')
+
+    loss_year = loss_year_tile_name(tile_id)
+
+    # This tile should exist, so it can reliably be opened for metadata and windows
+    model_extent_src = rasterio.open(model_extent)
+
+    # Opens the input tiles if they exist
+    loss_year_src = uu.open_optional_input(loss_year, tile_id, 'Loss year')
+    annual_gain_AGC_src = uu.open_optional_input(annual_gain_AGC, tile_id, 'Aboveground removal factor')
+    cumul_gain_AGCO2_src = uu.open_optional_input(cumul_gain_AGCO2, tile_id, 'Gross aboveground removal')
+    mangrove_biomass_2000_src = uu.open_optional_input(mangrove_biomass_2000, tile_id, 'Mangrove')
+    natrl_forest_biomass_2000_src = uu.open_optional_input(natrl_forest_biomass_2000, tile_id, 'Biomass')
+    gain_src = uu.open_optional_input(gain, tile_id, 'Gain')
+    removal_forest_type_src = uu.open_optional_input(removal_forest_type, tile_id, 'Removal type')
+    cont_ecozone_src = uu.open_optional_input(cont_ecozone, tile_id, 'Continent-ecozone')
+    BGB_AGB_ratio_src = uu.open_optional_input(BGB_AGB_ratio, tile_id, 'BGB:AGB', missing_note='. Using default BGB:AGB from Mokany instead.')
+    bor_tem_trop_src = uu.open_optional_input(bor_tem_trop, tile_id, 'Boreal/temperate/tropical')
+    precip_src = uu.open_optional_input(precip, tile_id, 'Precipitation')
+    elevation_src = uu.open_optional_input(elevation, tile_id, 'Elevation')
+    soil_full_extent_src = uu.open_optional_input(soil_full_extent, tile_id, 'Soil C 2000')
+
+    # Which optional inputs exist is resolved once for the tile, not for every window
+    has_natrl_forest_biomass = natrl_forest_biomass_2000_src is not None
+    has_mangrove_biomass = mangrove_biomass_2000_src is not None
+    has_soil = soil_full_extent_src is not None
+
+
+    # Grabs the windows of a tile to iterate over the entire tif without running out of memory
+    windows = uu.iterate_windows(model_extent_src, tile_id, 'create_carbon_pools_fused')
+
+    # Grabs metadata for one of the input tiles, like its location/projection/cellsize
+    kwargs = model_extent_src.meta
+
+    # Updates kwargs for the output dataset.
+    # Need to update data type to float 32 so that it can handle fractional carbon
+    kwargs.update(
+        driver='GTiff',
+        count=1,
+        compress='DEFLATE',
+        nodata=0,
+        dtype='float32'
+    )
+
+    # The output files for carbon pools in 2000. Creates names and rasters to write to.
+    if '2000' in carbon_pool_extent:
+        output_pattern_list = [cn.pattern_AGC_2000, cn.pattern_BGC_2000, cn.pattern_deadwood_2000,
+                               cn.pattern_litter_2000, cn.pattern_total_C_2000]
+        if cn.SENSIT_TYPE != 'std':
+            output_pattern_list = uu.alter_patterns(cn.SENSIT_TYPE, output_pattern_list)
+
+        extent_2000 = 'aboveground biomass in 2000 (WHRC if standard model, JPL if biomass_swap sensitivity analysis) and mangrove AGB. Mangrove AGB has precedence.'
+
+        dst_AGC_2000 = rasterio.open(uu.make_tile_name(tile_id, output_pattern_list[0]), 'w', **kwargs)
+        uu.add_universal_metadata_rasterio(dst_AGC_2000)
+        dst_AGC_2000.update_tags(
+            units='megagrams aboveground carbon (AGC)/ha')
+        dst_AGC_2000.update_tags(
+            source='WHRC (if standard model) or JPL (if biomass swap sensitivity analysis) and mangrove AGB (Simard et al. 2018)')
+        dst_AGC_2000.update_tags(extent=extent_2000)
+
+        dst_BGC_2000 = rasterio.open(uu.make_tile_name(tile_id, output_pattern_list[1]), 'w', **kwargs)
+        uu.add_universal_metadata_rasterio(dst_BGC_2000)
+        dst_BGC_2000.update_tags(
+            units='megagrams belowground carbon (BGC)/ha')
+        dst_BGC_2000.update_tags(
+            source='WHRC (if standard model) or JPL (if biomass_swap sensitivity analysis) and mangrove AGB (Simard et al. 2018). AGC:BGC for mangrove and non-mangrove forests applied.')
+        dst_BGC_2000.update_tags(extent=extent_2000)
+
+        dst_deadwood_2000 = rasterio.open(uu.make_tile_name(tile_id, output_pattern_list[2]), 'w', **kwargs)
+        uu.add_universal_metadata_rasterio(dst_deadwood_2000)
+        dst_deadwood_2000.update_tags(
+            units='megagrams deadwood carbon/ha')
+        dst_deadwood_2000.update_tags(
+            source='WHRC (if standard model) or JPL (if biomass swap sensitivity analysis) and mangrove AGB (Simard et al. 2018). AGC:deadwood carbon for mangrove and non-mangrove forests applied.')
+        dst_deadwood_2000.update_tags(extent=extent_2000)
+
+        dst_litter_2000 = rasterio.open(uu.make_tile_name(tile_id, output_pattern_list[3]), 'w', **kwargs)
+        uu.add_universal_metadata_rasterio(dst_litter_2000)
+        dst_litter_2000.update_tags(
+            units='megagrams litter carbon/ha')
+        dst_litter_2000.update_tags(
+            source='WHRC (if standard model) or JPL (if biomass swap sensitivity analysis) and mangrove AGB (Simard et al. 2018). AGC:litter carbon for mangrove and non-mangrove forests applied.')
+        dst_litter_2000.update_tags(extent=extent_2000)
+
+        # Total carbon in 2000 can exceed the classic tiff size limit
+        kwargs_total_C_2000 = kwargs.copy()
+        kwargs_total_C_2000.update(bigtiff='YES')
+        dst_total_C_2000 = rasterio.open(uu.make_tile_name(tile_id, output_pattern_list[4]), 'w', **kwargs_total_C_2000)
+        uu.add_universal_metadata_rasterio(dst_total_C_2000)
+        dst_total_C_2000.update_tags(
+            units='megagrams total (all emitted_pools) carbon/ha')
+        dst_total_C_2000.update_tags(
+            source='AGC, BGC, deadwood carbon, litter carbon, and soil carbon')
+        dst_total_C_2000.update_tags(
+            extent='aboveground biomass in 2000 (WHRC if standard model, JPL if biomass_swap sensitivity analysis), mangrove AGB, and soil carbon. Mangrove AGB has precedence.')
+
+    # The output files for carbon pools in the year of loss. Creates names and rasters to write to.
+    if 'loss' in carbon_pool_extent:
+        output_pattern_list = [cn.pattern_AGC_emis_year, cn.pattern_BGC_emis_year, cn.pattern_deadwood_emis_year_2000,
+                               cn.pattern_litter_emis_year_2000, cn.pattern_soil_C_emis_year_2000, cn.pattern_total_C_emis_year]
+        if cn.SENSIT_TYPE != 'std':
+            output_pattern_list = uu.alter_patterns(cn.SENSIT_TYPE, output_pattern_list)
+
+        extent_loss = 'tree cover loss pixels within model extent'
+
+        dst_AGC_emis_year = rasterio.open(uu.make_tile_name(tile_id, output_pattern_list[0]), 'w', **kwargs)
+        uu.add_universal_metadata_rasterio(dst_AGC_emis_year)
+        dst_AGC_emis_year.update_tags(
+            units='megagrams aboveground carbon (AGC)/ha')
+        dst_AGC_emis_year.update_tags(
+            source='WHRC (if standard model) or JPL (if biomass_swap sensitivity analysis) and mangrove AGB (Simard et al. 2018). Gross removals added to AGC2000 to get AGC in loss year.')
+        dst_AGC_emis_year.update_tags(extent=extent_loss)
+
+        dst_BGC_emis_year = rasterio.open(uu.make_tile_name(tile_id, output_pattern_list[1]), 'w', **kwargs)
+        uu.add_universal_metadata_rasterio(dst_BGC_emis_year)
+        dst_BGC_emis_year.update_tags(
+            units='megagrams belowground carbon (BGC)/ha')
+        dst_BGC_emis_year.update_tags(
+            source='WHRC (if standard model) or JPL (if biomass_swap sensitivity analysis) and mangrove AGB (Simard et al. 2018). Gross removals added to AGC2000 to get AGC in loss year. AGC:BGC for mangrove and non-mangrove forests applied.')
+        dst_BGC_emis_year.update_tags(extent=extent_loss)
+
+        dst_deadwood_emis_year = rasterio.open(uu.make_tile_name(tile_id, output_pattern_list[2]), 'w', **kwargs)
+        uu.add_universal_metadata_rasterio(dst_deadwood_emis_year)
+        dst_deadwood_emis_year.update_tags(
+            units='megagrams deadwood carbon/ha')
+        dst_deadwood_emis_year.update_tags(
+            source='WHRC (if standard model) or JPL (if biomass_swap sensitivity analysis) and mangrove AGB (Simard et al. 2018). Gross removals added to AGC2000 to get AGC in loss year. AGC:litter carbon for mangrove and non-mangrove forests applied.')
+        dst_deadwood_emis_year.update_tags(extent=extent_loss)
+
+        dst_litter_emis_year = rasterio.open(uu.make_tile_name(tile_id, output_pattern_list[3]), 'w', **kwargs)
+        uu.add_universal_metadata_rasterio(dst_litter_emis_year)
+        dst_litter_emis_year.update_tags(
+            units='megagrams litter carbon/ha')
+        dst_litter_emis_year.update_tags(
+            source='WHRC (if standard model) or JPL (if biomass_swap sensitivity analysis) and mangrove AGB (Simard et al. 2018). Gross removals added to AGC2000 to get AGC in loss year. AGC:litter carbon for mangrove and non-mangrove forests applied.')
+        dst_litter_emis_year.update_tags(extent=extent_loss)
+
+        # Soil carbon in the loss year is only created if there is soil carbon in 2000, as in create_soil_emis_extent
+        if has_soil:
+            kwargs_soil = kwargs.copy()
+            kwargs_soil.update(dtype='uint16')
+            dst_soil_emis_year = rasterio.open(uu.make_tile_name(tile_id, output_pattern_list[4]), 'w', **kwargs_soil)
+            uu.add_universal_metadata_rasterio(dst_soil_emis_year)
+            dst_soil_emis_year.update_tags(
+                units='megagrams soil carbon/ha')
+            dst_soil_emis_year.update_tags(
+                source='ISRIC SoilGrids250 (May 2020 update) soil organic carbon stock data. 0-30 cm data.')
+            dst_soil_emis_year.update_tags(
+                extent='tree cover loss pixels')
+
+        dst_total_C_emis_year = rasterio.open(uu.make_tile_name(tile_id, output_pattern_list[5]), 'w', **kwargs)
+        uu.add_universal_metadata_rasterio(dst_total_C_emis_year)
+        dst_total_C_emis_year.update_tags(
+            units='megagrams total (all emitted_pools) carbon/ha')
+        dst_total_C_emis_year.update_tags(
+            source='AGC, BGC, deadwood carbon, litter carbon, and soil carbon')
+        dst_total_C_emis_year.update_tags(extent=extent_loss)
+
+
+    uu.print_log(f'  Creating all carbon pools for {tile_id} in a single pass using carbon_pool_extent {carbon_pool_extent}')
+
+    uu.check_memory()
+
+    # Rows with carbon in loss pixels, for the AGC in emissions year row index
+    loss_carbon_rows = []
+
+    # Iterates across the windows (groups of 1 pixel strips) of the input tiles
+    for idx, window in windows:
+
+        # Reads the input tiles' windows. For windows from tiles that don't exist, a read-only array of 0s is used.
+        loss_year_window = uu.read_optional_window(loss_year_src, window, 'uint8')
+        annual_gain_AGC_window = uu.read_optional_window(annual_gain_AGC_src, window, 'float32')
+        cumul_gain_AGCO2_window = uu.read_optional_window(cumul_gain_AGCO2_src, window, 'float32')
+        removal_forest_type_window = uu.read_optional_window(removal_forest_type_src, window, 'uint8')
+        gain_window = uu.read_optional_window(gain_src, window, 'uint8')
+        mangrove_biomass_2000_window = uu.read_optional_window(mangrove_biomass_2000_src, window, 'float32')
+        natrl_forest_biomass_2000_window = uu.read_optional_window(natrl_forest_biomass_2000_src, window, 'float32')
+        cont_ecozone_window = uu.read_optional_window(cont_ecozone_src, window, 'int16')
+        BGB_AGB_ratio_window = uu.read_optional_window(BGB_AGB_ratio_src, window, 'float32', cn.below_to_above_non_mang)
+        bor_tem_trop_window = uu.read_optional_window(bor_tem_trop_src, window, 'int16')
+        precip_window = uu.read_optional_window(precip_src, window, 'int32')
+        elevation_window = uu.read_optional_window(elevation_src, window, 'int16')
+        soil_full_extent_window = uu.read_optional_window(soil_full_extent_src, window, 'int16')
+
+        # Applies the mangrove BGB:AGB ratios (3 different ratios) to the ecozone raster to create a raster of BGB:AGB ratios
+        mang_BGB_AGB_ratio_window = uu.apply_lookup_table(cont_ecozone_window, mang_BGB_AGB_ratio)
+        BGB_AGB_ratio_all_window = BGB_AGB_ratio_calc(removal_forest_type_window, mang_BGB_AGB_ratio_window, BGB_AGB_ratio_window)
+
+        # Aboveground carbon in 2000. Used for all other pools.
+        agc_2000_window = AGC_2000_calc(mangrove_biomass_2000_window, natrl_forest_biomass_2000_window)
+
+        # Deadwood and litter at the extent of AGB2000. Clipped to loss extent below.
+        deadwood_2000_output = np.zeros((window.height, window.width), dtype='float32')
+        litter_2000_output = np.zeros((window.height, window.width), dtype='float32')
+
+        # This allows the script to bypass the few tiles that have mangrove biomass but not WHRC biomass
+        if has_natrl_forest_biomass:
+            deadwood_2000_output, litter_2000_output = deadwood_litter_equations(
+                bor_tem_trop_window, deadwood_2000_output, elevation_window,
+                litter_2000_output, natrl_forest_biomass_2000_window, precip_window)
+
+        # Replaces non-mangrove deadwood and litter with special mangrove deadwood and litter values if there is mangrove
+        if has_mangrove_biomass:
+
+            mang_deadwood_AGB_ratio_window = uu.apply_lookup_table(cont_ecozone_window, mang_deadwood_AGB_ratio)
+            mang_litter_AGB_ratio_window = uu.apply_lookup_table(cont_ecozone_window, mang_litter_AGB_ratio)
+
+            deadwood_2000_output, litter_2000_output = mangrove_deadwood_litter_calc(
+                deadwood_2000_output, litter_2000_output, mangrove_biomass_2000_window,
+                mang_deadwood_AGB_ratio_window, mang_litter_AGB_ratio_window)
+
+        if '2000' in carbon_pool_extent:
+
+            BGC_2000_window = BGC_calc(agc_2000_window, BGB_AGB_ratio_all_window)
+
+            total_C_2000_window = total_C_calc(agc_2000_window, BGC_2000_window, deadwood_2000_output,
+                                               litter_2000_output, soil_full_extent_window)
+
+            dst_AGC_2000.write_band(1, agc_2000_window, window=window)
+            dst_BGC_2000.write_band(1, BGC_2000_window, window=window)
+            dst_deadwood_2000.write_band(1, deadwood_2000_output, window=window)
+            dst_litter_2000.write_band(1, litter_2000_output, window=window)
+            dst_total_C_2000.write_band(1, total_C_2000_window, window=window)
+
+        if 'loss' in carbon_pool_extent:
+
+            AGC_emis_year_window = AGC_emis_year_calc(agc_2000_window, loss_year_window, gain_window,
+                                                      annual_gain_AGC_window, cumul_gain_AGCO2_window,
+                                                      removal_forest_type_window)
+
+            BGC_emis_year_window = BGC_calc(AGC_emis_year_window, BGB_AGB_ratio_all_window)
+
+            # Deadwood and litter are clipped to AGC_emis_year_window extent, not loss years, because
+            # AGC_emis_year_extent is already clipped to the model extent.
+            deadwood_emis_year_output = np.where(AGC_emis_year_window > 0, deadwood_2000_output, 0).astype('float32')
+            litter_emis_year_output = np.where(AGC_emis_year_window > 0, litter_2000_output, 0).astype('float32')
+
+            # Without a soil tile, the soil window is already a read-only array of 0s
+            if has_soil:
+                soil_emis_year_output = soil_emis_year_calc(AGC_emis_year_window, soil_full_extent_window)
+                dst_soil_emis_year.write_band(1, soil_emis_year_output, window=window)
+            else:
+                soil_emis_year_output = soil_full_extent_window
+
+            total_C_emis_year_window = total_C_calc(AGC_emis_year_window, BGC_emis_year_window, deadwood_emis_year_output,
+                                                    litter_emis_year_output, soil_emis_year_output)
+
+            dst_AGC_emis_year.write_band(1, AGC_emis_year_window, window=window)
+            dst_BGC_emis_year.write_band(1, BGC_emis_year_window, window=window)
+            dst_deadwood_emis_year.write_band(1, deadwood_emis_year_output, window=window)
+            dst_litter_emis_year.write_band(1, litter_emis_year_output, window=window)
+            dst_total_C_emis_year.write_band(1, total_C_emis_year_window, window=window)
+
+            loss_carbon_rows.append(uu.nonzero_rows(AGC_emis_year_window, window))
+
+
+    # Indexes the rows that have carbon in loss pixels, so that gross emissions can skip the other rows
+    if 'loss' in carbon_pool_extent:
+        add_loss_carbon_rows_tag(dst_AGC_emis_year, loss_carbon_rows)
+
+    # Prints information about the tile that was just processed
+    if 'loss' in carbon_pool_extent:
+        uu.end_of_fx_summary(start, tile_id, cn.pattern_total_C_emis_year)
+    else:
+        uu.end_of_fx_summary(start, tile_id, cn.pattern_total_C_2000)
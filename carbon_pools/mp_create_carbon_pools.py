@@ -21,12 +21,16 @@ Carbon emitted_pools in both 2000 and in the year of loss can be created in a si
 
 python -m carbon_pools.mp_create_carbon_pools -t std -l 00N_000E -si -nu -ce loss
 python -m carbon_pools.mp_create_carbon_pools -t std -l all -si -ce loss
+
+All carbon pools can instead be created in one pass per tile with --fused-carbon-pools (-fcp).
+This reads each input tile once and doesn't write AGC, BGC, deadwood, litter, and soil to disk only to read them
+back in for the later pools. The outputs are the same as from the separate pool passes.
+python -m carbon_pools.mp_create_carbon_pools -t std -l 00N_000E -si -nu -ce loss -fcp
 """
 
 import argparse
 from functools import partial
 import glob
-import multiprocessing
 import os
 import pandas as pd
 import sys
@@ -190,6 +194,42 @@ def mp_create_carbon_pools(tile_id_list, carbon_pool_extent):
                                                                          cn.litter_to_above_trop_wet_mang,
                                                                          cn.litter_to_above_subtrop_mang)
 
+    # Converts the ratio dictionaries to lookup tables once for the whole run, rather than remapping each key for each window
+    mang_BGB_AGB_ratio = uu.make_lookup_table(mang_BGB_AGB_ratio)
+    mang_deadwood_AGB_ratio = uu.make_lookup_table(mang_deadwood_AGB_ratio)
+    mang_litter_AGB_ratio = uu.make_lookup_table(mang_litter_AGB_ratio)
+
+    # Creates all carbon pools in one pass per tile, rather than one pass per pool.
+    # Avoids writing AGC, BGC, deadwood, litter, and soil to disk and reading them back in for the later pools.
+    if cn.FUSED_CARBON_POOLS:
+
+        uu.print_log(f'Creating tiles of all carbon pools in {carbon_pool_extent} in a single pass')
+
+        if cn.SINGLE_PROCESSOR:
+            for tile_id in tile_id_list:
+                create_carbon_pools.create_carbon_pools_fused(tile_id, mang_BGB_AGB_ratio, mang_deadwood_AGB_ratio,
+                                                              mang_litter_AGB_ratio, carbon_pool_extent)
+
+        else:
+            uu.map_tiles(partial(create_carbon_pools.create_carbon_pools_fused, mang_BGB_AGB_ratio=mang_BGB_AGB_ratio,
+                                 mang_deadwood_AGB_ratio=mang_deadwood_AGB_ratio,
+                                 mang_litter_AGB_ratio=mang_litter_AGB_ratio,
+                                 carbon_pool_extent=carbon_pool_extent),
+                         tile_id_list, f'create_carbon_pools_fused_{carbon_pool_extent}')
+
+        # If cn.NO_UPLOAD flag is not activated (by choice or by lack of AWS credentials), output is uploaded
+        if not cn.NO_UPLOAD:
+            for output_dir, output_pattern in zip(output_dir_list, output_pattern_list):
+                # Soil carbon in 2000 is an input to carbon pool creation, not an output of it
+                if cn.pattern_soil_C_full_extent_2000 in output_pattern:
+                    continue
+                uu.upload_final_set(output_dir, output_pattern)
+
+        uu.check_storage()
+
+        return
+
+
     uu.print_log(f'Creating tiles of aboveground carbon in {carbon_pool_extent}')
 
     if cn.SINGLE_PROCESSOR:
@@ -197,24 +237,8 @@ def mp_create_carbon_pools(tile_id_list, carbon_pool_extent):
             create_carbon_pools.create_AGC(tile_id, carbon_pool_extent)
 
     else:
-        if cn.count == 96:
-            # More processors can be used for loss carbon pools than for 2000 carbon pools
-            if carbon_pool_extent == 'loss':
-                if cn.SENSIT_TYPE == 'biomass_swap':
-                    processes = 16  # 16 processors = XXX GB peak
-                else:
-                    processes = 17  # 19=around 650 but increases slowly and maxes out; 17=600 GB peak
-            else: # For 2000, or loss & 2000
-                processes = 32  # 25=540 GB peak; 32=690 GB peak; 34=sometimes 700, sometimes 760 GB peak (too high);
-                # 36=760 GB peak (too high)
-        else:
-            processes = 2
-        uu.print_log(f'AGC loss year max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(create_carbon_pools.create_AGC, carbon_pool_extent=carbon_pool_extent),
-                     tile_id_list)
-            pool.close()
-            pool.join()
+        uu.map_tiles(partial(create_carbon_pools.create_AGC, carbon_pool_extent=carbon_pool_extent),
+                     tile_id_list, f'create_AGC_{carbon_pool_extent}')
 
 
     # If cn.NO_UPLOAD flag is not activated (by choice or by lack of AWS credentials), output is uploaded
@@ -248,24 +272,9 @@ def mp_create_carbon_pools(tile_id_list, carbon_pool_extent):
             create_carbon_pools.create_BGC(tile_id, mang_BGB_AGB_ratio, carbon_pool_extent)
 
     else:
-        if cn.count == 96:
-            # More processors can be used for loss carbon pools than for 2000 carbon pools
-            if carbon_pool_extent == 'loss':
-                if cn.SENSIT_TYPE == 'biomass_swap':
-                    processes = 30  # 30 processors = XXX GB peak
-                else:
-                    processes = 30  # 20 processors = 370 GB peak; 32 = 590 GB peak; 33=760 BG peak (too high)
-            else: # For 2000, or loss & 2000
-                processes = 30  # 20 processors = 370 GB peak; 25 = 460 GB peak; 30=725 GB peak; 40 = 760 GB peak (too high)
-        else:
-            processes = 2
-        uu.print_log(f'BGC max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(create_carbon_pools.create_BGC, mang_BGB_AGB_ratio=mang_BGB_AGB_ratio,
+        uu.map_tiles(partial(create_carbon_pools.create_BGC, mang_BGB_AGB_ratio=mang_BGB_AGB_ratio,
                              carbon_pool_extent=carbon_pool_extent),
-                     tile_id_list)
-            pool.close()
-            pool.join()
+                     tile_id_list, f'create_BGC_{carbon_pool_extent}')
 
     # If cn.NO_UPLOAD flag is not activated (by choice or by lack of AWS credentials), output is uploaded
     if not cn.NO_UPLOAD:
@@ -306,31 +315,10 @@ def mp_create_carbon_pools(tile_id_list, carbon_pool_extent):
             create_carbon_pools.create_deadwood_litter(tile_id, mang_deadwood_AGB_ratio, mang_litter_AGB_ratio, carbon_pool_extent)
 
     else:
-        if cn.count == 96:
-            # More processors can be used for loss carbon pools than for 2000 carbon pools
-            if carbon_pool_extent == 'loss':
-                if cn.SENSIT_TYPE == 'biomass_swap':
-                    processes = 10  # 10 processors = XXX GB peak
-                else:
-                    # 32 processors = >750 GB peak; 24 > 750 GB peak; 14 = 685 GB peak (stops around 600, then increases very very slowly);
-                    # 15 = 700 GB peak once but also too much memory another time, so back to 13 (580 GB peak that I observed)
-                    processes = 13
-            else: # For 2000, or loss & 2000
-                ### Note: deleted precip, elevation, and WHRC AGB tiles at equatorial latitudes as deadwood and litter were produced.
-                ### There wouldn't have been enough room for all deadwood and litter otherwise.
-                ### For example, when deadwood and litter generation started getting up to around 50N, I deleted
-                ### 00N precip, elevation, and WHRC AGB. I deleted all of those from 30N to 20S.
-                processes = 16  # 7 processors = 320 GB peak; 14 = 620 GB peak; 16 = 710 GB peak
-        else:
-            processes = 2
-        uu.print_log(f'Deadwood and litter max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(create_carbon_pools.create_deadwood_litter, mang_deadwood_AGB_ratio=mang_deadwood_AGB_ratio,
-                        mang_litter_AGB_ratio=mang_litter_AGB_ratio,
-                        carbon_pool_extent=carbon_pool_extent),
-                     tile_id_list)
-            pool.close()
-            pool.join()
+        uu.map_tiles(partial(create_carbon_pools.create_deadwood_litter, mang_deadwood_AGB_ratio=mang_deadwood_AGB_ratio,
+                             mang_litter_AGB_ratio=mang_litter_AGB_ratio,
+                             carbon_pool_extent=carbon_pool_extent),
+                     tile_id_list, f'create_deadwood_litter_{carbon_pool_extent}')
 
 
     # If cn.NO_UPLOAD flag is not activated (by choice or by lack of AWS credentials), output is uploaded
@@ -381,23 +369,8 @@ def mp_create_carbon_pools(tile_id_list, carbon_pool_extent):
                 create_carbon_pools.create_soil_emis_extent(tile_id, pattern)
 
         else:
-            if cn.count == 96:
-                # More processors can be used for loss carbon pools than for 2000 carbon pools
-                if carbon_pool_extent == 'loss':
-                    if cn.SENSIT_TYPE == 'biomass_swap':
-                        processes = 36  # 36 processors = XXX GB peak
-                    else:
-                        processes = 46  # 24 processors = 360 GB peak; 32 = 490 GB peak; 38 = 580 GB peak; 42 = 640 GB peak; 46 = XXX GB peak
-                else: # For 2000, or loss & 2000
-                    processes = 12  # 12 processors = XXX GB peak
-            else:
-                processes = 2
-            uu.print_log(f'Soil carbon loss year max processors={processes}')
-            with multiprocessing.Pool(processes) as pool:
-                pool.map(partial(create_carbon_pools.create_soil_emis_extent, pattern=pattern),
-                         tile_id_list)
-                pool.close()
-                pool.join()
+            uu.map_tiles(partial(create_carbon_pools.create_soil_emis_extent, pattern=pattern),
+                         tile_id_list, f'create_soil_emis_extent_{carbon_pool_extent}')
 
 
         # If cn.NO_UPLOAD flag is not activated (by choice or by lack of AWS credentials), output is uploaded
@@ -437,23 +410,8 @@ def mp_create_carbon_pools(tile_id_list, carbon_pool_extent):
             create_carbon_pools.create_total_C(tile_id, carbon_pool_extent)
 
     else:
-        if cn.count == 96:
-            # More processors can be used for loss carbon pools than for 2000 carbon pools
-            if carbon_pool_extent == 'loss':
-                if cn.SENSIT_TYPE == 'biomass_swap':
-                    processes = 14  # 14 processors = XXX GB peak
-                else:
-                    processes = 18  # 20 processors > 750 GB peak (by just a bit, I think); 15 = 550 GB peak; 18 = XXX GB peak
-            else: # For 2000, or loss & 2000
-                processes = 12  # 12 processors = XXX GB peak
-        else:
-            processes = 2
-        uu.print_log(f'Total carbon loss year max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(create_carbon_pools.create_total_C, carbon_pool_extent=carbon_pool_extent),
-                     tile_id_list)
-            pool.close()
-            pool.join()
+        uu.map_tiles(partial(create_carbon_pools.create_total_C, carbon_pool_extent=carbon_pool_extent),
+                     tile_id_list, f'create_total_C_{carbon_pool_extent}')
 
 
     # If cn.NO_UPLOAD flag is not activated (by choice or by lack of AWS credentials), output is uploaded
@@ -487,6 +445,9 @@ if __name__ == '__main__':
                         help='Saves intermediate model outputs rather than deleting them to save storage')
     parser.add_argument('--carbon_pool_extent', '-ce', required=True,
                         help='Extent over which carbon emitted_pools should be calculated: loss, 2000, loss,2000, or 2000,loss')
+    parser.add_argument('--fused-carbon-pools', '-fcp', action='store_true',
+                        help='Creates all carbon pools in a single pass per tile rather than one pass per pool')
+    uu.add_tile_processing_arguments(parser)
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
@@ -495,7 +456,9 @@ if __name__ == '__main__':
     cn.NO_UPLOAD = args.no_upload
     cn.SINGLE_PROCESSOR = args.single_processor
     cn.SAVE_INTERMEDIATES = args.save_intermediates
+    cn.FUSED_CARBON_POOLS = args.fused_carbon_pools
     cn.CARBON_POOL_EXTENT = args.carbon_pool_extent # Tells the pool creation functions to calculate carbon emitted_pools as they were at the year of loss in loss pixels only
+    uu.set_tile_processing_arguments(args)
 
     tile_id_list = args.tile_id_list
 
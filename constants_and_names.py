@@ -25,8 +25,23 @@ global RUN_THROUGH
 RUN_THROUGH = True
 global CARBON_POOL_EXTENT
 CARBON_POOL_EXTENT = ''
+global FUSED_CARBON_POOLS
+FUSED_CARBON_POOLS = False
+global FUSED_REMOVALS
+FUSED_REMOVALS = False
+global FUSED_REMOVALS_OUTPUTS
+FUSED_REMOVALS_OUTPUTS = 'removal_forest_type,annual_gain_AGC_all_types,annual_gain_BGC_all_types,stdev_annual_gain_AGC_all_types,' \
+                         'cumul_gain_AGCO2_all_types,cumul_gain_BGCO2_all_types,cumul_gain_AGCO2_BGCO2_all_types'
 global EMITTED_POOLS
 EMITTED_POOLS = ''
+global EMISSIONS_ENGINE
+EMISSIONS_ENGINE = 'extension'
+global EMISSIONS_BUILD_PROFILE
+EMISSIONS_BUILD_PROFILE = 'default'
+global EMISSIONS_THREADS
+EMISSIONS_THREADS = 0
+global EMISSIONS_BY_DRIVER
+EMISSIONS_BY_DRIVER = False
 global STD_NET_FLUX
 STD_NET_FLUX = ''
 global INCLUDE_MANGROVES
@@ -39,6 +54,16 @@ global SINGLE_PROCESSOR
 SINGLE_PROCESSOR = False
 global LOG_NOTE
 LOG_NOTE = ''
+global WINDOW_MEMORY_BUDGET
+WINDOW_MEMORY_BUDGET = 64
+global LEGACY_WINDOWS
+LEGACY_WINDOWS = False
+global MEMORY_BUDGET
+MEMORY_BUDGET = None
+global MEMORY_PROFILE
+MEMORY_PROFILE = ''
+global FOOTPRINT_INDEX
+FOOTPRINT_INDEX = ''
 
 
 ### Constants
@@ -107,9 +132,19 @@ agg_pixel_window = int(tile_width * 0.004)
 # m2 per hectare
 m2_per_ha = 100 * 100
 
+# WGS84 ellipsoid, for the area of pixels at each latitude
+wgs84_semi_major_axis = 6378137.0
+wgs84_flattening = 1 / 298.257223563
+
 # Number of processors on the machine being used
 count = multiprocessing.cpu_count()
 
+# Projected peak memory (GB) of a tile task before any tile of that stage has been measured or profiled (uu.map_tiles)
+TILE_MEMORY_ESTIMATE = 40
+
+# How often (seconds) uu.map_tiles measures the memory of running tile tasks and checks for finished ones
+MEMORY_POLL_INTERVAL = 1
+
 planted_forest_postgis_db = 'all_plant'
 planted_forest_output_date = '20230911'
 planted_forest_version = 'SDPTv2'
@@ -131,6 +166,15 @@ docker_app = '/usr/local/app'
 
 c_emis_compile_dst = f'{docker_app}/emissions/cpp_util'
 
+# Emission factors that the gross emissions extension uses for each combination of its categorical inputs,
+# written to the tile folder in each emissions run so they can be checked against the emissions model flowchart
+emission_factor_table_csv = 'gross_emissions_emission_factor_table.csv'
+
+# Area-weighted sums of gross emissions by decision tree node, driver and loss year, accumulated while the
+# emissions are calculated. Each tile's table is {tile_id}_{pattern}.csv and they are merged into one table for the run.
+pattern_gross_emis_summary = f'gross_emis_summary_by_node_driver_loss_year_2001_{loss_years}'
+gross_emis_summary_dir = os.path.join(s3_base_dir, 'gross_emissions/summary/')
+
 # Model log
 start = datetime.datetime.now()
 date = datetime.datetime.now()
@@ -144,6 +188,9 @@ model_log = f'flux_model_log_{date_formatted}.txt'
 # don't get counted as actual tiles of this type
 blank_tile_txt = "blank_tiles.txt"
 
+# Footprint index of which input tiles exist and where they have data, made by data_prep/mp_footprint_index.py
+footprint_index = "tile_footprint_index.csv"
+
 
 # Tile summary spreadsheets
 tile_stats_pattern = 'tile_stats_model'
@@ -572,6 +619,9 @@ emis_pool_run_date = '20260302'
 # Aboveground carbon in the year of emission for all forest types in loss pixels
 pattern_AGC_emis_year = "Mg_AGC_ha_emis_year"
 AGC_emis_year_dir = os.path.join(base_carbon_pool_dir, f'aboveground_carbon/loss_pixels/standard/{emis_pool_run_date}/')
+# Metadata tag on the AGC in the year of emission tiles with the rows that have carbon in loss pixels
+# (uu.encode_row_ranges()). Gross emissions only read and calculate these rows.
+AGC_emis_year_rows_tag = 'rows_with_loss_carbon'
 
 # Belowground carbon in loss pixels
 pattern_BGC_emis_year = 'Mg_BGC_ha_emis_year'
@@ -672,6 +722,23 @@ gross_emis_n2o_only_all_drivers_biomass_soil_dir = f'{s3_base_dir}gross_emission
 pattern_gross_emis_nodes_biomass_soil = f'gross_emis_decision_tree_nodes_biomass_soil_2001_{loss_years}'
 gross_emis_nodes_biomass_soil_dir = f'{s3_base_dir}gross_emissions/decision_tree_nodes/biomass_soil/standard/{emis_run_date_biomass_soil}/'
 
+# Optional emissions by driver (--emissions-by-driver): one band for each driver (see emissions_driver_bands in
+# calculate_gross_emissions.py). The biomass_only and soil_only versions replace biomass_soil in the pattern and directory.
+pattern_gross_emis_all_gases_by_driver_biomass_soil = f'gross_emis_all_gases_by_driver_Mg_CO2e_ha_biomass_soil_2001_{loss_years}'
+gross_emis_all_gases_by_driver_biomass_soil_dir = f'{s3_base_dir}gross_emissions/by_driver/all_gases/biomass_soil/standard/{emis_run_date_biomass_soil}/'
+
+pattern_gross_emis_co2_only_by_driver_biomass_soil = f'gross_emis_CO2_only_by_driver_Mg_CO2e_ha_biomass_soil_2001_{loss_years}'
+gross_emis_co2_only_by_driver_biomass_soil_dir = f'{s3_base_dir}gross_emissions/by_driver/CO2_only/biomass_soil/standard/{emis_run_date_biomass_soil}/'
+
+pattern_gross_emis_non_co2_by_driver_biomass_soil = f'gross_emis_non_CO2_by_driver_Mg_CO2e_ha_biomass_soil_2001_{loss_years}'
+gross_emis_non_co2_by_driver_biomass_soil_dir = f'{s3_base_dir}gross_emissions/by_driver/non_CO2/biomass_soil/standard/{emis_run_date_biomass_soil}/'
+
+pattern_gross_emis_ch4_only_by_driver_biomass_soil = f'gross_emis_CH4_only_by_driver_Mg_CO2e_ha_biomass_soil_2001_{loss_years}'
+gross_emis_ch4_only_by_driver_biomass_soil_dir = f'{s3_base_dir}gross_emissions/by_driver/CH4_only/biomass_soil/standard/{emis_run_date_biomass_soil}/'
+
+pattern_gross_emis_n2o_only_by_driver_biomass_soil = f'gross_emis_N2O_only_by_driver_Mg_CO2e_ha_biomass_soil_2001_{loss_years}'
+gross_emis_n2o_only_by_driver_biomass_soil_dir = f'{s3_base_dir}gross_emissions/by_driver/N2O_only/biomass_soil/standard/{emis_run_date_biomass_soil}/'
+
 ### Emissions from biomass only: includes all non-soil carbon pools (AGB, BGB, deadwood, and litter)
 
 # Date to include in the output directory
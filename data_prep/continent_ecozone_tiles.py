@@ -54,7 +54,8 @@ def create_continent_ecozone_tiles(tile_id):
         kwargs = cont_eco_raw_src.meta
 
         # Grabs the windows of the tile (stripes) to iterate over the entire tif without running out of memory
-        windows = cont_eco_raw_src.block_windows(1)
+        # Keeps the tile's own windows because pixels without codes are filled with the most common code in each window
+        windows = uu.iterate_windows(cont_eco_raw_src, tile_id, 'create_continent_ecozone_tiles', legacy=True)
 
         # Updates kwargs for the output dataset.
         # Need to update data type to float 32 so that it can handle fractional removals rates
@@ -44,7 +44,8 @@ def create_input_files(tile_id, no_upload):
     kwargs = bor_tem_trop_src.meta
 
     # Grabs the windows of the tile (stripes) to iterate over the entire tif without running out of memory
-    windows = bor_tem_trop_src.block_windows(1)
+    # Keeps the tile's own windows because pixels without codes are filled with the most common code in each window
+    windows = uu.iterate_windows(bor_tem_trop_src, tile_id, 'create_input_files', legacy=True)
 
     # Updates kwargs for the output dataset.
     # Need to update data type to float 32 so that it can handle fractional removal rates
@@ -79,8 +79,8 @@ def create_combined_soil_C(tile_id):
         mangrove_soil_src = rasterio.open(mangrove_soil)
         # Grabs metadata for one of the input tiles, like its location/projection/cellsize
         kwargs = mangrove_soil_src.meta
-        # Grabs the windows of the tile (stripes) to iterate over the entire tif without running out of memory
-        windows = mangrove_soil_src.block_windows(1)
+        # Grabs the windows of the tile (groups of stripes) to iterate over the entire tif without running out of memory
+        windows = uu.iterate_windows(mangrove_soil_src, tile_id, 'create_combined_soil_C')
 
         mineral_soil_src = rasterio.open(mineral_soil)
 
@@ -98,7 +98,7 @@ def create_combined_soil_C(tile_id):
 
         uu.print_log("Replacing mineral soil C pixels with mangrove soil C pixels for", tile_id)
 
-        # Iterates across the windows (1 pixel strips) of the input tiles
+        # Iterates across the windows (groups of 1 pixel strips) of the input tiles
         for idx, window in windows:
 
             mangrove_soil_window = mangrove_soil_src.read(1, window=window)
@@ -52,8 +52,8 @@ def model_extent(tile_id, pattern):
         # Grabs metadata about the tif, like its location/projection/cellsize
         kwargs = tcd_src.meta
 
-        # Grabs the windows of the tile (stripes) so we can iterate over the entire tif without running out of memory
-        windows = tcd_src.block_windows(1)
+        # Grabs the windows of the tile (groups of stripes) so we can iterate over the entire tif without running out of memory
+        windows = uu.iterate_windows(tcd_src, tile_id, 'model_extent')
 
         # Updates kwargs for the output dataset
         kwargs.update(
@@ -64,23 +64,9 @@ def model_extent(tile_id, pattern):
         )
 
         # Checks whether each input tile exists
-        try:
-            mangroves_src = rasterio.open(mangrove)
-            uu.print_log(f'  Mangrove tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'  Mangrove tile not found for {tile_id}')
-
-        try:
-            gain_src = rasterio.open(gain)
-            uu.print_log(f'  Gain tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'  Gain tile not found for {tile_id}')
-
-        try:
-            biomass_src = rasterio.open(biomass)
-            uu.print_log(f'  Biomass tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'  Biomass tile not found for {tile_id}')
+        mangroves_src = uu.open_optional_input(mangrove, tile_id, 'Mangrove')
+        gain_src = uu.open_optional_input(gain, tile_id, 'Gain')
+        biomass_src = uu.open_optional_input(biomass, tile_id, 'Biomass')
 
 
         # Opens the output tile, giving it the metadata of the input tiles
@@ -104,28 +90,17 @@ def model_extent(tile_id, pattern):
 
         uu.check_memory()
 
-        # Iterates across the windows (1 pixel strips) of the input tile
+        # Iterates across the windows (groups of 1 pixel strips) of the input tile
         for idx, window in windows:
 
             # Tries to create a window (array) for each input tile.
             # If the tile does exist, it creates an array of the values in the window
             # If the tile does not exist, it creates an array of 0s.
-            try:
-                mangrove_window = mangroves_src.read(1, window=window).astype('uint8')
-            except UnboundLocalError:
-                mangrove_window = np.zeros((window.height, window.width), dtype=int)
-            try:
-                gain_window = gain_src.read(1, window=window)
-            except UnboundLocalError:
-                gain_window = np.zeros((window.height, window.width), dtype=int)
-            try:
-                biomass_window = biomass_src.read(1, window=window)
-            except UnboundLocalError:
-                biomass_window = np.zeros((window.height, window.width), dtype=int)
-            try:
-                tcd_window = tcd_src.read(1, window=window)
-            except UnboundLocalError:
-                tcd_window = np.zeros((window.height, window.width), dtype=int)
+            # Mangrove biomass is compared as uint8, so only existing mangrove tiles are converted (missing ones are uint8 0s).
+            mangrove_window = uu.read_optional_window(mangroves_src, window, 'uint8').astype('uint8', copy=False)
+            gain_window = uu.read_optional_window(gain_src, window, 'uint8')
+            biomass_window = uu.read_optional_window(biomass_src, window, 'float32')
+            tcd_window = tcd_src.read(1, window=window)
 
             # Array of pixels that have both biomass and tree cover density
             tcd_with_biomass_window = np.where((biomass_window > 0) & (tcd_window > 0), 1, 0)
@@ -82,10 +82,12 @@ if __name__ == '__main__':
                         help='Date of run. Must be format YYYYMMDD.')
     parser.add_argument('--no-upload', '-nu', action='store_true',
                        help='Disables uploading of outputs to s3')
+    uu.add_tile_processing_arguments(parser, memory=False)
     args = parser.parse_args()
     tile_id_list = args.tile_id_list
     run_date = args.run_date
     no_upload = args.NO_UPLOAD
+    uu.set_tile_processing_arguments(args)
 
     # Disables upload to s3 if no AWS credentials are found in environment
     if not uu.check_aws_creds():
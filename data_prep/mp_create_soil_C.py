@@ -311,12 +311,14 @@ if __name__ == '__main__':
     parser.add_argument('--no-upload', '-nu', action='store_true',
                        help='Disables uploading of outputs to s3')
 
+    uu.add_tile_processing_arguments(parser, memory=False)
     args = parser.parse_args()
 
     tile_id_list = args.tile_id_list
     cn.RUN_DATE = args.run_date
     cn.SINGLE_PROCESSOR = args.single_processor
     cn.NO_UPLOAD = args.no_upload
+    uu.set_tile_processing_arguments(args)
 
     # Disables upload to s3 if no AWS credentials are found in environment
     if not uu.check_aws_creds():
@@ -0,0 +1,157 @@
+"""
+This script builds the footprint index of the inputs that many tiles don't have or only have a little data in
+(mangroves, Europe and US removal factors, peat, drivers, etc.).
+For each input, it records which tiles exist on s3 and, from the data masks of the tiles, whether they have data and
+the bounding box of their data. The index is a csv (tile_footprint_index.csv in the tile folder by default) that
+model runs use with --footprint-index. With it, stages don't download tiles that don't exist, don't process tiles
+that have no data in the input that defines their output (e.g., mangrove removal factors), don't open removal factor
+tiles that have no data, and don't read the windows of input tiles that are outside the tiles' data.
+Only inputs that are read as 0s where they don't exist should be in the index.
+Tiles that aren't checked in a run (not in the tile list) keep what an earlier run found or,
+if they haven't been checked yet, are recorded as having data in the whole tile.
+The index should be rebuilt when its inputs change.
+
+python -m data_prep.mp_footprint_index -t std -l 00N_000E,00N_110E
+python -m data_prep.mp_footprint_index -t std -l all
+"""
+
+import argparse
+from functools import partial
+from multiprocessing.pool import Pool
+import os
+
+import constants_and_names as cn
+import universal_util as uu
+
+# Inputs in the footprint index. All of them are read as 0s where they don't exist.
+footprint_index_inputs = {
+    cn.mangrove_biomass_2000_dir: [cn.pattern_mangrove_biomass_2000],
+    cn.annual_gain_AGB_mangrove_dir: [cn.pattern_annual_gain_AGB_mangrove],
+    cn.annual_gain_BGB_mangrove_dir: [cn.pattern_annual_gain_BGB_mangrove],
+    cn.stdev_annual_gain_AGB_mangrove_dir: [cn.pattern_stdev_annual_gain_AGB_mangrove],
+    cn.annual_gain_AGC_BGC_natrl_forest_Europe_dir: [cn.pattern_annual_gain_AGC_BGC_natrl_forest_Europe],
+    cn.stdev_annual_gain_AGC_BGC_natrl_forest_Europe_dir: [cn.pattern_stdev_annual_gain_AGC_BGC_natrl_forest_Europe],
+    cn.annual_gain_AGC_BGC_natrl_forest_US_dir: [cn.pattern_annual_gain_AGC_BGC_natrl_forest_US],
+    cn.stdev_annual_gain_AGC_BGC_natrl_forest_US_dir: [cn.pattern_stdev_annual_gain_AGC_BGC_natrl_forest_US],
+    cn.FIA_regions_processed_dir: [cn.pattern_FIA_regions_processed],
+    cn.planted_forest_type_dir: [cn.pattern_planted_forest_type],
+    cn.peat_mask_dir: [cn.pattern_peat_mask],
+    cn.drivers_processed_dir: [cn.pattern_drivers],
+    cn.TCLF_processed_dir: [cn.pattern_TCLF_processed],
+    cn.ifl_primary_processed_dir: [cn.pattern_ifl_primary]
+}
+
+
+def tile_footprint_bounds(tile_id, pattern):
+    """
+    :param tile_id: tile to be checked, identified by its tile id
+    :param pattern: pattern of the input tile
+    :return: bounding box of the data in the tile (xmin, ymin, xmax, ymax), or None if the tile has no data
+    """
+
+    tile = uu.footprint_tile_name(tile_id, pattern)
+
+    uu.print_log(f'Finding the data footprint of {tile}...')
+    bounds = uu.tile_data_bounds(tile)
+
+    if bounds is None:
+        uu.print_log(f'  Data not found in {tile}')
+
+    return bounds
+
+
+def mp_footprint_index(tile_id_list, index_path):
+    """
+    :param tile_id_list: list of tile ids to check
+    :param index_path: footprint index csv to create or update
+    :return: footprint index csv with the tiles of each input in footprint_index_inputs
+    """
+
+    os.chdir(cn.docker_tile_dir)
+
+    footprint_index = uu.read_footprint_index(index_path)
+
+    # Loss inputs of sensitivity analyses
+    input_dict = dict(footprint_index_inputs)
+    if cn.SENSIT_TYPE == 'legal_Amazon_loss':
+        input_dict[cn.Brazil_annual_loss_processed_dir] = [cn.pattern_Brazil_annual_loss_processed]
+    if cn.SENSIT_TYPE == 'Mekong_loss':
+        input_dict[cn.Mekong_loss_processed_dir] = [cn.pattern_Mekong_loss_processed]
+
+    for source_dir, values in input_dict.items():
+        pattern = values[0]
+
+        # All the tiles of the input on s3 are in the index, even if only some of them are checked for data
+        s3_tile_id_list = uu.tile_list_s3(source_dir, cn.SENSIT_TYPE)
+
+        if tile_id_list == 'all':
+            check_tile_id_list = s3_tile_id_list
+        else:
+            check_tile_id_list = [tile_id for tile_id in tile_id_list if tile_id in s3_tile_id_list]
+
+        uu.print_log(f'{len(s3_tile_id_list)} tiles with pattern {pattern} on s3. Checking {len(check_tile_id_list)} of them for data.')
+
+        # Tiles that aren't checked now keep what was found before, or have data in the whole tile if they haven't been checked
+        previous_bounds = footprint_index.get(pattern, {})
+        pattern_bounds = {}
+        for tile_id in s3_tile_id_list:
+            xmin, ymin, xmax, ymax = uu.coords(tile_id)
+            pattern_bounds[tile_id] = previous_bounds.get(tile_id, (float(xmin), float(ymin), float(xmax), float(ymax)))
+
+        if len(check_tile_id_list) > 0:
+
+            uu.s3_flexible_download(source_dir, pattern, cn.docker_tile_dir, cn.SENSIT_TYPE,
+                                    'all' if tile_id_list == 'all' else check_tile_id_list)
+
+            if cn.SINGLE_PROCESSOR:
+                bounds_list = [tile_footprint_bounds(tile_id, pattern) for tile_id in check_tile_id_list]
+            else:
+                with Pool(cn.count) as pool:
+                    bounds_list = pool.map(partial(tile_footprint_bounds, pattern=pattern), check_tile_id_list)
+
+            pattern_bounds.update(zip(check_tile_id_list, bounds_list))
+
+        footprint_index[pattern] = pattern_bounds
+
+        # Written after each input so that the inputs that have been checked are kept if a later one fails
+        uu.write_footprint_index(index_path, footprint_index)
+
+        empty_count = sum(bounds is None for bounds in pattern_bounds.values())
+        uu.print_log(f'{empty_count} of {len(pattern_bounds)} tiles with pattern {pattern} have no data', "\n")
+
+    uu.print_log(f'Footprint index written to {index_path}')
+
+
+if __name__ == '__main__':
+
+    # The arguments for what kind of model run is being run (standard conditions or a sensitivity analysis),
+    # the tiles to check and where the index is written
+    parser = argparse.ArgumentParser(
+        description='Create an index of which input tiles exist and where they have data')
+    parser.add_argument('--model-type', '-t', required=True,
+                        help=f'{cn.model_type_arg_help}')
+    parser.add_argument('--tile_id_list', '-l', required=True,
+                        help='List of tile ids to use in the model. Should be of form 00N_110E or 00N_110E,00N_120E or all.')
+    parser.add_argument('--footprint-index', '-fi', required=False,
+                        default=os.path.join(cn.docker_tile_dir, cn.footprint_index),
+                        help='Footprint index csv to create or update')
+    parser.add_argument('--single-processor', '-sp', action='store_true',
+                       help='Uses single processing rather than multiprocessing')
+    uu.add_tile_processing_arguments(parser, memory=False)
+    args = parser.parse_args()
+
+    # Sets global variables to the command line arguments
+    cn.SENSIT_TYPE = args.model_type
+    cn.SINGLE_PROCESSOR = args.single_processor
+    uu.set_tile_processing_arguments(args)
+
+    tile_id_list = args.tile_id_list
+
+    # Create the output log
+    uu.initiate_log(tile_id_list)
+
+    # Checks whether the sensitivity analysis and tile_id_list arguments are valid
+    uu.check_sensit_type(cn.SENSIT_TYPE)
+    tile_id_list = uu.tile_id_list_check(tile_id_list)
+
+    mp_footprint_index(tile_id_list=tile_id_list, index_path=os.path.abspath(args.footprint_index))
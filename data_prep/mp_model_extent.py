@@ -12,7 +12,6 @@ python -m data_prep.mp_model_extent -t std -l all
 
 import argparse
 from functools import partial
-import multiprocessing
 import os
 import sys
 
@@ -92,39 +91,19 @@ def mp_model_extent(tile_id_list):
         for tile_id in tile_id_list:
             model_extent.model_extent(tile_id, pattern)
     else:
-        # This configuration of the multiprocessing call is necessary for passing multiple arguments to the main function
-        # It is based on the example here: http://spencerimp.blogspot.com/2015/12/python-multiprocess-with-multiple.html
-        if cn.count == 96:
-            if cn.SENSIT_TYPE == 'biomass_swap':
-                processes = 38
-            else:
-                processes = 45 # 30 processors = 480 GB peak (sporadic decreases followed by sustained increases);
-                # 36 = 550 GB peak; 40 = 590 GB peak; 42 = 631 GB peak; 43 = 690 GB peak; 45 = too high
-        else:
-            processes = 3
-        uu.print_log('Model extent processors=', processes)
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(model_extent.model_extent, pattern=pattern), tile_id_list)
-            pool.close()
-            pool.join()
+        uu.map_tiles(partial(model_extent.model_extent, pattern=pattern), tile_id_list, 'model_extent')
 
 
     # No single-processor versions of these check-if-empty functions
     output_pattern = output_pattern_list[0]
     if cn.count <= 2:  # For local tests
-        processes = 1
-        uu.print_log(f'Checking for empty tiles of {output_pattern} pattern with {output_pattern} processors using light function...')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(uu.check_and_delete_if_empty_light, output_pattern=output_pattern), tile_id_list)
-            pool.close()
-            pool.join()
+        uu.print_log(f'Checking for empty tiles of {output_pattern} pattern using light function...')
+        uu.map_tiles(partial(uu.check_and_delete_if_empty_light, output_pattern=output_pattern), tile_id_list,
+                     'check_and_delete_if_empty_light')
     else:
-        processes = 58  # 50 processors = 620 GB peak; 55 = 640 GB; 58 = 650 GB (continues to increase very slowly several hundred tiles in)
-        uu.print_log(f'Checking for empty tiles of {output_pattern} pattern with {output_pattern} processors...')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(uu.check_and_delete_if_empty, output_pattern=output_pattern), tile_id_list)
-            pool.close()
-            pool.join()
+        uu.print_log(f'Checking for empty tiles of {output_pattern} pattern...')
+        uu.map_tiles(partial(uu.check_and_delete_if_empty, output_pattern=output_pattern), tile_id_list,
+                     'check_and_delete_if_empty')
 
 
     # If no_upload flag is not activated (by choice or by lack of AWS credentials), output is uploaded
@@ -148,6 +127,7 @@ if __name__ == '__main__':
                        help='Disables uploading of outputs to s3')
     parser.add_argument('--single-processor', '-sp', action='store_true',
                        help='Uses single processing rather than multiprocessing')
+    uu.add_tile_processing_arguments(parser)
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
@@ -155,6 +135,7 @@ if __name__ == '__main__':
     cn.RUN_DATE = args.run_date
     cn.NO_UPLOAD = args.no_upload
     cn.SINGLE_PROCESSOR = args.single_processor
+    uu.set_tile_processing_arguments(args)
 
     tile_id_list = args.tile_id_list
 
@@ -133,6 +133,7 @@ if __name__ == '__main__':
                        help='Disables uploading of outputs to s3')
     parser.add_argument('--single-processor', '-sp', action='store_true',
                        help='Uses single processing rather than multiprocessing')
+    uu.add_tile_processing_arguments(parser, memory=False)
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
@@ -142,6 +143,7 @@ if __name__ == '__main__':
     cn.SINGLE_PROCESSOR = args.single_processor
 
     tile_id_list = args.tile_id_list
+    uu.set_tile_processing_arguments(args)
 
     # Disables upload to s3 if no AWS credentials are found in environment
     if not uu.check_aws_creds():
@@ -820,6 +820,7 @@ if __name__ == '__main__':
                        help='Uses single processing rather than multiprocessing')
     parser.add_argument('--process', '-p', required=True,
                         help='Specifies which one-off process to run: 1 = climate zone, IDN/MYS plantations before 2000, tree cover loss drivers, combine IFL and primary forest, 2 = AGB:BGB based on Huang et al, and 3 = Spatial Database of Planted Trees Version 2 Update')
+    uu.add_tile_processing_arguments(parser, memory=False)
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
@@ -829,6 +830,7 @@ if __name__ == '__main__':
 
     tile_id_list = args.tile_id_list
     process = args.process
+    uu.set_tile_processing_arguments(args)
 
     # Disables upload to s3 if no AWS credentials are found in environment
     if not uu.check_aws_creds():
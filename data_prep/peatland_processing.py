@@ -77,8 +77,8 @@ def create_peat_mask_tiles(tile_id):
         # Grabs metadata about the tif, like its location/projection/cellsize
         kwargs = out_tile_no_tag_src.meta
 
-        # Grabs the windows of the tile (stripes) so we can iterate over the entire tif without running out of memory
-        windows = out_tile_no_tag_src.block_windows(1)
+        # Grabs the windows of the tile (groups of stripes) so we can iterate over the entire tif without running out of memory
+        windows = uu.iterate_windows(out_tile_no_tag_src, tile_id, 'create_peat_mask_tiles')
 
         # Updates kwargs for the output dataset
         kwargs.update(
@@ -99,7 +99,7 @@ def create_peat_mask_tiles(tile_id):
         out_tile_tagged.update_tags(
             extent='Full extent of input datasets')
 
-        # Iterates across the windows (1 pixel strips) of the input tile
+        # Iterates across the windows (groups of 1 pixel strips) of the input tile
         for idx, window in windows:
 
             peat_mask_window = out_tile_no_tag_src.read(1, window=window)
@@ -75,7 +75,8 @@ def create_climate_zone_tiles(tile_id):
     kwargs = climate_zone_src.meta
 
     # Grabs the windows of the tile (stripes) to iterate over the entire tif without running out of memory
-    windows = climate_zone_src.block_windows(1)
+    # Keeps the tile's own windows because pixels without codes are filled with the most common code in each window
+    windows = uu.iterate_windows(climate_zone_src, tile_id, 'create_climate_zone_tiles', legacy=True)
 
     # Updates kwargs for the output dataset.
     kwargs.update(
@@ -1,21 +1,646 @@
 """
-Function to call C++ executable that calculates gross emissions
+Functions to calculate gross emissions, either with the gross emissions C++ decision tree as a Python extension
+(calc_gross_emissions_extension.so) or the NumPy decision tree (calculate_gross_emissions_numpy.py) on rasterio windows,
+or by calling the C++ executable for each tile
 """
 
+import ctypes
 import datetime
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import rasterio
 
 import constants_and_names as cn
 import universal_util as uu
 
-def calc_emissions(tile_id, emitted_pools, folder):
+from . import calculate_gross_emissions_numpy
+
+# Names of the gross emissions extension source and the shared library compiled from it
+emissions_extension_cpp = 'calc_gross_emissions_extension.cpp'
+emissions_extension_so = 'calc_gross_emissions_extension.so'
+
+# Whether the biomass pools (AGC, BGC, deadwood, litter) and soil pools (soil and peat) are emitted,
+# for each emitted_pools option
+emitted_pools_flags = {'biomass_soil': (1, 1), 'biomass_only': (1, 0), 'soil_only': (0, 1)}
+
+# Data types of the extension's inputs, in order: AGC, BGC, deadwood, litter, soil, loss, burn, drivers, peat,
+# IFL/primary, ecozone, climate zone and plantation type. These are the data types of the input tiles, so the
+# categorical inputs are passed to the C++ without being converted to float32.
+emissions_input_dtypes = ['float32', 'float32', 'float32', 'float32', 'uint16', 'uint8', 'uint8', 'uint8', 'uint8',
+                          'uint8', 'int16', 'uint8', 'uint8']
+
+# Columns of the extension's emission factor table: the categorical inputs (0 is every value that doesn't have its own
+# factors) and the factors for them. Peat drainage is annual because the extension multiplies it by the years since loss.
+emission_factor_table_columns = ['driver', 'ecozone', 'ifl_primary', 'plantation', 'climate', 'Cf', 'Gef_CO2',
+                                 'Gef_CH4', 'Gef_N2O', 'peatburn_CO2_only', 'peatburn_CH4_only',
+                                 'peat_drain_annual_CO2_only', 'peat_drain_annual_CH4_only',
+                                 'peat_drain_annual_N2O_only', 'flu']
+
+# Columns of the gross emissions summary: the emitted pools option, decision tree node, driver (0 is no driver or
+# a driver code that the decision tree doesn't use, as in the emission factor table) and loss year of the pixels,
+# then the number and area of the pixels and their emissions (Mg CO2e, i.e. Mg CO2e/ha times the pixel area) for each gas
+emissions_summary_columns = ['emitted_pools', 'node_code', 'driver', 'loss_year', 'pixels', 'area_ha',
+                             'all_gases_Mg_CO2e', 'CO2_only_Mg_CO2e', 'non_CO2_Mg_CO2e', 'CH4_only_Mg_CO2e',
+                             'N2O_only_Mg_CO2e']
+
+# Bands of the emissions by driver tiles (--emissions-by-driver): the driver code and name for each band, in order.
+# Each pixel's emissions are in the band for its driver, like the per-driver outputs (outdata_permanent_agriculture_*
+# etc.) that the decision tree adds up to get the emissions from all drivers. Codes that the decision tree doesn't use
+# are no driver.
+emissions_driver_bands = [(1, 'permanent_agriculture'), (2, 'hard_commodities'), (3, 'shifting_cultivation'),
+                          (4, 'forest_management'), (5, 'wildfire'), (6, 'settlements_infrastructure'),
+                          (7, 'other_natural_disturbances'), (0, 'no_driver')]
+
+# C++ executable for each emitted_pools option
+emissions_executable_cpp = {'biomass_soil': 'calc_gross_emissions_generic.cpp',
+                            'biomass_only': 'calc_gross_emissions_biomass_only.cpp',
+                            'soil_only': 'calc_gross_emissions_soil_only.cpp'}
+
+# Files that every emissions C++ file includes, so they are part of each build's hash
+emissions_cpp_includes = ['constants.h', 'equations.cpp', 'flu_val.cpp']
+
+# Compiler flags for each emissions build profile.
+# default is how the emissions C++ has always been compiled (no optimization).
+# release is optimized but doesn't contract multiplications and additions into fused multiply-adds,
+# so its outputs are bit-identical to the default build's.
+# It also doesn't use -march=native, so that cached builds can be used on other instance types.
+emissions_build_profiles = {'default': [], 'release': ['-O3', '-ffp-contract=off']}
+
+
+def compiler_version():
+    """
+    :return: first line of the C++ compiler's version, e.g. c++ (Ubuntu 11.4.0-1ubuntu1~22.04) 11.4.0
+    """
+
+    return subprocess.check_output(['c++', '--version']).decode('utf-8').splitlines()[0]
+
+
+def emissions_build_hash(cpp, profile):
+    """
+    Hashes everything that changes the compiled emissions C++: the C++ files, the compiler and the build profile
+    :param cpp: emissions C++ file in cn.c_emis_compile_dst
+    :param profile: emissions build profile (key of emissions_build_profiles)
+    :return: hex digest
+    """
+
+    build_hash = hashlib.sha256()
+
+    for source in [cpp] + emissions_cpp_includes:
+        with open(os.path.join(cn.c_emis_compile_dst, source), 'rb') as source_file:
+            build_hash.update(source_file.read())
+
+    build_hash.update(compiler_version().encode('utf-8'))
+    build_hash.update(' '.join([profile] + emissions_build_profiles[profile]).encode('utf-8'))
+
+    return build_hash.hexdigest()
+
+
+def build_emissions_cpp(cpp, output, compile_args, link_args):
+    """
+    Compiles emissions C++ with the build profile in cn.EMISSIONS_BUILD_PROFILE, unless the same build is already in the
+    build cache (cn.c_emis_compile_dst/build_cache). Builds are cached under the hash of everything that goes into them.
+    The build is then copied to where the emissions expect it (output).
+    :param cpp: emissions C++ file in cn.c_emis_compile_dst
+    :param output: name of the compiled file in cn.c_emis_compile_dst
+    :param compile_args: compiler arguments that go before the C++ file (besides the build profile's flags)
+    :param link_args: compiler arguments that go after the compiled file
+    :return: path of the compiled file
+    """
+
+    profile = cn.EMISSIONS_BUILD_PROFILE
+
+    if profile not in emissions_build_profiles:
+        uu.exception_log(f'Invalid emissions build profile {profile}. Please choose {" or ".join(emissions_build_profiles)}.')
+
+    build_hash = emissions_build_hash(cpp, profile)[:16]
+
+    build_cache_dir = os.path.join(cn.c_emis_compile_dst, 'build_cache')
+    os.makedirs(build_cache_dir, exist_ok=True)
+
+    stem, extension = os.path.splitext(output)
+    cached_build = os.path.join(build_cache_dir, f'{stem}_{profile}_{build_hash}{extension}')
+
+    if os.path.exists(cached_build):
+        uu.print_log(f'Using cached {profile} build {build_hash} of {cpp}')
+
+    else:
+        uu.print_log(f'Compiling {profile} build {build_hash} of {cpp}...')
+
+        # Compiles to a temporary name so that an interrupted compile doesn't end up in the cache
+        cmd = ['c++'] + compile_args + emissions_build_profiles[profile] + \
+              [os.path.join(cn.c_emis_compile_dst, cpp), '-o', f'{cached_build}.tmp'] + link_args
+        uu.log_subprocess_output_full(cmd)
+
+        if not os.path.exists(f'{cached_build}.tmp'):
+            uu.exception_log(f'{cpp} did not compile')
+
+        os.replace(f'{cached_build}.tmp', cached_build)
+
+    # Replaces rather than overwrites the compiled file, in case a previous build of it is running
+    output_path = os.path.join(cn.c_emis_compile_dst, output)
+    shutil.copy2(cached_build, f'{output_path}.tmp')
+    os.replace(f'{output_path}.tmp', output_path)
+
+    uu.print_log(f'  Emissions build used for {output}: {profile} profile ({" ".join(emissions_build_profiles[profile]) or "no flags"}), '
+                 f'hash {build_hash}, compiler {compiler_version()}')
+
+    return output_path
+
+
+def compile_emissions_executable(emitted_pools):
+    """
+    Compiles the gross emissions C++ executable for the emitted_pools option
+    :param emitted_pools: biomass_only, soil_only, or biomass_soil
+    :return: path of the executable, in the same folder as the emissions C++
+    """
+
+    cpp = emissions_executable_cpp[emitted_pools]
+
+    return build_emissions_cpp(cpp, cpp.replace('.cpp', '.exe'), [], ['-lgdal'])
+
+
+def compile_emissions_extension():
+    """
+    Compiles the gross emissions C++ decision tree as a shared library that calc_emissions_window() calls
+    :return: path of the shared library, in the same folder as the emissions C++
+    """
+
+    return build_emissions_cpp(emissions_extension_cpp, emissions_extension_so, ['-shared', '-fPIC'], [])
+
+
+def load_emissions_extension():
+    """
+    Loads the gross emissions extension from compile_emissions_extension() and declares the arguments of its window function
+    :return: ctypes library
+    """
+
+    emissions_extension = ctypes.CDLL(os.path.join(cn.c_emis_compile_dst, emissions_extension_so))
+
+    # Number of pixels, whether biomass and soil pools are emitted, 13 inputs (in the types of emissions_input_dtypes),
+    # 5 emissions outputs and the nodes output
+    emissions_extension.calc_gross_emissions_window.argtypes = \
+        [ctypes.c_long, ctypes.c_int] + \
+        [np.ctypeslib.ndpointer(dtype=np.intc, ndim=1, flags='C_CONTIGUOUS')] * 2 + \
+        [np.ctypeslib.ndpointer(dtype=dtype, ndim=1, flags='C_CONTIGUOUS') for dtype in emissions_input_dtypes] + \
+        [ctypes.POINTER(ctypes.POINTER(ctypes.c_float))] + \
+        [np.ctypeslib.ndpointer(dtype=np.uint16, ndim=1, flags='C_CONTIGUOUS')]
+    emissions_extension.calc_gross_emissions_window.restype = None
+
+    emissions_extension.emission_factor_table_rows.argtypes = []
+    emissions_extension.emission_factor_table_rows.restype = ctypes.c_int
+    emissions_extension.copy_emission_factor_table.argtypes = \
+        [np.ctypeslib.ndpointer(dtype=np.float32, ndim=2, flags='C_CONTIGUOUS')]
+    emissions_extension.copy_emission_factor_table.restype = None
+
+    return emissions_extension
+
+
+def emission_factor_table(emissions_extension):
+    """
+    Emission factors that the gross emissions extension looks up for each pixel's drivers, ecozone, IFL/primary,
+    plantation type and climate zone. These come from def_variables (equations.cpp) and flu_val (flu_val.cpp).
+    :param emissions_extension: library from load_emissions_extension()
+    :return: dataframe with a row for each combination of the categorical inputs
+    """
+
+    table = np.empty((emissions_extension.emission_factor_table_rows(), len(emission_factor_table_columns)),
+                     dtype='float32')
+    emissions_extension.copy_emission_factor_table(table)
+
+    emission_factors = pd.DataFrame(table, columns=emission_factor_table_columns)
+    categorical_columns = emission_factor_table_columns[:5]
+    emission_factors[categorical_columns] = emission_factors[categorical_columns].astype('uint8')
+
+    return emission_factors
+
+
+def write_emission_factor_table(emission_factors, out_csv):
+    """
+    Writes an emission factor table (from the extension or the NumPy decision tree) to a csv so that it can be checked
+    against the emissions model flowchart
+    :param emission_factors: dataframe from emission_factor_table() or calculate_gross_emissions_numpy.emission_factor_table()
+    :param out_csv: path of the csv
+    :return: None
+    """
+
+    emission_factors.to_csv(out_csv, index=False)
+
+    uu.print_log(f'Emission factor table written to {out_csv}')
+
+
+def calc_emissions_window(emissions_extension, emitted_pools, agc_window, bgc_window, deadwood_window, litter_window,
+                          soil_window, loss_window, burn_window, drivers_window, peat_window, ifl_primary_window,
+                          ecozone_window, climate_window, plantation_window):
+    """
+    Calculates gross emissions for a window with the C++ decision tree
+    :param emissions_extension: library from load_emissions_extension()
+    :param emitted_pools: biomass_only, soil_only, or biomass_soil, or several of them separated by commas
+    :param agc_window: array representing aboveground carbon density in the year of loss.
+        The other inputs are arrays with the same shape for the other carbon pools and the emissions inputs.
+    :return: list of arrays with the window's shape for each emitted pools option, in order: all gases, CO2 only,
+        non-CO2, CH4 only, N2O only (Mg CO2e/ha) and decision tree nodes
+    """
+
+    # Inputs that are already in the extension's data types (i.e. tiles in their usual data types) aren't copied.
+    # The inputs are only prepared once for all emitted pools options.
+    input_windows = [np.ascontiguousarray(input_window, dtype=dtype).ravel() for input_window, dtype in
+                     zip([agc_window, bgc_window, deadwood_window, litter_window, soil_window, loss_window, burn_window,
+                          drivers_window, peat_window, ifl_primary_window, ecozone_window, climate_window,
+                          plantation_window], emissions_input_dtypes)]
+
+    # All the emitted pools options are calculated in one call, which goes through the decision tree once for each pixel
+    pools_list = emitted_pools.split(',')
+    biomass_pools, soil_pools = [np.array(flags, dtype=np.intc) for flags in
+                                 zip(*[emitted_pools_flags[pools] for pools in pools_list])]
+
+    emissions_windows = [np.empty(agc_window.size, dtype='float32') for i in range(5 * len(pools_list))]
+    emissions_pointers = (ctypes.POINTER(ctypes.c_float) * len(emissions_windows))(
+        *[emissions_window.ctypes.data_as(ctypes.POINTER(ctypes.c_float)) for emissions_window in emissions_windows])
+    node_window = np.empty(agc_window.size, dtype='uint16')
+
+    emissions_extension.calc_gross_emissions_window(agc_window.size, len(pools_list), biomass_pools, soil_pools,
+                                                    *input_windows, emissions_pointers, node_window)
+
+    # The decision tree nodes are the same for all the emitted pools options
+    output_windows = []
+
+    for i in range(len(pools_list)):
+        output_windows.extend([output_window.reshape(agc_window.shape) for output_window in
+                               emissions_windows[5 * i:5 * (i + 1)] + [node_window]])
+
+    return output_windows
+
+
+def emissions_output_patterns(emitted_pools):
+    """
+    Output patterns for the emitted pools options, in the order that calc_emissions_window() returns the outputs
+    :param emitted_pools: biomass_only, soil_only, or biomass_soil, or several of them separated by commas
+    :return: list of 6 output patterns for each emitted pools option
+    """
+
+    output_pattern_list = []
+
+    for pools in emitted_pools.split(','):
+
+        output_pattern_list.extend([pattern.replace('biomass_soil', pools) for pattern in
+                                    [cn.pattern_gross_emis_all_gases_all_drivers_biomass_soil,
+                                     cn.pattern_gross_emis_co2_only_all_drivers_biomass_soil,
+                                     cn.pattern_gross_emis_non_co2_all_drivers_biomass_soil,
+                                     cn.pattern_gross_emis_ch4_only_all_drivers_biomass_soil,
+                                     cn.pattern_gross_emis_n2o_only_all_drivers_biomass_soil,
+                                     cn.pattern_gross_emis_nodes_biomass_soil]])
+
+    if cn.SENSIT_TYPE != 'std':
+        output_pattern_list = uu.alter_patterns(cn.SENSIT_TYPE, output_pattern_list)
+
+    return output_pattern_list
+
+
+def emissions_by_driver_patterns(emitted_pools):
     """
-    Calls the c++ script to calculate gross emissions
+    Output patterns of the emissions by driver tiles (all gases, CO2 only, non-CO2, CH4 only and N2O only)
+    for the emitted pools options, in the same order as the emissions outputs of emissions_output_patterns()
+    :param emitted_pools: biomass_only, soil_only, or biomass_soil, or several of them separated by commas
+    :return: list of 5 output patterns for each emitted pools option
+    """
+
+    output_pattern_list = []
+
+    for pools in emitted_pools.split(','):
+
+        output_pattern_list.extend([pattern.replace('biomass_soil', pools) for pattern in
+                                    [cn.pattern_gross_emis_all_gases_by_driver_biomass_soil,
+                                     cn.pattern_gross_emis_co2_only_by_driver_biomass_soil,
+                                     cn.pattern_gross_emis_non_co2_by_driver_biomass_soil,
+                                     cn.pattern_gross_emis_ch4_only_by_driver_biomass_soil,
+                                     cn.pattern_gross_emis_n2o_only_by_driver_biomass_soil]])
+
+    if cn.SENSIT_TYPE != 'std':
+        output_pattern_list = uu.alter_patterns(cn.SENSIT_TYPE, output_pattern_list)
+
+    return output_pattern_list
+
+
+def write_emissions_by_driver_window(dst, emissions_window, drivers_window, window):
+    """
+    Writes a window of emissions from all drivers to the emissions by driver tile, in the band for each pixel's driver
+    :param dst: emissions by driver dataset with a band for each of emissions_driver_bands
+    :param emissions_window: array of emissions from all drivers for one gas
+    :param drivers_window: array of drivers for the window
+    :param window: rasterio window to write
+    :return: None
+    """
+
+    drivers = np.where(drivers_window < calculate_gross_emissions_numpy.n_driver_classes, drivers_window, 0)
+
+    for band, (driver, driver_name) in enumerate(emissions_driver_bands, start=1):
+        dst.write(np.where(drivers == driver, emissions_window, 0), band, window=window)
+
+
+def summarize_emissions_window(emitted_pools, output_windows, drivers_window, loss_window, pixel_area):
+    """
+    Area-weighted sums of a window's gross emissions by decision tree node, driver and loss year, so that summary
+    tables don't have to be made by reading the emissions tiles again
+    :param emitted_pools: biomass_only, soil_only, or biomass_soil, or several of them separated by commas
+    :param output_windows: outputs of calc_emissions_window() for the window
+    :param drivers_window: array of drivers for the window
+    :param loss_window: array of loss years for the window
+    :param pixel_area: area (m2) of the pixels in each row of the window, from uu.pixel_area_rows()
+    :return: dataframe with emissions_summary_columns and a row for each combination of node, driver and loss year
+        in the window, for each emitted pools option
+    """
+
+    n_driver_classes = calculate_gross_emissions_numpy.n_driver_classes
+    n_loss_years = 256   # Loss years are uint8
+
+    pixel_area_ha = pixel_area.ravel() / cn.m2_per_ha
+
+    summaries = []
+
+    for i, pools in enumerate(emitted_pools.split(',')):
+
+        # Only pixels with emissions have a decision tree node. They are gathered once by their position in the window,
+        # which is faster than masking each input with a boolean array because few pixels in a window have emissions.
+        node_window = output_windows[i * 6 + 5]
+        emitting = np.flatnonzero(node_window)
+        if emitting.size == 0:
+            continue
+
+        drivers = np.take(drivers_window, emitting).astype('int64')
+        drivers = np.where(drivers < n_driver_classes, drivers, 0)
+        emitting_area_ha = pixel_area_ha[emitting // node_window.shape[1]]
+
+        # Each combination of node, driver and loss year is one key, so all sums are bincounts of the same keys.
+        # Node codes have at most 3 digits, so there are few enough keys to count all of them rather than sorting
+        # the pixels by key.
+        keys = (np.take(node_window, emitting).astype('int64') * n_driver_classes + drivers) * n_loss_years + \
+               np.take(loss_window, emitting).astype('int64')
+
+        pixels = np.bincount(keys)
+        window_keys = np.flatnonzero(pixels)
+
+        summary = pd.DataFrame({'emitted_pools': pools,
+                                'node_code': window_keys // (n_driver_classes * n_loss_years),
+                                'driver': window_keys // n_loss_years % n_driver_classes,
+                                'loss_year': window_keys % n_loss_years,
+                                'pixels': pixels[window_keys],
+                                'area_ha': np.bincount(keys, weights=emitting_area_ha)[window_keys]})
+
+        for column, emissions_window in zip(emissions_summary_columns[6:], output_windows[i * 6:i * 6 + 5]):
+            summary[column] = np.bincount(keys, weights=np.take(emissions_window, emitting) * emitting_area_ha)[window_keys]
+
+        summaries.append(summary)
+
+    return merge_emissions_summaries(summaries)
+
+
+def merge_emissions_summaries(summaries):
+    """
+    Adds up gross emissions summaries (e.g. of the windows of a tile, or of all tiles) by emitted pools option,
+    node, driver and loss year
+    :param summaries: list of dataframes from summarize_emissions_window() or merge_emissions_summaries()
+    :return: dataframe with emissions_summary_columns
+    """
+
+    summaries = [summary for summary in summaries if len(summary) > 0]
+    if not summaries:
+        return pd.DataFrame(columns=emissions_summary_columns)
+
+    return pd.concat(summaries).groupby(emissions_summary_columns[:4], as_index=False).sum()
+
+
+def write_emissions_summary(tile_id_list, out_csv):
+    """
+    Merges the gross emissions summaries of the tiles (written by calc_emissions_extension()) into one table for the run
+    :param tile_id_list: list of tile ids in the run
+    :param out_csv: path of the merged csv
+    :return: None
+    """
+
+    summaries = []
+
+    for tile_id in tile_id_list:
+        tile_csv = f'{tile_id}_{cn.pattern_gross_emis_summary}.csv'
+        if os.path.exists(tile_csv):
+            summaries.append(pd.read_csv(tile_csv))
+        else:
+            uu.print_log(f'  No gross emissions summary for {tile_id}')
+
+    summary = merge_emissions_summaries(summaries)
+    summary.to_csv(out_csv, index=False)
+
+    uu.print_log(f'Gross emissions summary of {len(summaries)} tiles written to {out_csv}')
+
+
+def calc_emissions_extension(tile_id, emitted_pools, threads=1):
+    """
+    Calculates gross emissions for a tile with the gross emissions C++ extension on windows of the input tiles,
+    or with the NumPy decision tree if cn.EMISSIONS_ENGINE is numpy.
+    All of the emitted pools options are calculated in the same pass through the inputs.
+    The windows can be split across threads (calc_emissions_extension_rows()), which read the inputs with their own
+    datasets and take turns writing each output.
+    The emissions are also summed by node, driver and loss year as they are calculated (summarize_emissions_window())
+    and the tile's summary is written to {tile_id}_{cn.pattern_gross_emis_summary}.csv.
+    :param tile_id: tile to be processed, identified by its tile id
+    :param emitted_pools: biomass_only, soil_only, or biomass_soil, or several of them separated by commas
+    :param threads: number of threads that calculate windows of the tile at the same time
+    :return: 6 tiles for each emitted pools option, the same as calc_emissions(), and the tile's emissions summary.
+        With cn.EMISSIONS_BY_DRIVER, also 5 emissions by driver tiles for each emitted pools option.
+    """
+    # Carbon pools in the year of loss. Only biomass_soil is run for sensitivity analyses.
+    AGC_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_AGC_emis_year)
+    BGC_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_BGC_emis_year)
+    deadwood_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_deadwood_emis_year_2000)
+    litter_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_litter_emis_year_2000)
+    soil_emis_year = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_soil_C_emis_year_2000)
+
+    # Same loss tiles as the C++ executables
+    if cn.SENSIT_TYPE == 'legal_Amazon_loss':
+        loss_year = f'{tile_id}_{cn.pattern_Brazil_annual_loss_processed}.tif'
+    else:
+        loss_year = f'{cn.pattern_loss}_{tile_id}.tif'
+
+    uu.print_log(f'  Reading input files for {tile_id}...')
+
+    # Carbon pools and loss should exist for every tile with emissions
+    AGC_emis_year_src = rasterio.open(AGC_emis_year)
+    BGC_emis_year_src = rasterio.open(BGC_emis_year)
+    deadwood_emis_year_src = rasterio.open(deadwood_emis_year)
+    litter_emis_year_src = rasterio.open(litter_emis_year)
+    loss_year_src = rasterio.open(loss_year)
+
+    # Inputs that don't exist for every tile are 0s, like the blank tiles made for the C++ executables
+    soil_emis_year_src = uu.open_optional_input(soil_emis_year, tile_id, 'Soil C emission year')
+    burn_src = uu.open_optional_input(f'{tile_id}_{cn.pattern_TCLF_processed}.tif', tile_id, 'Tree cover loss due to fires')
+    drivers_src = uu.open_optional_input(f'{tile_id}_{cn.pattern_drivers}.tif', tile_id, 'Drivers')
+    peat_src = uu.open_optional_input(f'{tile_id}_{cn.pattern_peat_mask}.tif', tile_id, 'Peat')
+    ifl_primary_src = uu.open_optional_input(f'{tile_id}_{cn.pattern_ifl_primary}.tif', tile_id, 'IFL/primary forest')
+    ecozone_src = uu.open_optional_input(f'{tile_id}_{cn.pattern_bor_tem_trop_processed}.tif', tile_id, 'Boreal/temperate/tropical')
+    climate_src = uu.open_optional_input(f'{tile_id}_{cn.pattern_climate_zone}.tif', tile_id, 'Climate zone')
+    plantation_src = uu.open_optional_input(f'{tile_id}_{cn.pattern_planted_forest_type}.tif', tile_id, 'Plantation type')
+
+    # The input tiles in the order that calc_emissions_window() takes them. Missing optional inputs are None.
+    input_src_list = [AGC_emis_year_src, BGC_emis_year_src, deadwood_emis_year_src, litter_emis_year_src,
+                      soil_emis_year_src, loss_year_src, burn_src, drivers_src, peat_src, ifl_primary_src,
+                      ecozone_src, climate_src, plantation_src]
+
+    # Grabs metadata for one of the input tiles, like its location/projection/cellsize
+    kwargs = AGC_emis_year_src.meta
+    kwargs.update(driver='GTiff', count=1, compress='DEFLATE', nodata=0, dtype='float32')
+    windows = uu.iterate_windows(AGC_emis_year_src, tile_id, f'calc_emissions_{emitted_pools.replace(",", "_")}',
+                                 threads=threads)
+
+    # Output files for each emitted pools option: emissions (Mg CO2e/ha) for all gases, CO2 only, non-CO2, CH4 only,
+    # N2O only, and decision tree nodes
+    dst_list = []
+    for i, pattern in enumerate(emissions_output_patterns(emitted_pools)):
+        kwargs.update(dtype='uint16' if i % 6 == 5 else 'float32')
+        dst_list.append(rasterio.open(f'{tile_id}_{pattern}.tif', 'w', **kwargs))
+
+    # Emissions by driver tiles for each gas and emitted pools option, with a band for each driver.
+    # They come after the other outputs in dst_list.
+    if cn.EMISSIONS_BY_DRIVER:
+        kwargs.update(dtype='float32', count=len(emissions_driver_bands), interleave='band')
+        for pattern in emissions_by_driver_patterns(emitted_pools):
+            dst = rasterio.open(f'{tile_id}_{pattern}.tif', 'w', **kwargs)
+            for band, (driver, driver_name) in enumerate(emissions_driver_bands, start=1):
+                dst.set_band_description(band, driver_name)
+            dst_list.append(dst)
+
+    # Both decision trees take the same windows and return the same outputs
+    if cn.EMISSIONS_ENGINE == 'numpy':
+        calc_window = calculate_gross_emissions_numpy.calc_emissions_window
+    else:
+        calc_window = partial(calc_emissions_window, load_emissions_extension())
+
+    uu.print_log(f'  Creating gross emissions for {tile_id} with emitted pools {emitted_pools} on {threads} thread(s)...')
+
+    # Rows with carbon in loss pixels, indexed when the carbon pools were created. Only these rows can have emissions.
+    # Carbon pools made before the index was added don't have it, so all of their rows are calculated.
+    loss_carbon_rows = AGC_emis_year_src.tags().get(cn.AGC_emis_year_rows_tag)
+    if loss_carbon_rows is None:
+        uu.print_log(f'    No row index for {AGC_emis_year}. Calculating all rows.')
+        loss_carbon_rows = np.ones(AGC_emis_year_src.height, dtype=bool)
+    else:
+        loss_carbon_rows = uu.decode_row_ranges(loss_carbon_rows, AGC_emis_year_src.height)
+        uu.print_log(f'    {np.count_nonzero(loss_carbon_rows)} of {AGC_emis_year_src.height} rows have carbon in loss pixels')
+
+    uu.check_memory()
+
+    if threads == 1:
+        summary = calc_emissions_extension_rows(calc_window, emitted_pools, input_src_list, dst_list, loss_carbon_rows,
+                                                windows)
+
+    else:
+        # Each thread opens its own datasets for the inputs because rasterio datasets can't be read by several threads
+        # at once. The threads take turns getting the next window and writing each output.
+        # The C++ and rasterio release the GIL, so the threads calculate and read windows at the same time.
+        window_lock = threading.Lock()
+        dst_locks = [threading.Lock() for dst in dst_list]
+
+        def thread_rows():
+            thread_src_list = [None if src is None else rasterio.open(src.name) for src in input_src_list]
+            try:
+                return calc_emissions_extension_rows(calc_window, emitted_pools, thread_src_list, dst_list,
+                                                     loss_carbon_rows, windows, window_lock, dst_locks)
+            finally:
+                for src in thread_src_list:
+                    if src is not None:
+                        src.close()
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = [executor.submit(thread_rows) for thread in range(threads)]
+            summary = merge_emissions_summaries([future.result() for future in futures])
+
+    for dst in dst_list:
+        dst.close()
+
+    summary.to_csv(f'{tile_id}_{cn.pattern_gross_emis_summary}.csv', index=False)
+
+
+def calc_emissions_extension_rows(calc_window, emitted_pools, input_src_list, dst_list, loss_carbon_rows,
+                                  windows, window_lock=None, dst_locks=None):
+    """
+    Calculates gross emissions for windows of a tile until there are no windows left.
+    Several threads can run this on the same windows and outputs, each with its own input datasets.
+    :param calc_window: calc_emissions_window() with the extension, or calculate_gross_emissions_numpy.calc_emissions_window()
+    :param emitted_pools: biomass_only, soil_only, or biomass_soil, or several of them separated by commas
+    :param input_src_list: input datasets in the order that calc_emissions_window() takes them (None for missing inputs)
+    :param dst_list: output datasets in the order that calc_emissions_window() returns them, followed by the
+        emissions by driver datasets (if any) in the order of emissions_by_driver_patterns()
+    :param loss_carbon_rows: boolean array of the tile's rows that have carbon in loss pixels
+    :param windows: (index, window) pairs from uu.iterate_windows()
+    :param window_lock: lock for getting the next window when several threads share windows
+    :param dst_locks: lock for each output dataset when several threads share the outputs
+    :return: emissions summary of the windows that this calculated, from merge_emissions_summaries()
+    """
+
+    window_lock = window_lock or threading.Lock()
+    dst_locks = dst_locks or [threading.Lock() for dst in dst_list]
+
+    summaries = []
+
+    # Iterates across the windows (groups of 1 pixel strips) of the input tiles
+    while True:
+
+        with window_lock:
+            idx, window = next(windows, (None, None))
+        if window is None:
+            break
+
+        # Only the rows from the first to the last row with carbon in loss pixels are read and calculated.
+        # Windows without any aren't read at all.
+        # Rows that aren't written are filled with the nodata value (0) by GDAL when the output tiles are closed.
+        window_rows = np.flatnonzero(loss_carbon_rows[window.row_off:window.row_off + window.height])
+        if window_rows.size == 0:
+            continue
+
+        window = rasterio.windows.Window(window.col_off, window.row_off + window_rows[0],
+                                         window.width, window_rows[-1] - window_rows[0] + 1)
+
+        # Missing optional inputs are 0s in the data types that calc_emissions_window() converts the inputs to
+        input_windows = [uu.read_optional_window(src, window, dtype) for src, dtype in zip(input_src_list, emissions_input_dtypes)]
+        output_windows = calc_window(emitted_pools, *input_windows)
+
+        # Drivers and loss year are the 8th and 6th inputs
+        summaries.append(summarize_emissions_window(emitted_pools, output_windows, input_windows[7], input_windows[5],
+                                                    uu.pixel_area_rows(input_src_list[0].transform, window)))
+
+        # Writes the output windows to the output files
+        for dst, dst_lock, output_window in zip(dst_list, dst_locks, output_windows):
+            with dst_lock:
+                dst.write_band(1, output_window, window=window)
+
+        # Writes the emissions outputs (not the nodes) to the emissions by driver files, if there are any
+        emissions_windows = [output_window for i, output_window in enumerate(output_windows) if i % 6 != 5]
+        for dst, dst_lock, emissions_window in zip(dst_list[len(output_windows):], dst_locks[len(output_windows):],
+                                                   emissions_windows):
+            with dst_lock:
+                write_emissions_by_driver_window(dst, emissions_window, input_windows[7], window)
+
+    return merge_emissions_summaries(summaries)
+
+
+def calc_emissions(tile_id, emitted_pools, folder, threads=1):
+    """
+    Calculates gross emissions with the C++ decision tree, either as an extension on rasterio windows
+    or by calling the C++ executable, or with the NumPy decision tree on rasterio windows (cn.EMISSIONS_ENGINE)
     :param tile_id: tile to be processed, identified by its tile id
     :param emitted_pools: Whether emissions from biomass only, emissions from soil only, or emissions from biomass and soil is calculated.
-        Options are: biomass_only, soil_only, or biomass_soil. 
+        Options are: biomass_only, soil_only, or biomass_soil, or several of them separated by commas
+        (e.g. biomass_soil,biomass_only). The extension calculates all of them in one pass through the inputs.
                      biomass_only includes not only AGC and BGC but also deadwood C and litter C (i.e. all non-soil pools)
     :param folder:
-    :return: 6 tiles -
+    :param threads: number of threads that the extension splits the tile's windows across (not used by the executables)
+    :return: 6 tiles for each emitted pools option -
         1. all gases (CO2, CH4 and N2O from all drivers);
         2. CO2 emissions from all drivers;
         3. non-CO2 emissions from all drivers (CH4 and N2O from all drivers);
@@ -31,25 +656,39 @@ def calc_emissions(tile_id, emitted_pools, folder):
 
     uu.check_memory()
 
-    # Runs the correct c++ script given the emitted_pools (biomass_only, soil_only, or biomass+soil) and model type selected.
+    # Checks the emitted_pools and model type combination, which is the same for both engines.
     # The other sensitivity analyses and the standard model all use the same gross emissions C++ script.
-    if (emitted_pools == 'biomass_only') & (cn.SENSIT_TYPE == 'std'):
-        cmd = [f'{cn.c_emis_compile_dst}/calc_gross_emissions_biomass_only.exe', tile_id, cn.SENSIT_TYPE, folder]
+    cmd_list = []
+    for pools in emitted_pools.split(','):
 
-    elif (emitted_pools == 'soil_only') & (cn.SENSIT_TYPE == 'std'):
-        cmd = [f'{cn.c_emis_compile_dst}/calc_gross_emissions_soil_only.exe', tile_id, cn.SENSIT_TYPE, folder]
+        if (pools == 'biomass_only') & (cn.SENSIT_TYPE == 'std'):
+            cmd_list.append([f'{cn.c_emis_compile_dst}/calc_gross_emissions_biomass_only.exe', tile_id, cn.SENSIT_TYPE, folder])
 
-    # This C++ script has an extra argument that names the input carbon emitted_pools and output emissions correctly
-    elif (emitted_pools == 'biomass_soil') & (cn.SENSIT_TYPE not in ['no_shifting_ag', 'convert_to_grassland']):
-        cmd = [f'{cn.c_emis_compile_dst}/calc_gross_emissions_generic.exe', tile_id, cn.SENSIT_TYPE, folder]
+        elif (pools == 'soil_only') & (cn.SENSIT_TYPE == 'std'):
+            cmd_list.append([f'{cn.c_emis_compile_dst}/calc_gross_emissions_soil_only.exe', tile_id, cn.SENSIT_TYPE, folder])
 
-    else:
-        uu.exception_log('Pool and/or sensitivity analysis option not valid')
+        # This C++ script has an extra argument that names the input carbon emitted_pools and output emissions correctly
+        elif (pools == 'biomass_soil') & (cn.SENSIT_TYPE not in ['no_shifting_ag', 'convert_to_grassland']):
+            cmd_list.append([f'{cn.c_emis_compile_dst}/calc_gross_emissions_generic.exe', tile_id, cn.SENSIT_TYPE, folder])
+
+        else:
+            uu.exception_log('Pool and/or sensitivity analysis option not valid')
+
+    # The extension calculates all the emitted pools options in one call, which has room for each option once
+    if len(set(emitted_pools.split(','))) != len(emitted_pools.split(',')):
+        uu.exception_log('Each emitted pools option can only be used once')
 
-    uu.log_subprocess_output_full(cmd)
+    # Runs the correct c++ script given the emitted_pools (biomass_only, soil_only, or biomass+soil) and model type selected.
+    # The executables need one pass through the inputs for each emitted pools option.
+    if cn.EMISSIONS_ENGINE in ['extension', 'numpy']:
+        calc_emissions_extension(tile_id, emitted_pools, threads)
+    else:
+        for cmd in cmd_list:
+            uu.log_subprocess_output_full(cmd)
 
 
-    # Identifies which pattern to use for counting tile completion
+    # Identifies which pattern to use for counting tile completion. The first emitted pools option is counted.
+    emitted_pools = emitted_pools.split(',')[0]
     pattern = cn.pattern_gross_emis_co2_only_all_drivers_biomass_soil
     if (emitted_pools == 'biomass_soil') & (cn.SENSIT_TYPE == 'std'):
         pattern = pattern
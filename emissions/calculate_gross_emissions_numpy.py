@@ -0,0 +1,391 @@
+"""
+Gross emissions decision tree in NumPy, on whole windows rather than one pixel at a time.
+This is the same decision tree as calc_gross_emissions_extension.cpp (and the C++ executables), with a boolean mask
+for each decision tree node (emissions/node_codes.txt). It is used as the emissions engine when there isn't a C++ compiler
+(--emissions-engine numpy) and to check the C++ outputs (benchmarks/gross_emissions.py).
+The equations are evaluated in the same order and with the same data types as in the C++, so the outputs are the same
+as the extension's, bit for bit.
+"""
+
+import functools
+
+import numpy as np
+import pandas as pd
+
+import constants_and_names as cn
+
+# Model constants, with the values and data types in cpp_util/constants.h
+model_years = cn.loss_years     # How many loss years are in the model
+CH4_equiv = 27                  # The CO2 equivalency (global warming potential) of CH4, AR6 WG1 Table 7.15
+N2O_equiv = 273                 # The CO2 equivalency (global warming potential) of N2O, AR6 WG1 Table 7.15
+C_to_CO2 = np.float32(44.0 / 12.0)  # The conversion of carbon to CO2
+biomass_to_c = np.float32(cn.biomass_to_c_non_mangrove)    # Fraction of carbon in biomass
+tropical = 1        # The ecozone code for the tropics
+boreal = 2          # The ecozone code for the boreal zone
+temperate = 3       # The ecozone code for the temperate zone
+soil_emis_period = 20   # The number of years over which soil emissions are calculated (separate from model years)
+C_N_ratio = np.float32(15.0)    # Carbon nitrogen ratio of soil organic matter
+N_mineralization_EF = np.float32(0.010)     # Emissions factor for soil nitrogen mineralization
+N2O_N_to_N2O = np.float32(44.0 / 28.0)      # Converts N2O-N emissions to N2O emissions
+
+# F_lu (fraction of soil C not emitted over 20 years) for the drivers with soil emissions.
+# Permanent agriculture's F_lu depends on the climate zone and ecozone, so it is in the emission factor table.
+driver_flu = {2: np.float32(0.80), 3: np.float32(0.72), 6: np.float32(0.80)}
+
+# Emission factors from def_variables (equations.cpp), for each ecozone: Gef_CO2, Gef_CH4, Gef_N2O, peatburn_CO2_only,
+# peatburn_CH4_only and, for the boreal and temperate zones, annual peat drainage CO2, CH4 and N2O.
+# Tropical annual peat drainage depends on the plantation type. Everything that isn't boreal or temperate uses the tropical factors.
+boreal_factors = [1569, 4.7, 0.26, 446, 82, 1.8, 0.33, 0.19]
+temperate_factors = [1569, 4.7, 0.26, 446, 82, 11, 0.21, 2.4]
+tropical_factors = [1580, 6.8, 0.2, 264, 88]
+tropical_wildfire_peatburn = [601, 200]
+tropical_peat_drain_annual = {1: [43, 1.2, 1.0], 2: [76, 1.3, 2.1], 0: [58, 1.3, 2.1]}
+
+# Combustion factor in the boreal and temperate zones for each driver (1-7, and 0 for no driver).
+# In the tropics, it is 0.36 in IFL/primary forest and 0.55 outside it for every driver.
+boreal_temperate_Cf = {1: (0.59, 0.51), 2: (0.59, 0.51), 3: (0.59, 0.51), 4: (0.33, 0.62), 5: (0.59, 0.51),
+                       6: (0.59, 0.51), 7: (0.34, 0.45), 0: (0.34, 0.45)}
+
+# F_lu for permanent agriculture from flu_val (flu_val.cpp), for dry, wet and montane climate zones in the tropics
+# and in the boreal/temperate zones
+dry_climates = [2, 4, 6, 8, 12]
+wet_climates = [1, 3, 5, 7, 10, 11]
+montane_climates = [9]
+permanent_agriculture_flu = {'dry': (0.92, 0.77), 'wet': (0.83, 0.70), 'montane': (0.88, 0.74)}
+
+# Numbers of classes of the categorical inputs in the emission factor table, the same as in the extension.
+# Class 0 of each input is every value that isn't listed separately.
+n_driver_classes = 8
+n_ecozone_classes = 4
+n_ifl_classes = 2
+n_plant_classes = 3
+n_climate_classes = 13
+
+
+def emission_factor_table():
+    """
+    Emission factors for each combination of driver, ecozone, IFL/primary, plantation type and climate zone classes,
+    with the same rows and columns as the extension's table (calculate_gross_emissions.emission_factor_table())
+    :return: dataframe with a row for each combination of the categorical inputs
+    """
+
+    rows = []
+
+    for driver in range(n_driver_classes):
+        for eco in range(n_ecozone_classes):
+            for ifl in range(n_ifl_classes):
+                for plant in range(n_plant_classes):
+                    for climate in range(n_climate_classes):
+
+                        if eco == boreal:
+                            factors = boreal_factors
+                            Cf = boreal_temperate_Cf[driver][0]
+                        elif eco == temperate:
+                            factors = temperate_factors
+                            Cf = boreal_temperate_Cf[driver][1]
+                        else:
+                            factors = tropical_factors + tropical_peat_drain_annual[plant]
+                            if driver == 5:
+                                factors = factors[:3] + tropical_wildfire_peatburn + factors[5:]
+                            Cf = 0.36 if ifl > 0 else 0.55
+
+                        flu = 0
+                        for climates, climate_flu in zip([dry_climates, wet_climates, montane_climates],
+                                                         permanent_agriculture_flu.values()):
+                            if climate in climates and eco == tropical:
+                                flu = climate_flu[0]
+                            elif climate in climates and eco in [boreal, temperate]:
+                                flu = climate_flu[1]
+
+                        rows.append([driver, eco, ifl, plant, climate, Cf] + factors + [flu])
+
+    # Same column names as calculate_gross_emissions.emission_factor_table_columns
+    columns = ['driver', 'ecozone', 'ifl_primary', 'plantation', 'climate', 'Cf', 'Gef_CO2', 'Gef_CH4', 'Gef_N2O',
+               'peatburn_CO2_only', 'peatburn_CH4_only', 'peat_drain_annual_CO2_only', 'peat_drain_annual_CH4_only',
+               'peat_drain_annual_N2O_only', 'flu']
+    emission_factors = pd.DataFrame(rows, columns=columns).astype('float32')
+    emission_factors[columns[:5]] = emission_factors[columns[:5]].astype('uint8')
+
+    return emission_factors
+
+
+@functools.lru_cache(maxsize=None)
+def emission_factor_array():
+    """
+    The factors of emission_factor_table() as a float32 array, built once per process
+    :return: array with a row for each combination of the categorical inputs and a column for each factor
+    """
+
+    return emission_factor_table().iloc[:, 5:].to_numpy()
+
+
+def emission_factor_rows(drivers, ecozone, ifl_primary, plantation, climate):
+    """
+    Rows of emission_factor_table() for the pixels' categorical inputs, like emission_factor_row() in the extension
+    :param drivers: array of drivers. The other inputs are arrays of the same shape.
+    :return: array of row numbers
+    """
+
+    def category_index(values, n_classes):
+        return np.where((values > 0) & (values < n_classes), values, 0).astype('int64')
+
+    rows = category_index(drivers, n_driver_classes)
+    rows = rows * n_ecozone_classes + category_index(ecozone, n_ecozone_classes)
+    rows = rows * n_ifl_classes + (ifl_primary > 0)
+    rows = rows * n_plant_classes + category_index(plantation, n_plant_classes)
+    rows = rows * n_climate_classes + category_index(climate, n_climate_classes)
+
+    return rows
+
+
+# Terms of the CO2, CH4 and N2O emissions at a node, added up from left to right like in the C++.
+# zero is the 0 that the C++ adds some terms to (e.g., 0 + peat_drain_total_CH4_only).
+yesfire = (['Byf_CO2'], ['Byf_CH4'], ['Byf_N2O'])
+yesfire_minsoil = (['Byf_CO2', 'minsoil_CO2'], ['Byf_CH4'], ['Byf_N2O', 'minsoil_N2O'])
+nofire = (['Bnf_CO2'], [], [])
+nofire_minsoil = (['Bnf_CO2', 'minsoil_CO2'], [], ['minsoil_N2O'])
+peat_burned = (['Byf_CO2', 'peat_drain_CO2', 'peatburn_CO2'], ['Byf_CH4', 'peat_drain_CH4', 'peatburn_CH4'],
+               ['Byf_N2O', 'peat_drain_N2O'])
+peat_drained = (['Bnf_CO2', 'peat_drain_CO2'], ['zero', 'peat_drain_CH4'], ['zero', 'peat_drain_N2O'])
+
+
+def commodity_nodes(driver):
+    """
+    Decision tree nodes for permanent agriculture (1), hard commodities (2) and settlements & infrastructure (6),
+    which have the same tree
+    :param driver: driver code, which is the first digit of the node codes
+    :return: list of (node code, conditions, emissions terms) for the driver
+    """
+
+    # Settlements & infrastructure keep peat drainage CO2 at node 62 in biomass_only emissions (calc_gross_emissions_biomass_only.cpp)
+    peat_drained_temperate_boreal = peat_drained
+    if driver == 6:
+        peat_drained_temperate_boreal = (['Bnf_CO2', 'peat_drain_CO2_node_62'],) + peat_drained[1:]
+
+    d = driver * 10
+    return [
+        (d, dict(peat=1, burn=1), peat_burned),
+        (d + 1, dict(peat=1, burn=0, eco=[tropical], plant=1), peat_drained),
+        ((d + 1) * 10 + 1, dict(peat=1, burn=0, eco=[tropical], plant=0), nofire),
+        (d + 2, dict(peat=1, burn=0, eco=[boreal, temperate]), peat_drained_temperate_boreal),
+        (d + 3, dict(peat=0, burn=1, eco=[tropical], ifl=1, plant=1), yesfire),
+        ((d + 3) * 10 + 1, dict(peat=0, burn=1, eco=[tropical], ifl=1, plant=0), yesfire_minsoil),
+        (d + 4, dict(peat=0, burn=1, eco=[tropical], ifl=0, plant=1), yesfire),
+        ((d + 4) * 10 + 1, dict(peat=0, burn=1, eco=[tropical], ifl=0, plant=0), yesfire_minsoil),
+        (d + 5, dict(peat=0, burn=1, eco=[boreal]), yesfire_minsoil),
+        (d + 6, dict(peat=0, burn=1, eco=[temperate], plant=1), yesfire),
+        ((d + 6) * 10 + 1, dict(peat=0, burn=1, eco=[temperate], plant=0), yesfire_minsoil),
+        (d + 7, dict(peat=0, burn=0, eco=[tropical], plant=1), nofire),
+        ((d + 7) * 10 + 1, dict(peat=0, burn=0, eco=[tropical], plant=0), nofire_minsoil),
+        (d + 8, dict(peat=0, burn=0, eco=[boreal]), nofire_minsoil),
+        (d + 9, dict(peat=0, burn=0, eco=[temperate], plant=1), nofire),
+        ((d + 9) * 10 + 1, dict(peat=0, burn=0, eco=[temperate], plant=0), nofire_minsoil)
+    ]
+
+
+def disturbance_nodes(driver, first_digit):
+    """
+    Decision tree nodes for forestry (4), wildfire (5), other natural disturbances (7) and no driver,
+    which have the same tree
+    :param driver: driver code (0 for no driver)
+    :param first_digit: first digit of the node codes (8 for no driver)
+    :return: list of (node code, conditions, emissions terms) for the driver
+    """
+
+    d = first_digit * 10
+    return [
+        (d, dict(peat=1, burn=1), peat_burned),
+        (d + 1, dict(peat=1, burn=0, eco=[boreal, temperate]), nofire),
+        (d + 2, dict(peat=1, burn=0, eco=[tropical], plant=1), peat_drained),
+        ((d + 2) * 10 + 1, dict(peat=1, burn=0, eco=[tropical], plant=0), nofire),
+        (d + 3, dict(peat=0, burn=1), yesfire),
+        (d + 4, dict(peat=0, burn=0), nofire)
+    ]
+
+
+# Shifting cultivation has its own tree for peat, and its nodes without peat are numbered differently
+shifting_cultivation_nodes = [
+    (30, dict(peat=1, burn=1, eco=[boreal, temperate]),
+     (['Byf_CO2', 'peatburn_CO2'], ['Byf_CH4', 'peatburn_CH4'], ['Byf_N2O'])),
+    (31, dict(peat=1, burn=1, eco=[tropical]), peat_burned),
+    (32, dict(peat=1, burn=0, eco=[boreal, temperate]), nofire),
+    (33, dict(peat=1, burn=0, eco=[tropical], plant=1), peat_drained),
+    (331, dict(peat=1, burn=0, eco=[tropical], plant=0), nofire),
+    (34, dict(peat=0, burn=1, eco=[tropical], ifl=1, plant=1), yesfire),
+    (341, dict(peat=0, burn=1, eco=[tropical], ifl=1, plant=0), yesfire_minsoil),
+    (35, dict(peat=0, burn=1, eco=[tropical], ifl=0, plant=1), yesfire),
+    (351, dict(peat=0, burn=1, eco=[tropical], ifl=0, plant=0), yesfire_minsoil),
+    (36, dict(peat=0, burn=1, eco=[boreal]), yesfire_minsoil),
+    (37, dict(peat=0, burn=1, eco=[temperate], plant=1), yesfire),
+    (371, dict(peat=0, burn=1, eco=[temperate], plant=0), yesfire_minsoil),
+    (38, dict(peat=0, burn=0, eco=[tropical], plant=1), nofire),
+    (381, dict(peat=0, burn=0, eco=[tropical], plant=0), nofire_minsoil),
+    (39, dict(peat=0, burn=0, eco=[boreal]), nofire_minsoil),
+    (391, dict(peat=0, burn=0, eco=[temperate], plant=1), nofire),
+    (392, dict(peat=0, burn=0, eco=[temperate], plant=0), nofire_minsoil)
+]
+
+# Decision tree nodes for each driver (0 is no driver, which is every driver code other than 1-7)
+driver_nodes = {1: commodity_nodes(1), 2: commodity_nodes(2), 3: shifting_cultivation_nodes,
+                4: disturbance_nodes(4, 4), 5: disturbance_nodes(5, 5), 6: commodity_nodes(6),
+                7: disturbance_nodes(7, 7), 0: disturbance_nodes(0, 8)}
+
+
+def node_mask(conditions, peat, burn, ecozone, ifl_primary, plantation):
+    """
+    Pixels that meet the conditions of a decision tree node
+    :param conditions: dictionary of peat (1 or 0), burn (1 or 0), eco (list of ecozones), ifl (1 or 0) and
+        plant (1 for plantation, 0 for not plantation). Inputs that aren't in it aren't used by the node.
+    :param peat: array of the peat input. The other inputs are arrays of the same shape.
+    :return: boolean array
+    """
+
+    mask = (peat > 0) if conditions['peat'] else (peat == 0)
+    mask &= (burn > 0) if conditions['burn'] else (burn == 0)
+
+    if 'eco' in conditions:
+        mask &= np.isin(ecozone, conditions['eco'])
+    if 'ifl' in conditions:
+        mask &= (ifl_primary == conditions['ifl'])
+    if 'plant' in conditions:
+        mask &= (plantation > 0) if conditions['plant'] else (plantation == 0)
+
+    return mask
+
+
+def calc_emissions_window(emitted_pools, agc_window, bgc_window, deadwood_window, litter_window, soil_window,
+                          loss_window, burn_window, drivers_window, peat_window, ifl_primary_window, ecozone_window,
+                          climate_window, plantation_window):
+    """
+    Calculates gross emissions for a window with the NumPy decision tree.
+    Takes and returns the same windows as calculate_gross_emissions.calc_emissions_window() without the extension.
+    :param emitted_pools: biomass_only, soil_only, or biomass_soil, or several of them separated by commas
+    :param agc_window: array representing aboveground carbon density in the year of loss.
+        The other inputs are arrays with the same shape for the other carbon pools and the emissions inputs.
+    :return: list of arrays with the window's shape for each emitted pools option, in order: all gases, CO2 only,
+        non-CO2, CH4 only, N2O only (Mg CO2e/ha) and decision tree nodes
+    """
+
+    # Only evaluates pixels that have loss and carbon, as 1D arrays of those pixels.
+    # The inputs are floats in the C++, so they are compared and used in equations as float32.
+    pixels = np.flatnonzero((np.asarray(loss_window) > 0) & (np.asarray(agc_window) > 0))
+    agc, bgc, dead, litter, soil, loss, burn, drivers, peat, ifl_primary, ecozone, climate, plantation = \
+        [np.asarray(input_window).ravel()[pixels].astype('float32') for input_window in
+         [agc_window, bgc_window, deadwood_window, litter_window, soil_window, loss_window, burn_window,
+          drivers_window, peat_window, ifl_primary_window, ecozone_window, climate_window, plantation_window]]
+
+    # Emission factors for each pixel
+    emission_factors = emission_factor_array()[
+        emission_factor_rows(drivers.astype('int64'), ecozone.astype('int64'), ifl_primary.astype('int64'),
+                             plantation.astype('int64'), climate.astype('int64'))]
+    Cf, Gef_CO2, Gef_CH4, Gef_N2O, peatburn_CO2, peatburn_CH4, \
+        peat_drain_annual_CO2, peat_drain_annual_CH4, peat_drain_annual_N2O, flu = emission_factors.T
+
+    # Peat drainage over the years since loss. The loss year is an integer in this equation.
+    years_since_loss = (model_years - loss.astype('int64')).astype('float32')
+    peat_drain = {'CO2': years_since_loss * peat_drain_annual_CO2, 'CH4': years_since_loss * peat_drain_annual_CH4,
+                  'N2O': years_since_loss * peat_drain_annual_N2O}
+
+    # Decision tree node of each pixel. Pixels that don't reach a node (e.g., no ecozone) stay 0.
+    node = np.zeros(pixels.size, dtype='uint16')
+    node_pixels = {}
+    for driver, nodes in driver_nodes.items():
+
+        if driver == 0:
+            driver_mask = ~np.isin(drivers, list(range(1, 8)))
+        else:
+            driver_mask = (drivers == driver)
+
+        for node_code, conditions, terms in nodes:
+            mask = driver_mask & node_mask(conditions, peat, burn, ecozone, ifl_primary, plantation)
+            node_pixels[node_code] = (driver, terms, np.flatnonzero(mask))
+            node[mask] = node_code
+
+    output_windows = []
+
+    for pools in emitted_pools.split(','):
+
+        biomass_pools = pools in ['biomass_soil', 'biomass_only']
+        soil_pools = pools in ['biomass_soil', 'soil_only']
+
+        # Pools that aren't emitted are zeroed, like in the extension
+        zeros = np.zeros(pixels.size, dtype='float32')
+        pool_agc, pool_bgc, pool_dead, pool_litter = [pool if biomass_pools else zeros for pool in [agc, bgc, dead, litter]]
+        pool_soil = soil if soil_pools else zeros
+        peat_terms = {'peatburn_CO2': peatburn_CO2, 'peatburn_CH4': peatburn_CH4, 'peat_drain_CO2': peat_drain['CO2'],
+                      'peat_drain_CH4': peat_drain['CH4'], 'peat_drain_N2O': peat_drain['N2O']}
+        if not soil_pools:
+            peat_terms = {name: zeros for name in peat_terms}
+        peat_terms['peat_drain_CO2_node_62'] = peat_drain['CO2']
+
+        non_soil_c = pool_agc + pool_bgc + pool_dead + pool_litter
+        non_soil_bgc_c = pool_agc + pool_dead + pool_litter
+        above_below_c = pool_agc + pool_bgc
+
+        # Emissions from mineral soil for each driver that has them
+        minsoil = {}
+        for driver in [1, 2, 3, 6]:
+            driver_flu_value = flu if driver == 1 else driver_flu[driver]
+            annual_minsoil_soc_loss = (pool_soil - (pool_soil * driver_flu_value)) / np.float32(soil_emis_period)
+            total_minsoil_soc_loss = annual_minsoil_soc_loss * (np.float32(model_years) - loss)
+            minsoil[driver] = {'minsoil_CO2': total_minsoil_soc_loss * C_to_CO2,
+                               'minsoil_N2O': total_minsoil_soc_loss * (np.float32(1) / C_N_ratio) * N_mineralization_EF
+                                              * N2O_N_to_N2O * np.float32(N2O_equiv)}
+
+        # Emissions from biomass, which differ between the commodity-type drivers and the disturbance-type drivers.
+        # The combustion and gas factors are multiplied as float32, then by 10^-3 and the CO2 equivalency as float64.
+        fire_CH4 = lambda carbon: ((carbon / biomass_to_c * Cf * Gef_CH4).astype('float64') * 1e-3 * CH4_equiv).astype('float32')
+        fire_N2O = lambda carbon: ((carbon / biomass_to_c * Cf * Gef_N2O).astype('float64') * 1e-3 * N2O_equiv).astype('float32')
+        commodity_biomass = {'Bnf_CO2': non_soil_c * C_to_CO2, 'Byf_CO2': non_soil_c * C_to_CO2,
+                             'Byf_CH4': fire_CH4(non_soil_c), 'Byf_N2O': fire_N2O(non_soil_c)}
+        disturbance_biomass = {'Bnf_CO2': above_below_c * C_to_CO2,
+                               'Byf_CO2': ((pool_agc / biomass_to_c * Cf * Gef_CO2).astype('float64') * 1e-3).astype('float32'),
+                               'Byf_CH4': fire_CH4(non_soil_bgc_c), 'Byf_N2O': fire_N2O(non_soil_bgc_c)}
+
+        # Terms of the emissions equations for each driver
+        driver_values = {}
+        for driver in driver_nodes:
+            driver_values[driver] = dict(peat_terms, zero=zeros)
+            driver_values[driver].update(commodity_biomass if driver in [1, 2, 3, 6] else disturbance_biomass)
+            driver_values[driver].update(minsoil.get(driver, {}))
+
+        CO2_only = np.zeros(pixels.size, dtype='float32')
+        CH4_only = np.zeros(pixels.size, dtype='float32')
+        N2O_only = np.zeros(pixels.size, dtype='float32')
+
+        for node_code, (driver, terms, node_index) in node_pixels.items():
+
+            if node_index.size == 0:
+                continue
+
+            values = driver_values[driver]
+
+            for output, gas_terms in zip([CO2_only, CH4_only, N2O_only], terms):
+                if not gas_terms:
+                    continue
+                gas = values[gas_terms[0]][node_index]
+                for term in gas_terms[1:]:
+                    gas = gas + values[term][node_index]
+                output[node_index] = gas
+
+        # Each pixel only has one driver. The C++ adds 0 for the other drivers, which makes -0 into 0.
+        all_gases = CO2_only + CH4_only + N2O_only + np.float32(0)
+        non_CO2 = CH4_only + N2O_only + np.float32(0)
+        CO2_only = CO2_only + np.float32(0)
+        CH4_only = CH4_only + np.float32(0)
+        N2O_only = N2O_only + np.float32(0)
+
+        # Pixels with no emissions get 0 for every gas
+        no_emissions = (all_gases == 0)
+
+        for output_pixels in [all_gases, CO2_only, non_CO2, CH4_only, N2O_only]:
+            output_pixels[no_emissions] = 0
+            output_window = np.zeros(np.shape(agc_window), dtype='float32')
+            output_window.ravel()[pixels] = output_pixels
+            output_windows.append(output_window)
+
+        node_window = np.zeros(np.shape(agc_window), dtype='uint16')
+        node_window.ravel()[pixels] = node
+        output_windows.append(node_window)
+
+    return output_windows
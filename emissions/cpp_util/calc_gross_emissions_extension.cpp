@@ -0,0 +1,1333 @@
+// Gross emissions decision tree as a shared library that Python calls on NumPy windows (through ctypes),
+// so that gross emissions use the same rasterio windowing and I/O as the rest of the model.
+// This is the same decision tree as calc_gross_emissions_generic.cpp, one pixel at a time.
+// Emissions from biomass only (calc_gross_emissions_biomass_only.cpp) and soil only (calc_gross_emissions_soil_only.cpp)
+// come from the same tree with the pools that aren't emitted set to 0. All the emitted pools options of a run are
+// calculated in one pass through the tree for each pixel.
+// The decision tree node codes are summarized in carbon-budget/emissions/node_codes.txt
+// Compile with:
+// c++ -shared -fPIC /usr/local/app/emissions/cpp_util/calc_gross_emissions_extension.cpp -o /usr/local/app/emissions/cpp_util/calc_gross_emissions_extension.so
+// GDAL isn't needed because the library doesn't read or write rasters.
+
+
+#include <math.h>
+#include <stdint.h>
+
+// These provide constants for the emissions equations and universal constants
+#include "flu_val.cpp"
+#include "equations.cpp"
+#include "constants.h"
+
+using namespace std;
+
+// Model constants, with the same types as in the executables so that the equations give the same results
+const int model_years = constants::model_years;    // How many loss years are in the model
+const int CH4_equiv = constants::CH4_equiv;      // The CO2 equivalency (global warming potential) of CH4
+const int N2O_equiv = constants::N2O_equiv;      // The CO2 equivalency (global warming potential) of N2O
+const float C_to_CO2 = constants::C_to_CO2;       // The conversion of carbon to CO2
+const float biomass_to_c = constants::biomass_to_c;    // Fraction of carbon in biomass
+const int tropical = constants::tropical;       // The ecozone code for the tropics
+const int temperate = constants::temperate;      // The ecozone code for the temperate zone
+const int boreal = constants::boreal;         // The ecozone code for the boreal zone
+const int soil_emis_period = constants::soil_emis_period;      // The number of years over which soil emissions are calculated (separate from model years)
+const float shift_cult_flu = constants::shift_cult_flu; // F_lu for shifting cultivation (fraction of soil C not emitted over 20 years)
+const float settlements_flu = constants::settlements_flu; // F_lu for settlements and infrastructure (fraction of soil C not emitted over 20 years)
+const float hard_commod_flu = constants::hard_commod_flu; // F_lu for hard_commodities (fraction of soil C not emitted over 20 years)
+const float C_N_ratio = constants::C_N_ratio;       // Carbon nitrogen ratio of soil organic matter
+const float N_mineralization_EF = constants::N_mineralization_EF;          // Emissions factor for soil nitrogen mineralization (converts N to N2O-N emissions)
+const float N2O_N_to_N2O = constants::N2O_N_to_N2O;     // Converts N2O-N emissions to N2O emissions
+
+
+// Emission factors for the categorical inputs, which are otherwise branched on for every pixel in def_variables (equations.cpp)
+// and flu_val (flu_val.cpp). Each input is reduced to the values that those functions distinguish between.
+// Index 0 of each input is every value that isn't listed separately (e.g. no driver or any unassigned driver code).
+const int n_driver_classes = 8;      // Drivers 1-7 and no driver
+const int n_ecozone_classes = 4;     // Tropical, boreal, temperate and no ecozone
+const int n_ifl_classes = 2;         // Outside and in IFL/primary forest
+const int n_plant_classes = 3;       // Oil palm, wood fiber and other or no plantation
+const int n_climate_classes = 13;    // Climate zones 1-12 and no climate zone
+const int n_emission_factor_rows = n_driver_classes * n_ecozone_classes * n_ifl_classes * n_plant_classes * n_climate_classes;
+const int n_emission_factor_columns = 15;   // 5 categorical inputs and 10 factors, in the order of struct emission_factors
+
+// Peat drainage is stored as an annual emission factor because the total depends on the loss year.
+// The total is calculated per pixel with the same equation as in def_variables.
+struct emission_factors
+{
+    float Cf;                           // Combustion factor
+    float Gef_CO2;                      // Emissions factor for CO2
+    float Gef_CH4;                      // Emissions factor for CH4
+    float Gef_N2O;                      // Emissions factor for N2O
+    float peatburn_CO2_only;            // Emissions from burning peat, CO2 emissions only
+    float peatburn_CH4_only;            // Emissions from burning peat, CH4 emissions only
+    float peat_drain_annual_CO2_only;   // Annual emissions from draining peat, CO2 emissions only
+    float peat_drain_annual_CH4_only;   // Annual emissions from draining peat, CH4 emissions only
+    float peat_drain_annual_N2O_only;   // Annual emissions from draining peat, N2O emissions only
+    float flu;                          // Emissions fraction from mineral soil for permanent agriculture
+};
+
+inline int category_index(int value, int n_classes)
+{
+    return ((value > 0) && (value < n_classes)) ? value : 0;
+}
+
+// Row of the emission factor table for the pixel's categorical inputs.
+// The inputs are converted to int like they were when they were passed to def_variables and flu_val.
+inline int emission_factor_row(int drivermodel, int ecozone, int ifl_primary, int plant, int climate)
+{
+    int row = category_index(drivermodel, n_driver_classes);
+    row = row * n_ecozone_classes + category_index(ecozone, n_ecozone_classes);
+    row = row * n_ifl_classes + (ifl_primary > 0);
+    row = row * n_plant_classes + category_index(plant, n_plant_classes);
+    row = row * n_climate_classes + category_index(climate, n_climate_classes);
+    return row;
+}
+
+// Builds the table from def_variables and flu_val themselves, so that the factors are the flowchart constants in those files.
+// With a loss year of model_years - 1, def_variables' peat drainage totals are the annual peat drainage.
+struct emission_factor_table
+{
+    emission_factors rows[n_emission_factor_rows];
+
+    emission_factor_table()
+    {
+        for (int driver = 0; driver < n_driver_classes; driver++)
+        for (int eco = 0; eco < n_ecozone_classes; eco++)
+        for (int ifl = 0; ifl < n_ifl_classes; ifl++)
+        for (int plant = 0; plant < n_plant_classes; plant++)
+        for (int climate = 0; climate < n_climate_classes; climate++)
+        {
+            float q[9];
+            def_variables(&q[0], eco, driver, ifl, climate, plant, model_years - 1);
+
+            emission_factors &factors = rows[emission_factor_row(driver, eco, ifl, plant, climate)];
+            factors.Cf = q[0];
+            factors.Gef_CO2 = q[1];
+            factors.Gef_CH4 = q[2];
+            factors.Gef_N2O = q[3];
+            factors.peatburn_CO2_only = q[4];
+            factors.peatburn_CH4_only = q[5];
+            factors.peat_drain_annual_CO2_only = q[6];
+            factors.peat_drain_annual_CH4_only = q[7];
+            factors.peat_drain_annual_N2O_only = q[8];
+            factors.flu = flu_val(climate, eco);
+        }
+    }
+};
+
+// The table is built once per process, the first time it is used
+const emission_factor_table &emission_factors_for_run()
+{
+    static const emission_factor_table table;
+    return table;
+}
+
+
+// Emitted pools options calculated together: whether the biomass pools (AGC, BGC, deadwood, litter) and soil pools
+// (soil and peat) are emitted in each one. biomass_soil is (1, 1), biomass_only is (1, 0) and soil_only is (0, 1).
+const int max_pool_variants = 3;
+const int n_gas_outputs = 5;   // All gases, CO2 only, non-CO2, CH4 only and N2O only
+
+struct pool_variants
+{
+    int n;
+    bool biomass_pools[max_pool_variants];
+    bool soil_pools[max_pool_variants];
+};
+
+// A value in the decision tree for each emitted pools option. The node and emission factors of a pixel don't depend on
+// which pools are emitted, so the tree is only walked once and its terms are added up for all the options together.
+struct variant_values
+{
+    float value[max_pool_variants];
+
+    variant_values(float x = 0)
+    {
+        for (int i = 0; i < max_pool_variants; i++)
+        {
+            value[i] = x;
+        }
+    }
+};
+
+inline variant_values operator+(const variant_values &a, const variant_values &b)
+{
+    variant_values sum;
+    for (int i = 0; i < max_pool_variants; i++)
+    {
+        sum.value[i] = a.value[i] + b.value[i];
+    }
+    return sum;
+}
+
+// A term from pools that aren't emitted in every option. It's 0 in the options that don't emit the pools,
+// which is what the term is when those pools are set to 0.
+inline variant_values emitted_term(float x, const bool *emitted)
+{
+    variant_values term;
+    for (int i = 0; i < max_pool_variants; i++)
+    {
+        term.value[i] = emitted[i] ? x : 0;
+    }
+    return term;
+}
+
+
+// Calculates gross emissions (Mg CO2e/ha) for one pixel for each emitted pools option in variants.
+// outdata gets all gases, CO2 only, non-CO2, CH4 only and N2O only (all drivers), in that order, for each option in turn.
+// Inputs are floats, like the rasters read by the executables, so that the equations give the same results.
+void calc_gross_emissions_pixel(const pool_variants &variants,
+                                float agc, float bgc, float dead, float litter, float soil,
+                                float loss, float burn, float drivermodel, float peat, float ifl_primary,
+                                float ecozone, float climate, float plant,
+                                float *outdata, uint16_t *node_code)
+{
+    // Initializes each output raster at 0 (nodata value)
+	variant_values outdata_permanent_agriculture_allgases = 0;   // permanent agriculture, all gases
+	variant_values outdata_permanent_agriculture_CO2only = 0;  // permanent agriculture, CO2 only
+	variant_values outdata_permanent_agriculture_nonCO2 = 0;  // permanent agriculture, non-CO2
+	variant_values outdata_permanent_agriculture_CH4only = 0;  // permanent agriculture, CH4 only
+	variant_values outdata_permanent_agriculture_N2Oonly = 0;  // permanent agriculture, N2O only
+
+	variant_values outdata_hard_commodities_allgases = 0;   // hard commodities, all gases
+	variant_values outdata_hard_commodities_CO2only = 0;  // hard commodities, CO2 only
+	variant_values outdata_hard_commodities_nonCO2 = 0;  // hard commodities, non-CO2
+	variant_values outdata_hard_commodities_CH4only = 0;  // hard commodities, CH4 only
+	variant_values outdata_hard_commodities_N2Oonly = 0;  // hard commodities, N2O only
+	
+	variant_values outdata_shifting_cultivation_allgases = 0;   // shifting cultivation, all gases
+	variant_values outdata_shifting_cultivation_CO2only = 0;  // shifting cultivation, CO2 only
+	variant_values outdata_shifting_cultivation_nonCO2 = 0;  // shifting cultivation, non-CO2
+	variant_values outdata_shifting_cultivation_CH4only = 0;  // shifting cultivation, CH4 only
+	variant_values outdata_shifting_cultivation_N2Oonly = 0;  // shifting cultivation, N2O only
+	
+	variant_values outdata_forest_management_allgases = 0;   // logging, all gases
+	variant_values outdata_forest_management_CO2only = 0;  // logging, CO2 only
+	variant_values outdata_forest_management_nonCO2 = 0;  // logging, non-CO2
+	variant_values outdata_forest_management_CH4only = 0;  // logging, CH4 only
+	variant_values outdata_forest_management_N2Oonly = 0;  // logging, N2O only
+	
+	variant_values outdata_wildfire_allgases = 0;   // wildfire, all gases
+	variant_values outdata_wildfire_CO2only = 0;  // wildfire, CO2 only
+	variant_values outdata_wildfire_nonCO2 = 0;  // wildfire, non-CO2
+	variant_values outdata_wildfire_CH4only = 0;  // wildfire, CH4 only
+	variant_values outdata_wildfire_N2Oonly = 0;  // wildfire, N2O only
+	
+	variant_values outdata_settlements_allgases = 0;   // settlement and infrastructure, all gases
+	variant_values outdata_settlements_CO2only = 0;  // settlement and infrastructure, CO2 only
+	variant_values outdata_settlements_nonCO2 = 0;  // settlement and infrastructure, non-CO2
+	variant_values outdata_settlements_CH4only = 0;  // settlement and infrastructure, CH4 only
+	variant_values outdata_settlements_N2Oonly = 0;  // settlement and infrastructure, N2O only
+
+	variant_values outdata_other_disturbances_allgases = 0;   // other natural disturbances, all gases
+	variant_values outdata_other_disturbances_CO2only = 0;  // other natural disturbances, CO2 only
+	variant_values outdata_other_disturbances_nonCO2 = 0;  // other natural disturbances, non-CO2
+	variant_values outdata_other_disturbances_CH4only = 0;  // other natural disturbances, CH4 only
+	variant_values outdata_other_disturbances_N2Oonly = 0;  // other natural disturbances, N2O only
+
+	variant_values outdata_no_driver_allgases = 0;   // no driver, all gases
+	variant_values outdata_no_driver_CO2only = 0;  // no driver, CO2 only
+	variant_values outdata_no_driver_nonCO2 = 0;  // no driver, non-CO2
+	variant_values outdata_no_driver_CH4only = 0;  // no driver, CH4 only
+	variant_values outdata_no_driver_N2Oonly = 0;  // no driver, N2O only
+
+	variant_values outdata_alldrivers_allgases = 0;  // all drivers, all gases
+	variant_values outdata_alldrivers_CO2only = 0;  // all drivers, CO2 only
+	variant_values outdata_alldrivers_nonCO2 = 0;  // all drivers, non-CO2
+	variant_values outdata_alldrivers_CH4only = 0;  // all drivers, CH4 only
+	variant_values outdata_alldrivers_N2Oonly = 0;  // all drivers, N2O only
+	
+	short int outdata_node_code = 0;  // flowchart node
+
+    // Only evaluates pixels that have loss and carbon. By definition, all pixels with carbon are in the model extent.
+	if (loss > 0 && agc > 0)
+    {
+
+        // The constants needed for calculating emissions, from the emission factor table for the pixel's categorical inputs
+        const emission_factors &factors = emission_factors_for_run().rows[emission_factor_row(drivermodel, ecozone, ifl_primary, plant, climate)];
+
+		float Cf = factors.Cf;            // Combustion factor
+		float Gef_CO2 = factors.Gef_CO2;       // Emissions factor for CO2
+		float Gef_CH4 = factors.Gef_CH4;       // Emissions factor for CH4
+		float Gef_N2O = factors.Gef_N2O;       // Emissions factor for N2O
+
+		// Emissions from draining peat depend on the loss year, as in def_variables
+		int lossyr = loss;
+
+        // Terms from pools that aren't emitted are 0 so that the same decision tree gives emissions from biomass only
+        // (no soil or peat emissions) or from soil only (no AGC, BGC, deadwood or litter emissions)
+		variant_values peatburn_CO2_only = emitted_term(factors.peatburn_CO2_only, variants.soil_pools);      // Emissions from burning peat, CO2 emissions only
+		variant_values peatburn_CH4_only = emitted_term(factors.peatburn_CH4_only, variants.soil_pools);       // Emissions from burning peat, CH4 emissions only (there are no N2O emissions from burning peat)
+		variant_values peat_drain_total_CO2_only = emitted_term((model_years - lossyr) * factors.peat_drain_annual_CO2_only, variants.soil_pools);      // Emissions from draining peat, CO2 emissions only
+		variant_values peat_drain_total_CH4_only = emitted_term((model_years - lossyr) * factors.peat_drain_annual_CH4_only, variants.soil_pools);      // Emissions from draining peat, CH4 emissions only
+		variant_values peat_drain_total_N2O_only = emitted_term((model_years - lossyr) * factors.peat_drain_annual_N2O_only, variants.soil_pools);      // Emissions from draining peat, N2O emissions only
+
+        // calc_gross_emissions_biomass_only.cpp keeps peat drainage CO2 at node 62 (settlements & infrastructure, peat,
+        // not burned, temperate/boreal), so it's emitted in every option there.
+        variant_values peat_drain_total_CO2_only_node_62 = (model_years - lossyr) * factors.peat_drain_annual_CO2_only;
+
+        // Define and calculate several values used later
+		float non_soil_c;
+		non_soil_c = agc + bgc + dead + litter;
+
+		float non_soil_bgc_c;
+		non_soil_bgc_c = agc + dead + litter; //used for CH4 and N2O fire emissions for forestry, wildfire, other, and no driver
+
+		float above_below_c;
+		above_below_c = agc + bgc;
+
+		variant_values Biomass_tCO2e_nofire_CO2_only;     // Emissions from biomass on pixels without fire- only emits CO2 (no non-CO2 option)
+		variant_values Biomass_tCO2e_yesfire_CO2_only;    // Emissions from biomass on pixels with fire- only the CO2
+		variant_values Biomass_tCO2e_yesfire_CH4_only;   // Emissions from biomass on pixels with fire- only CH4 emissions
+		variant_values Biomass_tCO2e_yesfire_N2O_only;   // Emissions from biomass on pixels with fire- only N2O emissions
+		float annual_minsoil_soc_loss;          // Annual soil organic carbon loss
+		float total_minsoil_soc_loss;           // Total soil organic carbon loss over model period
+		variant_values minsoil_CO2only;                 // CO2 emissions from SOC losses in mineral soil
+		variant_values minsoil_N2Oonly;                 // N2O emissions from soil nitrogen mineralization
+		float flu;                               // Emissions fraction from mineral soil
+
+	    // Each driver is an output raster and has its own emissions model. 
+	    // outdata_node_code is the code for each combination of outputs (defined in carbon-budget/emissions/node_codes.txt)
+
+		// Emissions model for permanent agriculture
+		if (drivermodel == 1)
+		{
+			// For each driver, these values (or a subset of them) are necessary for calculating emissions.
+			Biomass_tCO2e_nofire_CO2_only = emitted_term(non_soil_c * C_to_CO2, variants.biomass_pools);
+			Biomass_tCO2e_yesfire_CO2_only = emitted_term(non_soil_c * C_to_CO2, variants.biomass_pools);
+			Biomass_tCO2e_yesfire_CH4_only = emitted_term(((non_soil_c / biomass_to_c) * Cf * Gef_CH4 * pow(10,-3) * CH4_equiv), variants.biomass_pools);
+			Biomass_tCO2e_yesfire_N2O_only = emitted_term(((non_soil_c / biomass_to_c) * Cf * Gef_N2O * pow(10,-3) * N2O_equiv), variants.biomass_pools);
+			flu = factors.flu;
+			annual_minsoil_soc_loss = (soil-(soil * flu))/soil_emis_period;
+			total_minsoil_soc_loss = annual_minsoil_soc_loss * (model_years-loss);
+			minsoil_CO2only = emitted_term(total_minsoil_soc_loss * C_to_CO2, variants.soil_pools);
+            minsoil_N2Oonly = emitted_term(total_minsoil_soc_loss * (1/C_N_ratio) * N_mineralization_EF * N2O_N_to_N2O * N2O_equiv, variants.soil_pools);  // Note didn't multiply by 1000 to keep in t instead of kg [IPCC 2019, V4, Ch. 11, Equations 11.8 (F_som) and 11.1 (total emissions)]
+
+			if (peat > 0) // permanent ag, peat
+			{
+				if (burn > 0) // permanent ag, peat, burned
+				{
+					outdata_permanent_agriculture_CO2only = Biomass_tCO2e_yesfire_CO2_only + peat_drain_total_CO2_only + peatburn_CO2_only;
+					outdata_permanent_agriculture_CH4only = Biomass_tCO2e_yesfire_CH4_only + peat_drain_total_CH4_only + peatburn_CH4_only;
+					outdata_permanent_agriculture_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + peat_drain_total_N2O_only;
+					outdata_node_code = 10;
+				}
+				if (burn == 0) // permanent ag, peat, not burned
+				{
+					if (ecozone == tropical) // permanent ag, peat, not burned, tropical
+					{
+					    if (plant >= 1) // permanent ag, peat, not burned, tropical, plantation
+					    {
+					    	outdata_permanent_agriculture_CO2only = Biomass_tCO2e_nofire_CO2_only + peat_drain_total_CO2_only;
+					        outdata_permanent_agriculture_CH4only = 0 + peat_drain_total_CH4_only;
+					        outdata_permanent_agriculture_N2Oonly = 0 + peat_drain_total_N2O_only;
+					        outdata_node_code = 11;
+					    }
+					    if (plant == 0)     // permanent ag, peat, not burned, tropical, not plantation
+					    {
+					        outdata_permanent_agriculture_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					        outdata_permanent_agriculture_CH4only = 0;
+                            outdata_permanent_agriculture_N2Oonly = 0;
+					        outdata_node_code = 111;
+					    }
+					}
+                    if ((ecozone == boreal) || (ecozone == temperate))      // permanent ag, peat, not burned, temperate/boreal
+					{
+					    outdata_permanent_agriculture_CO2only = Biomass_tCO2e_nofire_CO2_only + peat_drain_total_CO2_only;
+					    outdata_permanent_agriculture_CH4only = 0 + peat_drain_total_CH4_only;
+						outdata_permanent_agriculture_N2Oonly = 0 + peat_drain_total_N2O_only;
+					    outdata_node_code = 12;
+					}
+				}
+			}
+			if (peat == 0) // permanent ag, not peat
+			{
+				if (burn > 0) // permanent ag, not peat, burned
+				{
+					if (ecozone == tropical)   // permanent ag, not peat, burned, tropical
+					{
+                        if (ifl_primary == 1)   // permanent ag, not peat, burned, tropical, IFL
+                        {
+                            if (plant >= 1)     // permanent ag, not peat, burned, tropical, IFL, plantation
+					        {
+					            outdata_permanent_agriculture_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					            outdata_permanent_agriculture_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						        outdata_permanent_agriculture_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					            outdata_node_code = 13;
+					        }
+					        if (plant == 0)     // permanent ag, not peat, burned, tropical, IFL, not plantation
+					        {
+					            outdata_permanent_agriculture_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+					            outdata_permanent_agriculture_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						        outdata_permanent_agriculture_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					            outdata_node_code = 131;
+					        }
+					    }
+					    if (ifl_primary == 0)   // permanent ag, not peat, burned, tropical, not IFL
+					    {
+                            if (plant >= 1)     // permanent ag, not peat, burned, tropical, not IFL, plantation
+					        {
+					            outdata_permanent_agriculture_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					            outdata_permanent_agriculture_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						        outdata_permanent_agriculture_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					            outdata_node_code = 14;
+ 						        }
+					        if (plant == 0)     // permanent ag, not peat, burned, tropical, not IFL, not plantation
+					        {
+					            outdata_permanent_agriculture_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+					            outdata_permanent_agriculture_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						        outdata_permanent_agriculture_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					            outdata_node_code = 141;
+					        }
+                        }
+					}
+					if (ecozone == boreal)   // permanent ag, not peat, burned, boreal
+					{
+                        outdata_permanent_agriculture_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+                        outdata_permanent_agriculture_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						outdata_permanent_agriculture_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					    outdata_node_code = 15;
+					}
+					if (ecozone == temperate)   // permanent ag, not peat, burned, temperate
+					{
+					    if (plant >= 1)     // permanent ag, not peat, burned, temperate, plantation
+					    {
+					        outdata_permanent_agriculture_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					        outdata_permanent_agriculture_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						    outdata_permanent_agriculture_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					        outdata_node_code = 16;
+					    }
+					    if (plant == 0)     // permanent ag, not peat, burned, temperate, not plantation
+					    {
+					        outdata_permanent_agriculture_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+					        outdata_permanent_agriculture_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						    outdata_permanent_agriculture_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					        outdata_node_code = 161;
+					    }
+					}
+				}
+				if (burn == 0) // permanent ag, not peat, not burned
+				{
+					if (ecozone == tropical)   // permanent ag, not peat, not burned, tropical
+					{
+					    if (plant >= 1)     // permanent ag, not peat, not burned, tropical, plantation
+					    {
+					        outdata_permanent_agriculture_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					        outdata_permanent_agriculture_CH4only = 0;
+						    outdata_permanent_agriculture_N2Oonly = 0;
+					        outdata_node_code = 17;
+					    }
+					    if (plant == 0)     // permanent ag, not peat, not burned, tropical, not plantation
+					    {
+					        outdata_permanent_agriculture_CO2only = Biomass_tCO2e_nofire_CO2_only + minsoil_CO2only;
+					        outdata_permanent_agriculture_CH4only = 0;
+						    outdata_permanent_agriculture_N2Oonly = minsoil_N2Oonly;
+					        outdata_node_code = 171;
+					    }
+					}
+					if (ecozone == boreal)   // permanent ag, not peat, not burned, boreal
+					{
+                        outdata_permanent_agriculture_CO2only = Biomass_tCO2e_nofire_CO2_only + minsoil_CO2only;
+                        outdata_permanent_agriculture_CH4only = 0;
+						outdata_permanent_agriculture_N2Oonly = minsoil_N2Oonly;
+                        outdata_node_code = 18;
+					}
+					if (ecozone == temperate)   // permanent ag, not peat, not burned, temperate
+					{
+					    if (plant >= 1)     // permanent ag, not peat, not burned, temperate, plantation
+					    {
+					        outdata_permanent_agriculture_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					        outdata_permanent_agriculture_CH4only = 0;
+						    outdata_permanent_agriculture_N2Oonly = 0;
+					        outdata_node_code = 19;
+					    }
+					    if (plant == 0)     // permanent ag, not peat, not burned, temperate, not plantation
+					    {
+					        outdata_permanent_agriculture_CO2only = Biomass_tCO2e_nofire_CO2_only + minsoil_CO2only;
+					        outdata_permanent_agriculture_CH4only = 0;
+						    outdata_permanent_agriculture_N2Oonly = minsoil_N2Oonly;
+					        outdata_node_code = 191;
+
+					    }
+					}
+				}
+			}
+			outdata_permanent_agriculture_allgases = outdata_permanent_agriculture_CO2only + outdata_permanent_agriculture_CH4only + outdata_permanent_agriculture_N2Oonly;
+			outdata_permanent_agriculture_nonCO2 = outdata_permanent_agriculture_CH4only + outdata_permanent_agriculture_N2Oonly;
+		}
+
+		// Emissions model for hard commodities
+		else if (drivermodel == 2)
+		{
+			// For each driver, these values (or a subset of them) are necessary for calculating emissions.
+			Biomass_tCO2e_nofire_CO2_only = emitted_term(non_soil_c * C_to_CO2, variants.biomass_pools);
+			Biomass_tCO2e_yesfire_CO2_only = emitted_term((non_soil_c * C_to_CO2), variants.biomass_pools);
+			Biomass_tCO2e_yesfire_CH4_only = emitted_term(((non_soil_c / biomass_to_c) * Cf * Gef_CH4 * pow(10,-3) * CH4_equiv), variants.biomass_pools);
+			Biomass_tCO2e_yesfire_N2O_only = emitted_term(((non_soil_c / biomass_to_c) * Cf * Gef_N2O * pow(10,-3) * N2O_equiv), variants.biomass_pools);
+			annual_minsoil_soc_loss = (soil-(soil * hard_commod_flu))/soil_emis_period;
+			total_minsoil_soc_loss = annual_minsoil_soc_loss * (model_years-loss);
+			minsoil_CO2only = emitted_term(total_minsoil_soc_loss * C_to_CO2, variants.soil_pools);
+            minsoil_N2Oonly = emitted_term(total_minsoil_soc_loss * (1/C_N_ratio) * N_mineralization_EF * N2O_N_to_N2O * N2O_equiv, variants.soil_pools);
+
+			if (peat > 0) // hard commodities, peat
+			{
+				if (burn > 0) // hard commodities, peat, burned
+				{
+					outdata_hard_commodities_CO2only = Biomass_tCO2e_yesfire_CO2_only + peat_drain_total_CO2_only + peatburn_CO2_only;
+					outdata_hard_commodities_CH4only = Biomass_tCO2e_yesfire_CH4_only + peat_drain_total_CH4_only + peatburn_CH4_only;
+					outdata_hard_commodities_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + peat_drain_total_N2O_only;
+					outdata_node_code = 20;
+				}
+				if (burn == 0) // hard commodities, peat, not burned
+				{
+					if (ecozone == tropical) // hard commodities, peat, not burned, tropical
+					{
+					    if (plant >= 1) // hard commodities, peat, not burned, tropical, plantation
+					    {
+					    	outdata_hard_commodities_CO2only = Biomass_tCO2e_nofire_CO2_only + peat_drain_total_CO2_only;
+					        outdata_hard_commodities_CH4only = 0 + peat_drain_total_CH4_only;
+					        outdata_hard_commodities_N2Oonly = 0 + peat_drain_total_N2O_only;
+					        outdata_node_code = 21;
+					    }
+					    if (plant == 0)     // hard commodities, peat, not burned, tropical, not plantation
+					    {
+					        outdata_hard_commodities_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					        outdata_hard_commodities_CH4only = 0;
+                            outdata_hard_commodities_N2Oonly = 0;
+					        outdata_node_code = 211;
+					    }
+					}
+                    if ((ecozone == boreal) || (ecozone == temperate))      // hard commodities, peat, not burned, temperate/boreal
+					{
+					    outdata_hard_commodities_CO2only = Biomass_tCO2e_nofire_CO2_only + peat_drain_total_CO2_only;
+					    outdata_hard_commodities_CH4only = 0 + peat_drain_total_CH4_only;
+						outdata_hard_commodities_N2Oonly = 0 + peat_drain_total_N2O_only;
+					    outdata_node_code = 22;
+					}
+				}
+			}
+			if (peat == 0) // hard commodities, not peat
+			{
+				if (burn > 0) // hard commodities, not peat, burned
+				{
+					if (ecozone == tropical)   // hard commodities, not peat, burned, tropical
+					{
+                        if (ifl_primary == 1)   // hard commodities, not peat, burned, tropical, IFL
+                        {
+                            if (plant >= 1)     // hard commodities, not peat, burned, tropical, IFL, plantation
+					        {
+					            outdata_hard_commodities_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					            outdata_hard_commodities_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						        outdata_hard_commodities_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					            outdata_node_code = 23;
+					        }
+					        if (plant == 0)     // hard commodities, not peat, burned, tropical, IFL, not plantation
+					        {
+					            outdata_hard_commodities_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+					            outdata_hard_commodities_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						        outdata_hard_commodities_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					            outdata_node_code = 231;
+					        }
+					    }
+					    if (ifl_primary == 0)   // hard commodities, not peat, burned, tropical, not IFL
+					    {
+                            if (plant >= 1)     // hard commodities, not peat, burned, tropical, not IFL, plantation
+					        {
+					            outdata_hard_commodities_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					            outdata_hard_commodities_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						        outdata_hard_commodities_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					            outdata_node_code = 24;
+ 						        }
+					        if (plant == 0)     // hard commodities, not peat, burned, tropical, not IFL, not plantation
+					        {
+					            outdata_hard_commodities_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+					            outdata_hard_commodities_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						        outdata_hard_commodities_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					            outdata_node_code = 241;
+					        }
+                        }
+					}
+					if (ecozone == boreal)   // hard commodities, not peat, burned, boreal
+					{
+                        outdata_hard_commodities_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+                        outdata_hard_commodities_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						outdata_hard_commodities_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					    outdata_node_code = 25;
+					}
+					if (ecozone == temperate)   // hard commodities, not peat, burned, temperate
+					{
+					    if (plant >= 1)     // hard commodities, not peat, burned, temperate, plantation
+					    {
+					        outdata_hard_commodities_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					        outdata_hard_commodities_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						    outdata_hard_commodities_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					        outdata_node_code = 26;
+					    }
+					    if (plant == 0)     // hard commodities, not peat, burned, temperate, not plantation
+					    {
+					        outdata_hard_commodities_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+					        outdata_hard_commodities_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						    outdata_hard_commodities_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					        outdata_node_code = 261;
+					    }
+					}
+				}
+				if (burn == 0) // hard commodities, not peat, not burned
+				{
+					if (ecozone == tropical)   // hard commodities, not peat, not burned, tropical
+					{
+					    if (plant >= 1)     // hard commodities, not peat, not burned, tropical, plantation
+					    {
+					        outdata_hard_commodities_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					        outdata_hard_commodities_CH4only = 0;
+						    outdata_hard_commodities_N2Oonly = 0;
+					        outdata_node_code = 27;
+					    }
+					    if (plant == 0)     // hard commodities, not peat, not burned, tropical, not plantation
+					    {
+					        outdata_hard_commodities_CO2only = Biomass_tCO2e_nofire_CO2_only + minsoil_CO2only;
+					        outdata_hard_commodities_CH4only = 0;
+						    outdata_hard_commodities_N2Oonly = minsoil_N2Oonly;
+					        outdata_node_code = 271;
+					    }
+					}
+					if (ecozone == boreal)   // hard commodities, not peat, not burned, boreal
+					{
+                        outdata_hard_commodities_CO2only = Biomass_tCO2e_nofire_CO2_only + minsoil_CO2only;
+                        outdata_hard_commodities_CH4only = 0;
+						outdata_hard_commodities_N2Oonly = minsoil_N2Oonly;
+                        outdata_node_code = 28;
+					}
+					if (ecozone == temperate)   // hard commodities, not peat, not burned, temperate
+					{
+					    if (plant >= 1)     // hard commodities, not peat, not burned, temperate, plantation
+					    {
+					        outdata_hard_commodities_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					        outdata_hard_commodities_CH4only = 0;
+						    outdata_hard_commodities_N2Oonly = 0;
+					        outdata_node_code = 29;
+					    }
+					    if (plant == 0)     // hard commodities, not peat, not burned, temperate, not plantation
+					    {
+					        outdata_hard_commodities_CO2only = Biomass_tCO2e_nofire_CO2_only + minsoil_CO2only;
+					        outdata_hard_commodities_CH4only = 0;
+						    outdata_hard_commodities_N2Oonly = minsoil_N2Oonly;
+					        outdata_node_code = 291;
+					    }
+					}
+				}
+			}
+			outdata_hard_commodities_allgases = outdata_hard_commodities_CO2only + outdata_hard_commodities_CH4only + outdata_hard_commodities_N2Oonly;
+			outdata_hard_commodities_nonCO2 = outdata_hard_commodities_CH4only + outdata_hard_commodities_N2Oonly;
+		}
+
+		// Emissions model for shifting cultivation (only difference is flu val)
+		else if (drivermodel == 3)
+		{
+			Biomass_tCO2e_nofire_CO2_only = emitted_term(non_soil_c * C_to_CO2, variants.biomass_pools);
+			Biomass_tCO2e_yesfire_CO2_only = emitted_term((non_soil_c * C_to_CO2), variants.biomass_pools);
+			Biomass_tCO2e_yesfire_CH4_only = emitted_term(((non_soil_c / biomass_to_c) * Cf * Gef_CH4 * pow(10,-3) * CH4_equiv), variants.biomass_pools);
+			Biomass_tCO2e_yesfire_N2O_only = emitted_term(((non_soil_c / biomass_to_c) * Cf * Gef_N2O * pow(10,-3) * N2O_equiv), variants.biomass_pools);
+			annual_minsoil_soc_loss = (soil-(soil * shift_cult_flu))/soil_emis_period;
+			total_minsoil_soc_loss = annual_minsoil_soc_loss * (model_years-loss);
+			minsoil_CO2only = emitted_term(total_minsoil_soc_loss * C_to_CO2, variants.soil_pools);
+            minsoil_N2Oonly = emitted_term(total_minsoil_soc_loss * (1/C_N_ratio) * N_mineralization_EF * N2O_N_to_N2O * N2O_equiv, variants.soil_pools);
+
+			if (peat > 0) // shifting cultivation, peat
+			{
+				if (burn > 0) // shifting cultivation, peat, burned
+				{
+					if ((ecozone == boreal) || (ecozone == temperate))      // shifting cultivation, peat, burned, temperate/boreal
+					{
+					    outdata_shifting_cultivation_CO2only = Biomass_tCO2e_yesfire_CO2_only + peatburn_CO2_only;
+					    outdata_shifting_cultivation_CH4only = Biomass_tCO2e_yesfire_CH4_only + peatburn_CH4_only;
+						outdata_shifting_cultivation_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					    outdata_node_code = 30;
+					}
+					if (ecozone == tropical)      // shifting cultivation, peat, burned, tropical
+					{
+					    outdata_shifting_cultivation_CO2only = Biomass_tCO2e_yesfire_CO2_only + peat_drain_total_CO2_only + peatburn_CO2_only;
+					    outdata_shifting_cultivation_CH4only = Biomass_tCO2e_yesfire_CH4_only + peat_drain_total_CH4_only + peatburn_CH4_only;
+						outdata_shifting_cultivation_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + peat_drain_total_N2O_only;
+					    outdata_node_code = 31;
+					}
+				}
+				if (burn == 0)// shifting cultivation, peat, not burned
+				{
+					if ((ecozone == boreal) || (ecozone == temperate))      // shifting cultivation, peat, not burned, temperate/boreal
+					{
+					    outdata_shifting_cultivation_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					    outdata_shifting_cultivation_CH4only = 0;
+						outdata_shifting_cultivation_N2Oonly = 0;
+					    outdata_node_code = 32;
+					}
+					if (ecozone == tropical)      // shifting cultivation, peat, not burned, tropical
+					{
+					    if (plant >= 1)     // shifting cultivation, peat, not burned, tropical, plantation
+					    {
+					        outdata_shifting_cultivation_CO2only = Biomass_tCO2e_nofire_CO2_only + peat_drain_total_CO2_only;
+					        outdata_shifting_cultivation_CH4only = 0 + peat_drain_total_CH4_only;
+						    outdata_shifting_cultivation_N2Oonly = 0 + peat_drain_total_N2O_only;
+					        outdata_node_code = 33;
+					    }
+					    if (plant == 0)     // shifting cultivation, peat, not burned, tropical, not plantation
+					    {
+					        outdata_shifting_cultivation_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					        outdata_shifting_cultivation_CH4only = 0;
+						    outdata_shifting_cultivation_N2Oonly = 0;
+					        outdata_node_code = 331;
+					    }
+					}
+				}
+			}
+			if (peat == 0)// shifting cultivation, not peat
+			{
+				if (burn > 0) // shifting cultivation, not peat, burned
+				{
+					if (ecozone == tropical)   // shifting cultivation, not peat, burned, tropical
+					{
+                        if (ifl_primary == 1)   // shifting cultivation, not peat, burned, tropical, IFL
+                        {
+                            if (plant >= 1)     // shifting cultivation, not peat, burned, tropical, IFL, plantation
+					        {
+					            outdata_shifting_cultivation_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					            outdata_shifting_cultivation_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						        outdata_shifting_cultivation_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					            outdata_node_code = 34;
+					        }
+					        if (plant == 0)     // shifting cultivation, not peat, burned, tropical, IFL, not plantation
+					        {
+					            outdata_shifting_cultivation_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+					            outdata_shifting_cultivation_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						        outdata_shifting_cultivation_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					            outdata_node_code = 341;
+					        }
+					    }
+					    if (ifl_primary == 0)   // shifting cultivation, not peat, burned, tropical, not IFL
+					    {
+                            if (plant >= 1)     // shifting cultivation, not peat, burned, tropical, not IFL, plantation
+					        {
+					            outdata_shifting_cultivation_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					            outdata_shifting_cultivation_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						        outdata_shifting_cultivation_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					            outdata_node_code = 35;
+					        }
+					        if (plant == 0)     // shifting cultivation, not peat, burned, tropical, not IFL, not plantation
+					        {
+					            outdata_shifting_cultivation_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+					            outdata_shifting_cultivation_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						        outdata_shifting_cultivation_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					            outdata_node_code = 351;
+					        }
+                        }
+					}
+					if (ecozone == boreal)   // shifting cultivation, not peat, burned, boreal
+					{
+                        outdata_shifting_cultivation_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+                        outdata_shifting_cultivation_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						outdata_shifting_cultivation_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					    outdata_node_code = 36;
+					}
+					if (ecozone == temperate)   // shifting cultivation, not peat, burned, temperate
+					{
+					    if (plant >= 1)     // shifting cultivation, not peat, burned, temperate, plantation
+					    {
+					        outdata_shifting_cultivation_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					        outdata_shifting_cultivation_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						    outdata_shifting_cultivation_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					        outdata_node_code = 37;
+					    }
+					    if (plant == 0)     // shifting cultivation, not peat, burned, temperate, not plantation
+					    {
+					        outdata_shifting_cultivation_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+					        outdata_shifting_cultivation_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+						    outdata_shifting_cultivation_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					        outdata_node_code = 371;
+					    }
+					}
+				}
+				if (burn == 0) // shifting cultivation, not peat, not burned
+				{
+					if (ecozone == tropical)   // shifting cultivation, not peat, not burned, tropical
+					{
+					    if (plant >= 1)     // shifting cultivation, not peat, not burned, tropical, plantation
+					    {
+					        outdata_shifting_cultivation_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					        outdata_shifting_cultivation_CH4only = 0;
+						    outdata_shifting_cultivation_N2Oonly = 0;
+					        outdata_node_code = 38;
+					    }
+					    if (plant == 0)     // shifting cultivation, not peat, not burned, tropical, not plantation
+					    {
+					        outdata_shifting_cultivation_CO2only = Biomass_tCO2e_nofire_CO2_only + minsoil_CO2only;
+					        outdata_shifting_cultivation_CH4only = 0;
+						    outdata_shifting_cultivation_N2Oonly = minsoil_N2Oonly;
+					        outdata_node_code = 381;
+
+					    }
+					}
+					if (ecozone == boreal)   // shifting cultivation, not peat, not burned, boreal
+					{
+                        outdata_shifting_cultivation_CO2only = Biomass_tCO2e_nofire_CO2_only + minsoil_CO2only;
+                        outdata_shifting_cultivation_CH4only = 0;
+					    outdata_shifting_cultivation_N2Oonly = minsoil_N2Oonly;
+                        outdata_node_code = 39;
+					}
+					if (ecozone == temperate)   // shifting cultivation, not peat, not burned, temperate
+					{
+					    if (plant >= 1)     // shifting cultivation, not peat, not burned, temperate, plantation
+					    {
+					        outdata_shifting_cultivation_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					        outdata_shifting_cultivation_CH4only = 0;
+					        outdata_shifting_cultivation_N2Oonly = 0;
+					        outdata_node_code = 391;
+					    }
+					    if (plant == 0)     // shifting cultivation, not peat, not burned, temperate, not plantation
+					    {
+					        outdata_shifting_cultivation_CO2only = Biomass_tCO2e_nofire_CO2_only + minsoil_CO2only;
+					        outdata_shifting_cultivation_CH4only = 0;
+					        outdata_shifting_cultivation_N2Oonly = minsoil_N2Oonly;
+					        outdata_node_code = 392;
+					    }
+					}
+				}
+			}
+		    outdata_shifting_cultivation_allgases = outdata_shifting_cultivation_CO2only + outdata_shifting_cultivation_CH4only + outdata_shifting_cultivation_N2Oonly;
+		    outdata_shifting_cultivation_nonCO2 = outdata_shifting_cultivation_CH4only + outdata_shifting_cultivation_N2Oonly;
+		}
+
+		// Emissions model for logging
+		else if (drivermodel == 4)
+		{
+			Biomass_tCO2e_nofire_CO2_only = emitted_term(above_below_c * C_to_CO2, variants.biomass_pools);
+			Biomass_tCO2e_yesfire_CO2_only = emitted_term(((agc / biomass_to_c) * Cf * Gef_CO2 * pow(10, -3)), variants.biomass_pools);
+            Biomass_tCO2e_yesfire_CH4_only = emitted_term(((non_soil_bgc_c / biomass_to_c) * Cf * Gef_CH4 * pow(10, -3) * CH4_equiv), variants.biomass_pools);
+			Biomass_tCO2e_yesfire_N2O_only = emitted_term(((non_soil_bgc_c / biomass_to_c) * Cf * Gef_N2O * pow(10, -3) * N2O_equiv), variants.biomass_pools);
+
+			if (peat > 0) // logging, peat
+			{
+				if (burn > 0 ) // logging, peat, burned
+				{
+					outdata_forest_management_CO2only = Biomass_tCO2e_yesfire_CO2_only + peat_drain_total_CO2_only + peatburn_CO2_only;
+					outdata_forest_management_CH4only = Biomass_tCO2e_yesfire_CH4_only + peat_drain_total_CH4_only + peatburn_CH4_only;
+					outdata_forest_management_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + peat_drain_total_N2O_only;
+					outdata_node_code = 40;
+				}
+				if (burn == 0 )  // logging, peat, not burned
+				{
+					if ((ecozone == boreal) || (ecozone == temperate))  // logging, peat, not burned, temperate/boreal
+					{
+						outdata_forest_management_CO2only = Biomass_tCO2e_nofire_CO2_only;
+						outdata_forest_management_CH4only = 0;
+					    outdata_forest_management_N2Oonly = 0;
+						outdata_node_code = 41;
+					}
+					if (ecozone == tropical)// logging, peat, not burned, tropical
+					{
+						if (plant > 0)  // logging, peat, not burned, tropical, plantation
+						{
+							outdata_forest_management_CO2only = Biomass_tCO2e_nofire_CO2_only + peat_drain_total_CO2_only;
+							outdata_forest_management_CH4only = 0 + peat_drain_total_CH4_only;
+							outdata_forest_management_N2Oonly = 0 + peat_drain_total_N2O_only;
+							outdata_node_code = 42;
+						}
+						if (plant == 0)  // logging, peat, not burned, tropical, not plantation
+						{
+							outdata_forest_management_CO2only = Biomass_tCO2e_nofire_CO2_only;
+							outdata_forest_management_CH4only = 0;
+							outdata_forest_management_N2Oonly = 0;
+							outdata_node_code = 421;
+						}
+					}
+				}
+			}
+			else  // logging, not peat
+			{
+				if (burn > 0) // logging, not peat, burned
+				{
+					outdata_forest_management_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					outdata_forest_management_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+					outdata_forest_management_N2Oonly= Biomass_tCO2e_yesfire_N2O_only;
+					outdata_node_code = 43;
+				}
+				if (burn == 0) // logging, not peat, not burned
+				{
+					outdata_forest_management_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					outdata_forest_management_CH4only = 0;
+					outdata_forest_management_N2Oonly = 0;
+					outdata_node_code = 44;
+				}
+			}
+			outdata_forest_management_allgases = outdata_forest_management_CO2only + outdata_forest_management_CH4only + outdata_forest_management_N2Oonly;
+			outdata_forest_management_nonCO2 = outdata_forest_management_CH4only + outdata_forest_management_N2Oonly;
+		}
+
+	    // Emissions model for wildfires
+	    else if (drivermodel == 5)
+		{
+			Biomass_tCO2e_nofire_CO2_only = emitted_term(above_below_c * C_to_CO2, variants.biomass_pools);
+			Biomass_tCO2e_yesfire_CO2_only = emitted_term(((agc / biomass_to_c) * Cf * Gef_CO2 * pow(10, -3)), variants.biomass_pools);
+            Biomass_tCO2e_yesfire_CH4_only = emitted_term(((non_soil_bgc_c / biomass_to_c) * Cf * Gef_CH4 * pow(10, -3) * CH4_equiv), variants.biomass_pools);
+			Biomass_tCO2e_yesfire_N2O_only = emitted_term(((non_soil_bgc_c / biomass_to_c) * Cf * Gef_N2O * pow(10, -3) * N2O_equiv), variants.biomass_pools);
+
+			if (peat > 0) // wildfire, peat
+			{
+				if (burn > 0) // wildfire, peat, burned
+				{
+					outdata_wildfire_CO2only = Biomass_tCO2e_yesfire_CO2_only + peat_drain_total_CO2_only + peatburn_CO2_only;
+					outdata_wildfire_CH4only = Biomass_tCO2e_yesfire_CH4_only + peat_drain_total_CH4_only + peatburn_CH4_only;
+					outdata_wildfire_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + peat_drain_total_N2O_only;
+					outdata_node_code = 50;
+				}
+				if (burn == 0) // wildfire, peat, not burned
+				{
+					if ((ecozone == boreal) || (ecozone == temperate)) // wildfire, peat, not burned, temperate/boreal
+					{
+						outdata_wildfire_CO2only = Biomass_tCO2e_nofire_CO2_only;
+						outdata_wildfire_CH4only = 0;
+					    outdata_wildfire_N2Oonly = 0;
+						outdata_node_code = 51;
+					}
+					if (ecozone == tropical) // wildfire, peat, not burned, tropical
+					{
+				        if (plant > 0)  // wildfire, peat, not burned, tropical, plantation
+						{
+							outdata_wildfire_CO2only = Biomass_tCO2e_nofire_CO2_only + peat_drain_total_CO2_only;
+							outdata_wildfire_CH4only = 0 + peat_drain_total_CH4_only;
+					        outdata_wildfire_N2Oonly = 0 + peat_drain_total_N2O_only;
+							outdata_node_code = 52;
+						}
+						if (plant == 0)  // wildfire, peat, not burned, tropical, not plantation
+						{
+							outdata_wildfire_CO2only = Biomass_tCO2e_nofire_CO2_only;
+							outdata_wildfire_CH4only = 0;
+					        outdata_wildfire_N2Oonly = 0;
+							outdata_node_code = 521;
+						}
+					}
+				}
+			}
+			else  // wildfire, not peat
+			{
+				if (burn > 0)  // wildfire, not peat, burned
+				{
+					outdata_wildfire_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					outdata_wildfire_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+					outdata_wildfire_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					outdata_node_code = 53;
+				}
+				else  // wildfire, not peat, not burned
+				{
+					outdata_wildfire_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					outdata_wildfire_CH4only = 0;
+					outdata_wildfire_N2Oonly = 0;
+					outdata_node_code = 54;
+				}
+			}
+			outdata_wildfire_allgases = outdata_wildfire_CO2only + outdata_wildfire_CH4only + outdata_wildfire_N2Oonly;
+			outdata_wildfire_nonCO2 = outdata_wildfire_CH4only + outdata_wildfire_N2Oonly;
+		}
+
+	    // Emissions model for settlements & infrastructure
+	    else if (drivermodel == 6)
+		{
+			Biomass_tCO2e_nofire_CO2_only = emitted_term(non_soil_c * C_to_CO2, variants.biomass_pools);
+			Biomass_tCO2e_yesfire_CO2_only = emitted_term((non_soil_c * C_to_CO2), variants.biomass_pools);
+			Biomass_tCO2e_yesfire_CH4_only = emitted_term(((non_soil_c / biomass_to_c) * Cf * Gef_CH4 * pow(10,-3) * CH4_equiv), variants.biomass_pools);
+			Biomass_tCO2e_yesfire_N2O_only = emitted_term(((non_soil_c / biomass_to_c) * Cf * Gef_N2O * pow(10,-3) * N2O_equiv), variants.biomass_pools);
+			annual_minsoil_soc_loss = (soil-(soil * settlements_flu))/soil_emis_period;
+			total_minsoil_soc_loss = annual_minsoil_soc_loss * (model_years-loss);
+			minsoil_CO2only = emitted_term(total_minsoil_soc_loss * C_to_CO2, variants.soil_pools);
+            minsoil_N2Oonly = emitted_term(total_minsoil_soc_loss * (1/C_N_ratio) * N_mineralization_EF * N2O_N_to_N2O * N2O_equiv, variants.soil_pools);
+
+            if (peat > 0) // settlements & infrastructure, peat
+			{
+				if (burn > 0) // settlements & infrastructure, peat, burned
+				{
+					outdata_settlements_CO2only = Biomass_tCO2e_yesfire_CO2_only + peat_drain_total_CO2_only + peatburn_CO2_only;
+					outdata_settlements_CH4only = Biomass_tCO2e_yesfire_CH4_only + peat_drain_total_CH4_only + peatburn_CH4_only;
+					outdata_settlements_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + peat_drain_total_N2O_only;
+					outdata_node_code = 60;
+				}
+				if (burn == 0) // settlements & infrastructure, peat, not burned
+				{
+					if (ecozone == tropical) // settlements & infrastructure, peat, not burned, tropical
+					{
+					    if (plant >= 1) // settlements & infrastructure, peat, not burned, tropical, plantation
+					    {
+					    	outdata_settlements_CO2only = Biomass_tCO2e_nofire_CO2_only + peat_drain_total_CO2_only;
+					        outdata_settlements_CH4only = 0 + peat_drain_total_CH4_only;
+					        outdata_settlements_N2Oonly = 0 + peat_drain_total_N2O_only;
+					        outdata_node_code = 61;
+					    }
+					    if (plant == 0)     // settlements & infrastructure, peat, not burned, tropical, not plantation
+					    {
+					        outdata_settlements_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					        outdata_settlements_CH4only = 0;
+					        outdata_settlements_N2Oonly = 0;
+					        outdata_node_code = 611;
+					    }
+					}
+                    if ((ecozone == boreal) || (ecozone == temperate))      // settlements & infrastructure, peat, not burned, temperate/boreal
+					{
+					    outdata_settlements_CO2only = Biomass_tCO2e_nofire_CO2_only + peat_drain_total_CO2_only_node_62;
+					    outdata_settlements_CH4only = 0 + peat_drain_total_CH4_only;
+					    outdata_settlements_N2Oonly = 0 + peat_drain_total_N2O_only;
+					    outdata_node_code = 62;
+					}
+				}
+			}
+			if (peat == 0)// settlements & infrastructure, not peat
+			{
+				if (burn > 0) // settlements & infrastructure, not peat, burned
+				{
+					if (ecozone == tropical)   // settlements & infrastructure, not peat, burned, tropical
+					{
+                        if (ifl_primary == 1)   // settlements & infrastructure, not peat, burned, tropical, IFL
+                        {
+                            if (plant >= 1)     // settlements & infrastructure, not peat, burned, tropical, IFL, plantation
+					        {
+					            outdata_settlements_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					            outdata_settlements_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+					            outdata_settlements_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					            outdata_node_code = 63;
+					        }
+					        if (plant == 0)     // settlements & infrastructure, not peat, burned, tropical, IFL, not plantation
+					        {
+					            outdata_settlements_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+					            outdata_settlements_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+					            outdata_settlements_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					            outdata_node_code = 631;
+					        }
+					    }
+					    if (ifl_primary == 0)   // settlements & infrastructure, not peat, burned, tropical, not IFL
+					    {
+                            if (plant >= 1)     // settlements & infrastructure, not peat, burned, tropical, not IFL, plantation
+					        {
+					            outdata_settlements_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					            outdata_settlements_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+					            outdata_settlements_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					            outdata_node_code = 64;
+					        }
+					        if (plant == 0)     // settlements & infrastructure, not peat, burned, tropical, not IFL, not plantation
+					        {
+					            outdata_settlements_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+					            outdata_settlements_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+					            outdata_settlements_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					            outdata_node_code = 641;
+					        }
+                        }
+					}
+					if (ecozone == boreal)   // settlements & infrastructure, not peat, burned, boreal
+					{
+                        outdata_settlements_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+                        outdata_settlements_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+					    outdata_settlements_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					    outdata_node_code = 65;
+					}
+					if (ecozone == temperate)   // settlements & infrastructure, not peat, burned, temperate
+					{
+					    if (plant >= 1)     // settlements & infrastructure, not peat, burned, temperate, plantation
+					    {
+					        outdata_settlements_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					        outdata_settlements_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+					        outdata_settlements_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					        outdata_node_code = 66;
+					    }
+					    if (plant == 0)     // settlements & infrastructure, not peat, burned, temperate, not plantation
+					    {
+					        outdata_settlements_CO2only = Biomass_tCO2e_yesfire_CO2_only + minsoil_CO2only;
+					        outdata_settlements_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+					        outdata_settlements_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + minsoil_N2Oonly;
+					        outdata_node_code = 661;
+					    }
+					}
+				}
+				if (burn == 0) // settlements & infrastructure, not peat, not burned
+				{
+					if (ecozone == tropical)   // settlements & infrastructure, not peat, not burned, tropical
+					{
+					    if (plant >= 1)     // settlements & infrastructure, not peat, not burned, tropical, plantation
+					    {
+					        outdata_settlements_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					        outdata_settlements_CH4only = 0;
+					        outdata_settlements_N2Oonly = 0;
+					        outdata_node_code = 67;
+					    }
+					    if (plant == 0)     // settlements & infrastructure, not peat, not burned, tropical, not plantation
+					    {
+					        outdata_settlements_CO2only = Biomass_tCO2e_nofire_CO2_only + minsoil_CO2only;
+					        outdata_settlements_CH4only = 0;
+					        outdata_settlements_N2Oonly = minsoil_N2Oonly;
+					        outdata_node_code = 671;
+					    }
+					}
+					if (ecozone == boreal)   // settlements & infrastructure, not peat, not burned, boreal
+					{
+                        outdata_settlements_CO2only = Biomass_tCO2e_nofire_CO2_only + minsoil_CO2only;
+                        outdata_settlements_CH4only = 0;
+					    outdata_settlements_N2Oonly = minsoil_N2Oonly;
+                        outdata_node_code = 68;
+					}
+					if (ecozone == temperate)   // settlements & infrastructure, not peat, not burned, temperate
+					{
+					    if (plant >= 1)     // settlements & infrastructure, not peat, not burned, temperate, plantation
+					    {
+					        outdata_settlements_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					        outdata_settlements_CH4only = 0;
+					        outdata_settlements_N2Oonly = 0;
+					        outdata_node_code = 69;
+					    }
+					    if (plant == 0)     // settlements & infrastructure, not peat, not burned, temperate, not plantation
+					    {
+					        outdata_settlements_CO2only = Biomass_tCO2e_nofire_CO2_only + minsoil_CO2only;
+					        outdata_settlements_CH4only = 0;
+					        outdata_settlements_N2Oonly = minsoil_N2Oonly;
+					        outdata_node_code = 691;
+					    }
+					}
+				}
+			}
+			outdata_settlements_allgases = outdata_settlements_CO2only + outdata_settlements_CH4only + outdata_settlements_N2Oonly;
+			outdata_settlements_nonCO2 = outdata_settlements_CH4only + outdata_settlements_N2Oonly;
+		}
+
+		// Emissions model for other natural disturbances
+		else if (drivermodel == 7)
+		{
+			Biomass_tCO2e_nofire_CO2_only = emitted_term(above_below_c * C_to_CO2, variants.biomass_pools);
+			Biomass_tCO2e_yesfire_CO2_only = emitted_term(((agc / biomass_to_c) * Cf * Gef_CO2 * pow(10, -3)), variants.biomass_pools);
+            Biomass_tCO2e_yesfire_CH4_only = emitted_term(((non_soil_bgc_c / biomass_to_c) * Cf * Gef_CH4 * pow(10, -3) * CH4_equiv), variants.biomass_pools);
+			Biomass_tCO2e_yesfire_N2O_only = emitted_term(((non_soil_bgc_c / biomass_to_c) * Cf * Gef_N2O * pow(10, -3) * N2O_equiv), variants.biomass_pools);
+
+			if (peat > 0) // other natural disturbances, peat
+			{
+				if (burn > 0 ) // other natural disturbances, peat, burned
+				{
+					outdata_other_disturbances_CO2only = Biomass_tCO2e_yesfire_CO2_only + peat_drain_total_CO2_only + peatburn_CO2_only;
+					outdata_other_disturbances_CH4only = Biomass_tCO2e_yesfire_CH4_only + peat_drain_total_CH4_only + peatburn_CH4_only;
+					outdata_other_disturbances_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + peat_drain_total_N2O_only;
+					outdata_node_code = 70;
+				}
+				if (burn == 0 )  // other natural disturbances, peat, not burned
+				{
+					if ((ecozone == boreal) || (ecozone == temperate))  // other natural disturbances, peat, not burned, temperate/boreal
+					{
+						outdata_other_disturbances_CO2only = Biomass_tCO2e_nofire_CO2_only;
+						outdata_other_disturbances_CH4only = 0;
+					    outdata_other_disturbances_N2Oonly = 0;
+						outdata_node_code = 71;
+					}
+					if (ecozone == tropical)// other natural disturbances, peat, not burned, tropical
+					{
+						if (plant > 0)  // other natural disturbances, peat, not burned, tropical, plantation
+						{
+							outdata_other_disturbances_CO2only = Biomass_tCO2e_nofire_CO2_only + peat_drain_total_CO2_only;
+							outdata_other_disturbances_CH4only = 0 + peat_drain_total_CH4_only;
+							outdata_other_disturbances_N2Oonly = 0 + peat_drain_total_N2O_only;
+							outdata_node_code = 72;
+						}
+						if (plant == 0)  // other natural disturbances, peat, not burned, tropical, not plantation
+						{
+							outdata_other_disturbances_CO2only = Biomass_tCO2e_nofire_CO2_only;
+							outdata_other_disturbances_CH4only = 0;
+							outdata_other_disturbances_N2Oonly = 0;
+							outdata_node_code = 721;
+						}
+					}
+				}
+			}
+			else  // other natural disturbances, not peat
+			{
+				if (burn > 0) // other natural disturbances, not peat, burned
+				{
+					outdata_other_disturbances_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					outdata_other_disturbances_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+					outdata_other_disturbances_N2Oonly= Biomass_tCO2e_yesfire_N2O_only;
+					outdata_node_code = 73;
+				}
+				if (burn == 0) // other natural disturbances, not peat, not burned
+				{
+					outdata_other_disturbances_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					outdata_other_disturbances_CH4only = 0;
+					outdata_other_disturbances_N2Oonly = 0;
+					outdata_node_code = 74;
+				}
+			}
+			outdata_other_disturbances_allgases = outdata_other_disturbances_CO2only + outdata_other_disturbances_CH4only + outdata_other_disturbances_N2Oonly;
+			outdata_other_disturbances_nonCO2 = outdata_other_disturbances_CH4only + outdata_other_disturbances_N2Oonly;
+		}
+
+	    // Emissions for where there is no driver model.
+	    // Radost said to make it the same as other natural disturbances
+	    else
+		{
+			Biomass_tCO2e_nofire_CO2_only = emitted_term(above_below_c * C_to_CO2, variants.biomass_pools);
+			Biomass_tCO2e_yesfire_CO2_only = emitted_term(((agc / biomass_to_c) * Cf * Gef_CO2 * pow(10, -3)), variants.biomass_pools);
+            Biomass_tCO2e_yesfire_CH4_only = emitted_term(((non_soil_bgc_c / biomass_to_c) * Cf * Gef_CH4 * pow(10, -3) * CH4_equiv), variants.biomass_pools);
+			Biomass_tCO2e_yesfire_N2O_only = emitted_term(((non_soil_bgc_c / biomass_to_c) * Cf * Gef_N2O * pow(10, -3) * N2O_equiv), variants.biomass_pools);
+
+			if (peat > 0) // No driver, peat
+			{
+				if (burn > 0 ) // No driver, peat, burned
+				{
+					outdata_no_driver_CO2only = Biomass_tCO2e_yesfire_CO2_only + peat_drain_total_CO2_only + peatburn_CO2_only;
+					outdata_no_driver_CH4only = Biomass_tCO2e_yesfire_CH4_only + peat_drain_total_CH4_only + peatburn_CH4_only;
+					outdata_no_driver_N2Oonly = Biomass_tCO2e_yesfire_N2O_only + peat_drain_total_N2O_only;
+					outdata_node_code = 80;
+				}
+				if (burn == 0 )  // No driver, peat, not burned
+				{
+					if ((ecozone == boreal) || (ecozone == temperate))  // No driver, peat, not burned, temperate/boreal
+					{
+						outdata_no_driver_CO2only = Biomass_tCO2e_nofire_CO2_only;
+						outdata_no_driver_CH4only = 0;
+						outdata_no_driver_N2Oonly = 0;
+						outdata_node_code = 81;
+					}
+					if (ecozone == tropical)// No driver, peat, not burned, tropical
+					{
+						if (plant > 0)  // No driver, peat, not burned, tropical, plantation
+						{
+							outdata_no_driver_CO2only = Biomass_tCO2e_nofire_CO2_only + peat_drain_total_CO2_only;
+							outdata_no_driver_CH4only = 0 + peat_drain_total_CH4_only;
+						    outdata_no_driver_N2Oonly = 0 + peat_drain_total_N2O_only;
+							outdata_node_code = 82;
+						}
+						if (plant == 0)  // No driver, peat, not burned, tropical, not plantation
+						{
+							outdata_no_driver_CO2only = Biomass_tCO2e_nofire_CO2_only;
+							outdata_no_driver_CH4only = 0;
+						    outdata_no_driver_N2Oonly = 0;
+							outdata_node_code = 821;
+						}
+					}
+				}
+			}
+			else
+			{
+				if (burn > 0) // No driver, not peat, burned
+				{
+					outdata_no_driver_CO2only = Biomass_tCO2e_yesfire_CO2_only;
+					outdata_no_driver_CH4only = Biomass_tCO2e_yesfire_CH4_only;
+				    outdata_no_driver_N2Oonly = Biomass_tCO2e_yesfire_N2O_only;
+					outdata_node_code = 83;
+				}
+				if (burn == 0) // No driver, not peat, not burned
+				{
+					outdata_no_driver_CO2only = Biomass_tCO2e_nofire_CO2_only;
+					outdata_no_driver_CH4only = 0;
+					outdata_no_driver_N2Oonly = 0;
+					outdata_node_code = 84;
+				}
+			}
+			outdata_no_driver_allgases = outdata_no_driver_CO2only + outdata_no_driver_CH4only + outdata_no_driver_N2Oonly;
+			outdata_no_driver_nonCO2 = outdata_no_driver_CH4only + outdata_no_driver_N2Oonly;
+		}
+
+
+        // Add up all drivers for a combined raster. Each pixel only has one driver
+        outdata_alldrivers_allgases = outdata_permanent_agriculture_allgases + outdata_hard_commodities_allgases + outdata_shifting_cultivation_allgases + outdata_forest_management_allgases + outdata_wildfire_allgases + outdata_settlements_allgases + outdata_other_disturbances_allgases + outdata_no_driver_allgases;
+        outdata_alldrivers_CO2only = outdata_permanent_agriculture_CO2only + outdata_hard_commodities_CO2only + outdata_shifting_cultivation_CO2only + outdata_forest_management_CO2only + outdata_wildfire_CO2only + outdata_settlements_CO2only + outdata_other_disturbances_CO2only + outdata_no_driver_CO2only;
+        outdata_alldrivers_nonCO2 = outdata_permanent_agriculture_nonCO2 + outdata_hard_commodities_nonCO2 +outdata_shifting_cultivation_nonCO2 + outdata_forest_management_nonCO2 + outdata_wildfire_nonCO2 + outdata_settlements_nonCO2 + outdata_other_disturbances_nonCO2 + outdata_no_driver_nonCO2;
+        outdata_alldrivers_CH4only = outdata_permanent_agriculture_CH4only + outdata_hard_commodities_CH4only +outdata_shifting_cultivation_CH4only + outdata_forest_management_CH4only + outdata_wildfire_CH4only + outdata_settlements_CH4only + outdata_other_disturbances_CH4only + outdata_no_driver_CH4only;
+        outdata_alldrivers_N2Oonly = outdata_permanent_agriculture_N2Oonly + outdata_hard_commodities_N2Oonly +outdata_shifting_cultivation_N2Oonly + outdata_forest_management_N2Oonly + outdata_wildfire_N2Oonly + outdata_settlements_N2Oonly + outdata_other_disturbances_N2Oonly + outdata_no_driver_N2Oonly;
+
+        // Pixels with no emissions get 0 for every gas
+        for (int i = 0; i < variants.n; i++)
+        {
+            if (outdata_alldrivers_allgases.value[i] != 0)
+            {
+                float *variant_outdata = &outdata[i * n_gas_outputs];
+                variant_outdata[0] = outdata_alldrivers_allgases.value[i];
+                variant_outdata[1] = outdata_alldrivers_CO2only.value[i];
+                variant_outdata[2] = outdata_alldrivers_nonCO2.value[i];
+                variant_outdata[3] = outdata_alldrivers_CH4only.value[i];
+                variant_outdata[4] = outdata_alldrivers_N2Oonly.value[i];
+            }
+        }
+    }
+
+    // Decision tree end node value (0 if pixel is not on loss and carbon)
+    *node_code = outdata_node_code;
+}
+
+
+// Calculates gross emissions for a window of n_pixels pixels. Called from Python with NumPy arrays.
+// Carbon pools (except soil) are float32 arrays. Soil is uint16 and the other inputs are in their rasters' integer types
+// (uint8, and int16 for ecozone), so they don't have to be converted to float32 arrays first. Each value is converted
+// to float in the pixel's decision tree, which gives the same results as the executables' float32 reads.
+// biomass_pools and soil_pools select the emitted pools of each of the n_variants options (at most max_pool_variants):
+// biomass_soil (1, 1), biomass_only (1, 0) or soil_only (0, 1).
+// out_data has float32 arrays for all gases, CO2 only, non-CO2, CH4 only and N2O only (all drivers) for each option
+// in turn. The decision tree nodes, which are the same for all options, are a uint16 array.
+extern "C" void calc_gross_emissions_window(long n_pixels, int n_variants, const int *biomass_pools, const int *soil_pools,
+                                            const float *agc_data, const float *bgc_data, const float *dead_data,
+                                            const float *litter_data, const uint16_t *soil_data, const uint8_t *loss_data,
+                                            const uint8_t *burn_data, const uint8_t *drivermodel_data, const uint8_t *peat_data,
+                                            const uint8_t *ifl_primary_data, const int16_t *ecozone_data,
+                                            const uint8_t *climate_data, const uint8_t *plant_data,
+                                            float **out_data, uint16_t *out_data_node_code)
+{
+    long x;
+
+    pool_variants variants;
+    variants.n = n_variants;
+    for (int i = 0; i < max_pool_variants; i++)
+    {
+        variants.biomass_pools[i] = (i < n_variants) && biomass_pools[i];
+        variants.soil_pools[i] = (i < n_variants) && soil_pools[i];
+    }
+
+    for (x=0; x<n_pixels; x++)
+    {
+        // Initializes each output at 0 (nodata value)
+        float outdata[max_pool_variants * n_gas_outputs] = {0};
+
+        calc_gross_emissions_pixel(variants,
+                                   agc_data[x], bgc_data[x], dead_data[x], litter_data[x], soil_data[x],
+                                   loss_data[x], burn_data[x], drivermodel_data[x], peat_data[x], ifl_primary_data[x],
+                                   ecozone_data[x], climate_data[x], plant_data[x],
+                                   &outdata[0], &out_data_node_code[x]);
+
+        for (int output = 0; output < n_variants * n_gas_outputs; output++)
+        {
+            out_data[output][x] = outdata[output];
+        }
+    }
+}
+
+
+// Number of rows in the emission factor table
+extern "C" int emission_factor_table_rows()
+{
+    return n_emission_factor_rows;
+}
+
+// Copies the emission factor table into out_data (n_emission_factor_rows x n_emission_factor_columns, row by row)
+// so that its values can be checked against the flowchart constants.
+// Each row is the driver, ecozone, IFL/primary, plantation and climate classes followed by the factors.
+extern "C" void copy_emission_factor_table(float *out_data)
+{
+    const emission_factor_table &table = emission_factors_for_run();
+    int row = 0;
+
+    for (int driver = 0; driver < n_driver_classes; driver++)
+    for (int eco = 0; eco < n_ecozone_classes; eco++)
+    for (int ifl = 0; ifl < n_ifl_classes; ifl++)
+    for (int plant = 0; plant < n_plant_classes; plant++)
+    for (int climate = 0; climate < n_climate_classes; climate++)
+    {
+        const emission_factors &factors = table.rows[emission_factor_row(driver, eco, ifl, plant, climate)];
+        float values[n_emission_factor_columns] = {(float)driver, (float)eco, (float)ifl, (float)plant, (float)climate,
+                                                   factors.Cf, factors.Gef_CO2, factors.Gef_CH4, factors.Gef_N2O,
+                                                   factors.peatburn_CO2_only, factors.peatburn_CH4_only,
+                                                   factors.peat_drain_annual_CO2_only, factors.peat_drain_annual_CH4_only,
+                                                   factors.peat_drain_annual_N2O_only, factors.flu};
+
+        for (int column = 0; column < n_emission_factor_columns; column++)
+        {
+            out_data[row * n_emission_factor_columns + column] = values[column];
+        }
+        row++;
+    }
+}
@@ -3,8 +3,25 @@ This script calculates the gross emissions in tonnes CO2e/ha for every loss pixe
 The properties of each pixel determine the appropriate emissions equation, the constants for the equation, and the
 carbon pool values that go into the equation.
 Unlike all other flux model components, this one uses C++ to quickly iterate through every pixel in each tile.
+By default, the C++ decision tree is compiled as a shared library (calc_gross_emissions_extension.so) that is called
+in-process on rasterio windows of the inputs (--emissions-engine extension). The C++ executables that read and write
+whole tiles themselves can be used instead (--emissions-engine executable). Where there isn't a C++ compiler,
+the same decision tree can be run in NumPy on rasterio windows (--emissions-engine numpy, calculate_gross_emissions_numpy.py),
+which gives the same outputs as the extension. benchmarks/gross_emissions.py compares the two.
 The relevant version of emissions C++ is compiled each time this file is run, so the C++ doesn't need to be compiled
-as an extra initial step.
+as an extra initial step. Compiled C++ is cached in cpp_util/build_cache under the hash of the C++ files, the compiler
+version and the build profile, so it is only recompiled when one of those changes. The build profile is set with
+--emissions-build-profile: default (no optimization, as the C++ has always been compiled) or release (optimized,
+with outputs identical to the default build's). Which build was used is reported in the log.
+The emissions extension looks up the emission factors from def_variables (equations.cpp) and flu_val (flu_val.cpp)
+in a table built once per run rather than evaluating them for every pixel. The table is written to
+gross_emissions_emission_factor_table.csv in the tile folder so that it can be checked against the flowchart.
+The extension and NumPy engines also sum each tile's emissions (area-weighted, in Mg CO2e) by decision tree node,
+driver and loss year while they calculate it. The tile tables are merged into one gross emissions summary for the run,
+which is uploaded to the gross emissions summary folder, so the QA and reporting tables don't need the emissions
+tiles to be read again.
+With --emissions-by-driver, they also write the emissions by driver in the same pass: a tile for each gas with a band
+for each driver, so driver-level maps don't need the emissions tiles to be masked with the drivers tiles afterwards.
 
 However, if you want to compile the standard emissions model C++ outside of a run,
 do the following inside the Docker container:
@@ -18,6 +35,8 @@ The other C++ scripts (equations.cpp and flu_val.cpp) do not need to be compiled
 Run the emissions model with:
 python -m emissions.mp_calculate_gross_emissions -t [MODEL_TYPE] -p [POOL_OPTION] -l [TILE_LIST] [optional_arguments]
 The --pools-to-use argument specifies whether to calculate gross emissions from biomass+soil, biomass only (i.e. all non-soil carbon pools including AGB, BGB, deadwood and litter), or soil only.
+Several of them can be calculated together (e.g. -p biomass_soil,biomass_only). The emissions extension then calculates
+all of them in one pass through the inputs of each tile, rather than reading the inputs again for each.
 The --model-type argument specifies whether the model run is a sensitivity analysis or standard run.
 Emissions from all drivers is also output as emissions due to CO2, CH4, and N2O.
 The other output shows which branch of the decision tree that determines the emissions equation applies to each pixel.
@@ -29,7 +48,6 @@ python -m emissions.mp_calculate_gross_emissions -t std -l all
 
 import argparse
 from functools import partial
-import multiprocessing
 import os
 import sys
 
@@ -37,13 +55,15 @@ import constants_and_names as cn
 import universal_util as uu
 
 from . import calculate_gross_emissions
+from . import calculate_gross_emissions_numpy
 
 def mp_calculate_gross_emissions(tile_id_list, emitted_pools):
     """
     :param tile_id_list: list of tile ids to process
     :param emitted_pools: Whether emissions from biomass only, emissions from soil only, or emissions from biomass and soil is calculated.
-        Options are: biomass_only, soil_only, or biomass_soil.
-    :return: 6 tiles -
+        Options are: biomass_only, soil_only, or biomass_soil, or several of them separated by commas (e.g. biomass_soil,biomass_only).
+        With the emissions extension, several options are calculated in one pass through the inputs.
+    :return: 6 tiles for each emitted pools option -
         1. all gases (CO2, CH4 and N2O from all drivers);
         2. CO2 emissions from all drivers;
         3. non-CO2 emissions from all drivers (CH4 and N2O from all drivers);
@@ -92,81 +112,112 @@ def mp_calculate_gross_emissions(tile_id_list, emitted_pools):
         download_dict[cn.loss_dir] = [cn.pattern_loss]
 
 
-    # Checks the validity of the emitted_pools argument
-    if (emitted_pools not in ['biomass_only', 'soil_only', 'biomass_soil']):
-        uu.exception_log('Invalid pool input. Please choose biomass_only, soil_only or biomass_soil.')
-
-
-    # Checks if the correct c++ script has been compiled for the pool option selected
-    if emitted_pools == 'biomass_soil':
-
-        # Output file directories for biomass+soil. Must be in same order as output pattern directories.
-        output_dir_list = [cn.gross_emis_all_gases_all_drivers_biomass_soil_dir,
-                           cn.gross_emis_co2_only_all_drivers_biomass_soil_dir,
-                           cn.gross_emis_non_co2_all_drivers_biomass_soil_dir,
-                           cn.gross_emis_ch4_only_all_drivers_biomass_soil_dir,
-                           cn.gross_emis_n2o_only_all_drivers_biomass_soil_dir,
-                           cn.gross_emis_nodes_biomass_soil_dir]
-
-        output_pattern_list = [cn.pattern_gross_emis_all_gases_all_drivers_biomass_soil,
-                               cn.pattern_gross_emis_co2_only_all_drivers_biomass_soil,
-                               cn.pattern_gross_emis_non_co2_all_drivers_biomass_soil,
-                               cn.pattern_gross_emis_ch4_only_all_drivers_biomass_soil,
-                               cn.pattern_gross_emis_n2o_only_all_drivers_biomass_soil,
-                               cn.pattern_gross_emis_nodes_biomass_soil]
-
-        # The standard model can all use the same, generic gross emissions script.
-        uu.print_log(f'Compiling generic model C++...')
-        cmd = ['c++', f'/usr/local/app/emissions/cpp_util/calc_gross_emissions_generic.cpp',
-                '-o', f'/usr/local/app/emissions/cpp_util/calc_gross_emissions_generic.exe', '-lgdal']
-        uu.log_subprocess_output_full(cmd)
-
-    elif (emitted_pools == 'biomass_only') & (cn.SENSIT_TYPE == 'std'):
-
-        # Output file directories for biomass_only. Must be in same order as output pattern directories.
-        output_dir_list = [cn.gross_emis_all_gases_all_drivers_biomass_only_dir,
-                           cn.gross_emis_co2_only_all_drivers_biomass_only_dir,
-                           cn.gross_emis_non_co2_all_drivers_biomass_only_dir,
-                           cn.gross_emis_ch4_only_all_drivers_biomass_only_dir,
-                           cn.gross_emis_n2o_only_all_drivers_biomass_only_dir,
-                           cn.gross_emis_nodes_biomass_only_dir]
-
-        output_pattern_list = [cn.pattern_gross_emis_all_gases_all_drivers_biomass_only,
-                               cn.pattern_gross_emis_co2_only_all_drivers_biomass_only,
-                               cn.pattern_gross_emis_non_co2_all_drivers_biomass_only,
-                               cn.pattern_gross_emis_ch4_only_all_drivers_biomass_only,
-                               cn.pattern_gross_emis_n2o_only_all_drivers_biomass_only,
-                               cn.pattern_gross_emis_nodes_biomass_only]
-
-        uu.print_log(f'Compiling biomass_only model C++...')
-        cmd = ['c++', f'/usr/local/app/emissions/cpp_util/calc_gross_emissions_biomass_only.cpp',
-               '-o', f'/usr/local/app/emissions/cpp_util/calc_gross_emissions_biomass_only.exe', '-lgdal']
-        uu.log_subprocess_output_full(cmd)
-
-    elif (emitted_pools == 'soil_only') & (cn.SENSIT_TYPE == 'std'):
-
-        # Output file directories for soil_only. Must be in same order as output pattern directories.
-        output_dir_list = [cn.gross_emis_all_gases_all_drivers_soil_only_dir,
-                           cn.gross_emis_co2_only_all_drivers_soil_only_dir,
-                           cn.gross_emis_non_co2_all_drivers_soil_only_dir,
-                           cn.gross_emis_ch4_only_all_drivers_soil_only_dir,
-                           cn.gross_emis_n2o_only_all_drivers_soil_only_dir,
-                           cn.gross_emis_nodes_soil_only_dir]
-
-        output_pattern_list = [cn.pattern_gross_emis_all_gases_all_drivers_soil_only,
-                               cn.pattern_gross_emis_co2_only_all_drivers_soil_only,
-                               cn.pattern_gross_emis_non_co2_all_drivers_soil_only,
-                               cn.pattern_gross_emis_ch4_only_all_drivers_soil_only,
-                               cn.pattern_gross_emis_n2o_only_all_drivers_soil_only,
-                               cn.pattern_gross_emis_nodes_soil_only]
-
-        uu.print_log(f'Compiling soil_only model C++...')
-        cmd = ['c++', f'/usr/local/app/emissions/cpp_util/calc_gross_emissions_soil_only.cpp',
-               '-o', f'/usr/local/app/emissions/cpp_util/calc_gross_emissions_soil_only.exe', '-lgdal']
-        uu.log_subprocess_output_full(cmd)
+    # Checks the validity of the emitted_pools argument.
+    # Several emitted pools options can be calculated in the same pass through the inputs, e.g. biomass_soil,biomass_only.
+    emitted_pools_list = emitted_pools.split(',')
+    if any(pools not in ['biomass_only', 'soil_only', 'biomass_soil'] for pools in emitted_pools_list):
+        uu.exception_log('Invalid pool input. Please choose biomass_only, soil_only or biomass_soil, or several of them separated by commas.')
+
+    output_dir_list = []
+    output_pattern_list = []
+
+    for pools in emitted_pools_list:
+
+        if pools == 'biomass_soil':
+
+            # Output file directories for biomass+soil. Must be in same order as output pattern directories.
+            output_dir_list.extend([cn.gross_emis_all_gases_all_drivers_biomass_soil_dir,
+                                    cn.gross_emis_co2_only_all_drivers_biomass_soil_dir,
+                                    cn.gross_emis_non_co2_all_drivers_biomass_soil_dir,
+                                    cn.gross_emis_ch4_only_all_drivers_biomass_soil_dir,
+                                    cn.gross_emis_n2o_only_all_drivers_biomass_soil_dir,
+                                    cn.gross_emis_nodes_biomass_soil_dir])
+
+            output_pattern_list.extend([cn.pattern_gross_emis_all_gases_all_drivers_biomass_soil,
+                                        cn.pattern_gross_emis_co2_only_all_drivers_biomass_soil,
+                                        cn.pattern_gross_emis_non_co2_all_drivers_biomass_soil,
+                                        cn.pattern_gross_emis_ch4_only_all_drivers_biomass_soil,
+                                        cn.pattern_gross_emis_n2o_only_all_drivers_biomass_soil,
+                                        cn.pattern_gross_emis_nodes_biomass_soil])
+
+        elif (pools == 'biomass_only') & (cn.SENSIT_TYPE == 'std'):
+
+            # Output file directories for biomass_only. Must be in same order as output pattern directories.
+            output_dir_list.extend([cn.gross_emis_all_gases_all_drivers_biomass_only_dir,
+                                    cn.gross_emis_co2_only_all_drivers_biomass_only_dir,
+                                    cn.gross_emis_non_co2_all_drivers_biomass_only_dir,
+                                    cn.gross_emis_ch4_only_all_drivers_biomass_only_dir,
+                                    cn.gross_emis_n2o_only_all_drivers_biomass_only_dir,
+                                    cn.gross_emis_nodes_biomass_only_dir])
+
+            output_pattern_list.extend([cn.pattern_gross_emis_all_gases_all_drivers_biomass_only,
+                                        cn.pattern_gross_emis_co2_only_all_drivers_biomass_only,
+                                        cn.pattern_gross_emis_non_co2_all_drivers_biomass_only,
+                                        cn.pattern_gross_emis_ch4_only_all_drivers_biomass_only,
+                                        cn.pattern_gross_emis_n2o_only_all_drivers_biomass_only,
+                                        cn.pattern_gross_emis_nodes_biomass_only])
+
+        elif (pools == 'soil_only') & (cn.SENSIT_TYPE == 'std'):
+
+            # Output file directories for soil_only. Must be in same order as output pattern directories.
+            output_dir_list.extend([cn.gross_emis_all_gases_all_drivers_soil_only_dir,
+                                    cn.gross_emis_co2_only_all_drivers_soil_only_dir,
+                                    cn.gross_emis_non_co2_all_drivers_soil_only_dir,
+                                    cn.gross_emis_ch4_only_all_drivers_soil_only_dir,
+                                    cn.gross_emis_n2o_only_all_drivers_soil_only_dir,
+                                    cn.gross_emis_nodes_soil_only_dir])
+
+            output_pattern_list.extend([cn.pattern_gross_emis_all_gases_all_drivers_soil_only,
+                                        cn.pattern_gross_emis_co2_only_all_drivers_soil_only,
+                                        cn.pattern_gross_emis_non_co2_all_drivers_soil_only,
+                                        cn.pattern_gross_emis_ch4_only_all_drivers_soil_only,
+                                        cn.pattern_gross_emis_n2o_only_all_drivers_soil_only,
+                                        cn.pattern_gross_emis_nodes_soil_only])
 
+        else:
+            uu.exception_log('Pool and/or sensitivity analysis option not valid')
+
+    # Emissions by driver are split from the emissions from all drivers in the same pass through the inputs,
+    # which the C++ executables don't do
+    if cn.EMISSIONS_BY_DRIVER:
+
+        if cn.EMISSIONS_ENGINE == 'executable':
+            uu.exception_log('Emissions by driver are only made by the extension and numpy emissions engines')
+
+        for pools in emitted_pools_list:
+            output_dir_list.extend([output_dir.replace('biomass_soil', pools) for output_dir in
+                                    [cn.gross_emis_all_gases_by_driver_biomass_soil_dir,
+                                     cn.gross_emis_co2_only_by_driver_biomass_soil_dir,
+                                     cn.gross_emis_non_co2_by_driver_biomass_soil_dir,
+                                     cn.gross_emis_ch4_only_by_driver_biomass_soil_dir,
+                                     cn.gross_emis_n2o_only_by_driver_biomass_soil_dir]])
+
+            output_pattern_list.extend([pattern.replace('biomass_soil', pools) for pattern in
+                                        [cn.pattern_gross_emis_all_gases_by_driver_biomass_soil,
+                                         cn.pattern_gross_emis_co2_only_by_driver_biomass_soil,
+                                         cn.pattern_gross_emis_non_co2_by_driver_biomass_soil,
+                                         cn.pattern_gross_emis_ch4_only_by_driver_biomass_soil,
+                                         cn.pattern_gross_emis_n2o_only_by_driver_biomass_soil]])
+
+    # Compiles the emissions C++, or uses the cached build if nothing that goes into it has changed.
+    # The emissions extension is the same decision tree for all emitted pools options and calculates all of them
+    # in one pass through the inputs.
+    # The standard model and the sensitivity analyses can all use the same, generic gross emissions executable.
+    # The executables calculate one emitted pools option per pass through the inputs.
+    # The extension's emission factors (looked up by each pixel's categorical inputs) are written out for checking.
+    # The NumPy decision tree doesn't need to be compiled.
+    if cn.EMISSIONS_ENGINE == 'extension':
+        calculate_gross_emissions.compile_emissions_extension()
+        emission_factors = calculate_gross_emissions.emission_factor_table(calculate_gross_emissions.load_emissions_extension())
+        calculate_gross_emissions.write_emission_factor_table(emission_factors, os.path.join(folder, cn.emission_factor_table_csv))
+    elif cn.EMISSIONS_ENGINE == 'numpy':
+        emission_factors = calculate_gross_emissions_numpy.emission_factor_table()
+        calculate_gross_emissions.write_emission_factor_table(emission_factors, os.path.join(folder, cn.emission_factor_table_csv))
+    elif cn.EMISSIONS_ENGINE == 'executable':
+        for pools in emitted_pools_list:
+            calculate_gross_emissions.compile_emissions_executable(pools)
     else:
-        uu.exception_log('Pool and/or sensitivity analysis option not valid')
+        uu.exception_log(f'Invalid emissions engine {cn.EMISSIONS_ENGINE}. Please choose extension, numpy or executable.')
 
 
     # Downloads input files or entire directories, depending on how many tiles are in the tile_id_list
@@ -191,17 +242,20 @@ def mp_calculate_gross_emissions(tile_id_list, emitted_pools):
     uu.print_log(output_pattern_list)
 
 
-    # The C++ code expects certain tiles for every input 10x10.
+    # The C++ executables expect certain tiles for every input 10x10.
     # However, not all Hansen tiles have all of these inputs.
     # This function creates "dummy" tiles for all Hansen tiles that currently have non-existent tiles.
     # That way, the C++ script gets all the necessary input files.
     # If it doesn't get the necessary inputs, it skips that tile.
-    uu.print_log('Making blank tiles for inputs that do not currently exist')
+    # The emissions extension reads inputs that don't exist as 0s, so it doesn't need blank tiles.
     # All of the inputs that need to have dummy tiles made in order to match the tile list of the carbon emitted_pools
     pattern_list = [cn.pattern_planted_forest_type, cn.pattern_peat_mask, cn.pattern_ifl_primary,
                     cn.pattern_drivers, cn.pattern_bor_tem_trop_processed, cn.pattern_TCLF_processed, cn.pattern_climate_zone,
                     cn.pattern_soil_C_emis_year_2000]
-
+    if cn.EMISSIONS_ENGINE == 'executable':
+        uu.print_log('Making blank tiles for inputs that do not currently exist')
+    else:
+        pattern_list = []
 
     # textfile that stores the names of the blank tiles that are created for processing.
     # This will be iterated through to delete the tiles at the end of the script.
@@ -213,43 +267,39 @@ def mp_calculate_gross_emissions(tile_id_list, emitted_pools):
                 uu.make_blank_tile(tile, pattern, folder)
 
     else:
-        processes=80 # 60 = 100 GB peak; 80 =  XXX GB peak
         for output_pattern in pattern_list:
-            with multiprocessing.Pool(processes) as pool:
-                pool.map(partial(uu.make_blank_tile, pattern=output_pattern, folder=folder),
-                         tile_id_list)
-                pool.close()
-                pool.join()
+            uu.map_tiles(partial(uu.make_blank_tile, pattern=output_pattern, folder=folder),
+                         tile_id_list, 'make_blank_tile')
 
 
-    # Calculates gross emissions for each tile
+    # Calculates gross emissions for each tile.
+    # The extension can split each tile's rows across threads (--emissions-threads). By default (0), the number of
+    # threads is chosen for each tile from how many tiles remain: tiles are processed in parallel while there are
+    # many of them, and the last few tiles (or a rerun of a few tiles) are split across the idle processors.
     if cn.SINGLE_PROCESSOR:
         for tile in tile_id_list:
-              calculate_gross_emissions.calc_emissions(tile, emitted_pools, folder)
+              calculate_gross_emissions.calc_emissions(tile, emitted_pools, folder, max(1, cn.EMISSIONS_THREADS))
 
-    else:
-        # count/4 uses about 390 GB on a r4.16xlarge spot machine.
-        # processes=18 uses about 440 GB on an r4.16xlarge spot machine.
-        # (these values are for the old 10km drivers, might be different with 1km drivers now)
-        if cn.count == 96:
-            if cn.SENSIT_TYPE == 'biomass_swap':
-                processes = 15 # 15 processors = XXX GB peak
-            else:
-                processes = 19   # 17 = 650 GB peak; 18 = 677 GB peak; 19 = 720 GB peak
-        else:
-            processes = 9
-        uu.print_log(f'Gross emissions max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(calculate_gross_emissions.calc_emissions, emitted_pools=emitted_pools,
+    elif cn.EMISSIONS_ENGINE != 'executable' and cn.EMISSIONS_THREADS == 0:
+        uu.map_tiles(partial(calculate_gross_emissions.calc_emissions, emitted_pools=emitted_pools,
                              folder=folder),
-                     tile_id_list)
-            pool.close()
-            pool.join()
+                     tile_id_list, f'calc_emissions_{emitted_pools.replace(",", "_")}', threads_arg='threads')
+
+    else:
+        uu.map_tiles(partial(calculate_gross_emissions.calc_emissions, emitted_pools=emitted_pools,
+                             folder=folder, threads=max(1, cn.EMISSIONS_THREADS)),
+                     tile_id_list, f'calc_emissions_{emitted_pools.replace(",", "_")}')
 
 
     # Print the list of blank created tiles, delete the tiles, and delete their text file
     uu.list_and_delete_blank_tiles()
 
+    # Merges the emissions summaries of the tiles. The C++ executables don't make summaries.
+    emissions_summary_csv = None
+    if cn.EMISSIONS_ENGINE != 'executable':
+        emissions_summary_csv = f'{cn.pattern_gross_emis_summary}_v{cn.version}_{cn.SENSIT_TYPE}_{uu.date_time_today}.csv'
+        calculate_gross_emissions.write_emissions_summary(tile_id_list, emissions_summary_csv)
+
     for i, output_pattern in enumerate(output_pattern_list):
 
         uu.print_log(f'Adding metadata tags for pattern {output_pattern}')
@@ -259,16 +309,8 @@ def mp_calculate_gross_emissions(tile_id_list, emitted_pools):
                 uu.add_emissions_metadata(tile_id, output_pattern)
 
         else:
-            if cn.count == 96:
-                processes = 75  # 45 processors = ~30 GB peak; 55 = XXX GB peak; 75 = XXX GB peak
-            else:
-                processes = 9
-            uu.print_log(f'Adding metadata tags max processors={processes}')
-            with multiprocessing.Pool(processes) as pool:
-                pool.map(partial(uu.add_emissions_metadata, output_pattern=output_pattern),
-                         tile_id_list)
-                pool.close()
-                pool.join()
+            uu.map_tiles(partial(uu.add_emissions_metadata, output_pattern=output_pattern),
+                         tile_id_list, 'add_emissions_metadata')
 
 
 
@@ -278,6 +320,11 @@ def mp_calculate_gross_emissions(tile_id_list, emitted_pools):
         for output_dir, output_pattern in zip(output_dir_list, output_pattern_list):
             uu.upload_final_set(output_dir, output_pattern)
 
+        # Copies the emissions summary to the gross emissions summary folder on s3
+        if emissions_summary_csv is not None:
+            cmd = ['aws', 's3', 'cp', emissions_summary_csv, cn.gross_emis_summary_dir]
+            uu.log_subprocess_output_full(cmd)
+
 
 if __name__ == '__main__':
 
@@ -295,7 +342,16 @@ if __name__ == '__main__':
     parser.add_argument('--single-processor', '-sp', action='store_true',
                        help='Uses single processing rather than multiprocessing')
     parser.add_argument('--emitted-pools-to-use', '-p', required=True,
-                        help='Options are biomass_only, soil_only or biomass_soil. biomass_only only considers emissions from biomass. soil_only only considers emissions from soil. biomass_soil considers emissions from biomass and soil.')
+                        help='Options are biomass_only, soil_only or biomass_soil, or several of them separated by commas (e.g. biomass_soil,biomass_only). biomass_only only considers emissions from biomass. soil_only only considers emissions from soil. biomass_soil considers emissions from biomass and soil.')
+    parser.add_argument('--emissions-engine', '-ee', default=cn.EMISSIONS_ENGINE, choices=['extension', 'numpy', 'executable'],
+                        help='extension runs the C++ decision tree in-process on rasterio windows. numpy runs the same decision tree in NumPy, without a C++ compiler. executable runs the C++ executable for each tile.')
+    parser.add_argument('--emissions-build-profile', '-ebp', default=cn.EMISSIONS_BUILD_PROFILE, choices=['default', 'release'],
+                        help='default compiles the emissions C++ without optimization. release compiles it with optimization.')
+    parser.add_argument('--emissions-threads', '-et', type=int, default=cn.EMISSIONS_THREADS,
+                        help='Number of threads that the emissions extension splits each tile across. 0 chooses it for each tile from how many tiles remain.')
+    parser.add_argument('--emissions-by-driver', '-ebd', action='store_true',
+                        help='Also writes gross emissions by driver, with a band for each driver, in the same pass as the emissions from all drivers. Not with the executable emissions engine.')
+    uu.add_tile_processing_arguments(parser)
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
@@ -304,6 +360,11 @@ if __name__ == '__main__':
     cn.NO_UPLOAD = args.no_upload
     cn.SINGLE_PROCESSOR = args.single_processor
     cn.EMITTED_POOLS = args.emitted_pools_to_use
+    cn.EMISSIONS_ENGINE = args.emissions_engine
+    cn.EMISSIONS_BUILD_PROFILE = args.emissions_build_profile
+    cn.EMISSIONS_THREADS = args.emissions_threads
+    cn.EMISSIONS_BY_DRIVER = args.emissions_by_driver
+    uu.set_tile_processing_arguments(args)
 
     tile_id_list = args.tile_id_list
 
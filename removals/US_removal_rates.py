@@ -8,9 +8,78 @@ import constants_and_names as cn
 import universal_util as uu
 
 
+# Codes of the age categories in the US forest age category raster and the names of their columns in the US removal factor table
+US_age_categories = {1: 'young', 2: 'middle', 3: 'old'}
+
+
+def US_removal_rate_table(gain_table, column_prefixes, default=0):
+    """
+    Makes the lookup table of US removal factors by forest age category, forest group and FIA region,
+    so that the removal factors of a window are looked up with one gather rather than one comparison per table row.
+    :param gain_table: table of US removal factors with rows for FIA region-forest group combinations and columns for age categories
+    :param column_prefixes: prefixes of the columns that are looked up together (e.g., ['growth', 'SD'] for removal factors
+        and their standard deviations). Each prefix has a column for each age category (e.g., growth_young).
+    :param default: value for combinations of codes without a value in the table
+    :return: lookup table (uu.make_composite_lookup_table) of the values by age category code, forest group and region code
+    """
+
+    code_dict = {}
+
+    for age_cat, age_name in US_age_categories.items():
+
+        values = gain_table[[f'{prefix}_{age_name}' for prefix in column_prefixes]].values.astype('float64')
+
+        for region, group, value in zip(gain_table['FIA_region_code'], gain_table['forest_group_code'], values):
+
+            # Region-group combinations without any values for this age category aren't in the table
+            if np.isnan(value).all():
+                continue
+
+            code_dict[(age_cat, group, region)] = np.where(np.isnan(value), default, value)
+
+    uu.print_log(code_dict)
+
+    table, code_count, default = uu.make_composite_lookup_table(code_dict, default=default)
+
+    # Pixels without an age category, forest group or FIA region don't have US removal factors
+    table[0, :, :] = default
+    table[:, 0, :] = default
+    table[:, :, 0] = default
+
+    return table, code_count, default
+
+
+def US_removal_rate_window(gain_window, US_age_cat_window, US_forest_group_window, US_region_window, rate_table):
+    """
+    Assigns US removal factors and standard deviations to a window
+    :param gain_window: array of Hansen gain
+    :param US_age_cat_window: array of US forest age categories
+    :param US_forest_group_window: array of FIA forest groups
+    :param US_region_window: array of FIA regions
+    :param rate_table: lookup table (US_removal_rate_table) of removal factors and standard deviations
+    :return: arrays of AGC+BGC removal factor and standard deviation
+    """
+
+    # Pixels with Hansen gain get the young forest rate, regardless of their age category, because gain is more
+    # specific information than the Pan et al. forest age category raster.
+    # They still need an age category, which limits the output to pixels that had some age category input.
+    age_cat_window = np.where((gain_window != 0) & (US_age_cat_window != 0), 1, US_age_cat_window)
+
+    # Looks up the removal factor and standard deviation of each pixel's age category-forest group-region combination at once
+    rate_stdev_window = uu.apply_composite_lookup_table((age_cat_window, US_forest_group_window, US_region_window), rate_table)
+
+    return rate_stdev_window[..., 0], rate_stdev_window[..., 1]
+
+
 # Creates annual AGC and BGC removal rate rasters for US using US-specific removal rates
-def US_removal_rate_calc(tile_id, gain_table_group_region_age_dict, gain_table_group_region_dict,
-                         stdev_table_group_region_age_dict, stdev_table_group_region_dict, output_pattern_list):
+def US_removal_rate_calc(tile_id, rate_table, output_pattern_list):
+    """
+    :param tile_id: tile to be processed, identified by its tile id
+    :param rate_table: lookup table (US_removal_rate_table) of removal factors and standard deviations
+        by age category, forest group and FIA region
+    :param output_pattern_list: patterns for output tile names
+    :return: tiles of AGC+BGC removal factors and their standard deviations
+    """
 
     uu.print_log("Assigning US removal rates and removal rate standard deviations:", tile_id)
 
@@ -29,8 +98,8 @@ def US_removal_rate_calc(tile_id, gain_table_group_region_age_dict, gain_table_g
         # Grabs metadata about the tif, like its location/projection/cell size
         kwargs = US_age_cat_src.meta
 
-        # Grabs the windows of the tile (stripes) so we can iterate over the entire tif without running out of memory
-        windows = US_age_cat_src.block_windows(1)
+        # Grabs the windows of the tile (groups of stripes) so we can iterate over the entire tif without running out of memory
+        windows = uu.iterate_windows(US_age_cat_src, tile_id, 'US_removal_rate_calc')
 
         # Opens other necessary tiles
         gain_src = rasterio.open(gain)
@@ -67,94 +136,21 @@ def US_removal_rate_calc(tile_id, gain_table_group_region_age_dict, gain_table_g
         agc_bgc_stdev_dst.update_tags(
             extent='Continental USA. Applies to pixels for which an FIA region, FIA forest group, and Pan et al. forest age category are available or interpolated.')
 
-        # Iterates across the windows (1 pixel strips) of the input tile
+        # Iterates across the windows (groups of 1 pixel strips) of the input tile
         for idx, window in windows:
 
             # Creates window for each input raster
             gain_window = gain_src.read(1, window=window)
-            US_age_cat_window = US_age_cat_src.read(1, window=window).astype('float32')
-            US_forest_group_window = US_forest_group_src.read(1, window=window).astype('float32')
-            US_region_window = US_region_src.read(1, window=window).astype('float32')
-
-
-            ### For removal factors
-
-            # Creates empty windows (arrays) that will store removals rates. There are separate arrays for
-            # no Hansen gain pixels and for Hansen gain pixels. These are later combined.
-            # Pixels without and with Hansen gain are treated separately because gain pixels automatically get the youngest
-            # removal rate, regardless of their age category.
-            agc_bgc_without_gain_pixel_window = np.zeros((window.height, window.width), dtype='float32')
-            agc_bgc_with_gain_pixel_window = np.zeros((window.height, window.width), dtype='float32')
-
-            # Performs the same operation on the three rasters as is done on the values in the table in order to
-            # make the codes (dictionary key) match. Then, combines the three rasters. These values now match the key values in the spreadsheet.
-            group_region_age_combined_window = (US_age_cat_window * 10000 + US_forest_group_window * 100 + US_region_window)
-
-
-            # Masks the combined age-group-region raster to the three input tiles (age category, forest group, FIA region).
-            # Excludes all Hansen gain pixels.
-            group_region_age_combined_window = np.ma.masked_where(US_age_cat_window == 0, group_region_age_combined_window).filled(0).astype('uint16')
-            group_region_age_combined_window = np.ma.masked_where(US_forest_group_window == 0, group_region_age_combined_window).filled(0)
-            group_region_age_combined_window = np.ma.masked_where(US_region_window == 0, group_region_age_combined_window).filled(0)
-            group_region_age_combined_window = np.ma.masked_where(gain_window != 0, group_region_age_combined_window).filled(0)
-
-            # Applies the dictionary of group-region-age removals rates to the group-region-age numpy array to
-            # get annual removals rates (Mg AGC+BGC/ha/yr) for each non-Hansen gain pixel
-            for key, value in gain_table_group_region_age_dict.items():
-                agc_bgc_without_gain_pixel_window[group_region_age_combined_window == key] = value
-
-
-            # This is for pixels with Hansen gain, so it assumes the age category is young and therefore only
-            # includes region and forest group.
-            # Performs the same operation on the two rasters as is done on the values in the table in order to
-            # make the codes (dictionary key) match. Then, combines the two rasters. These values now match the key values in the spreadsheet.
-            group_region_combined_window = (US_forest_group_window * 100 + US_region_window)
-
-            # Masks the combined age-group-region raster to the three input tiles (age category, forest group, FIA region).
-            # It masks to age category simply to limit the output to pixels that had some age category input.
-            # The real age category masking comes when the array is masked to only where Hansen gain occurs.
-            group_region_combined_window = np.ma.masked_where(US_age_cat_window == 0, group_region_combined_window).filled(0).astype('uint16')
-            group_region_combined_window = np.ma.masked_where(US_forest_group_window == 0, group_region_combined_window).filled(0)
-            group_region_combined_window = np.ma.masked_where(US_region_window == 0, group_region_combined_window).filled(0)
-            group_region_combined_window = np.ma.masked_where(gain_window == 0, group_region_combined_window).filled(0)
-
-            # Applies the dictionary of group-region removals rates to the group-region numpy array to
-            # get annual removals rates (Mg AGC+BGC/ha/yr) for each pixel that doesn't have Hansen gain
-            for key, value in gain_table_group_region_dict.items():
-                agc_bgc_with_gain_pixel_window[group_region_combined_window == key] = value
-
-            # Pixels with Hansen gain fill in the pixels that don't have Hansen gain. Each pixel has a value in
-            # one or neither of these arrays but not both of these arrays
-            agc_bgc_rate_window = agc_bgc_without_gain_pixel_window + agc_bgc_with_gain_pixel_window
-
-            # Writes the output to raster
-            agc_bgc_rate_dst.write_band(1, agc_bgc_rate_window, window=window)
+            US_age_cat_window = US_age_cat_src.read(1, window=window)
+            US_forest_group_window = US_forest_group_src.read(1, window=window)
+            US_region_window = US_region_src.read(1, window=window)
 
+            agc_bgc_rate_window, stdev_agc_bgc_window = US_removal_rate_window(gain_window, US_age_cat_window,
+                                                                               US_forest_group_window, US_region_window,
+                                                                               rate_table)
 
-            ### For removal factor standard deviation
-
-            # Creates empty windows (arrays) that will store stdev. There are separate arrays for
-            # no Hansen gain pixels and for Hansen gain pixels. These are later combined.
-            # Pixels without and with Hansen gain are treated separately because removals pixels automatically get the youngest
-            # removal rate stdev, regardless of their age category.
-            stdev_agc_bgc_without_gain_pixel_window = np.zeros((window.height, window.width), dtype='float32')
-            stdev_agc_bgc_with_gain_pixel_window = np.zeros((window.height, window.width), dtype='float32')
-
-            # Applies the dictionary of group-region-age removals rates to the group-region-age numpy array to
-            # get annual removals rates (Mg AGC+BGC/ha/yr) for each non-Hansen gain pixel
-            for key, value in stdev_table_group_region_age_dict.items():
-                stdev_agc_bgc_without_gain_pixel_window[group_region_age_combined_window == key] = value
-
-            # Applies the dictionary of group-region removals rates to the group-region numpy array to
-            # get annual removals rates (Mg AGC+BGC/ha/yr) for each pixel that doesn't have Hansen gain
-            for key, value in stdev_table_group_region_dict.items():
-                stdev_agc_bgc_with_gain_pixel_window[group_region_combined_window == key] = value
-
-            # Pixels with Hansen gain fill in the pixels that don't have Hansen gain. Each pixel has a value in
-            # one or neither of these arrays but not both of these arrays
-            stdev_agc_bgc_window = stdev_agc_bgc_without_gain_pixel_window + stdev_agc_bgc_with_gain_pixel_window
-
-            # Writes the output to raster
+            # Writes the outputs to rasters
+            agc_bgc_rate_dst.write_band(1, agc_bgc_rate_window, window=window)
             agc_bgc_stdev_dst.write_band(1, stdev_agc_bgc_window, window=window)
 
 
@@ -9,6 +9,136 @@ import rasterio
 import constants_and_names as cn
 import universal_util as uu
 
+# Metadata tags of the output tiles: removal forest type, aboveground rate, belowground rate,
+# aboveground+belowground rate, standard deviation for aboveground rate
+removal_rate_tags = [
+    dict(key='6: mangroves. 5: European-specific rates. 4: planted forests. 3: US-specific rates. 2: young (<20 year) secondary forests. 1: old (>20 year) secondary forests and primary forests. Priority goes to the highest number.',
+         source='Mangroves: IPCC wetlands supplement. Europe: Liz Goldman. Planted forests: Spatial Database of Planted Forests. USA: US FIA, via Rich Birdsey. Young natural forests: Cook-Patton et al. 2020. Old natural forests: IPCC Forests table 4.9',
+         extent='Full model extent'),
+    dict(units='megagrams aboveground carbon/ha/yr',
+         source='Mangroves: IPCC wetlands supplement Table 4.4. Europe: Liz Goldman. Planted forests: Spatial Database of Planted Forests. USA: US FIA, via Rich Birdsey. Young natural forests: Cook-Patton et al. 2020. Old natural forests: IPCC Forests table 4.9',
+         extent='Full model extent'),
+    dict(units='megagrams belowground carbon/ha/yr',
+         source='Mangroves: IPCC wetlands supplement Table 4.4. Europe: Liz Goldman. Planted forests: Spatial Database of Planted Forests. USA: US FIA, via Rich Birdsey. Young natural forests: Cook-Patton et al. 2020. Old natural forests: IPCC Forests table 4.9',
+         extent='Full model extent'),
+    dict(units='megagrams aboveground + belowground carbon/ha/yr',
+         source='Mangroves: IPCC wetlands supplement Table 4.4. Europe: Liz Goldman. Planted forests: Spatial Database of Planted Forests. USA: US FIA, via Rich Birdsey. Young natural forests: Cook-Patton et al. 2020. Old natural forests: IPCC Forests table 4.9',
+         extent='Full model extent'),
+    dict(units='standard deviation for removal factor, in terms of megagrams aboveground carbon/ha/yr',
+         source='Mangroves: IPCC wetlands supplement Table 4.4. Europe: Liz Goldman. Planted forests: Spatial Database of Planted Forests. USA: US FIA, via Rich Birdsey. Young natural forests: Cook-Patton et al. 2020. Old natural forests: IPCC Forests table 4.9',
+         extent='Full model extent')
+]
+
+# Removal factor sources from highest to lowest priority, with the removal forest type code of each
+removal_factor_sources = [('mangrove', cn.mangrove_rank), ('europe', cn.europe_rank),
+                          ('plantations', cn.planted_forest_rank), ('us', cn.US_rank),
+                          ('young', cn.young_natural_rank), ('ipcc', cn.old_natural_rank)]
+
+def source_removal_factors(source, selected_windows, BGB_AGB_ratio):
+    """
+    Converts the removal factors of one source to aboveground carbon, belowground carbon and
+    aboveground carbon standard deviation
+    :param source: removal factor source (key of rate_windows)
+    :param selected_windows: removal factors of the source (as in rate_windows) for the pixels that use it
+    :param BGB_AGB_ratio: BGB:AGB ratios of the pixels that use the source
+    :return: arrays of aboveground rate, belowground rate, standard deviation for aboveground rate
+    """
+
+    if source == 'mangrove':
+        mangroves_AGB_rate, mangroves_BGB_rate, mangroves_AGB_stdev = selected_windows
+        return mangroves_AGB_rate * cn.biomass_to_c_mangrove, mangroves_BGB_rate * cn.biomass_to_c_mangrove, \
+               mangroves_AGB_stdev * cn.biomass_to_c_mangrove
+
+    rate, stdev = selected_windows
+
+    if source == 'ipcc':
+        return rate * cn.biomass_to_c_non_mangrove, rate * cn.biomass_to_c_non_mangrove * BGB_AGB_ratio, \
+               stdev * cn.biomass_to_c_non_mangrove
+
+    if source == 'young':
+        return rate, rate * BGB_AGB_ratio, stdev
+
+    # NOTE: Nancy Harris thought that the European removal standard deviations were 2x too large,
+    # per email on 8/30/2020. Thus, simplest fix is to leave original tiles 2x too large and
+    # correct them only where composited with other stdev sources.
+    if source == 'europe':
+        stdev = stdev/2
+
+    # US, planted forest and European removal factors are AGC+BGC
+    return rate / (1 + BGB_AGB_ratio), rate - (rate / (1 + BGB_AGB_ratio)), stdev / (1 + BGB_AGB_ratio)
+
+
+def annual_gain_rate_AGC_BGC_window(model_extent_window, age_category_window, BGB_AGB_ratio_window, rate_windows):
+    """
+    Combines the removal factors from all sources for a window according to the removal factor hierarchy.
+    The source of each pixel (removal forest type) is chosen once, and all of the pixel's removal factors come from it.
+    :param model_extent_window: array of model extent
+    :param age_category_window: array of forest age categories
+    :param BGB_AGB_ratio_window: array of BGB:AGB ratios
+    :param rate_windows: removal factor arrays of the sources that have tiles, keyed by source:
+        'ipcc', 'young', 'us', 'plantations' and 'europe' are (rate, standard deviation);
+        'mangrove' is (AGB rate, BGB rate, AGB standard deviation). Sources without tiles are left out.
+    :return: arrays of removal forest type, aboveground rate, belowground rate, aboveground+belowground rate,
+        standard deviation for aboveground rate
+    """
+
+    # US removal factors aren't used in the US_removals sensitivity analysis
+    sources = [(source, rank) for source, rank in removal_factor_sources
+               if (source in rate_windows) & ((source != 'us') | (cn.SENSIT_TYPE != 'US_removals'))]
+
+    # Where each source has a removal factor, in the same order as the sources
+    available = []
+    for source, rank in sources:
+        if source == 'ipcc':
+            # In no_primary_gain, the AGB_default_rate_window = 0, so primary forest pixels would not be
+            # assigned a removal forest type and therefore get exclude from the model later.
+            # That is incorrect, so using model_extent as the criterion instead allows the primary forest pixels
+            # that don't have rates under this sensitivity analysis to still be included in the model.
+            # Unfortunately, model_extent is slightly different from the IPCC rate extent (no IPCC rates where
+            # there is no ecozone information), but this is a very small difference and not worth worrying about.
+            if cn.SENSIT_TYPE == 'no_primary_gain':
+                available.append(model_extent_window != 0)
+            else:
+                available.append(rate_windows[source][0] != 0)
+        elif source == 'young':
+            # young_AGC_rate_window uses > because of the weird NaN in the tiles. If != is used, the young rate NaN overwrites the IPCC arrays.
+            # Using the > with the NaN results in non-fatal "RuntimeWarning: invalid value encountered in greater".
+            # This isn't actually a problem, so the "with" statement suppresses it, per https://stackoverflow.com/a/58026329/10839927
+            with np.errstate(invalid='ignore'):
+                available.append((rate_windows[source][0] > 0) & (age_category_window == 1))
+        else:
+            available.append(rate_windows[source][0] != 0)
+
+    # Removal forest type is the highest priority source that has a removal factor for the pixel
+    if len(sources) > 0:
+        removal_forest_type_window = np.select(available, [np.uint8(rank) for source, rank in sources], np.uint8(0))
+    else:
+        removal_forest_type_window = np.zeros(model_extent_window.shape, dtype='uint8')
+
+    # Masks outputs to model output extent
+    removal_forest_type_window[model_extent_window != 1] = 0
+
+    # Output rasters' windows
+    annual_gain_AGC_all_forest_types_window = np.zeros(model_extent_window.shape, dtype='float32')
+    annual_gain_BGC_all_forest_types_window = np.zeros(model_extent_window.shape, dtype='float32')
+    stdev_annual_gain_AGC_all_forest_types_window = np.zeros(model_extent_window.shape, dtype='float32')
+
+    # Gathers the removal factors of each pixel from its source, only calculating them for the pixels that use the source
+    for source, rank in sources:
+        selected = removal_forest_type_window == rank
+        if not selected.any():
+            continue
+
+        annual_gain_AGC_all_forest_types_window[selected], annual_gain_BGC_all_forest_types_window[selected], \
+        stdev_annual_gain_AGC_all_forest_types_window[selected] = source_removal_factors(
+            source, [window[selected] for window in rate_windows[source]], BGB_AGB_ratio_window[selected])
+
+    annual_gain_AGC_BGC_all_forest_types_window = annual_gain_AGC_all_forest_types_window + annual_gain_BGC_all_forest_types_window
+
+    return removal_forest_type_window, annual_gain_AGC_all_forest_types_window, annual_gain_BGC_all_forest_types_window, \
+           annual_gain_AGC_BGC_all_forest_types_window, stdev_annual_gain_AGC_all_forest_types_window
+
+
 def annual_gain_rate_AGC_BGC_all_forest_types(tile_id, output_pattern_list):
     """
     :param tile_id: tile to be processed, identified by its tile id
@@ -57,8 +187,8 @@ def annual_gain_rate_AGC_BGC_all_forest_types(tile_id, output_pattern_list):
         # Grabs metadata about the tif, like its location/projection/cellsize
         kwargs = model_extent_src.meta
 
-        # Grabs the windows of the tile (stripes) so we can iterate over the entire tif without running out of memory
-        windows = model_extent_src.block_windows(1)
+        # Grabs the windows of the tile (groups of stripes) so we can iterate over the entire tif without running out of memory
+        windows = uu.iterate_windows(model_extent_src, tile_id, 'annual_gain_rate_AGC_BGC_all_forest_types')
 
         # Updates kwargs for the output dataset
         kwargs.update(
@@ -68,73 +198,32 @@ def annual_gain_rate_AGC_BGC_all_forest_types(tile_id, output_pattern_list):
             nodata=0
         )
 
-        # Checks whether there are mangrove or planted forest tiles. If so, they are opened.
-        try:
-            mangrove_AGB_src = rasterio.open(mangrove_AGB)
-            mangrove_BGB_src = rasterio.open(mangrove_BGB)
-            mangrove_AGB_stdev_src = rasterio.open(mangrove_AGB_stdev)
-            uu.print_log(f'    Mangrove tiles (AGB and BGB) found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'    Mangrove tiles (AGB and BGB) not found for {tile_id}')
-
-        try:
-            europe_AGC_BGC_src = rasterio.open(europe_AGC_BGC)
-            europe_AGC_BGC_stdev_src = rasterio.open(europe_AGC_BGC_stdev)
-            uu.print_log(f'    Europe removal factor tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'    Europe removal factor tile not found for {tile_id}')
-
-        try:
-            plantations_AGC_BGC_src = rasterio.open(plantations_AGC_BGC)
-            plantations_AGC_BGC_stdev_src = rasterio.open(plantations_AGC_BGC_stdev)
-            uu.print_log(f'    Planted forest tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'    Planted forest tile not found for {tile_id}')
-
-        try:
-            us_AGC_BGC_src = rasterio.open(us_AGC_BGC)
-            us_AGC_BGC_stdev_src = rasterio.open(us_AGC_BGC_stdev)
-            uu.print_log(f'    US removal factor tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'    US removal factor tile not found for {tile_id}')
-
-        try:
-            young_AGC_src = rasterio.open(young_AGC)
-            young_AGC_stdev_src = rasterio.open(young_AGC_stdev)
-            uu.print_log(f'    Young forest removal factor tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'    Young forest removal factor tile not found for {tile_id}')
-
-        try:
-            age_category_src = rasterio.open(age_category)
-            uu.print_log(f'    Age category tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'    Age category tile not found for {tile_id}')
-
-        try:
-            ipcc_AGB_default_src = rasterio.open(ipcc_AGB_default)
-            ipcc_AGB_default_stdev_src = rasterio.open(ipcc_AGB_default_stdev)
-            uu.print_log(f'    IPCC default removal rate tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'    IPCC default removal rate tile not found for {tile_id}')
-
-        try:
-            BGB_AGB_ratio_src = rasterio.open(BGB_AGB_ratio)
-            uu.print_log(f'    BGB:AGB tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'    BGB:AGB tile not found for {tile_id}. Using default BGB:AGB from Mokany instead.')
+        # Opens the removal factor sources that have tiles. Each source is only used if all of its tiles exist
+        # and its removal factor has data (according to the footprint index, if one is used).
+        rate_tiles = {
+            'mangrove': ([mangrove_AGB, mangrove_BGB, mangrove_AGB_stdev], 'Mangrove removal factor (AGB and BGB)'),
+            'europe': ([europe_AGC_BGC, europe_AGC_BGC_stdev], 'Europe removal factor'),
+            'plantations': ([plantations_AGC_BGC, plantations_AGC_BGC_stdev], 'Planted forest removal factor'),
+            'us': ([us_AGC_BGC, us_AGC_BGC_stdev], 'US removal factor'),
+            'young': ([young_AGC, young_AGC_stdev], 'Young forest removal factor'),
+            'ipcc': ([ipcc_AGB_default, ipcc_AGB_default_stdev], 'IPCC default removal rate')
+        }
+        rate_srcs = {}
+        for source, (tiles, input_name) in rate_tiles.items():
+            srcs = uu.open_optional_inputs(tiles, tile_id, input_name)
+            if srcs is not None:
+                rate_srcs[source] = srcs
+
+        age_category_src = uu.open_optional_input(age_category, tile_id, 'Age category')
+
+        BGB_AGB_ratio_src = uu.open_optional_input(BGB_AGB_ratio, tile_id, 'BGB:AGB', missing_note='. Using default BGB:AGB from Mokany instead.')
 
         # Opens the output tile, giving it the arguments of the input tiles
         removal_forest_type_dst = rasterio.open(removal_forest_type, 'w', **kwargs)
 
         # Adds metadata tags to the output raster
         uu.add_universal_metadata_rasterio(removal_forest_type_dst)
-        removal_forest_type_dst.update_tags(
-            key='6: mangroves. 5: European-specific rates. 4: planted forests. 3: US-specific rates. 2: young (<20 year) secondary forests. 1: old (>20 year) secondary forests and primary forests. Priority goes to the highest number.')
-        removal_forest_type_dst.update_tags(
-            source='Mangroves: IPCC wetlands supplement. Europe: Liz Goldman. Planted forests: Spatial Database of Planted Forests. USA: US FIA, via Rich Birdsey. Young natural forests: Cook-Patton et al. 2020. Old natural forests: IPCC Forests table 4.9')
-        removal_forest_type_dst.update_tags(
-            extent='Full model extent')
+        removal_forest_type_dst.update_tags(**removal_rate_tags[0])
 
         # Updates kwargs for the removal rate outputs-- just need to change datatype
         kwargs.update(dtype='float32')
@@ -146,197 +235,38 @@ def annual_gain_rate_AGC_BGC_all_forest_types(tile_id, output_pattern_list):
 
         # Adds metadata tags to the output raster
         uu.add_universal_metadata_rasterio(annual_gain_AGC_all_forest_types_dst)
-        annual_gain_AGC_all_forest_types_dst.update_tags(
-            units='megagrams aboveground carbon/ha/yr')
-        annual_gain_AGC_all_forest_types_dst.update_tags(
-            source='Mangroves: IPCC wetlands supplement Table 4.4. Europe: Liz Goldman. Planted forests: Spatial Database of Planted Forests. USA: US FIA, via Rich Birdsey. Young natural forests: Cook-Patton et al. 2020. Old natural forests: IPCC Forests table 4.9')
-        annual_gain_AGC_all_forest_types_dst.update_tags(
-            extent='Full model extent')
+        annual_gain_AGC_all_forest_types_dst.update_tags(**removal_rate_tags[1])
 
         # Adds metadata tags to the output raster
         uu.add_universal_metadata_rasterio(annual_gain_BGC_all_forest_types_dst)
-        annual_gain_BGC_all_forest_types_dst.update_tags(
-            units='megagrams belowground carbon/ha/yr')
-        annual_gain_BGC_all_forest_types_dst.update_tags(
-            source='Mangroves: IPCC wetlands supplement Table 4.4. Europe: Liz Goldman. Planted forests: Spatial Database of Planted Forests. USA: US FIA, via Rich Birdsey. Young natural forests: Cook-Patton et al. 2020. Old natural forests: IPCC Forests table 4.9')
-        annual_gain_BGC_all_forest_types_dst.update_tags(
-            extent='Full model extent')
+        annual_gain_BGC_all_forest_types_dst.update_tags(**removal_rate_tags[2])
 
         # Adds metadata tags to the output raster
         uu.add_universal_metadata_rasterio(annual_gain_AGC_BGC_all_forest_types_dst)
-        annual_gain_AGC_BGC_all_forest_types_dst.update_tags(
-            units='megagrams aboveground + belowground carbon/ha/yr')
-        annual_gain_AGC_BGC_all_forest_types_dst.update_tags(
-            source='Mangroves: IPCC wetlands supplement Table 4.4. Europe: Liz Goldman. Planted forests: Spatial Database of Planted Forests. USA: US FIA, via Rich Birdsey. Young natural forests: Cook-Patton et al. 2020. Old natural forests: IPCC Forests table 4.9')
-        annual_gain_AGC_BGC_all_forest_types_dst.update_tags(
-            extent='Full model extent')
+        annual_gain_AGC_BGC_all_forest_types_dst.update_tags(**removal_rate_tags[3])
 
         # Adds metadata tags to the output raster
         uu.add_universal_metadata_rasterio(stdev_annual_gain_AGC_all_forest_types_dst)
-        stdev_annual_gain_AGC_all_forest_types_dst.update_tags(
-            units='standard deviation for removal factor, in terms of megagrams aboveground carbon/ha/yr')
-        stdev_annual_gain_AGC_all_forest_types_dst.update_tags(
-            source='Mangroves: IPCC wetlands supplement Table 4.4. Europe: Liz Goldman. Planted forests: Spatial Database of Planted Forests. USA: US FIA, via Rich Birdsey. Young natural forests: Cook-Patton et al. 2020. Old natural forests: IPCC Forests table 4.9')
-        stdev_annual_gain_AGC_all_forest_types_dst.update_tags(
-            extent='Full model extent')
+        stdev_annual_gain_AGC_all_forest_types_dst.update_tags(**removal_rate_tags[4])
 
         uu.print_log(f'  Creating removal model forest type tile, AGC removal factor tile, BGC removal factor tile, and AGC removal factor standard deviation tile for {tile_id}')
 
         uu.check_memory()
 
-        # Iterates across the windows (1 pixel strips) of the input tile
+        # Iterates across the windows (groups of 1 pixel strips) of the input tile
         for idx, window in windows:
 
             model_extent_window = model_extent_src.read(1, window=window)
+            age_category_window = uu.read_optional_window(age_category_src, window, 'uint8')
+            BGB_AGB_ratio_window = uu.read_optional_window(BGB_AGB_ratio_src, window, 'float32', cn.below_to_above_non_mang)
+
+            # Windows of the removal factor sources that have tiles
+            rate_windows = {source: tuple(uu.read_optional_window(src, window, 'float32') for src in srcs)
+                            for source, srcs in rate_srcs.items()}
 
-            # Output rasters' windows
-            removal_forest_type_window = np.zeros((window.height, window.width), dtype='uint8')
-            annual_gain_AGC_all_forest_types_window = np.zeros((window.height, window.width), dtype='float32')
-            annual_gain_BGC_all_forest_types_window = np.zeros((window.height, window.width), dtype='float32')
-            stdev_annual_gain_AGC_all_forest_types_window = np.zeros((window.height, window.width), dtype='float32')
-
-            try:
-                age_category_window = age_category_src.read(1, window=window)
-            except UnboundLocalError:
-                age_category_window = np.zeros((window.height, window.width), dtype='uint8')
-
-            try:
-                BGB_AGB_ratio_window = BGB_AGB_ratio_src.read(1, window=window)
-            except UnboundLocalError:
-                BGB_AGB_ratio_window = np.empty((window.height, window.width), dtype='float32')
-                BGB_AGB_ratio_window[:] = cn.below_to_above_non_mang
-
-            # Lowest priority
-            try:
-                ipcc_AGB_default_rate_window = ipcc_AGB_default_src.read(1, window=window)
-                ipcc_AGB_default_stdev_window = ipcc_AGB_default_stdev_src.read(1, window=window)
-                # In no_primary_gain, the AGB_default_rate_window = 0, so primary forest pixels would not be
-                # assigned a removal forest type and therefore get exclude from the model later.
-                # That is incorrect, so using model_extent as the criterion instead allows the primary forest pixels
-                # that don't have rates under this sensitivity analysis to still be included in the model.
-                # Unfortunately, model_extent is slightly different from the IPCC rate extent (no IPCC rates where
-                # there is no ecozone information), but this is a very small difference and not worth worrying about.
-                if cn.SENSIT_TYPE == 'no_primary_gain':
-                    removal_forest_type_window = np.where(model_extent_window != 0,
-                                                          cn.old_natural_rank,
-                                                          removal_forest_type_window).astype('uint8')
-                else:
-                    removal_forest_type_window = np.where(ipcc_AGB_default_rate_window != 0,
-                                                          cn.old_natural_rank,
-                                                          removal_forest_type_window).astype('uint8')
-                annual_gain_AGC_all_forest_types_window = np.where(ipcc_AGB_default_rate_window != 0,
-                                                                   ipcc_AGB_default_rate_window * cn.biomass_to_c_non_mangrove,
-                                                                   annual_gain_AGC_all_forest_types_window).astype('float32')
-                annual_gain_BGC_all_forest_types_window = np.where(ipcc_AGB_default_rate_window != 0,
-                                                                   ipcc_AGB_default_rate_window * cn.biomass_to_c_non_mangrove * BGB_AGB_ratio_window,
-                                                                   annual_gain_BGC_all_forest_types_window).astype('float32')
-                stdev_annual_gain_AGC_all_forest_types_window = np.where(ipcc_AGB_default_stdev_window != 0,
-                                                                   ipcc_AGB_default_stdev_window * cn.biomass_to_c_non_mangrove,
-                                                                   stdev_annual_gain_AGC_all_forest_types_window).astype('float32')
-            except UnboundLocalError:
-                pass
-
-            try: # young_AGC_rate_window uses > because of the weird NaN in the tiles. If != is used, the young rate NaN overwrites the IPCC arrays
-                young_AGC_rate_window = young_AGC_src.read(1, window=window)
-                young_AGC_stdev_window = young_AGC_stdev_src.read(1, window=window)
-                # Using the > with the NaN results in non-fatal "RuntimeWarning: invalid value encountered in greater".
-                # This isn't actually a problem, so the "with" statement suppresses it, per https://stackoverflow.com/a/58026329/10839927
-                with np.errstate(invalid='ignore'):
-                    removal_forest_type_window = np.where((young_AGC_rate_window > 0) & (age_category_window == 1),
-                                                          cn.young_natural_rank,
-                                                          removal_forest_type_window).astype('uint8')
-                    annual_gain_AGC_all_forest_types_window = np.where((young_AGC_rate_window > 0) & (age_category_window == 1),
-                                                                       young_AGC_rate_window,
-                                                                       annual_gain_AGC_all_forest_types_window).astype('float32')
-                    annual_gain_BGC_all_forest_types_window = np.where((young_AGC_rate_window > 0) & (age_category_window == 1),
-                                                                       young_AGC_rate_window * BGB_AGB_ratio_window,
-                                                                       annual_gain_BGC_all_forest_types_window).astype('float32')
-                    stdev_annual_gain_AGC_all_forest_types_window = np.where((young_AGC_stdev_window > 0) & (age_category_window == 1),
-                                                                       young_AGC_stdev_window,
-                                                                       stdev_annual_gain_AGC_all_forest_types_window).astype('float32')
-
-            except UnboundLocalError:
-                pass
-
-            if cn.SENSIT_TYPE != 'US_removals':
-                try:
-                    us_AGC_BGC_rate_window = us_AGC_BGC_src.read(1, window=window)
-                    us_AGC_BGC_stdev_window = us_AGC_BGC_stdev_src.read(1, window=window)
-                    removal_forest_type_window = np.where(us_AGC_BGC_rate_window != 0, cn.US_rank, removal_forest_type_window).astype('uint8')
-                    annual_gain_AGC_all_forest_types_window = np.where(us_AGC_BGC_rate_window != 0,
-                                                                       us_AGC_BGC_rate_window / (1 + BGB_AGB_ratio_window),
-                                                                       annual_gain_AGC_all_forest_types_window).astype('float32')
-                    annual_gain_BGC_all_forest_types_window = np.where(us_AGC_BGC_rate_window != 0,
-                                                                       (us_AGC_BGC_rate_window) -
-                                                                       (us_AGC_BGC_rate_window / (1 + BGB_AGB_ratio_window)),
-                                                                       annual_gain_BGC_all_forest_types_window).astype('float32')
-                    stdev_annual_gain_AGC_all_forest_types_window = np.where(us_AGC_BGC_stdev_window != 0,
-                                                                       us_AGC_BGC_stdev_window / (1 + BGB_AGB_ratio_window),
-                                                                       stdev_annual_gain_AGC_all_forest_types_window).astype('float32')
-                except UnboundLocalError:
-                    pass
-
-            try:
-                plantations_AGC_BGC_rate_window = plantations_AGC_BGC_src.read(1, window=window)
-                plantations_AGC_BGC_stdev_window = plantations_AGC_BGC_stdev_src.read(1, window=window)
-                removal_forest_type_window = np.where(plantations_AGC_BGC_rate_window != 0, cn.planted_forest_rank, removal_forest_type_window).astype('uint8')
-                annual_gain_AGC_all_forest_types_window = np.where(plantations_AGC_BGC_rate_window != 0,
-                                                                   plantations_AGC_BGC_rate_window / (1 + BGB_AGB_ratio_window),
-                                                                   annual_gain_AGC_all_forest_types_window).astype('float32')
-                annual_gain_BGC_all_forest_types_window = np.where(plantations_AGC_BGC_rate_window != 0,
-                                                                   (plantations_AGC_BGC_rate_window ) -
-                                                                   (plantations_AGC_BGC_rate_window / (1 + BGB_AGB_ratio_window)),
-                                                                   annual_gain_BGC_all_forest_types_window).astype('float32')
-                stdev_annual_gain_AGC_all_forest_types_window = np.where(plantations_AGC_BGC_stdev_window != 0,
-                                                                   plantations_AGC_BGC_stdev_window / (1 + BGB_AGB_ratio_window),
-                                                                   stdev_annual_gain_AGC_all_forest_types_window).astype('float32')
-            except UnboundLocalError:
-                pass
-
-            try:
-                europe_AGC_BGC_rate_window = europe_AGC_BGC_src.read(1, window=window)
-                europe_AGC_BGC_stdev_window = europe_AGC_BGC_stdev_src.read(1, window=window)
-                removal_forest_type_window = np.where(europe_AGC_BGC_rate_window != 0, cn.europe_rank, removal_forest_type_window).astype('uint8')
-                annual_gain_AGC_all_forest_types_window = np.where(europe_AGC_BGC_rate_window != 0,
-                                                                   europe_AGC_BGC_rate_window / (1 + BGB_AGB_ratio_window),
-                                                                   annual_gain_AGC_all_forest_types_window).astype('float32')
-                annual_gain_BGC_all_forest_types_window = np.where(europe_AGC_BGC_rate_window != 0,
-                                                                   (europe_AGC_BGC_rate_window) -
-                                                                   (europe_AGC_BGC_rate_window / (1 + BGB_AGB_ratio_window)),
-                                                                   annual_gain_BGC_all_forest_types_window).astype('float32')
-                # NOTE: Nancy Harris thought that the European removal standard deviations were 2x too large,
-                # per email on 8/30/2020. Thus, simplest fix is to leave original tiles 2x too large and
-                # correct them only where composited with other stdev sources.
-                stdev_annual_gain_AGC_all_forest_types_window = np.where(europe_AGC_BGC_stdev_window != 0,
-                                                                   (europe_AGC_BGC_stdev_window/2) / (1 + BGB_AGB_ratio_window),
-                                                                   stdev_annual_gain_AGC_all_forest_types_window).astype('float32')
-            except UnboundLocalError:
-                pass
-
-            # Highest priority
-            try:
-                mangroves_AGB_rate_window = mangrove_AGB_src.read(1, window=window)
-                mangroves_BGB_rate_window = mangrove_BGB_src.read(1, window=window)
-                mangroves_AGB_stdev_window = mangrove_AGB_stdev_src.read(1, window=window)
-                removal_forest_type_window = np.where(mangroves_AGB_rate_window != 0, cn.mangrove_rank, removal_forest_type_window).astype('uint8')
-                annual_gain_AGC_all_forest_types_window = np.where(mangroves_AGB_rate_window != 0,
-                                                                   mangroves_AGB_rate_window * cn.biomass_to_c_mangrove,
-                                                                   annual_gain_AGC_all_forest_types_window).astype('float32')
-                annual_gain_BGC_all_forest_types_window = np.where(mangroves_BGB_rate_window != 0,
-                                                                   mangroves_BGB_rate_window * cn.biomass_to_c_mangrove,
-                                                                   annual_gain_BGC_all_forest_types_window).astype('float32')
-                stdev_annual_gain_AGC_all_forest_types_window = np.where(mangroves_AGB_stdev_window != 0,
-                                                                   mangroves_AGB_stdev_window * cn.biomass_to_c_mangrove,
-                                                                   stdev_annual_gain_AGC_all_forest_types_window).astype('float32')
-            except UnboundLocalError:
-                pass
-
-            # Masks outputs to model output extent
-            removal_forest_type_window = np.where(model_extent_window == 1, removal_forest_type_window, 0)
-            annual_gain_AGC_all_forest_types_window = np.where(model_extent_window == 1, annual_gain_AGC_all_forest_types_window, 0)
-            annual_gain_BGC_all_forest_types_window = np.where(model_extent_window == 1, annual_gain_BGC_all_forest_types_window, 0)
-            annual_gain_AGC_BGC_all_forest_types_window = annual_gain_AGC_all_forest_types_window + annual_gain_BGC_all_forest_types_window
-            stdev_annual_gain_AGC_all_forest_types_window = np.where(model_extent_window == 1, stdev_annual_gain_AGC_all_forest_types_window, 0)
+            removal_forest_type_window, annual_gain_AGC_all_forest_types_window, annual_gain_BGC_all_forest_types_window, \
+            annual_gain_AGC_BGC_all_forest_types_window, stdev_annual_gain_AGC_all_forest_types_window = \
+                annual_gain_rate_AGC_BGC_window(model_extent_window, age_category_window, BGB_AGB_ratio_window, rate_windows)
 
             # Writes the outputs window to the output files
             removal_forest_type_dst.write_band(1, removal_forest_type_window, window=window)
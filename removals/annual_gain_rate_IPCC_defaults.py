@@ -4,6 +4,7 @@ Function to create removal factor tiles according to IPCC defaults
 
 import datetime
 import numpy as np
+import pandas as pd
 import rasterio
 import sys
 
@@ -13,23 +14,187 @@ import universal_util as uu
 # Necessary to suppress a pandas error later on. https://github.com/numpy/numpy/issues/12987
 np.set_printoptions(threshold=sys.maxsize)
 
+# Converts the forest age category decision tree output values to the three age categories--
+# 10000: primary forest; 20000: secondary forest > 20 years; 30000: secondary forest <= 20 years
+# These are five digits so they can easily be added to the four digits of the continent-ecozone code to make unique codes
+# for each continent-ecozone-age combination.
+# The key in the dictionary is the forest age category decision tree endpoints.
+age_lookup_table = uu.make_lookup_table({0: 0, 1: 10000, 2: 20000, 3: 30000}, dtype='int32')
+
+# Metadata tags of the output tiles: aboveground rate, belowground rate, standard deviation for aboveground rate
+IPCC_default_rate_tags = [
+    dict(units='megagrams aboveground biomass (AGB or dry matter)/ha/yr',
+         source='IPCC Guidelines 2019 refinement, forest section, Table 4.9',
+         extent='Full model extent, even though these rates will not be used over the full model extent'),
+    dict(units='megagrams belowground biomass (AGB or dry matter)/ha/yr',
+         source='IPCC Guidelines 2019 refinement, forest section, Table 4.9',
+         extent='Full model extent, even though these rates will not be used over the full model extent'),
+    dict(units='standard deviation, in terms of megagrams aboveground biomass (AGB or dry matter)/ha/yr',
+         source='IPCC Guidelines 2019 refinement, forest section, Table 4.9',
+         extent='Full model extent, even though these standard deviations will not be used over the full model extent')
+]
+
+def IPCC_default_gain_tables():
+    """
+    Makes the lookup tables of IPCC Table 4.9 removal factors and their standard deviations by continent-ecozone-age code.
+    The IPCC removal factor spreadsheet (cn.gain_spreadsheet) must be in the working directory.
+    :return: lookup tables (uu.make_lookup_table) of removal factors and standard deviations by continent, ecozone, and age
+    """
+
+    pd.options.mode.chained_assignment = None
+
+    # Special removal rate table for no_primary_gain sensitivity analysis: primary forests and IFLs have removal rate of 0
+    if cn.SENSIT_TYPE == 'no_primary_gain':
+        # Imports the table with the ecozone-continent codes and the carbon removals rates
+        gain_table = pd.read_excel(cn.gain_spreadsheet, sheet_name = "natrl fores gain, no_prim_gain")
+        uu.print_log('Using no_primary_gain IPCC default rates for tile creation')
+
+    # All other analyses use the standard removal rates
+    else:
+        # Imports the table with the ecozone-continent codes and the biomass removals rates
+        gain_table = pd.read_excel(cn.gain_spreadsheet, sheet_name = "natrl fores gain, for std model")
+
+    # Removes rows with duplicate codes (N. and S. America for the same ecozone)
+    gain_table_simplified = gain_table.drop_duplicates(subset='gainEcoCon', keep='first')
+
+    # Converts removals table from wide to long, so each continent-ecozone-age category has its own row
+    gain_table_cont_eco_age = pd.melt(gain_table_simplified, id_vars = ['gainEcoCon'],
+                            value_vars = ['growth_primary', 'growth_secondary_greater_20', 'growth_secondary_less_20'])
+    gain_table_cont_eco_age = gain_table_cont_eco_age.dropna()
+
+    # Creates a table that has just the continent-ecozone combinations for adding to the dictionary.
+    # These will be used whenever there is just a continent-ecozone pixel without a forest age pixel.
+    # Assigns removal rate of 0 when there's no age category.
+    gain_table_con_eco_only = gain_table_cont_eco_age
+    gain_table_con_eco_only = gain_table_con_eco_only.drop_duplicates(subset='gainEcoCon', keep='first')
+    gain_table_con_eco_only['value'] = 0
+    gain_table_con_eco_only['cont_eco_age'] = gain_table_con_eco_only['gainEcoCon']
+
+    # Creates a code for each age category so that each continent-ecozone-age combo can have its own unique value
+    rate_age_dict = {'growth_secondary_less_20': 10000, 'growth_secondary_greater_20': 20000, 'growth_primary': 30000}
+
+    # Creates a unique value for each continent-ecozone-age category
+    gain_table_cont_eco_age = gain_table_cont_eco_age.replace({"variable": rate_age_dict})
+    gain_table_cont_eco_age['cont_eco_age'] = gain_table_cont_eco_age['gainEcoCon'] + gain_table_cont_eco_age['variable']
+
+    # Merges the table of just continent-ecozone codes and the table of  continent-ecozone-age codes
+    gain_table_all_combos = pd.concat([gain_table_con_eco_only, gain_table_cont_eco_age])
+
+    # Converts the continent-ecozone-age codes and corresponding removals rates to a dictionary
+    gain_table_dict = pd.Series(gain_table_all_combos.value.values,index=gain_table_all_combos.cont_eco_age).to_dict()
+
+    # Adds a dictionary entry for where the ecozone-continent-age code is 0 (not in a continent)
+    gain_table_dict[0] = 0
+
+    # Adds a dictionary entry for each forest age code for pixels that have forest age but no continent-ecozone
+    for key, value in rate_age_dict.items():
+
+        gain_table_dict[value] = 0
+
+    # Converts all the keys (continent-ecozone-age codes) to float type
+    gain_table_dict = {float(key): value for key, value in gain_table_dict.items()}
+
+
+    # Special removal rate table for no_primary_gain sensitivity analysis: primary forests and IFLs have removal rate of 0
+    if cn.SENSIT_TYPE == 'no_primary_gain':
+        # Imports the table with the ecozone-continent codes and the carbon removals rates
+        stdev_table = pd.read_excel(cn.gain_spreadsheet, sheet_name="natrl fores stdv, no_prim_gain")
+        uu.print_log('Using no_primary_gain IPCC default standard deviations for tile creation')
+
+    # All other analyses use the standard removal rates
+    else:
+        # Imports the table with the ecozone-continent codes and the biomass removals rate standard deviations
+        stdev_table = pd.read_excel(cn.gain_spreadsheet, sheet_name="natrl fores stdv, for std model")
+
+    # Removes rows with duplicate codes (N. and S. America for the same ecozone)
+    stdev_table_simplified = stdev_table.drop_duplicates(subset='gainEcoCon', keep='first')
+
+    # Converts removals table from wide to long, so each continent-ecozone-age category has its own row
+    stdev_table_cont_eco_age = pd.melt(stdev_table_simplified, id_vars = ['gainEcoCon'], value_vars = ['stdev_primary', 'stdev_secondary_greater_20', 'stdev_secondary_less_20'])
+    stdev_table_cont_eco_age = stdev_table_cont_eco_age.dropna()
+
+    # Creates a table that has just the continent-ecozone combinations for adding to the dictionary.
+    # These will be used whenever there is just a continent-ecozone pixel without a forest age pixel.
+    # Assigns removal rate of 0 when there's no age category.
+    stdev_table_con_eco_only = stdev_table_cont_eco_age
+    stdev_table_con_eco_only = stdev_table_con_eco_only.drop_duplicates(subset='gainEcoCon', keep='first')
+    stdev_table_con_eco_only['value'] = 0
+    stdev_table_con_eco_only['cont_eco_age'] = stdev_table_con_eco_only['gainEcoCon']
+
+    # Creates a code for each age category so that each continent-ecozone-age combo can have its own unique value
+    stdev_age_dict = {'stdev_secondary_less_20': 10000, 'stdev_secondary_greater_20': 20000, 'stdev_primary': 30000}
+
+
+    # Creates a unique value for each continent-ecozone-age category
+    stdev_table_cont_eco_age = stdev_table_cont_eco_age.replace({"variable": stdev_age_dict})
+    stdev_table_cont_eco_age['cont_eco_age'] = stdev_table_cont_eco_age['gainEcoCon'] + stdev_table_cont_eco_age['variable']
+
+    # Merges the table of just continent-ecozone codes and the table of  continent-ecozone-age codes
+    stdev_table_all_combos = pd.concat([stdev_table_con_eco_only, stdev_table_cont_eco_age])
+
+    # Converts the continent-ecozone-age codes and corresponding removals rates to a dictionary
+    stdev_table_dict = pd.Series(stdev_table_all_combos.value.values,index=stdev_table_all_combos.cont_eco_age).to_dict()
+
+    # Adds a dictionary entry for where the ecozone-continent-age code is 0 (not in a continent)
+    stdev_table_dict[0] = 0
+
+    # Adds a dictionary entry for each forest age code for pixels that have forest age but no continent-ecozone
+    for key, value in stdev_age_dict.items():
+
+        stdev_table_dict[value] = 0
+
+    # Converts all the keys (continent-ecozone-age codes) to float type
+    stdev_table_dict = {float(key): value for key, value in stdev_table_dict.items()}
+
+    # Converts the removal factor and standard deviation dictionaries to lookup tables once for the whole run,
+    # rather than remapping each key for each window
+    return uu.make_lookup_table(gain_table_dict), uu.make_lookup_table(stdev_table_dict)
+
+
+def annual_gain_rate_window(age_cat_window, cont_eco_window, BGB_AGB_ratio_window, gain_table_dict, stdev_table_dict):
+    """
+    Assigns IPCC default removal factors and standard deviations to a window
+    :param age_cat_window: array of forest age categories
+    :param cont_eco_window: array of continent-ecozone codes
+    :param BGB_AGB_ratio_window: array of BGB:AGB ratios
+    :param gain_table_dict: lookup table (uu.make_lookup_table) of removal factors by continent, ecozone, and age
+    :param stdev_table_dict: lookup table (uu.make_lookup_table) of standard deviations for removal factors by continent, ecozone, and age
+    :return: arrays of aboveground rate, belowground rate, standard deviation for aboveground rate
+    """
+
+    # Recodes the input forest age category array with 10 different decision tree end values into the 3 actual age categories
+    age_recode = uu.apply_lookup_table(age_cat_window, age_lookup_table)
+
+    # Adds the age category codes to the continent-ecozone codes to create an array of unique continent-ecozone-age codes
+    cont_eco_age = cont_eco_window + age_recode
+
+    ## Aboveground removal factors
+    # Applies the lookup table of continent-ecozone-age removals rates to the continent-ecozone-age array to
+    # get annual removals rates (metric tons aboveground biomass/yr) for each pixel
+    gain_rate_AGB = uu.apply_lookup_table(cont_eco_age, gain_table_dict)
+
+    ## Belowground removal factors
+    # Calculates belowground annual removal rates
+    gain_rate_BGB = gain_rate_AGB * BGB_AGB_ratio_window
+
+    ## Aboveground removal factor standard deviation
+    # Applies the lookup table of continent-ecozone-age removals rate standard deviations to the continent-ecozone-age array to
+    # get annual removals rate standard deviations (metric tons aboveground biomass/yr) for each pixel
+    gain_stdev_AGB = uu.apply_lookup_table(cont_eco_age, stdev_table_dict)
+
+    return gain_rate_AGB, gain_rate_BGB, gain_stdev_AGB
+
+
 def annual_gain_rate(tile_id, gain_table_dict, stdev_table_dict, output_pattern_list):
     """
     :param tile_id: tile to be processed, identified by its tile id
-    :param gain_table_dict: dictionary of removal factors by continent, ecozone, and age
-    :param stdev_table_dict: dictionary of standard deviations for removal factors by continent, ecozone, and age
+    :param gain_table_dict: lookup table (uu.make_lookup_table) of removal factors by continent, ecozone, and age
+    :param stdev_table_dict: lookup table (uu.make_lookup_table) of standard deviations for removal factors by continent, ecozone, and age
     :param output_pattern_list: patterns for output tile names
     :return: 3 tiles: aboveground rate, belowground rate, standard deviation for aboveground rate (IPCC rates)
         Units: Mg biomass/ha/yr (including for standard deviation tiles)
     """
 
-    # Converts the forest age category decision tree output values to the three age categories--
-    # 10000: primary forest; 20000: secondary forest > 20 years; 30000: secondary forest <= 20 years
-    # These are five digits so they can easily be added to the four digits of the continent-ecozone code to make unique codes
-    # for each continent-ecozone-age combination.
-    # The key in the dictionary is the forest age category decision tree endpoints.
-    age_dict = {0: 0, 1: 10000, 2: 20000, 3: 30000}
-
     uu.print_log(f'Creating IPCC default biomass removals rates and standard deviation for {tile_id}')
 
     # Start time
@@ -58,17 +223,13 @@ def annual_gain_rate(tile_id, gain_table_dict, stdev_table_dict, output_pattern_
     except rasterio.errors.RasterioIOError:
         return uu.print_log(f'  Continent-ecozone tile not found for {tile_id}. Skipping tile.')
 
-    try:
-        BGB_AGB_ratio_src = rasterio.open(BGB_AGB_ratio)
-        uu.print_log(f'  BGB:AGB tile found for {tile_id}')
-    except rasterio.errors.RasterioIOError:
-        uu.print_log(f'  BGB:AGB tile not found for {tile_id}. Using default BGB:AGB from Mokany instead.')
+    BGB_AGB_ratio_src = uu.open_optional_input(BGB_AGB_ratio, tile_id, 'BGB:AGB', missing_note='. Using default BGB:AGB from Mokany instead.')
 
     # Grabs metadata about the continent ecozone tile, like its location/projection/cellsize
     kwargs = cont_eco_src.meta
 
-    # Grabs the windows of the tile (stripes) to iterate over the entire tif without running out of memory
-    windows = cont_eco_src.block_windows(1)
+    # Grabs the windows of the tile (groups of stripes) to iterate over the entire tif without running out of memory
+    windows = uu.iterate_windows(cont_eco_src, tile_id, 'annual_gain_rate_IPCC_defaults')
 
     # Updates kwargs for the output dataset.
     # Need to update data type to float 32 so that it can handle fractional removals rates
@@ -84,90 +245,35 @@ def annual_gain_rate(tile_id, gain_table_dict, stdev_table_dict, output_pattern_
     dst_above = rasterio.open(AGB_IPCC_default_gain_rate, 'w', **kwargs)
     # Adds metadata tags to the output raster
     uu.add_universal_metadata_rasterio(dst_above)
-    dst_above.update_tags(
-        units='megagrams aboveground biomass (AGB or dry matter)/ha/yr')
-    dst_above.update_tags(
-        source='IPCC Guidelines 2019 refinement, forest section, Table 4.9')
-    dst_above.update_tags(
-        extent='Full model extent, even though these rates will not be used over the full model extent')
+    dst_above.update_tags(**IPCC_default_rate_tags[0])
 
     dst_below = rasterio.open(BGB_IPCC_default_gain_rate, 'w', **kwargs)
     # Adds metadata tags to the output raster
     uu.add_universal_metadata_rasterio(dst_below)
-    dst_below.update_tags(
-        units='megagrams belowground biomass (AGB or dry matter)/ha/yr')
-    dst_below.update_tags(
-        source='IPCC Guidelines 2019 refinement, forest section, Table 4.9')
-    dst_below.update_tags(
-        extent='Full model extent, even though these rates will not be used over the full model extent')
+    dst_below.update_tags(**IPCC_default_rate_tags[1])
 
     dst_stdev_above = rasterio.open(AGB_IPCC_default_gain_stdev, 'w', **kwargs)
     # Adds metadata tags to the output raster
     uu.add_universal_metadata_rasterio(dst_stdev_above)
-    dst_stdev_above.update_tags(
-        units='standard deviation, in terms of megagrams aboveground biomass (AGB or dry matter)/ha/yr')
-    dst_stdev_above.update_tags(
-        source='IPCC Guidelines 2019 refinement, forest section, Table 4.9')
-    dst_stdev_above.update_tags(
-        extent='Full model extent, even though these standard deviations will not be used over the full model extent')
+    dst_stdev_above.update_tags(**IPCC_default_rate_tags[2])
 
     uu.check_memory()
 
-    # Iterates across the windows (1 pixel strips) of the input tiles
+    # Iterates across the windows (groups of 1 pixel strips) of the input tiles
     for idx, window in windows:
 
         # Creates a processing window for each input raster
-        try:
-            cont_eco_window = cont_eco_src.read(1, window=window)
-        except UnboundLocalError:
-            cont_eco_window = np.zeros((window.height, window.width), dtype='uint8')
-
-        try:
-            age_cat_window = age_cat_src.read(1, window=window)
-        except UnboundLocalError:
-            age_cat_window = np.zeros((window.height, window.width), dtype='uint8')
-
-        try:
-            BGB_AGB_ratio_window = BGB_AGB_ratio_src.read(1, window=window)
-        except UnboundLocalError:
-            BGB_AGB_ratio_window = np.empty((window.height, window.width), dtype='float32')
-            BGB_AGB_ratio_window[:] = cn.below_to_above_non_mang
-
-        # Recodes the input forest age category array with 10 different decision tree end values into the 3 actual age categories
-        age_recode = np.vectorize(age_dict.get)(age_cat_window)
-
-        # Adds the age category codes to the continent-ecozone codes to create an array of unique continent-ecozone-age codes
-        cont_eco_age = cont_eco_window + age_recode
-
-        ## Aboveground removal factors
-        # Converts the continent-ecozone array to float so that the values can be replaced with fractional removals rates
-        gain_rate_AGB = cont_eco_age.astype('float32')
-
-        # Applies the dictionary of continent-ecozone-age removals rates to the continent-ecozone-age array to
-        # get annual removals rates (metric tons aboveground biomass/yr) for each pixel
-        for key, value in gain_table_dict.items():
-            gain_rate_AGB[gain_rate_AGB == key] = value
-
-        # Writes the output window to the output file
-        dst_above.write_band(1, gain_rate_AGB, window=window)
+        cont_eco_window = cont_eco_src.read(1, window=window)
+        age_cat_window = age_cat_src.read(1, window=window)
+        BGB_AGB_ratio_window = uu.read_optional_window(BGB_AGB_ratio_src, window, 'float32', cn.below_to_above_non_mang)
 
-        ## Belowground removal factors
-        # Calculates belowground annual removal rates
-        gain_rate_BGB = gain_rate_AGB * BGB_AGB_ratio_window
+        gain_rate_AGB, gain_rate_BGB, gain_stdev_AGB = annual_gain_rate_window(age_cat_window, cont_eco_window,
+                                                                              BGB_AGB_ratio_window,
+                                                                              gain_table_dict, stdev_table_dict)
 
-        # Writes the output window to the output file
+        # Writes the output windows to the output files
+        dst_above.write_band(1, gain_rate_AGB, window=window)
         dst_below.write_band(1, gain_rate_BGB, window=window)
-
-        ## Aboveground removal factor standard deviation
-        # Converts the continent-ecozone array to float so that the values can be replaced with fractional standard deviations
-        gain_stdev_AGB = cont_eco_age.astype('float32')
-
-        # Applies the dictionary of continent-ecozone-age removals rate standard deviations to the continent-ecozone-age array to
-        # get annual removals rate standard deviations (metric tons aboveground biomass/yr) for each pixel
-        for key, value in stdev_table_dict.items():
-            gain_stdev_AGB[gain_stdev_AGB == key] = value
-
-        # Writes the output window to the output file
         dst_stdev_above.write_band(1, gain_stdev_AGB, window=window)
 
     # Prints information about the tile that was just processed
@@ -45,8 +45,8 @@ def annual_gain_rate(tile_id, output_pattern_list, gain_above_dict, gain_below_d
     # Grabs metadata about the tif, like its location/projection/cellsize
     kwargs = cont_eco_src.meta
 
-    # Grabs the windows of the tile (stripes) to iterate over the entire tif without running out of memory
-    windows = cont_eco_src.block_windows(1)
+    # Grabs the windows of the tile (groups of stripes) to iterate over the entire tif without running out of memory
+    windows = uu.iterate_windows(cont_eco_src, tile_id, 'annual_gain_rate_mangrove')
 
     # Updates kwargs for the output dataset.
     # Need to update data type to float 32 so that it can handle fractional removals rates
@@ -88,30 +88,21 @@ def annual_gain_rate(tile_id, output_pattern_list, gain_above_dict, gain_below_d
     dst_stdev_above.update_tags(
         extent='Simard et al. 2018, based on Giri et al. 2011 (Global Ecol. Biogeogr.) mangrove extent')
 
-    # Iterates across the windows (1 pixel strips) of the input tile
+    # Iterates across the windows (groups of 1 pixel strips) of the input tile
     for idx, window in windows:
 
         # Creates windows for each input raster
         cont_eco = cont_eco_src.read(1, window=window)
         mangrove_AGB = mangrove_AGB_src.read(1, window=window)
 
-        # Converts the continent-ecozone array to float so that the values can be replaced with fractional removals rates.
-        # Creates two copies: one for aboveground removals and one for belowground removals.
-        # Creating only one copy of the cont_eco raster made it so that belowground removals rates weren't being
-        # written correctly for some reason.
-        cont_eco_above = cont_eco.astype('float32')
-        cont_eco_below = cont_eco.astype('float32')
-        cont_eco_stdev = cont_eco.astype('float32')
-
         # Reclassifies mangrove biomass to 1 or 0 to make a mask of mangrove pixels.
         # Ultimately, only these pixels (ones with mangrove biomass) will get values.
         mangrove_AGB[mangrove_AGB > 0] = 1
 
 
-        # Applies the dictionary of continent-ecozone aboveground removals rates to the continent-ecozone array to
+        # Applies the lookup table of continent-ecozone aboveground removals rates to the continent-ecozone array to
         # get annual aboveground removals rates (metric tons aboveground biomass/yr) for each pixel
-        for key, value in gain_above_dict.items():
-            cont_eco_above[cont_eco_above == key] = value
+        cont_eco_above = uu.apply_lookup_table(cont_eco, gain_above_dict)
 
         # Masks out pixels without mangroves, leaving removals rates in only pixels with mangroves
         dst_above_data = cont_eco_above * mangrove_AGB
@@ -121,18 +112,16 @@ def annual_gain_rate(tile_id, output_pattern_list, gain_above_dict, gain_below_d
 
 
         # Same as above but for belowground removals rates
-        for key, value in gain_below_dict.items():
-            cont_eco_below[cont_eco_below == key] = value
+        cont_eco_below = uu.apply_lookup_table(cont_eco, gain_below_dict)
 
         dst_below_data = cont_eco_below * mangrove_AGB
 
         dst_below.write_band(1, dst_below_data, window=window)
 
 
-        # Applies the dictionary of continent-ecozone aboveground removals rate standard deviations to the continent-ecozone array to
+        # Applies the lookup table of continent-ecozone aboveground removals rate standard deviations to the continent-ecozone array to
         # get annual aboveground removals rate standard deviations (metric tons aboveground biomass/yr) for each pixel
-        for key, value in stdev_dict.items():
-            cont_eco_stdev[cont_eco_stdev == key] = value
+        cont_eco_stdev = uu.apply_lookup_table(cont_eco, stdev_dict)
 
         # Masks out pixels without mangroves, leaving removals rates in only pixels with mangroves
         dst_stdev = cont_eco_stdev * mangrove_AGB
@@ -4,25 +4,66 @@ Function to create forest age category tiles
 
 import datetime
 import numpy as np
+import pandas as pd
 import rasterio
 
 import constants_and_names as cn
 import universal_util as uu
 
-def forest_age_category(tile_id, gain_table_dict, pattern):
+# Metadata tags of the forest age category tiles
+age_category_tags = dict(
+    key='1: young (<20 year) secondary forest; 2: old (>20 year) secondary forest; 3: primary forest or IFL',
+    source='Decision tree that uses Hansen gain and loss, IFL/primary forest extent, and aboveground biomass to assign an age category',
+    extent='Full model extent, even though these age categories will not be used over the full model extent. They apply to just the rates from IPCC defaults.'
+)
+
+def young_forest_gain_table():
     """
-    :param tile_id: tile to be processed, identified by its tile id
-    :param gain_table_dict: dictionary of removal factors by continent, ecozone, and forest age category
-    :param pattern: pattern for output tile names
-    :return: tile denoting three broad forest age categories: 1- young (<20), 2- middle, 3- old/primary
+    Makes the lookup table of young (<20 year) secondary forest removal factors that the age category decision tree uses.
+    The IPCC removal factor spreadsheet (cn.gain_spreadsheet) must be in the working directory.
+    :return: lookup table (uu.make_lookup_table) of young secondary forest removal factors by continent-ecozone
     """
 
-    uu.print_log("Assigning forest age categories:", tile_id)
+    # Imports the table with the ecozone-continent codes and the carbon removals rates
+    gain_table = pd.read_excel(f'{cn.gain_spreadsheet}', sheet_name = "natrl fores gain, for std model")
 
-    # Start time
-    start = datetime.datetime.now()
+    # Removes rows with duplicate codes (N. and S. America for the same ecozone)
+    gain_table_simplified = gain_table.drop_duplicates(subset='gainEcoCon', keep='first')
+
+    # Converts the continent-ecozone codes and young forest removals rates to a dictionary
+    gain_table_dict = pd.Series(gain_table_simplified.growth_secondary_less_20.values,index=gain_table_simplified.gainEcoCon).to_dict()
+
+    # Adds a dictionary entry for where the ecozone-continent code is 0 (not in a continent)
+    gain_table_dict[0] = 0
+
+    # Converts the removal factor dictionary to a lookup table once for the whole run.
+    # Rates are kept as float64 so that 20 years of removals are calculated at the same precision as before, and
+    # continent-ecozone codes that aren't in the table get NaN (no age comparison is true for them).
+    return uu.make_lookup_table(gain_table_dict, default=float('nan'), dtype='float64')
 
-    # Gets the bounding coordinates of each tile. Needed to determine if the tile is in the tropics (within 30 deg of the equator)
+
+def loss_tile_name(tile_id):
+    """
+    :param tile_id: tile id
+    :return: name of the loss tile for the model run: PRODES loss for legal_Amazon_loss, Mekong loss for Mekong_loss,
+        and Hansen loss for all other model runs
+    """
+
+    if cn.SENSIT_TYPE == 'legal_Amazon_loss':
+        return f'{tile_id}_{cn.pattern_Brazil_annual_loss_processed}.tif'
+    elif cn.SENSIT_TYPE == 'Mekong_loss':
+        return f'{tile_id}_{cn.pattern_Mekong_loss_processed}.tif'
+
+    return f'{cn.pattern_loss}_{tile_id}.tif'
+
+
+def tile_in_tropics(tile_id):
+    """
+    :param tile_id: tile id
+    :return: 1 if the tile is in the tropics (top of the tile within 30 deg of the equator), 0 if not
+    """
+
+    # Gets the bounding coordinates of each tile
     xmin, ymin, xmax, ymax = uu.coords(tile_id)
 
     # Default value is that the tile is not in the tropics
@@ -33,6 +74,95 @@ def forest_age_category(tile_id, gain_table_dict, pattern):
 
         tropics = 1
 
+    return tropics
+
+
+def forest_age_category_window(model_extent_window, gain_window, loss_window, ifl_primary_window, biomass_window,
+                               cont_eco_window, gain_table_dict, tropics):
+    """
+    Assigns forest age categories to a window according to the decision tree
+    :param model_extent_window: array of model extent
+    :param gain_window: array of Hansen gain
+    :param loss_window: array of loss years
+    :param ifl_primary_window: array of IFL/primary forest
+    :param biomass_window: array of aboveground biomass in 2000
+    :param cont_eco_window: array of continent-ecozone codes
+    :param gain_table_dict: lookup table (uu.make_lookup_table) of young secondary forest removal factors by continent-ecozone
+    :param tropics: whether the tile is in the tropics (1) or not (0)
+    :return: array of forest age categories: 1- young (<20), 2- middle, 3- old/primary
+    """
+
+    # Creates a numpy array that has the <=20 year secondary forest growth rate x 20
+    # based on the continent-ecozone code of each pixel (the lookup table).
+    # This is used to assign pixels to the correct age category.
+    gain_20_years = uu.apply_lookup_table(cont_eco_window, gain_table_dict)*20
+
+    # Create a 0s array for the output
+    dst_data = np.zeros(model_extent_window.shape, dtype='uint8')
+
+    # Logic tree for assigning age categories begins here
+    # Code 1 = young (<20 years) secondary forest, code 2 = old (>20 year) secondary forest, code 3 = primary forest
+    # model_extent_window ensures that there is both biomass and tree cover in 2000 OR mangroves OR tree cover gain
+
+    # For every model version except legal_Amazon_loss sensitivity analysis, which has its own rules about age assignment
+
+    #### Try using this in the future: https://gis.stackexchange.com/questions/419445/comparing-two-rasters-based-on-a-complex-set-of-rules
+
+    if cn.SENSIT_TYPE != 'legal_Amazon_loss':
+        # No change pixels- no loss or gain
+        if tropics == 0:
+
+            dst_data[np.where((model_extent_window > 0) & (gain_window == 0) & (loss_window == 0))] = 2
+
+        if tropics == 1:
+
+            dst_data[np.where((model_extent_window > 0) & (gain_window == 0) & (loss_window == 0) & (ifl_primary_window != 1))] = 2
+            dst_data[np.where((model_extent_window > 0) & (gain_window == 0) & (loss_window == 0) & (ifl_primary_window == 1))] = 3
+
+        # Loss-only pixels
+        dst_data[np.where((model_extent_window > 0) & (gain_window == 0) & (loss_window > 0) & (ifl_primary_window != 1) & (biomass_window <= gain_20_years))] = 1
+        dst_data[np.where((model_extent_window > 0) & (gain_window == 0) & (loss_window > 0) & (ifl_primary_window != 1) & (biomass_window > gain_20_years))] = 2
+        dst_data[np.where((model_extent_window > 0) & (gain_window == 0) & (loss_window > 0) & (ifl_primary_window ==1))] = 3
+
+        # Gain-only pixels
+        # If there is gain, the pixel doesn't need biomass or canopy cover.
+        dst_data[np.where((model_extent_window > 0) & (gain_window == 1) & (loss_window == 0))] = 1
+
+        # Pixels with loss-and-gain
+        # If there is gain with loss, the pixel doesn't need biomass or canopy cover.
+        dst_data[np.where((model_extent_window > 0) & (gain_window == 1) & (loss_window > 0))] = 1
+
+    # For legal_Amazon_loss sensitivity analysis
+    else:
+
+        # Non-loss pixels (could have gain or not. Assuming that if within PRODES extent in 2000, there can't be
+        # gain, so it's a faulty detection. Thus, gain-only pixels are ignored and become part of no-change.)
+        dst_data[np.where((model_extent_window == 1) & (loss_window == 0))] = 3  # primary forest
+
+        # Loss-only pixels
+        dst_data[np.where((model_extent_window == 1) & (loss_window > 0) & (gain_window == 0))] = 3  # primary forest
+
+        # Loss-and-gain pixels
+        dst_data[np.where((model_extent_window == 1) & (loss_window > 0) & (gain_window == 1))] = 2  # young secondary forest
+
+    return dst_data
+
+
+def forest_age_category(tile_id, gain_table_dict, pattern):
+    """
+    :param tile_id: tile to be processed, identified by its tile id
+    :param gain_table_dict: lookup table (uu.make_lookup_table) of removal factors by continent, ecozone, and forest age category
+    :param pattern: pattern for output tile names
+    :return: tile denoting three broad forest age categories: 1- young (<20), 2- middle, 3- old/primary
+    """
+
+    uu.print_log("Assigning forest age categories:", tile_id)
+
+    # Start time
+    start = datetime.datetime.now()
+
+    # Needed to determine if the tile is in the tropics (within 30 deg of the equator)
+    tropics = tile_in_tropics(tile_id)
     uu.print_log(f'  Tile {tile_id} in tropics: {tropics}')
 
     # Names of the input tiles
@@ -42,14 +172,8 @@ def forest_age_category(tile_id, gain_table_dict, pattern):
     cont_eco = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_cont_eco_processed)
     biomass = uu.sensit_tile_rename_biomass(cn.SENSIT_TYPE, tile_id)  # Biomass tile name depends on the sensitivity analysis
 
-    if cn.SENSIT_TYPE == 'legal_Amazon_loss':
-        loss = f'{tile_id}_{cn.pattern_Brazil_annual_loss_processed}.tif'
-        uu.print_log(f'Using PRODES loss tile {tile_id} for {cn.SENSIT_TYPE} sensitivity analysis')
-    elif cn.SENSIT_TYPE == 'Mekong_loss':
-        loss = f'{tile_id}_{cn.pattern_Mekong_loss_processed}.tif'
-    else:
-        loss = f'{cn.pattern_loss}_{tile_id}.tif'
-        uu.print_log(f'Using Hansen loss tile {tile_id} for {cn.SENSIT_TYPE} model run')
+    loss = loss_tile_name(tile_id)
+    uu.print_log(f'Using loss tile {loss} for {cn.SENSIT_TYPE} model run')
 
     # Opens biomass tile
     with rasterio.open(model_extent) as model_extent_src:
@@ -57,39 +181,15 @@ def forest_age_category(tile_id, gain_table_dict, pattern):
         # Grabs metadata about the tif, like its location/projection/cellsize
         kwargs = model_extent_src.meta
 
-        # Grabs the windows of the tile (stripes) so we can iterate over the entire tif without running out of memory
-        windows = model_extent_src.block_windows(1)
+        # Grabs the windows of the tile (groups of stripes) so we can iterate over the entire tif without running out of memory
+        windows = uu.iterate_windows(model_extent_src, tile_id, 'forest_age_category')
 
         # Opens the input tiles if they exist
-        try:
-            cont_eco_src = rasterio.open(cont_eco)
-            uu.print_log(f'   Continent-ecozone tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'   Continent-ecozone tile not found for {tile_id}')
-
-        try:
-            gain_src = rasterio.open(gain)
-            uu.print_log(f'   Gain tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'   Gain tile not found for {tile_id}')
-
-        try:
-            biomass_src = rasterio.open(biomass)
-            uu.print_log(f'   Biomass tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'   Biomass tile not found for {tile_id}')
-
-        try:
-            loss_src = rasterio.open(loss)
-            uu.print_log(f'   Loss tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'   Loss tile not found for {tile_id}')
-
-        try:
-            ifl_primary_src = rasterio.open(ifl_primary)
-            uu.print_log(f'   IFL-primary forest tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'   IFL-primary forest tile not found for {tile_id}')
+        cont_eco_src = uu.open_optional_input(cont_eco, tile_id, 'Continent-ecozone')
+        gain_src = uu.open_optional_input(gain, tile_id, 'Gain')
+        biomass_src = uu.open_optional_input(biomass, tile_id, 'Biomass')
+        loss_src = uu.open_optional_input(loss, tile_id, 'Loss')
+        ifl_primary_src = uu.open_optional_input(ifl_primary, tile_id, 'IFL-primary forest')
 
         # Updates kwargs for the output dataset
         kwargs.update(
@@ -104,101 +204,26 @@ def forest_age_category(tile_id, gain_table_dict, pattern):
 
         # Adds metadata tags to the output raster
         uu.add_universal_metadata_rasterio(dst)
-        dst.update_tags(
-            key='1: young (<20 year) secondary forest; 2: old (>20 year) secondary forest; 3: primary forest or IFL')
-        dst.update_tags(
-            source='Decision tree that uses Hansen gain and loss, IFL/primary forest extent, and aboveground biomass to assign an age category')
-        dst.update_tags(
-            extent='Full model extent, even though these age categories will not be used over the full model extent. They apply to just the rates from IPCC defaults.')
+        dst.update_tags(**age_category_tags)
 
         uu.print_log(f'     Assigning IPCC age categories for {tile_id}')
 
         uu.check_memory()
 
-        # Iterates across the windows (1 pixel strips) of the input tile
+        # Iterates across the windows (groups of 1 pixel strips) of the input tile
         for idx, window in windows:
 
             # Creates windows for each input raster. Only model_extent_src is guaranteed to exist
             model_extent_window = model_extent_src.read(1, window=window)
 
-            try:
-                loss_window = loss_src.read(1, window=window)
-            except UnboundLocalError:
-                loss_window = np.zeros((window.height, window.width), dtype='uint8')
-
-            try:
-                gain_window = gain_src.read(1, window=window)
-            except UnboundLocalError:
-                gain_window = np.zeros((window.height, window.width), dtype='uint8')
-
-            try:
-                cont_eco_window = cont_eco_src.read(1, window=window)
-            except UnboundLocalError:
-                cont_eco_window = np.zeros((window.height, window.width), dtype='uint8')
-
-            try:
-                biomass_window = biomass_src.read(1, window=window)
-            except UnboundLocalError:
-                biomass_window = np.zeros((window.height, window.width), dtype='float32')
-
-            try:
-                ifl_primary_window = ifl_primary_src.read(1, window=window)
-            except UnboundLocalError:
-                ifl_primary_window = np.zeros((window.height, window.width), dtype='uint8')
-
-            # Creates a numpy array that has the <=20 year secondary forest growth rate x 20
-            # based on the continent-ecozone code of each pixel (the dictionary).
-            # This is used to assign pixels to the correct age category.
-            gain_20_years = np.vectorize(gain_table_dict.get)(cont_eco_window)*20
-
-            # Create a 0s array for the output
-            dst_data = np.zeros((window.height, window.width), dtype='uint8')
-
-            # Logic tree for assigning age categories begins here
-            # Code 1 = young (<20 years) secondary forest, code 2 = old (>20 year) secondary forest, code 3 = primary forest
-            # model_extent_window ensures that there is both biomass and tree cover in 2000 OR mangroves OR tree cover gain
-
-            # For every model version except legal_Amazon_loss sensitivity analysis, which has its own rules about age assignment
-
-            #### Try using this in the future: https://gis.stackexchange.com/questions/419445/comparing-two-rasters-based-on-a-complex-set-of-rules
-
-            if cn.SENSIT_TYPE != 'legal_Amazon_loss':
-                # No change pixels- no loss or gain
-                if tropics == 0:
-
-                    dst_data[np.where((model_extent_window > 0) & (gain_window == 0) & (loss_window == 0))] = 2
-
-                if tropics == 1:
-
-                    dst_data[np.where((model_extent_window > 0) & (gain_window == 0) & (loss_window == 0) & (ifl_primary_window != 1))] = 2
-                    dst_data[np.where((model_extent_window > 0) & (gain_window == 0) & (loss_window == 0) & (ifl_primary_window == 1))] = 3
-
-                # Loss-only pixels
-                dst_data[np.where((model_extent_window > 0) & (gain_window == 0) & (loss_window > 0) & (ifl_primary_window != 1) & (biomass_window <= gain_20_years))] = 1
-                dst_data[np.where((model_extent_window > 0) & (gain_window == 0) & (loss_window > 0) & (ifl_primary_window != 1) & (biomass_window > gain_20_years))] = 2
-                dst_data[np.where((model_extent_window > 0) & (gain_window == 0) & (loss_window > 0) & (ifl_primary_window ==1))] = 3
-
-                # Gain-only pixels
-                # If there is gain, the pixel doesn't need biomass or canopy cover.
-                dst_data[np.where((model_extent_window > 0) & (gain_window == 1) & (loss_window == 0))] = 1
-
-                # Pixels with loss-and-gain
-                # If there is gain with loss, the pixel doesn't need biomass or canopy cover.
-                dst_data[np.where((model_extent_window > 0) & (gain_window == 1) & (loss_window > 0))] = 1
-
-            # For legal_Amazon_loss sensitivity analysis
-            else:
-
-                # Non-loss pixels (could have gain or not. Assuming that if within PRODES extent in 2000, there can't be
-                # gain, so it's a faulty detection. Thus, gain-only pixels are ignored and become part of no-change.)
-                dst_data[np.where((model_extent_window == 1) & (loss_window == 0))] = 3  # primary forest
-
-                # Loss-only pixels
-                dst_data[np.where((model_extent_window == 1) & (loss_window > 0) & (gain_window == 0))] = 3  # primary forest
-
-                # Loss-and-gain pixels
-                dst_data[np.where((model_extent_window == 1) & (loss_window > 0) & (gain_window == 1))] = 2  # young secondary forest
+            loss_window = uu.read_optional_window(loss_src, window, 'uint8')
+            gain_window = uu.read_optional_window(gain_src, window, 'uint8')
+            cont_eco_window = uu.read_optional_window(cont_eco_src, window, 'int16')
+            biomass_window = uu.read_optional_window(biomass_src, window, 'float32')
+            ifl_primary_window = uu.read_optional_window(ifl_primary_src, window, 'uint8')
 
+            dst_data = forest_age_category_window(model_extent_window, gain_window, loss_window, ifl_primary_window,
+                                                  biomass_window, cont_eco_window, gain_table_dict, tropics)
 
             # Writes the output window to the output
             dst.write_band(1, dst_data, window=window)
@@ -0,0 +1,269 @@
+"""
+Function to create removals outputs from forest age category through gross removals in one pass through each tile
+"""
+
+from contextlib import ExitStack
+import datetime
+import rasterio
+
+import constants_and_names as cn
+import universal_util as uu
+from . import annual_gain_rate_AGC_BGC_all_forest_types
+from . import annual_gain_rate_IPCC_defaults
+from . import forest_age_category_IPCC
+from . import gain_year_count_all_forest_types
+from . import gross_removals_all_forest_types
+
+# Removals stages that can be calculated in one pass, in the order they are run in the model.
+# A fused pass always runs through gross removals.
+removal_stages = ['forest_age_category_IPCC', 'annual_removals_IPCC', 'annual_removals_all_forest_types',
+                  'gain_year_count', 'gross_removals_all_forest_types']
+
+# Outputs of the removals stages, in the order they are created.
+# Each is: stage that creates it, output directory, output pattern, data type ('model_extent' for the model extent tile's
+# data type, like in the separate stages), and metadata tags.
+fused_removals_outputs = {
+    'age_cat_IPCC': ('forest_age_category_IPCC', cn.age_cat_IPCC_dir, cn.pattern_age_cat_IPCC, 'model_extent',
+                     forest_age_category_IPCC.age_category_tags),
+    'annual_gain_AGB_IPCC_defaults': ('annual_removals_IPCC', cn.annual_gain_AGB_IPCC_defaults_dir,
+                                      cn.pattern_annual_gain_AGB_IPCC_defaults, 'float32',
+                                      annual_gain_rate_IPCC_defaults.IPCC_default_rate_tags[0]),
+    'annual_gain_BGB_IPCC_defaults': ('annual_removals_IPCC', cn.annual_gain_BGB_IPCC_defaults_dir,
+                                      cn.pattern_annual_gain_BGB_IPCC_defaults, 'float32',
+                                      annual_gain_rate_IPCC_defaults.IPCC_default_rate_tags[1]),
+    'stdev_annual_gain_AGB_IPCC_defaults': ('annual_removals_IPCC', cn.stdev_annual_gain_AGB_IPCC_defaults_dir,
+                                            cn.pattern_stdev_annual_gain_AGB_IPCC_defaults, 'float32',
+                                            annual_gain_rate_IPCC_defaults.IPCC_default_rate_tags[2]),
+    'removal_forest_type': ('annual_removals_all_forest_types', cn.removal_forest_type_dir,
+                            cn.pattern_removal_forest_type, 'model_extent',
+                            annual_gain_rate_AGC_BGC_all_forest_types.removal_rate_tags[0]),
+    'annual_gain_AGC_all_types': ('annual_removals_all_forest_types', cn.annual_gain_AGC_all_types_dir,
+                                  cn.pattern_annual_gain_AGC_all_types, 'float32',
+                                  annual_gain_rate_AGC_BGC_all_forest_types.removal_rate_tags[1]),
+    'annual_gain_BGC_all_types': ('annual_removals_all_forest_types', cn.annual_gain_BGC_all_types_dir,
+                                  cn.pattern_annual_gain_BGC_all_types, 'float32',
+                                  annual_gain_rate_AGC_BGC_all_forest_types.removal_rate_tags[2]),
+    'annual_gain_AGC_BGC_all_types': ('annual_removals_all_forest_types', cn.annual_gain_AGC_BGC_all_types_dir,
+                                      cn.pattern_annual_gain_AGC_BGC_all_types, 'float32',
+                                      annual_gain_rate_AGC_BGC_all_forest_types.removal_rate_tags[3]),
+    'stdev_annual_gain_AGC_all_types': ('annual_removals_all_forest_types', cn.stdev_annual_gain_AGC_all_types_dir,
+                                        cn.pattern_stdev_annual_gain_AGC_all_types, 'float32',
+                                        annual_gain_rate_AGC_BGC_all_forest_types.removal_rate_tags[4]),
+    'gain_year_count': ('gain_year_count', cn.gain_year_count_dir, cn.pattern_gain_year_count, 'uint8',
+                        gain_year_count_all_forest_types.gain_year_count_tags),
+    'cumul_gain_AGCO2_all_types': ('gross_removals_all_forest_types', cn.cumul_gain_AGCO2_all_types_dir,
+                                   cn.pattern_cumul_gain_AGCO2_all_types, 'float32',
+                                   gross_removals_all_forest_types.gross_removals_tags[0]),
+    'cumul_gain_BGCO2_all_types': ('gross_removals_all_forest_types', cn.cumul_gain_BGCO2_all_types_dir,
+                                   cn.pattern_cumul_gain_BGCO2_all_types, 'float32',
+                                   gross_removals_all_forest_types.gross_removals_tags[1]),
+    'cumul_gain_AGCO2_BGCO2_all_types': ('gross_removals_all_forest_types', cn.cumul_gain_AGCO2_BGCO2_all_types_dir,
+                                         cn.pattern_cumul_gain_AGCO2_BGCO2_all_types, 'float32',
+                                         gross_removals_all_forest_types.gross_removals_tags[2])
+}
+
+
+def fused_removals(tile_id, stages, young_gain_table, gain_table_dict, stdev_table_dict, output_patterns):
+    """
+    Creates the removals outputs for the given stages in a single pass through a tile.
+    Each window goes through the forest age category decision tree, IPCC default removal factors,
+    removal factor compositing, gain year count and gross removals in memory, rather than each stage writing tiles that
+    the next stage reads back in. Outputs are the same as from the separate stages, but only the requested ones are written.
+    Stages before the first fused stage are read from their output tiles.
+    :param tile_id: tile to be processed, identified by its tile id
+    :param stages: removals stages to calculate (a run of removal_stages through gross_removals_all_forest_types)
+    :param young_gain_table: lookup table (uu.make_lookup_table) of young secondary forest removal factors by continent-ecozone
+        (only used if forest age categories are calculated)
+    :param gain_table_dict: lookup table (uu.make_lookup_table) of IPCC removal factors by continent, ecozone, and age
+        (only used if IPCC default removal factors are calculated)
+    :param stdev_table_dict: lookup table (uu.make_lookup_table) of IPCC removal factor standard deviations by continent, ecozone, and age
+        (only used if IPCC default removal factors are calculated)
+    :param output_patterns: output patterns of the outputs to write, keyed by output name (keys of fused_removals_outputs)
+    :return: the requested removals output tiles
+    """
+
+    uu.print_log(f'Creating removals outputs for {stages} in a single pass: {tile_id}')
+
+    # Start time
+    start = datetime.datetime.now()
+
+    compute_age = 'forest_age_category_IPCC' in stages
+    compute_IPCC = 'annual_removals_IPCC' in stages
+    compute_rates = 'annual_removals_all_forest_types' in stages
+
+    # Names of the input tiles
+    loss, gain, model_extent = gain_year_count_all_forest_types.tile_names(tile_id)
+    age_loss = forest_age_category_IPCC.loss_tile_name(tile_id)
+    ifl_primary = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_ifl_primary)
+    cont_eco = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_cont_eco_processed)
+    biomass = uu.sensit_tile_rename_biomass(cn.SENSIT_TYPE, tile_id)
+    BGB_AGB_ratio = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_BGB_AGB_ratio)
+    age_category = uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_age_cat_IPCC)
+
+    # The input and output tiles are closed when the tile is done or if it fails
+    with ExitStack() as datasets:
+
+        def opened(src):
+            return src if src is None else datasets.enter_context(src)
+
+        def opened_list(srcs):
+            return srcs if srcs is None else [datasets.enter_context(src) for src in srcs]
+
+        # This tile should exist, so it can reliably be opened for metadata and windows
+        model_extent_src = datasets.enter_context(rasterio.open(model_extent))
+
+        loss_src = opened(uu.open_optional_input(loss, tile_id, 'Loss'))
+        gain_src = opened(uu.open_optional_input(gain, tile_id, 'Gain'))
+        BGB_AGB_ratio_src = opened(uu.open_optional_input(BGB_AGB_ratio, tile_id, 'BGB:AGB', missing_note='. Using default BGB:AGB from Mokany instead.'))
+
+        if compute_age:
+            tropics = forest_age_category_IPCC.tile_in_tropics(tile_id)
+            uu.print_log(f'  Tile {tile_id} in tropics: {tropics}')
+
+            # The age category decision tree uses a different loss tile from gain year count in some sensitivity analyses
+            age_loss_src = loss_src if age_loss == loss else opened(uu.open_optional_input(age_loss, tile_id, 'Loss'))
+            ifl_primary_src = opened(uu.open_optional_input(ifl_primary, tile_id, 'IFL-primary forest'))
+            biomass_src = opened(uu.open_optional_input(biomass, tile_id, 'Biomass'))
+            age_category_src = None
+        else:
+            age_category_src = opened(uu.open_optional_input(age_category, tile_id, 'Age category'))
+
+        cont_eco_src = None
+        if compute_age or compute_IPCC:
+            cont_eco_src = opened(uu.open_optional_input(cont_eco, tile_id, 'Continent-ecozone'))
+
+        # IPCC default removal factors are only created where there are continent-ecozone and age category tiles,
+        # like in annual_gain_rate_IPCC_defaults.annual_gain_rate()
+        has_IPCC = False
+        if compute_IPCC:
+            has_IPCC = (cont_eco_src is not None) and (compute_age or age_category_src is not None)
+            if not has_IPCC:
+                uu.print_log(f'  Continent-ecozone or age category tile not found for {tile_id}. Not creating IPCC default removal factors.')
+
+        # Removal factor sources for compositing. Each source is only used if all of its tiles exist
+        # and its removal factor has data (according to the footprint index, if one is used).
+        rate_srcs = {}
+        if compute_rates:
+            rate_tiles = {
+                'young': [cn.pattern_annual_gain_AGC_natrl_forest_young, cn.pattern_stdev_annual_gain_AGC_natrl_forest_young],
+                'us': [cn.pattern_annual_gain_AGC_BGC_natrl_forest_US, cn.pattern_stdev_annual_gain_AGC_BGC_natrl_forest_US],
+                'plantations': [cn.pattern_annual_gain_AGC_BGC_planted_forest, cn.pattern_stdev_annual_gain_AGC_BGC_planted_forest],
+                'europe': [cn.pattern_annual_gain_AGC_BGC_natrl_forest_Europe, cn.pattern_stdev_annual_gain_AGC_BGC_natrl_forest_Europe],
+                'mangrove': [cn.pattern_annual_gain_AGB_mangrove, cn.pattern_annual_gain_BGB_mangrove, cn.pattern_stdev_annual_gain_AGB_mangrove]
+            }
+
+            # IPCC default removal factors are read from tiles if they aren't calculated in this pass
+            if not compute_IPCC:
+                rate_tiles['ipcc'] = [cn.pattern_annual_gain_AGB_IPCC_defaults, cn.pattern_stdev_annual_gain_AGB_IPCC_defaults]
+
+            for source, patterns in rate_tiles.items():
+                srcs = opened_list(uu.open_optional_inputs([uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, pattern) for pattern in patterns],
+                                                           tile_id, f'{source} removal factor'))
+                if srcs is not None:
+                    rate_srcs[source] = srcs
+
+        # Composite removal factors are read from tiles if they aren't calculated in this pass.
+        # Gross removals can't be calculated without them, like in gross_removals_all_forest_types().
+        else:
+            gain_rate_AGC_src = opened(uu.open_optional_input(uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_annual_gain_AGC_all_types),
+                                                              tile_id, 'Aboveground removal factor'))
+            gain_rate_BGC_src = opened(uu.open_optional_input(uu.sensit_tile_rename(cn.SENSIT_TYPE, tile_id, cn.pattern_annual_gain_BGC_all_types),
+                                                              tile_id, 'Belowground removal factor'))
+            if (gain_rate_AGC_src is None) | (gain_rate_BGC_src is None):
+                return uu.print_log(f'  Removal factor tiles not found for {tile_id}. Skipping tile.')
+
+        # Grabs the windows of the tile (groups of stripes) to iterate over the entire tif without running out of memory
+        windows = uu.iterate_windows(model_extent_src, tile_id, 'fused_removals')
+
+        # Grabs metadata about the model extent tile, like its location/projection/cellsize
+        kwargs = model_extent_src.meta
+        kwargs.update(
+            driver='GTiff',
+            count=1,
+            compress='DEFLATE',
+            nodata=0
+        )
+
+        # Opens the requested outputs of the stages that are calculated in this pass
+        dsts = {}
+        for output, pattern in output_patterns.items():
+            stage, output_dir, output_pattern, dtype, tags = fused_removals_outputs[output]
+
+            if (stage == 'annual_removals_IPCC') & (not has_IPCC):
+                continue
+
+            output_kwargs = kwargs.copy()
+            if dtype != 'model_extent':
+                output_kwargs.update(dtype=dtype)
+
+            dst = datasets.enter_context(rasterio.open(uu.make_tile_name(tile_id, pattern), 'w', **output_kwargs))
+            uu.add_universal_metadata_rasterio(dst)
+            dst.update_tags(**tags)
+            dsts[output] = dst
+
+        uu.check_memory()
+
+        # Iterates across the windows (groups of 1 pixel strips) of the input tiles
+        for idx, window in windows:
+
+            model_extent_window = model_extent_src.read(1, window=window)
+            loss_window = uu.read_optional_window(loss_src, window, 'uint8')
+            gain_window = uu.read_optional_window(gain_src, window, 'uint8')
+            BGB_AGB_ratio_window = uu.read_optional_window(BGB_AGB_ratio_src, window, 'float32', cn.below_to_above_non_mang)
+            cont_eco_window = uu.read_optional_window(cont_eco_src, window, 'int16')
+
+            # Output windows, keyed by output name
+            outputs = {}
+
+            ## Forest age category
+            if compute_age:
+                outputs['age_cat_IPCC'] = forest_age_category_IPCC.forest_age_category_window(
+                    model_extent_window, gain_window, uu.read_optional_window(age_loss_src, window, 'uint8'),
+                    uu.read_optional_window(ifl_primary_src, window, 'uint8'),
+                    uu.read_optional_window(biomass_src, window, 'float32'),
+                    cont_eco_window, young_gain_table, tropics)
+                age_category_window = outputs['age_cat_IPCC']
+            else:
+                age_category_window = uu.read_optional_window(age_category_src, window, 'uint8')
+
+            ## Removal factors from all sources
+            if compute_rates:
+
+                # Windows of the removal factor sources that have tiles
+                rate_windows = {source: tuple(uu.read_optional_window(src, window, 'float32') for src in srcs)
+                                for source, srcs in rate_srcs.items()}
+
+                ## IPCC default removal factors
+                if has_IPCC:
+                    outputs['annual_gain_AGB_IPCC_defaults'], outputs['annual_gain_BGB_IPCC_defaults'], \
+                    outputs['stdev_annual_gain_AGB_IPCC_defaults'] = annual_gain_rate_IPCC_defaults.annual_gain_rate_window(
+                        age_category_window, cont_eco_window, BGB_AGB_ratio_window, gain_table_dict, stdev_table_dict)
+                    rate_windows['ipcc'] = (outputs['annual_gain_AGB_IPCC_defaults'], outputs['stdev_annual_gain_AGB_IPCC_defaults'])
+
+                outputs['removal_forest_type'], outputs['annual_gain_AGC_all_types'], outputs['annual_gain_BGC_all_types'], \
+                outputs['annual_gain_AGC_BGC_all_types'], outputs['stdev_annual_gain_AGC_all_types'] = \
+                    annual_gain_rate_AGC_BGC_all_forest_types.annual_gain_rate_AGC_BGC_window(
+                        model_extent_window, age_category_window, BGB_AGB_ratio_window, rate_windows)
+
+                gain_rate_AGC_window = outputs['annual_gain_AGC_all_types']
+                gain_rate_BGC_window = outputs['annual_gain_BGC_all_types']
+
+            else:
+                gain_rate_AGC_window = gain_rate_AGC_src.read(1, window=window)
+                gain_rate_BGC_window = gain_rate_BGC_src.read(1, window=window)
+
+            ## Gain year count
+            outputs['gain_year_count'] = gain_year_count_all_forest_types.gain_year_count_window(loss_window, gain_window,
+                                                                                                 model_extent_window)
+
+            ## Gross removals
+            outputs['cumul_gain_AGCO2_all_types'], outputs['cumul_gain_BGCO2_all_types'], \
+            outputs['cumul_gain_AGCO2_BGCO2_all_types'] = gross_removals_all_forest_types.gross_removals_window(
+                gain_rate_AGC_window, gain_rate_BGC_window, outputs['gain_year_count'])
+
+            # Writes the requested outputs
+            for output, dst in dsts.items():
+                dst.write_band(1, outputs[output], window=window)
+
+    # Prints information about the tile that was just processed
+    uu.end_of_fx_summary(start, tile_id, list(output_patterns.values())[0])
@@ -8,6 +8,35 @@ import rasterio
 import constants_and_names as cn
 import universal_util as uu
 
+# Metadata tags of the output tiles: gross aboveground removals, belowground removals, aboveground+belowground removals
+gross_removals_tags = [
+    dict(units='megagrams aboveground CO2/ha over entire model period',
+         source='annual removal factors and gain year count',
+         extent='Full model extent'),
+    dict(units='megagrams belowground CO2/ha over entire model period',
+         source='annual removal factors and gain year count',
+         extent='Full model extent'),
+    dict(units='megagrams aboveground+belowground CO2/ha over entire model period',
+         source='annual removal factors and gain year count',
+         extent='Full model extent')
+]
+
+def gross_removals_window(gain_rate_AGC_window, gain_rate_BGC_window, gain_year_count_window):
+    """
+    Converts annual removal factors into gross removals over the model period for a window
+    :param gain_rate_AGC_window: array of aboveground removal factors (Mg C/ha/yr)
+    :param gain_rate_BGC_window: array of belowground removal factors (Mg C/ha/yr)
+    :param gain_year_count_window: array of years of removals
+    :return: arrays of gross aboveground removals, belowground removals, aboveground+belowground removals (Mg CO2/ha)
+    """
+
+    cumulative_gain_AGCO2_window = gain_rate_AGC_window * gain_year_count_window * cn.c_to_co2
+    cumulative_gain_BGCO2_window = gain_rate_BGC_window * gain_year_count_window * cn.c_to_co2
+    cumulative_gain_AGCO2_BGCO2_window = cumulative_gain_AGCO2_window + cumulative_gain_BGCO2_window
+
+    return cumulative_gain_AGCO2_window, cumulative_gain_BGCO2_window, cumulative_gain_AGCO2_BGCO2_window
+
+
 def gross_removals_all_forest_types(tile_id, output_pattern_list):
     """
     Calculates cumulative aboveground carbon dioxide removals in mangroves
@@ -53,8 +82,8 @@ def gross_removals_all_forest_types(tile_id, output_pattern_list):
     # Grabs metadata for an input tile
     kwargs = gain_rate_AGC_src.meta
 
-    # Grabs the windows of the tile (stripes) to iterate over the entire tif without running out of memory
-    windows = gain_rate_AGC_src.block_windows(1)
+    # Grabs the windows of the tile (groups of stripes) to iterate over the entire tif without running out of memory
+    windows = uu.iterate_windows(gain_rate_AGC_src, tile_id, 'gross_removals_all_forest_types')
 
     # Updates kwargs for the output dataset.
     kwargs.update(
@@ -67,33 +96,19 @@ def gross_removals_all_forest_types(tile_id, output_pattern_list):
     # The output files: aboveground gross removals, belowground gross removals, above+belowground gross removals. Adds metadata tags
     cumulative_gain_AGCO2_dst = rasterio.open(cumulative_gain_AGCO2, 'w', **kwargs)
     uu.add_universal_metadata_rasterio(cumulative_gain_AGCO2_dst)
-    cumulative_gain_AGCO2_dst.update_tags(
-        units='megagrams aboveground CO2/ha over entire model period')
-    cumulative_gain_AGCO2_dst.update_tags(
-        source='annual removal factors and gain year count')
-    cumulative_gain_AGCO2_dst.update_tags(
-        extent='Full model extent')
+    cumulative_gain_AGCO2_dst.update_tags(**gross_removals_tags[0])
 
     cumulative_gain_BGCO2_dst = rasterio.open(cumulative_gain_BGCO2, 'w', **kwargs)
     uu.add_universal_metadata_rasterio(cumulative_gain_BGCO2_dst)
-    cumulative_gain_BGCO2_dst.update_tags(
-        units='megagrams belowground CO2/ha over entire model period')
-    cumulative_gain_BGCO2_dst.update_tags(
-        source='annual removal factors and gain year count')
-    cumulative_gain_BGCO2_dst.update_tags(
-        extent='Full model extent')
+    cumulative_gain_BGCO2_dst.update_tags(**gross_removals_tags[1])
 
     cumulative_gain_AGCO2_BGCO2_dst = rasterio.open(cumulative_gain_AGCO2_BGCO2, 'w', **kwargs)
-    cumulative_gain_AGCO2_BGCO2_dst.update_tags(
-        units='megagrams aboveground+belowground CO2/ha over entire model period')
-    cumulative_gain_AGCO2_BGCO2_dst.update_tags(
-        source='annual removal factors and gain year count')
-    cumulative_gain_AGCO2_BGCO2_dst.update_tags(
-        extent='Full model extent')
+    uu.add_universal_metadata_rasterio(cumulative_gain_AGCO2_BGCO2_dst)
+    cumulative_gain_AGCO2_BGCO2_dst.update_tags(**gross_removals_tags[2])
 
     uu.check_memory()
 
-    # Iterates across the windows (1 pixel strips) of the input tiles
+    # Iterates across the windows (groups of 1 pixel strips) of the input tiles
     for idx, window in windows:
 
         # Creates a processing window for each input raster
@@ -102,9 +117,8 @@ def gross_removals_all_forest_types(tile_id, output_pattern_list):
         gain_year_count_window = gain_year_count_src.read(1, window=window)
 
         # Converts the annual removal rate into gross removals
-        cumulative_gain_AGCO2_window = gain_rate_AGC_window * gain_year_count_window * cn.c_to_co2
-        cumulative_gain_BGCO2_window = gain_rate_BGC_window * gain_year_count_window * cn.c_to_co2
-        cumulative_gain_AGCO2_BGCO2_window = cumulative_gain_AGCO2_window + cumulative_gain_BGCO2_window
+        cumulative_gain_AGCO2_window, cumulative_gain_BGCO2_window, cumulative_gain_AGCO2_BGCO2_window = \
+            gross_removals_window(gain_rate_AGC_window, gain_rate_BGC_window, gain_year_count_window)
 
         # Writes the output windows to the output files
         cumulative_gain_AGCO2_dst.write_band(1, cumulative_gain_AGCO2_window, window=window)
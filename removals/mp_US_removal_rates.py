@@ -29,15 +29,13 @@ that region-group-age combination (such as exotic hardwoods, I believe).
 So although almost the entire US is covered by the three input rasters, considerable areas with assigned rates can
 occur when the FIA didn't have sufficient data to come up with a rate.
 
-This script creates two dictionaries for rate and two for stdev to apply to the three input tiles: one by
-region-group-age combinations and another with the youngest rate for each region-group combination.
-The first dictionary is applied to all standard gain model pixels according to their region-group-age combination
-but then is overwritten for any Hansen gain pixel with the youngest rate for that region-group combination applied
-(using the second dictionary). That is because we can assume that any Hansen gain pixel is in the youngest age category,
-i.e. it is more specific information than the Pan et al. forest age category raster, so we give that info priority.
+This script creates one lookup table of rates and stdevs by region-group-age combination to apply to the three input tiles.
+The table is applied to all pixels according to their region-group-age combination, except that any Hansen gain pixel
+gets the youngest rate for its region-group combination. That is because we can assume that any Hansen gain pixel is
+in the youngest age category, i.e. it is more specific information than the Pan et al. forest age category raster,
+so we give that info priority.
 '''
 
-import multiprocessing
 from functools import partial
 import datetime
 import argparse
@@ -58,6 +56,9 @@ def mp_US_removal_rates(tile_id_list):
     if tile_id_list == 'all':
         tile_id_list = uu.tile_list_s3(cn.FIA_regions_processed_dir)
 
+    # US removal factors are only where there are FIA regions, so tiles without them aren't processed
+    tile_id_list = uu.tiles_with_data(tile_id_list, cn.pattern_FIA_regions_processed)
+
     uu.print_log(tile_id_list)
     uu.print_log(f'There are {str(len(tile_id_list))} tiles to process', "\n")
 
@@ -98,110 +99,22 @@ def mp_US_removal_rates(tile_id_list):
     uu.log_subprocess_output_full(cmd)
 
 
-    ### To make the removal factor dictionaries
-
-    # Imports the table with the region-group-age AGC+BGC removal rates
+    # Imports the table with the region-group-age AGC+BGC removal rates and standard deviations
     gain_table = pd.read_excel("{}".format(cn.table_US_removal_rate),
                                sheet_name="US_rates_AGC+BGC")
 
-    # Converts removals table from wide to long, so each region-group-age category has its own row
-    gain_table_group_region_by_age = pd.melt(gain_table, id_vars=['FIA_region_code', 'forest_group_code'],
-                                      value_vars=['growth_young', 'growth_middle',
-                                                  'growth_old'])
-    gain_table_group_region_by_age = gain_table_group_region_by_age.dropna()
-
-    # In the forest age category raster, each category has this value
-    age_dict = {'growth_young': 1000, 'growth_middle': 2000, 'growth_old': 3000}
-
-    # Creates a unique value for each forest group-region-age category in the table.
-    # Although these rates are applied to all standard removals model pixels at first, they are not ultimately used for
-    # pixels that have Hansen gain (see below).
-    gain_table_group_region_age = gain_table_group_region_by_age.replace({"variable": age_dict})
-    gain_table_group_region_age['age_cat'] = gain_table_group_region_age['variable']*10
-    gain_table_group_region_age['group_region_age_combined'] = gain_table_group_region_age['age_cat'] + \
-                                              gain_table_group_region_age['forest_group_code']*100 + \
-                                              gain_table_group_region_age['FIA_region_code']
-    # Converts the forest group-region-age codes and corresponding removals rates to a dictionary,
-    # where the key is the unique group-region-age code and the value is the AGB removal rate.
-    gain_table_group_region_age_dict = pd.Series(gain_table_group_region_age.value.values, index=gain_table_group_region_age.group_region_age_combined).to_dict()
-    uu.print_log(gain_table_group_region_age_dict)
-
-
-    # Creates a unique value for each forest group-region category using just young forest rates.
-    # These are assigned to Hansen gain pixels, which automatically get the young forest rate, regardless of the
-    # forest age category raster.
-    gain_table_group_region = gain_table_group_region_age.drop(gain_table_group_region_age[gain_table_group_region_age.age_cat != 10000].index)
-    gain_table_group_region['group_region_combined'] = gain_table_group_region['forest_group_code']*100 + \
-                                                       gain_table_group_region['FIA_region_code']
-    # Converts the forest group-region codes and corresponding removals rates to a dictionary,
-    # where the key is the unique group-region code (youngest age category) and the value is the AGB removal rate.
-    gain_table_group_region_dict = pd.Series(gain_table_group_region.value.values, index=gain_table_group_region.group_region_combined).to_dict()
-    uu.print_log(gain_table_group_region_dict)
-
-
-    ### To make the removal factor standard deviation dictionaries
-
-    # Converts removals table from wide to long, so each region-group-age category has its own row
-    stdev_table_group_region_by_age = pd.melt(gain_table, id_vars=['FIA_region_code', 'forest_group_code'],
-                                             value_vars=['SD_young', 'SD_middle',
-                                                         'SD_old'])
-    stdev_table_group_region_by_age = stdev_table_group_region_by_age.dropna()
-
-    # In the forest age category raster, each category has this value
-    stdev_dict = {'SD_young': 1000, 'SD_middle': 2000, 'SD_old': 3000}
-
-    # Creates a unique value for each forest group-region-age category in the table.
-    # Although these rates are applied to all standard removals model pixels at first, they are not ultimately used for
-    # pixels that have Hansen gain (see below).
-    stdev_table_group_region_age = stdev_table_group_region_by_age.replace({"variable": stdev_dict})
-    stdev_table_group_region_age['age_cat'] = stdev_table_group_region_age['variable'] * 10
-    stdev_table_group_region_age['group_region_age_combined'] = stdev_table_group_region_age['age_cat'] + \
-                                                               stdev_table_group_region_age['forest_group_code'] * 100 + \
-                                                               stdev_table_group_region_age['FIA_region_code']
-    # Converts the forest group-region-age codes and corresponding removals rates to a dictionary,
-    # where the key is the unique group-region-age code and the value is the AGB removal rate.
-    stdev_table_group_region_age_dict = pd.Series(stdev_table_group_region_age.value.values,
-                                                 index=stdev_table_group_region_age.group_region_age_combined).to_dict()
-    uu.print_log(stdev_table_group_region_age_dict)
-
-    # Creates a unique value for each forest group-region category using just young forest rates.
-    # These are assigned to Hansen gain pixels, which automatically get the young forest rate, regardless of the
-    # forest age category raster.
-    stdev_table_group_region = stdev_table_group_region_age.drop(
-        stdev_table_group_region_age[stdev_table_group_region_age.age_cat != 10000].index)
-    stdev_table_group_region['group_region_combined'] = stdev_table_group_region['forest_group_code'] * 100 + \
-                                                       stdev_table_group_region['FIA_region_code']
-    # Converts the forest group-region codes and corresponding removals rates to a dictionary,
-    # where the key is the unique group-region code (youngest age category) and the value is the AGB removal rate.
-    stdev_table_group_region_dict = pd.Series(stdev_table_group_region.value.values,
-                                             index=stdev_table_group_region.group_region_combined).to_dict()
-    uu.print_log(stdev_table_group_region_dict)
-
-
-    if cn.count == 96:
-        processes = 68   # 68 processors (only 16 tiles though) = 310 GB peak
-    else:
-        processes = 24
-    uu.print_log('US natural forest AGC+BGC removal rate max processors=', processes)
-    pool = multiprocessing.Pool(processes)
-    pool.map(partial(US_removal_rates.US_removal_rate_calc,
-                     gain_table_group_region_age_dict=gain_table_group_region_age_dict,
-                     gain_table_group_region_dict=gain_table_group_region_dict,
-                     stdev_table_group_region_age_dict=stdev_table_group_region_age_dict,
-                     stdev_table_group_region_dict=stdev_table_group_region_dict,
-                     output_pattern_list=output_pattern_list), tile_id_list)
-    pool.close()
-    pool.join()
+    # Converts the removal rates and standard deviations to one lookup table by age category, forest group and region
+    rate_table = US_removal_rates.US_removal_rate_table(gain_table, ['growth', 'SD'])
+
+
+    uu.map_tiles(partial(US_removal_rates.US_removal_rate_calc,
+                         rate_table=rate_table,
+                         output_pattern_list=output_pattern_list), tile_id_list, 'US_removal_rates')
 
     # # For single processor use
     # for tile_id in tile_id_list:
     #
-    #     US_removal_rates.US_removal_rate_calc(tile_id,
-    #       gain_table_group_region_age_dict,
-    #       gain_table_group_region_dict,
-    #       stdev_table_group_region_age_dict,
-    #       stdev_table_group_region_dict,
-    #       output_pattern_list)
+    #     US_removal_rates.US_removal_rate_calc(tile_id, rate_table, output_pattern_list)
 
 
     # Uploads output tiles to s3
@@ -223,12 +136,14 @@ if __name__ == '__main__':
                         help='Date of run. Must be format YYYYMMDD.')
     parser.add_argument('--no-upload', '-nu', action='store_true',
                        help='Disables uploading of outputs to s3')
+    uu.add_tile_processing_arguments(parser)
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
     cn.SENSIT_TYPE = args.model_type
     cn.RUN_DATE = args.run_date
     cn.NO_UPLOAD = args.no_upload
+    uu.set_tile_processing_arguments(args)
 
     tile_id_list = args.tile_id_list
 
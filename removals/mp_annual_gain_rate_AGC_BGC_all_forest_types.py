@@ -15,7 +15,6 @@ python -m removals.mp_annual_gain_rate_AGC_BGC_all_forest_types -t std -l all
 
 import argparse
 from functools import partial
-import multiprocessing
 import os
 import sys
 
@@ -99,41 +98,22 @@ def mp_annual_gain_rate_AGC_BGC_all_forest_types(tile_id_list):
             annual_gain_rate_AGC_BGC_all_forest_types.annual_gain_rate_AGC_BGC_all_forest_types(tile_id, output_pattern_list)
 
     else:
-        # This configuration of the multiprocessing call is necessary for passing multiple arguments to the main function
-        # It is based on the example here: http://spencerimp.blogspot.com/2015/12/python-multiprocess-with-multiple.html
-        if cn.count == 96:
-            if cn.SENSIT_TYPE == 'biomass_swap':
-                processes = 13
-            else:
-                processes = 17  # 30 processors > 740 GB peak; 18 = >740 GB peak; 16 = 660 GB peak; 17 = >680 GB peak
-        else:
-            processes = 2
-        uu.print_log(f'Removal factor processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(annual_gain_rate_AGC_BGC_all_forest_types.annual_gain_rate_AGC_BGC_all_forest_types,
+        uu.map_tiles(partial(annual_gain_rate_AGC_BGC_all_forest_types.annual_gain_rate_AGC_BGC_all_forest_types,
                              output_pattern_list=output_pattern_list),
-                     tile_id_list)
-            pool.close()
-            pool.join()
+                     tile_id_list, 'annual_gain_rate_AGC_BGC_all_forest_types')
 
 
     # No single-processor versions of these check-if-empty functions
     # Checks the gross removals outputs for tiles with no data
     for output_pattern in output_pattern_list:
         if cn.count <= 12:  # For local tests
-            processes = 1
-            uu.print_log(f'Checking for empty tiles of {output_pattern} pattern with {processes} processors using light function...')
-            with multiprocessing.Pool(processes) as pool:
-                pool.map(partial(uu.check_and_delete_if_empty_light, output_pattern=output_pattern), tile_id_list)
-                pool.close()
-                pool.join()
+            uu.print_log(f'Checking for empty tiles of {output_pattern} pattern using light function...')
+            uu.map_tiles(partial(uu.check_and_delete_if_empty_light, output_pattern=output_pattern), tile_id_list,
+                         'check_and_delete_if_empty_light')
         else:
-            processes = 55  # 55 processors = XXX GB peak
-            uu.print_log(f'Checking for empty tiles of {output_pattern} pattern with {processes} processors...')
-            with multiprocessing.Pool(processes) as pool:
-                pool.map(partial(uu.check_and_delete_if_empty, output_pattern=output_pattern), tile_id_list)
-                pool.close()
-                pool.join()
+            uu.print_log(f'Checking for empty tiles of {output_pattern} pattern...')
+            uu.map_tiles(partial(uu.check_and_delete_if_empty, output_pattern=output_pattern), tile_id_list,
+                         'check_and_delete_if_empty')
 
 
     # If cn.NO_UPLOAD flag is not activated (by choice or by lack of AWS credentials), output is uploaded
@@ -158,6 +138,7 @@ if __name__ == '__main__':
                        help='Disables uploading of outputs to s3')
     parser.add_argument('--single-processor', '-sp', action='store_true',
                        help='Uses single processing rather than multiprocessing')
+    uu.add_tile_processing_arguments(parser)
     args = parser.parse_args()
 
 
@@ -166,6 +147,7 @@ if __name__ == '__main__':
     cn.RUN_DATE = args.run_date
     cn.NO_UPLOAD = args.no_upload
     cn.SINGLE_PROCESSOR = args.single_processor
+    uu.set_tile_processing_arguments(args)
 
     tile_id_list = args.tile_id_list
 
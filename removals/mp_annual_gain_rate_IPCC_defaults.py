@@ -16,7 +16,6 @@ python -m removals.mp_annual_gain_rate_IPCC_defaults -t std -l 00N_000E -nu
 python -m removals.mp_annual_gain_rate_IPCC_defaults -t std -l all
 """
 
-import multiprocessing
 from functools import partial
 import argparse
 import pandas as pd
@@ -88,135 +87,18 @@ def mp_annual_gain_rate_IPCC_defaults(tile_id_list):
     uu.log_subprocess_output_full(cmd)
 
 
-    ### To make the removal factor dictionaries
-
-    # Special removal rate table for no_primary_gain sensitivity analysis: primary forests and IFLs have removal rate of 0
-    if cn.SENSIT_TYPE == 'no_primary_gain':
-        # Imports the table with the ecozone-continent codes and the carbon removals rates
-        gain_table = pd.read_excel(cn.gain_spreadsheet, sheet_name = "natrl fores gain, no_prim_gain")
-        uu.print_log('Using no_primary_gain IPCC default rates for tile creation')
-
-    # All other analyses use the standard removal rates
-    else:
-        # Imports the table with the ecozone-continent codes and the biomass removals rates
-        gain_table = pd.read_excel(cn.gain_spreadsheet, sheet_name = "natrl fores gain, for std model")
-
-    # Removes rows with duplicate codes (N. and S. America for the same ecozone)
-    gain_table_simplified = gain_table.drop_duplicates(subset='gainEcoCon', keep='first')
-
-    # Converts removals table from wide to long, so each continent-ecozone-age category has its own row
-    gain_table_cont_eco_age = pd.melt(gain_table_simplified, id_vars = ['gainEcoCon'],
-                            value_vars = ['growth_primary', 'growth_secondary_greater_20', 'growth_secondary_less_20'])
-    gain_table_cont_eco_age = gain_table_cont_eco_age.dropna()
-
-    # Creates a table that has just the continent-ecozone combinations for adding to the dictionary.
-    # These will be used whenever there is just a continent-ecozone pixel without a forest age pixel.
-    # Assigns removal rate of 0 when there's no age category.
-    gain_table_con_eco_only = gain_table_cont_eco_age
-    gain_table_con_eco_only = gain_table_con_eco_only.drop_duplicates(subset='gainEcoCon', keep='first')
-    gain_table_con_eco_only['value'] = 0
-    gain_table_con_eco_only['cont_eco_age'] = gain_table_con_eco_only['gainEcoCon']
-
-    # Creates a code for each age category so that each continent-ecozone-age combo can have its own unique value
-    rate_age_dict = {'growth_secondary_less_20': 10000, 'growth_secondary_greater_20': 20000, 'growth_primary': 30000}
-
-    # Creates a unique value for each continent-ecozone-age category
-    gain_table_cont_eco_age = gain_table_cont_eco_age.replace({"variable": rate_age_dict})
-    gain_table_cont_eco_age['cont_eco_age'] = gain_table_cont_eco_age['gainEcoCon'] + gain_table_cont_eco_age['variable']
-
-    # Merges the table of just continent-ecozone codes and the table of  continent-ecozone-age codes
-    gain_table_all_combos = pd.concat([gain_table_con_eco_only, gain_table_cont_eco_age])
-
-    # Converts the continent-ecozone-age codes and corresponding removals rates to a dictionary
-    gain_table_dict = pd.Series(gain_table_all_combos.value.values,index=gain_table_all_combos.cont_eco_age).to_dict()
-
-    # Adds a dictionary entry for where the ecozone-continent-age code is 0 (not in a continent)
-    gain_table_dict[0] = 0
-
-    # Adds a dictionary entry for each forest age code for pixels that have forest age but no continent-ecozone
-    for key, value in rate_age_dict.items():
-
-        gain_table_dict[value] = 0
-
-    # Converts all the keys (continent-ecozone-age codes) to float type
-    gain_table_dict = {float(key): value for key, value in gain_table_dict.items()}
-
-
-    ### To make the removal factor standard deviation dictionary
-
-    # Special removal rate table for no_primary_gain sensitivity analysis: primary forests and IFLs have removal rate of 0
-    if cn.SENSIT_TYPE == 'no_primary_gain':
-        # Imports the table with the ecozone-continent codes and the carbon removals rates
-        stdev_table = pd.read_excel(cn.gain_spreadsheet, sheet_name="natrl fores stdv, no_prim_gain")
-        uu.print_log('Using no_primary_gain IPCC default standard deviations for tile creation')
-
-    # All other analyses use the standard removal rates
-    else:
-        # Imports the table with the ecozone-continent codes and the biomass removals rate standard deviations
-        stdev_table = pd.read_excel(cn.gain_spreadsheet, sheet_name="natrl fores stdv, for std model")
-
-    # Removes rows with duplicate codes (N. and S. America for the same ecozone)
-    stdev_table_simplified = stdev_table.drop_duplicates(subset='gainEcoCon', keep='first')
-
-    # Converts removals table from wide to long, so each continent-ecozone-age category has its own row
-    stdev_table_cont_eco_age = pd.melt(stdev_table_simplified, id_vars = ['gainEcoCon'], value_vars = ['stdev_primary', 'stdev_secondary_greater_20', 'stdev_secondary_less_20'])
-    stdev_table_cont_eco_age = stdev_table_cont_eco_age.dropna()
-
-    # Creates a table that has just the continent-ecozone combinations for adding to the dictionary.
-    # These will be used whenever there is just a continent-ecozone pixel without a forest age pixel.
-    # Assigns removal rate of 0 when there's no age category.
-    stdev_table_con_eco_only = stdev_table_cont_eco_age
-    stdev_table_con_eco_only = stdev_table_con_eco_only.drop_duplicates(subset='gainEcoCon', keep='first')
-    stdev_table_con_eco_only['value'] = 0
-    stdev_table_con_eco_only['cont_eco_age'] = stdev_table_con_eco_only['gainEcoCon']
-
-    # Creates a code for each age category so that each continent-ecozone-age combo can have its own unique value
-    stdev_age_dict = {'stdev_secondary_less_20': 10000, 'stdev_secondary_greater_20': 20000, 'stdev_primary': 30000}
-
-
-    # Creates a unique value for each continent-ecozone-age category
-    stdev_table_cont_eco_age = stdev_table_cont_eco_age.replace({"variable": stdev_age_dict})
-    stdev_table_cont_eco_age['cont_eco_age'] = stdev_table_cont_eco_age['gainEcoCon'] + stdev_table_cont_eco_age['variable']
-
-    # Merges the table of just continent-ecozone codes and the table of  continent-ecozone-age codes
-    stdev_table_all_combos = pd.concat([stdev_table_con_eco_only, stdev_table_cont_eco_age])
-
-    # Converts the continent-ecozone-age codes and corresponding removals rates to a dictionary
-    stdev_table_dict = pd.Series(stdev_table_all_combos.value.values,index=stdev_table_all_combos.cont_eco_age).to_dict()
-
-    # Adds a dictionary entry for where the ecozone-continent-age code is 0 (not in a continent)
-    stdev_table_dict[0] = 0
-
-    # Adds a dictionary entry for each forest age code for pixels that have forest age but no continent-ecozone
-    for key, value in stdev_age_dict.items():
-
-        stdev_table_dict[value] = 0
-
-    # Converts all the keys (continent-ecozone-age codes) to float type
-    stdev_table_dict = {float(key): value for key, value in stdev_table_dict.items()}
+    # Lookup tables of removal factors and standard deviations, made once for the whole run
+    gain_table_dict, stdev_table_dict = annual_gain_rate_IPCC_defaults.IPCC_default_gain_tables()
 
     if cn.SINGLE_PROCESSOR:
         for tile_id in tile_id_list:
             annual_gain_rate_IPCC_defaults.annual_gain_rate(tile_id, gain_table_dict, stdev_table_dict, output_pattern_list)
 
-    # This configuration of the multiprocessing call is necessary for passing multiple arguments to the main function
-    # It is based on the example here: http://spencerimp.blogspot.com/2015/12/python-multiprocess-with-multiple.html
-    if cn.count == 96:
-        if cn.SENSIT_TYPE == 'biomass_swap':
-            processes = 24 # 24 processors = 590 GB peak
-        else:
-            processes = 23  # 30 processors>=740 GB peak; 25>=740 GB peak (too high); 20>=740 GB peak (risky);
-            # 16>=740 GB peak; 14=420 GB peak; 17=520 GB peak; 20=610 GB peak; 23=690 GB peak; 25=>740 GB peak
     else:
-        processes = 2
-    uu.print_log(f'Annual removals rate natural forest max processors={processes}')
-    with multiprocessing.Pool(processes) as pool:
-        pool.map(partial(annual_gain_rate_IPCC_defaults.annual_gain_rate,
-                         gain_table_dict=gain_table_dict, stdev_table_dict=stdev_table_dict,
-                         output_pattern_list=output_pattern_list),
-                 tile_id_list)
-        pool.close()
-        pool.join()
+        uu.map_tiles(partial(annual_gain_rate_IPCC_defaults.annual_gain_rate,
+                             gain_table_dict=gain_table_dict, stdev_table_dict=stdev_table_dict,
+                             output_pattern_list=output_pattern_list),
+                     tile_id_list, 'annual_gain_rate_IPCC_defaults')
 
 
     # If no_upload flag is not activated (by choice or by lack of AWS credentials), output is uploaded
@@ -241,6 +123,7 @@ if __name__ == '__main__':
                        help='Disables uploading of outputs to s3')
     parser.add_argument('--single-processor', '-sp', action='store_true',
                        help='Uses single processing rather than multiprocessing')
+    uu.add_tile_processing_arguments(parser)
     args = parser.parse_args()
 
 
@@ -249,6 +132,7 @@ if __name__ == '__main__':
     cn.RUN_DATE = args.run_date
     cn.NO_UPLOAD = args.no_upload
     cn.SINGLE_PROCESSOR = args.single_processor
+    uu.set_tile_processing_arguments(args)
 
     tile_id_list = args.tile_id_list
 
@@ -8,7 +8,6 @@ python -m removals.mp_annual_gain_rate_mangrove -t std -l 00N_000E -nu
 python -m removals.mp_annual_gain_rate_mangrove -t std -l all
 '''
 
-import multiprocessing
 from functools import partial
 import argparse
 import datetime
@@ -34,6 +33,9 @@ def mp_annual_gain_rate_mangrove(tile_id_list):
         ecozone_tile_list = uu.tile_list_s3(cn.cont_eco_dir)
         tile_id_list = list(set(mangrove_biomass_tile_list).intersection(ecozone_tile_list))
 
+    # Mangrove removal factors are only where there is mangrove biomass, so tiles without it aren't processed
+    tile_id_list = uu.tiles_with_data(tile_id_list, cn.pattern_mangrove_biomass_2000)
+
     uu.print_log(tile_id_list)
     uu.print_log(f'There are {str(len(tile_id_list))} tiles to process', "\n")
 
@@ -119,26 +121,21 @@ def mp_annual_gain_rate_mangrove(tile_id_list):
     # Converts all the keys (continent-ecozone codes) to float type
     stdev_dict = {float(key): value for key, value in stdev_dict.items()}
 
+    # Converts the removal factor and standard deviation dictionaries to lookup tables once for the whole run,
+    # rather than remapping each key for each window
+    gain_above_dict = uu.make_lookup_table(gain_above_dict)
+    gain_below_dict = uu.make_lookup_table(gain_below_dict)
+    stdev_dict = uu.make_lookup_table(stdev_dict)
+
 
     if cn.SINGLE_PROCESSOR:
         for tile in tile_id_list:
             annual_gain_rate_mangrove.annual_gain_rate(tile, output_pattern_list, gain_above_dict, gain_below_dict, stdev_dict)
 
     else:
-        # This configuration of the multiprocessing call is necessary for passing multiple arguments to the main function
-        # It is based on the example here: http://spencerimp.blogspot.com/2015/12/python-multiprocess-with-multiple.html
-        # Ran with 18 processors on r4.16xlarge (430 GB memory peak)
-        if cn.count == 96:
-            processes = 20    #26 processors = >740 GB peak; 18 = 550 GB peak; 20 = 610 GB peak; 23 = 700 GB peak; 24 > 750 GB peak
-        else:
-            processes = 4
-        uu.print_log('Mangrove annual removals rate max processors=', processes)
-        pool = multiprocessing.Pool(processes)
-        pool.map(partial(annual_gain_rate_mangrove.annual_gain_rate, output_pattern_list=output_pattern_list,
-                         gain_above_dict=gain_above_dict, gain_below_dict=gain_below_dict, stdev_dict=stdev_dict),
-                 tile_id_list)
-        pool.close()
-        pool.join()
+        uu.map_tiles(partial(annual_gain_rate_mangrove.annual_gain_rate, output_pattern_list=output_pattern_list,
+                             gain_above_dict=gain_above_dict, gain_below_dict=gain_below_dict, stdev_dict=stdev_dict),
+                     tile_id_list, 'annual_gain_rate_mangrove')
 
 
     # If no_upload flag is not activated (by choice or by lack of AWS credentials), output is uploaded
@@ -163,6 +160,7 @@ if __name__ == '__main__':
                        help='Disables uploading of outputs to s3')
     parser.add_argument('--single-processor', '-sp', action='store_true',
                        help='Uses single processing rather than multiprocessing')
+    uu.add_tile_processing_arguments(parser)
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
@@ -170,6 +168,7 @@ if __name__ == '__main__':
     cn.RUN_DATE = args.run_date
     cn.NO_UPLOAD = args.no_upload
     cn.SINGLE_PROCESSOR = args.single_processor
+    uu.set_tile_processing_arguments(args)
 
     tile_id_list = args.tile_id_list
 
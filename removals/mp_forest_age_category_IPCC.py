@@ -17,8 +17,6 @@ python -m removals.mp_forest_age_category_IPCC -t std -l all
 
 import argparse
 from functools import partial
-import pandas as pd
-import multiprocessing
 import os
 import sys
 
@@ -97,18 +95,8 @@ def mp_forest_age_category_IPCC(tile_id_list):
     uu.log_subprocess_output_full(cmd)
 
 
-    # Imports the table with the ecozone-continent codes and the carbon removals rates
-    gain_table = pd.read_excel(f'{cn.gain_spreadsheet}', sheet_name = "natrl fores gain, for std model")
-
-    # Removes rows with duplicate codes (N. and S. America for the same ecozone)
-    gain_table_simplified = gain_table.drop_duplicates(subset='gainEcoCon', keep='first')
-
-    # Converts the continent-ecozone codes and young forest removals rates to a dictionary
-    gain_table_dict = pd.Series(gain_table_simplified.growth_secondary_less_20.values,index=gain_table_simplified.gainEcoCon).to_dict()
-
-    # Adds a dictionary entry for where the ecozone-continent code is 0 (not in a continent)
-    gain_table_dict[0] = 0
-
+    # Lookup table of young secondary forest removal factors, made once for the whole run
+    gain_table_dict = forest_age_category_IPCC.young_forest_gain_table()
 
     # Creates a single filename pattern to pass to the multiprocessor call
     pattern = output_pattern_list[0]
@@ -118,23 +106,8 @@ def mp_forest_age_category_IPCC(tile_id_list):
             forest_age_category_IPCC.forest_age_category(tile_id, gain_table_dict, pattern)
 
     else:
-        # This configuration of the multiprocessing call is necessary for passing multiple arguments to the main function
-        # It is based on the example here: http://spencerimp.blogspot.com/2015/12/python-multiprocess-with-multiple.html
-        # With processes=30, peak usage was about 350 GB using WHRC AGB.
-        # processes=26 maxes out above 480 GB for biomass_swap, so better to use fewer than that.
-        if cn.count == 96:
-            if cn.SENSIT_TYPE == 'biomass_swap':
-                processes = 32 # 32 processors = 610 GB peak
-            else:
-                processes = 44 # 30 processors=460 GB peak; 36 = 550 GB peak; 42 = 700 GB peak (slow increase later on); 44=725 GB peak
-        else:
-            processes = 2
-        uu.print_log(f'Natural forest age category max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(forest_age_category_IPCC.forest_age_category, gain_table_dict=gain_table_dict, pattern=pattern),
-                     tile_id_list)
-            pool.close()
-            pool.join()
+        uu.map_tiles(partial(forest_age_category_IPCC.forest_age_category, gain_table_dict=gain_table_dict, pattern=pattern),
+                     tile_id_list, 'forest_age_category_IPCC')
 
     # If no_upload flag is not activated (by choice or by lack of AWS credentials), output is uploaded
     if not cn.NO_UPLOAD:
@@ -157,6 +130,7 @@ if __name__ == '__main__':
                        help='Disables uploading of outputs to s3')
     parser.add_argument('--single-processor', '-sp', action='store_true',
                        help='Uses single processing rather than multiprocessing')
+    uu.add_tile_processing_arguments(parser)
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
@@ -164,6 +138,7 @@ if __name__ == '__main__':
     cn.RUN_DATE = args.run_date
     cn.NO_UPLOAD = args.no_upload
     cn.SINGLE_PROCESSOR = args.single_processor
+    uu.set_tile_processing_arguments(args)
 
     tile_id_list = args.tile_id_list
 
@@ -0,0 +1,239 @@
+"""
+Creates removals outputs from forest age category through gross removals in one pass through each tile,
+rather than running forest_age_category_IPCC, annual_removals_IPCC, annual_removals_all_forest_types,
+gain_year_count and gross_removals_all_forest_types as separate stages that each write tiles that the next stage reads back in.
+Each window goes through all of the stages in memory, so the outputs are the same as from the separate stages.
+Only the outputs listed in --fused-removals-outputs (-fro) are written and uploaded; by default, these are the
+removal forest type, removal factors, removal factor standard deviation and gross removals tiles.
+Stages before --stage are not calculated; their outputs are read from their tiles like in the separate stages.
+This is used by run_full_model.py with --fused-removals (-fr) when more than one removals stage is run.
+
+python -m removals.mp_fused_removals -t std -l 00N_000E -nu
+python -m removals.mp_fused_removals -t std -l 00N_000E -s annual_removals_IPCC -fro removal_forest_type,gain_year_count -nu
+python -m removals.mp_fused_removals -t std -l all
+"""
+
+import argparse
+from functools import partial
+import os
+import pandas as pd
+
+import constants_and_names as cn
+import universal_util as uu
+from . import annual_gain_rate_IPCC_defaults
+from . import forest_age_category_IPCC
+from . import fused_removals
+
+def mp_fused_removals(tile_id_list, stages):
+    """
+    :param tile_id_list: list of tile ids to process
+    :param stages: removals stages to calculate (a run of fused_removals.removal_stages through gross_removals_all_forest_types)
+    :return: sets of tiles of the removals outputs listed in cn.FUSED_REMOVALS_OUTPUTS that the stages create
+    """
+
+    os.chdir(cn.docker_tile_dir)
+    pd.options.mode.chained_assignment = None
+
+    if stages != fused_removals.removal_stages[-len(stages):]:
+        uu.exception_log(f'Fused removals stages must run through gross_removals_all_forest_types in order: {fused_removals.removal_stages}')
+
+    compute_age = 'forest_age_category_IPCC' in stages
+    compute_IPCC = 'annual_removals_IPCC' in stages
+    compute_rates = 'annual_removals_all_forest_types' in stages
+
+    # Outputs to write. Outputs of stages that aren't calculated in this pass can't be written.
+    outputs = cn.FUSED_REMOVALS_OUTPUTS.split(',')
+    for output in outputs:
+        if output not in fused_removals.fused_removals_outputs:
+            uu.exception_log(f'Invalid fused removals output {output}. Please choose from {list(fused_removals.fused_removals_outputs)}')
+    outputs = [output for output in fused_removals.fused_removals_outputs
+               if (output in outputs) & (fused_removals.fused_removals_outputs[output][0] in stages)]
+    if len(outputs) == 0:
+        uu.exception_log(f'None of the fused removals outputs {cn.FUSED_REMOVALS_OUTPUTS} are created by stages {stages}')
+
+    # If a full model run is specified, the correct set of tiles for the particular script is listed
+    if tile_id_list == 'all':
+        if compute_rates:
+            # List of tiles to run in the model
+            tile_id_list = uu.tile_list_s3(cn.model_extent_dir, cn.SENSIT_TYPE)
+        else:
+            # No point in making gain year count and gross removals tiles for tiles that don't have annual removals
+            tile_id_list = uu.tile_list_s3(cn.annual_gain_AGC_all_types_dir, cn.SENSIT_TYPE)
+
+    uu.print_log(tile_id_list)
+    uu.print_log(f'There are {str(len(tile_id_list))} tiles to process', "\n")
+
+
+    # Files to download for this script. Gain year count is always calculated, so its inputs are always needed.
+    download_dict = {
+        cn.model_extent_dir: [cn.pattern_model_extent],
+        cn.gain_dir: [cn.pattern_data_lake]
+    }
+
+    # Adds the correct loss tile to the download dictionary depending on the model run
+    if cn.SENSIT_TYPE == 'legal_Amazon_loss':
+        download_dict[cn.Brazil_annual_loss_processed_dir] = [cn.pattern_Brazil_annual_loss_processed]
+    elif cn.SENSIT_TYPE == 'Mekong_loss':
+        download_dict[cn.Mekong_loss_processed_dir] = [cn.pattern_Mekong_loss_processed]
+    else:
+        download_dict[cn.loss_dir] = [cn.pattern_loss]
+
+    if compute_age:
+        download_dict[cn.ifl_primary_processed_dir] = [cn.pattern_ifl_primary]
+        download_dict[cn.cont_eco_dir] = [cn.pattern_cont_eco_processed]
+
+        # Adds the correct biomass tile to the download dictionary depending on the model run
+        if cn.SENSIT_TYPE == 'biomass_swap':
+            download_dict[cn.JPL_processed_dir] = [cn.pattern_JPL_unmasked_processed]
+        else:
+            download_dict[cn.WHRC_biomass_2000_unmasked_dir] = [cn.pattern_WHRC_biomass_2000_unmasked]
+
+    if compute_rates:
+        download_dict[cn.cont_eco_dir] = [cn.pattern_cont_eco_processed]
+        download_dict[cn.BGB_AGB_ratio_dir] = [cn.pattern_BGB_AGB_ratio]
+        download_dict[cn.annual_gain_AGB_mangrove_dir] = [cn.pattern_annual_gain_AGB_mangrove]
+        download_dict[cn.annual_gain_BGB_mangrove_dir] = [cn.pattern_annual_gain_BGB_mangrove]
+        download_dict[cn.annual_gain_AGC_BGC_natrl_forest_Europe_dir] = [cn.pattern_annual_gain_AGC_BGC_natrl_forest_Europe]
+        download_dict[cn.annual_gain_AGC_BGC_planted_forest_dir] = [cn.pattern_annual_gain_AGC_BGC_planted_forest]
+        download_dict[cn.annual_gain_AGC_BGC_natrl_forest_US_dir] = [cn.pattern_annual_gain_AGC_BGC_natrl_forest_US]
+        download_dict[cn.annual_gain_AGC_natrl_forest_young_dir] = [cn.pattern_annual_gain_AGC_natrl_forest_young]
+        download_dict[cn.stdev_annual_gain_AGB_mangrove_dir] = [cn.pattern_stdev_annual_gain_AGB_mangrove]
+        download_dict[cn.stdev_annual_gain_AGC_BGC_natrl_forest_Europe_dir] = [cn.pattern_stdev_annual_gain_AGC_BGC_natrl_forest_Europe]
+        download_dict[cn.stdev_annual_gain_AGC_BGC_planted_forest_dir] = [cn.pattern_stdev_annual_gain_AGC_BGC_planted_forest]
+        download_dict[cn.stdev_annual_gain_AGC_BGC_natrl_forest_US_dir] = [cn.pattern_stdev_annual_gain_AGC_BGC_natrl_forest_US]
+        download_dict[cn.stdev_annual_gain_AGC_natrl_forest_young_dir] = [cn.pattern_stdev_annual_gain_AGC_natrl_forest_young]
+
+        # Outputs of the earlier removals stages that aren't calculated in this pass
+        if not compute_age:
+            download_dict[cn.age_cat_IPCC_dir] = [cn.pattern_age_cat_IPCC]
+        if not compute_IPCC:
+            download_dict[cn.annual_gain_AGB_IPCC_defaults_dir] = [cn.pattern_annual_gain_AGB_IPCC_defaults]
+            download_dict[cn.stdev_annual_gain_AGB_IPCC_defaults_dir] = [cn.pattern_stdev_annual_gain_AGB_IPCC_defaults]
+    else:
+        download_dict[cn.annual_gain_AGC_all_types_dir] = [cn.pattern_annual_gain_AGC_all_types]
+        download_dict[cn.annual_gain_BGC_all_types_dir] = [cn.pattern_annual_gain_BGC_all_types]
+
+
+    # List of output directories and output file name patterns
+    output_dir_list = [fused_removals.fused_removals_outputs[output][1] for output in outputs]
+    output_pattern_list = [fused_removals.fused_removals_outputs[output][2] for output in outputs]
+
+
+    # Downloads input files or entire directories, depending on how many tiles are in the tile_id_list
+    for key, values in download_dict.items():
+        directory = key
+        pattern = values[0]
+        uu.s3_flexible_download(directory, pattern, cn.docker_tile_dir, cn.SENSIT_TYPE, tile_id_list)
+
+
+    # If the model run isn't the standard one, the output directory and file names are changed
+    if cn.SENSIT_TYPE != 'std':
+        uu.print_log('Changing output directory and file name pattern based on sensitivity analysis')
+        output_dir_list = uu.alter_dirs(cn.SENSIT_TYPE, output_dir_list)
+        output_pattern_list = uu.alter_patterns(cn.SENSIT_TYPE, output_pattern_list)
+
+    # A date can optionally be provided by the full model script or a run of this script.
+    # This replaces the date in constants_and_names.
+    # Only done if output upload is enabled.
+    if cn.RUN_DATE is not None and cn.NO_UPLOAD is not None:
+        output_dir_list = uu.replace_output_dir_date(output_dir_list, cn.RUN_DATE)
+
+
+    # Lookup tables for the forest age category decision tree and IPCC default removal factors, made once for the whole run
+    young_gain_table = None
+    gain_table_dict = None
+    stdev_table_dict = None
+
+    if compute_age or compute_IPCC:
+
+        # Table with IPCC Table 4.9 default removals rates
+        cmd = ['aws', 's3', 'cp', os.path.join(cn.gain_spreadsheet_dir, cn.gain_spreadsheet), cn.docker_tile_dir]
+        uu.log_subprocess_output_full(cmd)
+
+        if compute_age:
+            young_gain_table = forest_age_category_IPCC.young_forest_gain_table()
+        if compute_IPCC:
+            gain_table_dict, stdev_table_dict = annual_gain_rate_IPCC_defaults.IPCC_default_gain_tables()
+
+    output_patterns = dict(zip(outputs, output_pattern_list))
+
+    uu.print_log(f'Creating removals outputs {outputs} for stages {stages} in a single pass')
+
+    if cn.SINGLE_PROCESSOR:
+        for tile_id in tile_id_list:
+            fused_removals.fused_removals(tile_id, stages, young_gain_table, gain_table_dict, stdev_table_dict,
+                                          output_patterns)
+
+    else:
+        uu.map_tiles(partial(fused_removals.fused_removals, stages=stages, young_gain_table=young_gain_table,
+                             gain_table_dict=gain_table_dict, stdev_table_dict=stdev_table_dict,
+                             output_patterns=output_patterns),
+                     tile_id_list, 'fused_removals')
+
+
+    # Checks the removal factor and gross removals outputs for tiles with no data, like the separate stages do
+    for output, output_pattern in output_patterns.items():
+        if fused_removals.fused_removals_outputs[output][0] not in ['annual_removals_all_forest_types',
+                                                                    'gross_removals_all_forest_types']:
+            continue
+        if cn.count <= 12:  # For local tests
+            uu.print_log(f'Checking for empty tiles of {output_pattern} pattern using light function...')
+            uu.map_tiles(partial(uu.check_and_delete_if_empty_light, output_pattern=output_pattern), tile_id_list,
+                         'check_and_delete_if_empty_light')
+        else:
+            uu.print_log(f'Checking for empty tiles of {output_pattern} pattern...')
+            uu.map_tiles(partial(uu.check_and_delete_if_empty, output_pattern=output_pattern), tile_id_list,
+                         'check_and_delete_if_empty')
+
+
+    # If cn.NO_UPLOAD flag is not activated (by choice or by lack of AWS credentials), output is uploaded
+    if not cn.NO_UPLOAD:
+        for output_dir, output_pattern in zip(output_dir_list, output_pattern_list):
+            uu.upload_final_set(output_dir, output_pattern)
+
+
+if __name__ == '__main__':
+
+    # The arguments for what kind of model run is being run (standard conditions or a sensitivity analysis) and
+    # the tiles to include
+    parser = argparse.ArgumentParser(
+        description='Create removals outputs from forest age category through gross removals in a single pass')
+    parser.add_argument('--model-type', '-t', required=True,
+                        help=f'{cn.model_type_arg_help}')
+    parser.add_argument('--tile_id_list', '-l', required=True,
+                        help='List of tile ids to use in the model. Should be of form 00N_110E or 00N_110E,00N_120E or all.')
+    parser.add_argument('--stage', '-s', default=fused_removals.removal_stages[0], choices=fused_removals.removal_stages[:-1],
+                        help='First removals stage to calculate. All later removals stages are also calculated.')
+    parser.add_argument('--fused-removals-outputs', '-fro', default=cn.FUSED_REMOVALS_OUTPUTS,
+                        help=f'Removals outputs to write, separated by commas. Options: {",".join(fused_removals.fused_removals_outputs)}')
+    parser.add_argument('--run-date', '-d', required=False,
+                        help='Date of run. Must be format YYYYMMDD.')
+    parser.add_argument('--no-upload', '-nu', action='store_true',
+                       help='Disables uploading of outputs to s3')
+    parser.add_argument('--single-processor', '-sp', action='store_true',
+                       help='Uses single processing rather than multiprocessing')
+    uu.add_tile_processing_arguments(parser)
+    args = parser.parse_args()
+
+    # Sets global variables to the command line arguments
+    cn.SENSIT_TYPE = args.model_type
+    cn.FUSED_REMOVALS_OUTPUTS = args.fused_removals_outputs
+    cn.RUN_DATE = args.run_date
+    cn.NO_UPLOAD = args.no_upload
+    cn.SINGLE_PROCESSOR = args.single_processor
+    uu.set_tile_processing_arguments(args)
+
+    tile_id_list = args.tile_id_list
+
+    # Disables upload to s3 if no AWS credentials are found in environment
+    if not uu.check_aws_creds():
+        cn.NO_UPLOAD = True
+
+    # Create the output log
+    uu.initiate_log(tile_id_list)
+
+    # Checks whether the sensitivity analysis and tile_id_list arguments are valid
+    uu.check_sensit_type(cn.SENSIT_TYPE)
+    tile_id_list = uu.tile_id_list_check(tile_id_list)
+
+    mp_fused_removals(tile_id_list, fused_removals.removal_stages[fused_removals.removal_stages.index(args.stage):])
@@ -1,12 +1,12 @@
 """
 Creates tiles of the number of years in which carbon removals occur during the model duration (2001 to 2020 currently).
 It is based on the annual Hansen loss data and the 2000-2012 Hansen gain data.
-First it separately calculates rasters of gain years for model pixels that had loss-only,
-gain-only, neither loss nor gain, and both loss-and-gain.
-The gain years for each of these conditions are calculated according to rules that are found in the function called by the multiprocessor commands.
+Gain years are assigned to each pixel according to its combination of loss and gain:
+loss-only, gain-only, neither loss nor gain, or both loss-and-gain.
+The rules for each of these conditions are in the function called by the multiprocessor commands.
 The same gain year count rules are applied to all types of forest (mangrove, planted, etc.).
-Then it combines those four rasters into a single gain year raster for each tile using rasterio because
-summing the arrays using rasterio is faster and uses less memory than combining them with gdalmerge.
+All four conditions are calculated in a single pass through each tile with rasterio and NumPy, reading the loss, gain
+and model extent tiles window by window, rather than writing a raster for each condition and then combining them.
 If different input rasters for loss (e.g., 2001-2017) and gain (e.g., 2000-2018) are used, the year count constants in constants_and_names.py must be changed.
 
 python -m removals.mp_gain_year_count_all_forest_types -t std -l 00N_000E -nu
@@ -15,7 +15,6 @@ python -m removals.mp_gain_year_count_all_forest_types -t std -l all
 
 import argparse
 from functools import partial
-import multiprocessing
 import os
 import sys
 
@@ -26,8 +25,7 @@ from . import gain_year_count_all_forest_types
 def mp_gain_year_count_all_forest_types(tile_id_list):
     """
     :param tile_id_list: list of tile ids to process
-    :return: 5 sets of tiles that show the estimated years of carbon accumulation.
-        The only one used later in the model is the combined one. The other four are for QC.
+    :return: set of tiles that show the estimated years of carbon accumulation.
         Units: years.
     """
 
@@ -86,117 +84,17 @@ def mp_gain_year_count_all_forest_types(tile_id_list):
 
 
     if cn.SINGLE_PROCESSOR:
-
-        for tile_id in tile_id_list:
-            gain_year_count_all_forest_types.create_gain_year_count_loss_only(tile_id)
-
         for tile_id in tile_id_list:
-            if cn.SENSIT_TYPE == 'maxgain':
-                gain_year_count_all_forest_types.create_gain_year_count_gain_only_maxgain(tile_id)
-            else:
-                gain_year_count_all_forest_types.create_gain_year_count_gain_only_standard(tile_id)
-
-        for tile_id in tile_id_list:
-            gain_year_count_all_forest_types.create_gain_year_count_no_change_standard(tile_id)
-
-        for tile_id in tile_id_list:
-            if cn.SENSIT_TYPE == 'maxgain':
-                gain_year_count_all_forest_types.create_gain_year_count_loss_and_gain_maxgain(tile_id)
-            else:
-                gain_year_count_all_forest_types.create_gain_year_count_loss_and_gain_standard(tile_id)
-
-        for tile_id in tile_id_list:
-            gain_year_count_all_forest_types.create_gain_year_count_merge(tile_id, pattern)
+            gain_year_count_all_forest_types.create_gain_year_count(tile_id, pattern)
 
     else:
-
-        # Creates gain year count tiles using only pixels that had only loss
-        if cn.count == 96:
-            processes = 70   # 90>=740 GB peak; 70=610 GB peak
-        else:
-            processes = int(cn.count/2)
-        uu.print_log(f'Gain year count loss-only pixels max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(gain_year_count_all_forest_types.create_gain_year_count_loss_only),
-                     tile_id_list)
-            pool.close()
-            pool.join()
-
-        # Creates gain year count tiles using only pixels that had only gain
-        if cn.count == 96:
-            processes = 90   # 66 = 330 GB peak; 75 = 380 GB peak; 90 = 530 GB peak
-        else:
-            processes = int(cn.count/2)
-        uu.print_log(f'Gain year count gain-only pixels max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            if cn.SENSIT_TYPE == 'maxgain':
-                pool.map(partial(gain_year_count_all_forest_types.create_gain_year_count_gain_only_maxgain),
-                         tile_id_list)
-            elif cn.SENSIT_TYPE == 'legal_Amazon_loss':
-                uu.print_log('Gain-only pixels do not apply to legal_Amazon_loss sensitivity analysis. Skipping this step.')
-            else:
-                pool.map(partial(gain_year_count_all_forest_types.create_gain_year_count_gain_only_standard),
-                         tile_id_list)
-            pool.close()
-            pool.join()
-
-        # Creates gain year count tiles using only pixels that had neither loss nor gain pixels
-        if cn.count == 96:
-            processes = 50   # 50 = XXX GB peak
-        else:
-            processes = int(cn.count/2)
-        uu.print_log(f'Gain year count no-change pixels max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            if cn.SENSIT_TYPE == 'legal_Amazon_loss':
-                pool.map(partial(gain_year_count_all_forest_types.create_gain_year_count_no_change_legal_Amazon_loss),
-                         tile_id_list)
-            else:
-                pool.map(partial(gain_year_count_all_forest_types.create_gain_year_count_no_change_standard),
-                         tile_id_list)
-            pool.close()
-            pool.join()
-
-        # Creates gain year count tiles using only pixels that had both loss and gain
-        if cn.count == 96:
-            processes = 50   # 50 = XXX GB peak
-        else:
-            processes = int(cn.count/2)
-        uu.print_log(f'Gain year count loss & gain pixels max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            if cn.SENSIT_TYPE == 'maxgain':
-                pool.map(partial(gain_year_count_all_forest_types.create_gain_year_count_loss_and_gain_maxgain),
-                         tile_id_list)
-            else:
-                pool.map(partial(gain_year_count_all_forest_types.create_gain_year_count_loss_and_gain_standard),
-                         tile_id_list)
-            pool.close()
-            pool.join()
-
-        # Combines the four above gain year count tiles for each Hansen tile into a single output tile
-        if cn.count == 96:
-            processes = 50   # 50 = XXX GB peak
-        elif cn.count < 4:
-            processes = 1
-        else:
-            processes = int(cn.count/4)
-        uu.print_log(f'Gain year count gain merge all combos max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(gain_year_count_all_forest_types.create_gain_year_count_merge, pattern=pattern),
-                     tile_id_list)
-            pool.close()
-            pool.join()
+        uu.map_tiles(partial(gain_year_count_all_forest_types.create_gain_year_count, pattern=pattern), tile_id_list,
+                     'gain_year_count')
 
 
     # If cn.NO_UPLOAD flag is not activated (by choice or by lack of AWS credentials), output is uploaded
     if not cn.NO_UPLOAD:
 
-        # Intermediate output tiles for checking outputs
-        uu.upload_final_set(output_dir_list[0], "gain_year_count_loss_only")
-        uu.upload_final_set(output_dir_list[0], "gain_year_count_gain_only")
-        uu.upload_final_set(output_dir_list[0], "gain_year_count_no_change")
-        uu.upload_final_set(output_dir_list[0], "gain_year_count_loss_and_gain")
-
-        # This is the final output used later in the model
         uu.upload_final_set(output_dir_list[0], output_pattern_list[0])
 
 
@@ -216,6 +114,7 @@ if __name__ == '__main__':
                        help='Disables uploading of outputs to s3')
     parser.add_argument('--single-processor', '-sp', action='store_true',
                        help='Uses single processing rather than multiprocessing')
+    uu.add_tile_processing_arguments(parser)
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
@@ -223,6 +122,7 @@ if __name__ == '__main__':
     cn.RUN_DATE = args.run_date
     cn.NO_UPLOAD = args.no_upload
     cn.SINGLE_PROCESSOR = args.single_processor
+    uu.set_tile_processing_arguments(args)
 
     tile_id_list = args.tile_id_list
 
@@ -12,7 +12,6 @@ python -m removals.gross_removals_all_forest_types -t std -l all
 
 import argparse
 from functools import partial
-import multiprocessing
 import os
 import sys
 
@@ -80,38 +79,22 @@ def mp_gross_removals_all_forest_types(tile_id_list):
             gross_removals_all_forest_types.gross_removals_all_forest_types(tile_id, output_pattern_list)
 
     else:
-        if cn.count == 96:
-            if cn.SENSIT_TYPE == 'biomass_swap':
-                processes = 18
-            else:
-                processes = 22   # 50 processors > 740 GB peak; 25 = >740 GB peak; 15 = 490 GB peak; 20 = 590 GB peak; 22 = 710 GB peak
-        else:
-            processes = 2
-        uu.print_log(f'Gross removals max processors={processes}')
-        with multiprocessing.Pool(processes) as pool:
-            pool.map(partial(gross_removals_all_forest_types.gross_removals_all_forest_types,
+        uu.map_tiles(partial(gross_removals_all_forest_types.gross_removals_all_forest_types,
                              output_pattern_list=output_pattern_list),
-                     tile_id_list)
-            pool.close()
-            pool.join()
+                     tile_id_list, 'gross_removals_all_forest_types')
 
 
     # Checks the gross removals outputs for tiles with no data
     for output_pattern in output_pattern_list:
         if cn.count <= 12:  # For local tests
-            processes = 1
-            uu.print_log(f'Checking for empty tiles of {output_pattern} pattern with {processes} processors using light function...')
-            with multiprocessing.Pool(processes) as pool:
-                pool.map(partial(uu.check_and_delete_if_empty_light, output_pattern=output_pattern), tile_id_list)
-                pool.close()
-                pool.join()
+            uu.print_log(f'Checking for empty tiles of {output_pattern} pattern using light function...')
+            uu.map_tiles(partial(uu.check_and_delete_if_empty_light, output_pattern=output_pattern), tile_id_list,
+                         'check_and_delete_if_empty_light')
         else:
-            processes = 55  # 55 processors = 670 GB peak
-            uu.print_log(f'Checking for empty tiles of {output_pattern} pattern with {processes} processors...')
-            with multiprocessing.Pool(processes) as pool:
-                pool.map(partial(uu.check_and_delete_if_empty, output_pattern=output_pattern), tile_id_list)
-                pool.close()
-                pool.join()
+            uu.print_log(f'Checking for empty tiles of {output_pattern} pattern...')
+            uu.map_tiles(partial(uu.check_and_delete_if_empty, output_pattern=output_pattern), tile_id_list,
+                         'check_and_delete_if_empty')
+
 
     # If cn.NO_UPLOAD flag is not activated (by choice or by lack of AWS credentials), output is uploaded
     if not cn.NO_UPLOAD:
@@ -135,6 +118,7 @@ if __name__ == '__main__':
                        help='Disables uploading of outputs to s3')
     parser.add_argument('--single-processor', '-sp', action='store_true',
                        help='Uses single processing rather than multiprocessing')
+    uu.add_tile_processing_arguments(parser)
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
@@ -142,6 +126,7 @@ if __name__ == '__main__':
     cn.RUN_DATE = args.run_date
     cn.NO_UPLOAD = args.no_upload
     cn.SINGLE_PROCESSOR = args.single_processor
+    uu.set_tile_processing_arguments(args)
 
     tile_id_list = args.tile_id_list
 
@@ -59,6 +59,8 @@ from removals.mp_annual_gain_rate_IPCC_defaults import mp_annual_gain_rate_IPCC_
 from removals.mp_annual_gain_rate_AGC_BGC_all_forest_types import mp_annual_gain_rate_AGC_BGC_all_forest_types
 from removals.mp_gain_year_count_all_forest_types import mp_gain_year_count_all_forest_types
 from removals.mp_gross_removals_all_forest_types import mp_gross_removals_all_forest_types
+from removals.mp_fused_removals import mp_fused_removals
+from removals.fused_removals import removal_stages
 from carbon_pools.mp_create_carbon_pools import mp_create_carbon_pools
 from emissions.mp_calculate_gross_emissions import mp_calculate_gross_emissions
 from analyses.mp_net_flux import mp_net_flux
@@ -92,6 +94,20 @@ def main ():
                         help='List of tile ids to use in the model. Should be of form 00N_110E or 00N_110E,00N_120E or all.')
     parser.add_argument('--carbon-pool-extent', '-ce', required=False,
                         help='Time period for which carbon pools should be calculated: loss, 2000, loss,2000, or 2000,loss')
+    parser.add_argument('--fused-carbon-pools', '-fcp', action='store_true',
+                        help='Creates all carbon pools in a single pass per tile rather than one pass per pool')
+    parser.add_argument('--fused-removals', '-fr', action='store_true',
+                        help='Runs the removals stages from forest_age_category_IPCC through gross_removals_all_forest_types in a single pass per tile rather than one pass per stage')
+    parser.add_argument('--fused-removals-outputs', '-fro', default=cn.FUSED_REMOVALS_OUTPUTS,
+                        help='Removals outputs to write in the fused removals pass, separated by commas. Other removals outputs are only kept in memory.')
+    parser.add_argument('--emissions-engine', '-ee', default=cn.EMISSIONS_ENGINE, choices=['extension', 'numpy', 'executable'],
+                        help='extension runs the gross emissions C++ decision tree in-process on rasterio windows. numpy runs the same decision tree in NumPy, without a C++ compiler. executable runs the C++ executable for each tile.')
+    parser.add_argument('--emissions-build-profile', '-ebp', default=cn.EMISSIONS_BUILD_PROFILE, choices=['default', 'release'],
+                        help='default compiles the gross emissions C++ without optimization. release compiles it with optimization.')
+    parser.add_argument('--emissions-threads', '-et', type=int, default=cn.EMISSIONS_THREADS,
+                        help='Number of threads that the gross emissions extension splits each tile across. 0 chooses it for each tile from how many tiles remain.')
+    parser.add_argument('--emissions-by-driver', '-ebd', action='store_true',
+                        help='Also writes gross emissions by driver, with a band for each driver, in the same pass as the emissions from all drivers. Not with the executable emissions engine.')
     parser.add_argument('--std-net-flux-aggreg', '-sagg', required=False,
                         help='The s3 standard model net flux aggregated tif, for comparison with the sensitivity analysis map')
     parser.add_argument('--mangroves', '-ma', action='store_true',
@@ -106,6 +122,9 @@ def main ():
                         help='Saves intermediate model outputs rather than deleting them to save storage')
     parser.add_argument('--log-note', '-ln', required=False,
                         help='Note to include in log header about model run.')
+    uu.add_tile_processing_arguments(parser)
+    parser.add_argument('--footprint-index', '-fi', required=False, default='',
+                        help='Footprint index csv from data_prep/mp_footprint_index.py. Skips input tiles and windows without data.')
     args = parser.parse_args()
 
     # Sets global variables to the command line arguments
@@ -114,6 +133,13 @@ def main ():
     cn.RUN_THROUGH = args.run_through
     cn.RUN_DATE = args.run_date
     cn.CARBON_POOL_EXTENT = args.carbon_pool_extent
+    cn.FUSED_CARBON_POOLS = args.fused_carbon_pools
+    cn.FUSED_REMOVALS = args.fused_removals
+    cn.FUSED_REMOVALS_OUTPUTS = args.fused_removals_outputs
+    cn.EMISSIONS_ENGINE = args.emissions_engine
+    cn.EMISSIONS_BUILD_PROFILE = args.emissions_build_profile
+    cn.EMISSIONS_THREADS = args.emissions_threads
+    cn.EMISSIONS_BY_DRIVER = args.emissions_by_driver
     cn.STD_NET_FLUX = args.std_net_flux_aggreg
     cn.INCLUDE_MANGROVES = args.mangroves
     cn.INCLUDE_US = args.us_rates
@@ -121,6 +147,8 @@ def main ():
     cn.SINGLE_PROCESSOR = args.single_processor
     cn.SAVE_INTERMEDIATES = args.save_intermediates
     cn.LOG_NOTE = args.log_note
+    uu.set_tile_processing_arguments(args)
+    cn.FOOTPRINT_INDEX = args.footprint_index
 
     tile_id_list = args.tile_id_list
 
@@ -155,6 +183,13 @@ def main ():
                                        include_mangroves = cn.INCLUDE_MANGROVES, include_us=cn.INCLUDE_US)
     uu.print_log(f'Analysis stages to run: {actual_stages}')
 
+    # Removals stages that are run in a single pass rather than separately. Only done if more than one is being run.
+    fused_removal_stages = [stage for stage in removal_stages if stage in actual_stages]
+    if (not cn.FUSED_REMOVALS) | (len(fused_removal_stages) < 2):
+        fused_removal_stages = []
+    else:
+        uu.print_log(f'Removals stages to run in a single pass: {fused_removal_stages}')
+
     # Reports how much storage is being used with files
     uu.check_storage()
 
@@ -295,8 +330,22 @@ def main ():
         uu.print_log(f':::::Processing time for model_extent: {elapsed_time}', "\n", "\n")
 
 
+    # Creates the removals outputs from forest age category through gross removals in a single pass through each tile
+    if len(fused_removal_stages) > 0:
+
+        uu.print_log(':::::Creating removals tiles in a single pass')
+        start = datetime.datetime.now()
+
+        mp_fused_removals(tile_id_list, fused_removal_stages)
+
+        end = datetime.datetime.now()
+        elapsed_time = end - start
+        uu.check_storage()
+        uu.print_log(f':::::Processing time for fused_removals: {elapsed_time}', "\n", "\n")
+
+
     # Creates age category tiles for natural forests
-    if 'forest_age_category_IPCC' in actual_stages:
+    if ('forest_age_category_IPCC' in actual_stages) & ('forest_age_category_IPCC' not in fused_removal_stages):
 
         uu.print_log(':::::Creating tiles of forest age categories for IPCC removal rates')
         start = datetime.datetime.now()
@@ -310,7 +359,7 @@ def main ():
 
 
     # Creates tiles of annual AGB and BGB removals rates using IPCC Table 4.9 defaults
-    if 'annual_removals_IPCC' in actual_stages:
+    if ('annual_removals_IPCC' in actual_stages) & ('annual_removals_IPCC' not in fused_removal_stages):
 
         uu.print_log(':::::Creating tiles of annual aboveground and belowground removal rates using IPCC defaults')
         start = datetime.datetime.now()
@@ -324,7 +373,7 @@ def main ():
 
 
     # Creates tiles of annual AGC and BGC removal factors for the entire model, combining removal factors from all forest types
-    if 'annual_removals_all_forest_types' in actual_stages:
+    if ('annual_removals_all_forest_types' in actual_stages) & ('annual_removals_all_forest_types' not in fused_removal_stages):
         uu.print_log(':::::Creating tiles of annual aboveground and belowground removal rates for all forest types')
         start = datetime.datetime.now()
 
@@ -336,7 +385,8 @@ def main ():
         uu.print_log(f':::::Processing time for annual_gain_rate_AGC_BGC_all_forest_types: {elapsed_time}', "\n", "\n")
 
 
-    # Creates tiles of the number of years of removals for all model pixels (across all forest types)
+    # Creates tiles of the number of years of removals for all model pixels (across all forest types).
+    # Input tiles are still deleted if gain year count was created in the fused removals pass.
     if 'gain_year_count' in actual_stages:
 
         if not cn.SAVE_INTERMEDIATES:
@@ -373,6 +423,8 @@ def main ():
 
         uu.check_storage()
 
+    if ('gain_year_count' in actual_stages) & ('gain_year_count' not in fused_removal_stages):
+
         uu.print_log(':::::Creating tiles of gain year count for all removal pixels')
         start = datetime.datetime.now()
 
@@ -385,7 +437,7 @@ def main ():
 
 
     # Creates tiles of gross removals for all forest types (aboveground, belowground, and above+belowground)
-    if 'gross_removals_all_forest_types' in actual_stages:
+    if ('gross_removals_all_forest_types' in actual_stages) & ('gross_removals_all_forest_types' not in fused_removal_stages):
 
         uu.print_log(':::::Creating gross removals for all forest types combined (above + belowground) tiles')
         start = datetime.datetime.now()
@@ -467,15 +519,21 @@ def main ():
 
         uu.check_storage()
 
-        uu.print_log(':::::Creating gross biomass_soil emissions tiles')
+        # The emissions extension and the NumPy decision tree calculate biomass_only emissions in the same pass through
+        # the inputs as biomass_soil emissions, so the biomass_only stage doesn't read the inputs again
+        emitted_pools = 'biomass_soil'
+        if ('gross_emissions_biomass_only' in actual_stages) & (cn.EMISSIONS_ENGINE != 'executable') & (cn.SENSIT_TYPE == 'std'):
+            emitted_pools = 'biomass_soil,biomass_only'
+
+        uu.print_log(f':::::Creating gross {emitted_pools} emissions tiles')
         start = datetime.datetime.now()
 
-        mp_calculate_gross_emissions(tile_id_list, 'biomass_soil')
+        mp_calculate_gross_emissions(tile_id_list, emitted_pools)
 
         end = datetime.datetime.now()
         elapsed_time = end - start
         uu.check_storage()
-        uu.print_log(f':::::Processing time for biomass_soil gross_emissions: {elapsed_time}', "\n", "\n")
+        uu.print_log(f':::::Processing time for {emitted_pools} gross_emissions: {elapsed_time}', "\n", "\n")
 
 
     # Creates gross emissions tiles for soil_only by driver, gas, and all emissions combined
@@ -532,15 +590,19 @@ def main ():
 
             uu.check_storage()
 
-            uu.print_log(':::::Creating biomass_only gross emissions tiles')
-            start = datetime.datetime.now()
+            if emitted_pools == 'biomass_soil,biomass_only':
+                uu.print_log(':::::biomass_only gross emissions tiles were created with the biomass_soil gross emissions tiles')
 
-            mp_calculate_gross_emissions(tile_id_list, 'biomass_only')
+            else:
+                uu.print_log(':::::Creating biomass_only gross emissions tiles')
+                start = datetime.datetime.now()
 
-            end = datetime.datetime.now()
-            elapsed_time = end - start
-            uu.check_storage()
-            uu.print_log(f':::::Processing time for biomass_only gross_emissions: {elapsed_time}', "\n", "\n")
+                mp_calculate_gross_emissions(tile_id_list, 'biomass_only')
+
+                end = datetime.datetime.now()
+                elapsed_time = end - start
+                uu.check_storage()
+                uu.print_log(f':::::Processing time for biomass_only gross_emissions: {elapsed_time}', "\n", "\n")
 
     # Creates net flux tiles (gross emissions - gross removals)
     if 'net_flux' in actual_stages:
@@ -7,6 +7,10 @@ sys.path.append('../')
 import constants_and_names as cn
 import universal_util as uu
 
+# Converts the codes of the Pan et al. forest age category raster (1000: young, 2000: middle, 3000: old) to the
+# age category codes of the US removal rate lookup table (removals.US_removal_rates.US_removal_rate_table)
+age_cat_lookup_table = uu.make_lookup_table({1000: 1, 2000: 2, 3000: 3}, default=0, dtype='uint8')
+
 # Creates Hansen tiles out of FIA region shapefile
 def prep_FIA_regions(tile_id):
 
@@ -45,7 +49,7 @@ def prep_FIA_regions(tile_id):
 
 
 # Creates annual AGB and BGB removal rate rasters for US using US-specific removal rates
-def US_removal_rate_calc(tile_id, gain_table_group_region_age_dict, gain_table_group_region_dict, output_pattern_list, sensit_type):
+def US_removal_rate_calc(tile_id, rate_table, output_pattern_list, sensit_type):
 
     uu.print_log("Assigning US removal rates:", tile_id)
 
@@ -66,8 +70,8 @@ def US_removal_rate_calc(tile_id, gain_table_group_region_age_dict, gain_table_g
         # Grabs metadata about the tif, like its location/projection/cell size
         kwargs = annual_gain_standard_src.meta
 
-        # Grabs the windows of the tile (stripes) so we can iterate over the entire tif without running out of memory
-        windows = annual_gain_standard_src.block_windows(1)
+        # Grabs the windows of the tile (groups of stripes) so we can iterate over the entire tif without running out of memory
+        windows = uu.iterate_windows(annual_gain_standard_src, tile_id, 'US_removal_rates_sensit')
 
         # Opens other necessary tiles
         gain_src = rasterio.open(gain)
@@ -75,11 +79,7 @@ def US_removal_rate_calc(tile_id, gain_table_group_region_age_dict, gain_table_g
         US_forest_group_src = rasterio.open(US_forest_group)
         US_region_src = rasterio.open(US_region)
 
-        try:
-            BGB_AGB_ratio_src = rasterio.open(BGB_AGB_ratio)
-            uu.print_log(f'    BGB:AGB tile found for {tile_id}')
-        except rasterio.errors.RasterioIOError:
-            uu.print_log(f'    BGB:AGB tile not found for {tile_id}. Using default BGB:AGB from Mokany instead.')
+        BGB_AGB_ratio_src = uu.open_optional_input(BGB_AGB_ratio, tile_id, 'BGB:AGB', missing_note='. Using default BGB:AGB from Mokany instead.')
 
         # Updates kwargs for the output dataset
         kwargs.update(
@@ -93,7 +93,7 @@ def US_removal_rate_calc(tile_id, gain_table_group_region_age_dict, gain_table_g
         agb_dst = rasterio.open('{0}_{1}.tif'.format(tile_id, output_pattern_list[0]), 'w', **kwargs)
         bgb_dst = rasterio.open('{0}_{1}.tif'.format(tile_id, output_pattern_list[1]), 'w', **kwargs)
 
-        # Iterates across the windows (1 pixel strips) of the input tile
+        # Iterates across the windows (groups of 1 pixel strips) of the input tile
         for idx, window in windows:
 
             # Creates window for each input raster
@@ -103,52 +103,20 @@ def US_removal_rate_calc(tile_id, gain_table_group_region_age_dict, gain_table_g
             US_forest_group_window = US_forest_group_src.read(1, window=window)
             US_region_window = US_region_src.read(1, window=window)
 
-            try:
-                BGB_AGB_ratio_window = BGB_AGB_ratio_src.read(1, window=window)
-            except UnboundLocalError:
-                BGB_AGB_ratio_window = np.empty((window.height, window.width), dtype='float32')
-                BGB_AGB_ratio_window[:] = cn.below_to_above_non_mang
-
-            # Masks the three input tiles (age category, forest group, FIA region) to the pixels to the standard removals model extent
-            age_cat_masked_window = np.ma.masked_where(annual_gain_standard_window == 0, US_age_cat_window).filled(0).astype('uint16')
-            US_forest_group_masked_window = np.ma.masked_where(annual_gain_standard_window == 0, US_forest_group_window).filled(0).astype('uint16')
-            US_region_masked_window = np.ma.masked_where(annual_gain_standard_window == 0, US_region_window).filled(0).astype('uint16')
-
-            # Performs the same operation on the three rasters as is done on the values in the table in order to
-            # make the codes (dictionary key) match. Then, combines the three rasters. These values now match the key values in the spreadsheet.
-            group_region_age_combined_window = (age_cat_masked_window * 10 + US_forest_group_masked_window * 100 + US_region_masked_window).astype('float32')
-
-            # Applies the dictionary of group-region-age removals rates to the group-region-age numpy array to
-            # get annual removals rates (metric tons aboveground biomass/yr) for each pixel that has removals in the standard model
-            for key, value in gain_table_group_region_age_dict.items():
-                annual_gain_standard_window[group_region_age_combined_window == key] = value
-
-            # Replaces all values that have Hansen gain pixels with 0 so that they can be filled with Hansen removals pixel-specific
-            # values (rates for youngest forest age category)
-            agb_without_gain_pixel_window = np.ma.masked_where(gain_window != 0, annual_gain_standard_window).filled(0)
-
-            # Creates key array for the dictionary that applies to just Hansen gain pixels, then masks the
-            # array to just Hansen gain pixels. This is now ready for matching with the dictionary for Hansen gain pixels.
-            agb_with_gain_pixel_window = (US_forest_group_masked_window * 100 + US_region_masked_window).astype('float32')
-            agb_with_gain_pixel_window = np.ma.masked_where((gain_window == 0) & (annual_gain_standard_window != 0), agb_with_gain_pixel_window).filled(0)
-
-            # Applies the dictionary of region-age-group removals rates to the region-age-group array to
-            # get annual removals rates (metric tons aboveground biomass/yr) for each pixel that has removals in the standard model
-            for key, value in gain_table_group_region_dict.items():
-                agb_with_gain_pixel_window[agb_with_gain_pixel_window == key] = value
-
-            # Combines the array of removal rates that has no rates where there are Hansen gain pixels with the array of
-            # removal rates that has has values only where there are Hansen gain pixels
-            agb_dst_window = agb_without_gain_pixel_window + agb_with_gain_pixel_window
-
-            # The maximum rate in the US-specific removals rate dictionary
-            max_rate = max(gain_table_group_region_age_dict.values())
-
-            # Any pixel that has a rate 1.2x as large as the largest rate in the dictionary gets assigned the standard model's rate
-            # for that pixel. This can occur for pixels that don't have a rate for a given region-group-age or region-group
-            # and therefore the key value gets stuck in the array rather than being replaced by a non-existent rate
-            # from the dictionary.
-            agb_dst_corrected_window = np.where(agb_dst_window > (max_rate*1.2), annual_gain_standard_window, agb_dst_window)
+            BGB_AGB_ratio_window = uu.read_optional_window(BGB_AGB_ratio_src, window, 'float32', cn.below_to_above_non_mang)
+
+            # Any Hansen gain pixel gets the youngest rate for its region-group combination, regardless of its age category
+            age_cat_window = uu.apply_lookup_table(US_age_cat_window, age_cat_lookup_table)
+            age_cat_window[gain_window != 0] = 1
+
+            # Looks up the removal rate of each pixel's age category-forest group-region combination
+            # (metric tons aboveground biomass/yr) with one gather
+            US_rate_window = uu.apply_composite_lookup_table((age_cat_window, US_forest_group_window, US_region_window), rate_table)[..., 0]
+
+            # Wherever there is no rate in the table for a region-group-age combination, the standard model rate is used.
+            # Pixels that don't have removals in the standard model don't have US rates either.
+            agb_dst_corrected_window = np.where(np.isnan(US_rate_window), annual_gain_standard_window, US_rate_window)
+            agb_dst_corrected_window[annual_gain_standard_window == 0] = 0
 
             # Calculates BGB removal rate from AGB removal rate
             bgb_dst_window = agb_dst_corrected_window * BGB_AGB_ratio_window
@@ -26,8 +26,8 @@ def legal_Amazon_forest_age_category(tile_id, sensit_type, output_pattern):
         # Grabs metadata about the tif, like its location/projection/cellsize
         kwargs = loss_src.meta
 
-        # Grabs the windows of the tile (stripes) so we can iterate over the entire tif without running out of memory
-        windows = loss_src.block_windows(1)
+        # Grabs the windows of the tile (groups of stripes) so we can iterate over the entire tif without running out of memory
+        windows = uu.iterate_windows(loss_src, tile_id, 'legal_Amazon_forest_age_category')
 
         # Opens tiles
         gain_src = rasterio.open(gain)
@@ -58,7 +58,7 @@ def legal_Amazon_forest_age_category(tile_id, sensit_type, output_pattern):
         # Opens the output tile, giving it the arguments of the input tiles
         dst = rasterio.open('{0}_{1}.tif'.format(tile_id, output_pattern), 'w', **kwargs)
 
-        # Iterates across the windows (1 pixel strips) of the input tile
+        # Iterates across the windows (groups of 1 pixel strips) of the input tile
         for idx, window in windows:
 
             # Creates windows for each input raster
@@ -15,11 +15,10 @@ forest group characterization so that any model pixel will be covered by forest
 The forest age raster (Pan et al.) is pre-created and then processed in this script the same as the forest group raster.
 The actual age category cutoffs are different for the SE/SC regions and the rest of the US but the age category raster
 as already incorporated that, so the youngest category (1000) means 0-20 years for non-south and 0-10 years for south, etc.
-After Hansenizing region, group, and age category, this script creates two dictionaries: one with removal rates by
-region-group-age combinations and another with the youngest rate for each region-group combination.
-The first dictionary is applied to all standard removals model pixels according to their region-group-age combination
-but then is overwritten for any Hansen gain pixel with the youngest rate for that region-group combination applied
-(using the second dictionary). That is because we can assume that any Hansen gain pixel is in the youngest age category,
+After Hansenizing region, group, and age category, this script creates a lookup table of removal rates by
+region-group-age combination. The table is applied to all standard removals model pixels according to their
+region-group-age combination, except that any Hansen gain pixel gets the youngest rate for its region-group combination.
+That is because we can assume that any Hansen gain pixel is in the youngest age category,
 i.e. it is more specific information than the Pan et al. forest age category raster, so we give that info priority.
 Wherever there is no rate in the table for a region-group-age combination, the standard model rate is used.
 This has the exact same extent as the standard AGB and BGB annual removal rate layers; the pixels where it should be
@@ -29,7 +28,9 @@ different are the ones that have a region-group-age combination that's in the FI
 import multiprocessing
 from functools import partial
 import datetime
+import numpy as np
 from sensitivity_analysis import US_removal_rates
+from removals.US_removal_rates import US_removal_rate_table
 import pandas as pd
 from subprocess import Popen, PIPE, STDOUT, check_call
 import os
@@ -166,45 +167,14 @@ def main ():
     gain_table = pd.read_excel("{}".format(cn.table_US_removal_rate),
                                sheet_name="US_rates_for_model")
 
-    # Converts removals table from wide to long, so each region-group-age category has its own row
-    gain_table_group_region_by_age = pd.melt(gain_table, id_vars=['FIA_region_code', 'forest_group_code'],
-                                      value_vars=['growth_young', 'growth_middle',
-                                                  'growth_old'])
-    gain_table_group_region_by_age = gain_table_group_region_by_age.dropna()
-
-    # In the forest age category raster, each category has this value
-    age_dict = {'growth_young': 1000, 'growth_middle': 2000, 'growth_old': 3000}
-
-    # Creates a unique value for each forest group-region-age category in the table.
-    # Although these rates are applied to all standard removals model pixels at first, they are not ultimately used for
-    # pixels that have Hansen gain (see below).
-    gain_table_group_region_age = gain_table_group_region_by_age.replace({"variable": age_dict})
-    gain_table_group_region_age['age_cat'] = gain_table_group_region_age['variable']*10
-    gain_table_group_region_age['group_region_age_combined'] = gain_table_group_region_age['age_cat'] + \
-                                              gain_table_group_region_age['forest_group_code']*100 + \
-                                              gain_table_group_region_age['FIA_region_code']
-    # Converts the forest group-region-age codes and corresponding removals rates to a dictionary,
-    # where the key is the unique group-region-age code and the value is the AGB removal rate.
-    gain_table_group_region_age_dict = pd.Series(gain_table_group_region_age.value.values, index=gain_table_group_region_age.group_region_age_combined).to_dict()
-    uu.print_log(gain_table_group_region_age_dict)
-
-
-    # Creates a unique value for each forest group-region category using just young forest rates.
-    # These are assigned to Hansen gain pixels, which automatically get the young forest rate, regardless of the
-    # forest age category raster.
-    gain_table_group_region = gain_table_group_region_age.drop(gain_table_group_region_age[gain_table_group_region_age.age_cat != 10000].index)
-    gain_table_group_region['group_region_combined'] = gain_table_group_region['forest_group_code']*100 + \
-                                                       gain_table_group_region['FIA_region_code']
-    # Converts the forest group-region codes and corresponding removals rates to a dictionary,
-    # where the key is the unique group-region code (youngest age category) and the value is the AGB removal rate.
-    gain_table_group_region_dict = pd.Series(gain_table_group_region.value.values, index=gain_table_group_region.group_region_combined).to_dict()
-    uu.print_log(gain_table_group_region_dict)
+    # Converts the removal rates to a lookup table by age category, forest group and region.
+    # Region-group-age combinations without a rate are NaN so that they get the standard model rate.
+    rate_table = US_removal_rate_table(gain_table, ['growth'], default=np.nan)
 
 
     # count/2 on a m4.16xlarge maxes out at about 230 GB of memory (processing 16 tiles at once), so it's okay on an m4.16xlarge
     pool = multiprocessing.Pool(int(cn.count/2))
-    pool.map(partial(US_removal_rates.US_removal_rate_calc, gain_table_group_region_age_dict=gain_table_group_region_age_dict,
-                     gain_table_group_region_dict=gain_table_group_region_dict,
+    pool.map(partial(US_removal_rates.US_removal_rate_calc, rate_table=rate_table,
                      output_pattern_list=output_pattern_list, sensit_type=sensit_type), US_tile_id_list)
     pool.close()
     pool.join()
@@ -212,8 +182,7 @@ def main ():
     # # For single processor use
     # for tile_id in US_tile_id_list:
     #
-    #     US_removal_rates.US_removal_rate_calc(tile_id, gain_table_group_region_age_dict, gain_table_group_region_dict,
-    #                                           output_pattern_list, sensit_type)
+    #     US_removal_rates.US_removal_rate_calc(tile_id, rate_table, output_pattern_list, sensit_type)
 
 
     # Uploads output tiles to s3
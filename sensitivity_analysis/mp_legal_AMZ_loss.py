@@ -39,9 +39,11 @@ def main ():
                         help='Stages of creating Brazil legal Amazon-specific gross cumulative removals. Options are {}'.format(Brazil_stages))
     parser.add_argument('--run_through', '-r', required=True,
                         help='Options: true or false. true: run named stage and following stages. false: run only named stage.')
+    uu.add_tile_processing_arguments(parser, memory=False)
     args = parser.parse_args()
     stage_input = args.stages
     run_through = args.run_through
+    uu.set_tile_processing_arguments(args)
 
 
     # Checks the validity of the two arguments. If either one is invalid, the script ends.
@@ -4,6 +4,7 @@ import os
 import pytest
 import rasterio
 import constants_and_names as cn
+import universal_util as uu
 from carbon_pools.create_carbon_pools import prepare_gain_table, mangrove_pool_ratio_dict
 
 # Makes mangrove BGC:AGC dictionary for different continent-ecozone combinations
@@ -17,7 +18,8 @@ def create_BGC_dictionary():
                                                     cn.below_to_above_trop_wet_mang,
                                                     cn.below_to_above_subtrop_mang)
 
-    return mang_BGB_AGB_ratio
+    # The pool creation functions take the ratios as lookup tables
+    return uu.make_lookup_table(mang_BGB_AGB_ratio)
 
 
 # Makes mangrove deadwood:AGC dictionary for different continent-ecozone combinations
@@ -31,7 +33,8 @@ def create_deadwood_dictionary():
                                                         cn.deadwood_to_above_trop_wet_mang,
                                                         cn.deadwood_to_above_subtrop_mang)
 
-    return mang_deadwood_AGB_ratio
+    # The pool creation functions take the ratios as lookup tables
+    return uu.make_lookup_table(mang_deadwood_AGB_ratio)
 
 
 # Makes mangrove litter:AGC dictionary for different continent-ecozone combinations
@@ -45,4 +48,5 @@ def create_litter_dictionary():
                                                         cn.litter_to_above_trop_wet_mang,
                                                         cn.litter_to_above_subtrop_mang)
 
-    return mang_litter_AGB_ratio
+    # The pool creation functions take the ratios as lookup tables
+    return uu.make_lookup_table(mang_litter_AGB_ratio)
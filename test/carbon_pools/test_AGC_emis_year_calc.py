@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import constants_and_names as cn
+from carbon_pools.create_carbon_pools import AGC_emis_year_calc
+
+
+# Pixels: loss-only in model extent, loss-and-gain in model extent, loss-only outside model extent,
+# loss-and-gain outside model extent, no loss
+@pytest.fixture()
+def AGC_emis_year_inputs():
+    return dict(
+        agc_2000_window=np.array([[100, 100, 100, 100, 100]], dtype='float32'),
+        loss_year_window=np.array([[5, 5, 5, 5, 0]], dtype='uint8'),
+        gain_window=np.array([[0, 1, 0, 1, 1]], dtype='uint8'),
+        annual_gain_AGC_window=np.array([[2, 2, 2, 2, 2]], dtype='float32'),
+        cumul_gain_AGCO2_window=np.array([[11, 11, 11, 11, 11]], dtype='float32'),
+        removal_forest_type_window=np.array([[1, 1, 0, 0, 1]], dtype='uint8')
+    )
+
+
+def test_AGC_emis_year_calc_returns_float32(AGC_emis_year_inputs):
+    AGC_emis_year = AGC_emis_year_calc(**AGC_emis_year_inputs)
+
+    assert AGC_emis_year.dtype == np.float32
+
+def test_AGC_emis_year_calc_adds_removals_by_loss_and_gain(AGC_emis_year_inputs):
+    AGC_emis_year = AGC_emis_year_calc(**AGC_emis_year_inputs)
+
+    cumul_gain_AGC = np.float32(11) / np.float32(cn.c_to_co2)
+    expected = np.array([[100 + cumul_gain_AGC, 100 + 2 * 4, cumul_gain_AGC, 2 * 4, 0]], dtype='float32')
+    np.testing.assert_array_equal(AGC_emis_year, expected)
+
+def test_AGC_emis_year_calc_accepts_missing_inputs(AGC_emis_year_inputs):
+    # Missing inputs are read-only constant windows
+    for input_name in ['gain_window', 'annual_gain_AGC_window', 'cumul_gain_AGCO2_window']:
+        input_window = AGC_emis_year_inputs[input_name]
+        AGC_emis_year_inputs[input_name] = np.broadcast_to(np.zeros(1, dtype=input_window.dtype), input_window.shape)
+
+    AGC_emis_year = AGC_emis_year_calc(**AGC_emis_year_inputs)
+
+    np.testing.assert_array_equal(AGC_emis_year, np.array([[100, 100, 0, 0, 0]], dtype='float32'))
@@ -0,0 +1,26 @@
+import numpy as np
+
+import constants_and_names as cn
+from carbon_pools.create_carbon_pools import BGB_AGB_ratio_calc, BGC_calc
+
+
+def test_BGB_AGB_ratio_calc_uses_mangrove_ratio_in_mangroves():
+    removal_forest_type_window = np.array([[cn.mangrove_rank, 0, 1]], dtype='uint8')
+    mang_BGB_AGB_ratio_window = np.array([[0.5, 0.5, 0.5]], dtype='float32')
+    BGB_AGB_ratio_window = np.array([[0.25, 0.25, 0.3]], dtype='float32')
+
+    BGB_AGB_ratio_all_window = BGB_AGB_ratio_calc(removal_forest_type_window, mang_BGB_AGB_ratio_window, BGB_AGB_ratio_window)
+
+    np.testing.assert_array_equal(BGB_AGB_ratio_all_window, np.array([[0.5, 0.25, 0.3]], dtype='float32'))
+
+def test_BGC_calc_shares_ratio_between_extents():
+    BGB_AGB_ratio_all_window = np.array([[0.5, 0.25, 0.3]], dtype='float32')
+    AGC_2000_window = np.array([[100, 100, 0]], dtype='float32')
+    AGC_emis_year_window = np.array([[120, 0, 0]], dtype='float32')
+
+    BGC_2000_window = BGC_calc(AGC_2000_window, BGB_AGB_ratio_all_window)
+    BGC_emis_year_window = BGC_calc(AGC_emis_year_window, BGB_AGB_ratio_all_window)
+
+    assert BGC_2000_window.dtype == np.float32
+    np.testing.assert_array_equal(BGC_2000_window, np.array([[50, 25, 0]], dtype='float32'))
+    np.testing.assert_array_equal(BGC_emis_year_window, np.array([[60, 0, 0]], dtype='float32'))
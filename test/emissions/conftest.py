@@ -0,0 +1,25 @@
+import os
+import shutil
+
+import pytest
+
+import constants_and_names as cn
+from emissions import calculate_gross_emissions
+
+
+# Compiles the extension from a copy of the emissions C++ so that the test doesn't write into the repo
+@pytest.fixture(scope='module')
+def emissions_extension(tmp_path_factory):
+
+    if shutil.which('c++') is None:
+        pytest.skip('No C++ compiler')
+
+    cpp_util_dir = str(tmp_path_factory.mktemp('cpp_util'))
+    shutil.copytree(os.path.join(os.path.dirname(calculate_gross_emissions.__file__), 'cpp_util'), cpp_util_dir,
+                    dirs_exist_ok=True)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(cn, 'c_emis_compile_dst', cpp_util_dir)
+        calculate_gross_emissions.compile_emissions_extension()
+        return calculate_gross_emissions.load_emissions_extension()
+
@@ -0,0 +1,44 @@
+import os
+import shutil
+
+import pytest
+
+import constants_and_names as cn
+from emissions import calculate_gross_emissions
+
+
+@pytest.fixture()
+def cpp_util_dir(monkeypatch, tmp_path):
+
+    if shutil.which('c++') is None:
+        pytest.skip('No C++ compiler')
+
+    shutil.copytree(os.path.join(os.path.dirname(calculate_gross_emissions.__file__), 'cpp_util'), tmp_path,
+                    dirs_exist_ok=True)
+    monkeypatch.setattr(cn, 'c_emis_compile_dst', str(tmp_path))
+
+    return tmp_path
+
+
+def test_unchanged_build_is_not_recompiled(cpp_util_dir, monkeypatch):
+    calculate_gross_emissions.compile_emissions_extension()
+    cached_builds = os.listdir(cpp_util_dir / 'build_cache')
+
+    # Compiling again would fail, so the second build can only come from the cache
+    monkeypatch.setattr(calculate_gross_emissions.uu, 'log_subprocess_output_full',
+                        lambda cmd: pytest.fail(f'Recompiled with {cmd}'))
+    extension = calculate_gross_emissions.compile_emissions_extension()
+
+    assert os.listdir(cpp_util_dir / 'build_cache') == cached_builds
+    assert os.path.exists(extension)
+
+def test_build_hash_changes_with_includes_and_profile(cpp_util_dir):
+    cpp = calculate_gross_emissions.emissions_extension_cpp
+
+    default_hash = calculate_gross_emissions.emissions_build_hash(cpp, 'default')
+    release_hash = calculate_gross_emissions.emissions_build_hash(cpp, 'release')
+
+    with open(cpp_util_dir / 'constants.h', 'a') as constants:
+        constants.write('\n')
+
+    assert len({default_hash, release_hash, calculate_gross_emissions.emissions_build_hash(cpp, 'default')}) == 3
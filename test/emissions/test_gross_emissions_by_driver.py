@@ -0,0 +1,26 @@
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+from emissions import calculate_gross_emissions
+
+
+def test_emissions_are_in_the_band_for_their_driver(tmp_path):
+    emissions_window = np.array([[10, 20, 30, 0]], dtype='float32')
+
+    # Driver 9 isn't a driver in the decision tree, so it is no driver like 0
+    drivers_window = np.array([[1, 9, 0, 5]], dtype='uint8')
+
+    with rasterio.open(tmp_path / 'by_driver.tif', 'w', driver='GTiff', height=1, width=4, dtype='float32',
+                       count=len(calculate_gross_emissions.emissions_driver_bands), crs='EPSG:4326',
+                       transform=from_origin(0, 0, 0.00025, 0.00025)) as dst:
+        calculate_gross_emissions.write_emissions_by_driver_window(dst, emissions_window, drivers_window, Window(0, 0, 4, 1))
+
+    with rasterio.open(tmp_path / 'by_driver.tif') as src:
+        bands = src.read()
+
+    np.testing.assert_array_equal(bands.sum(axis=0), emissions_window)
+    np.testing.assert_array_equal(bands[0], [[10, 0, 0, 0]])    # Permanent agriculture
+    np.testing.assert_array_equal(bands[-1], [[0, 20, 30, 0]])  # No driver
+    assert not bands[1:-1].any()
@@ -0,0 +1,62 @@
+import numpy as np
+
+from emissions import calculate_gross_emissions
+import test.test_utilities as tu
+
+
+def test_no_loss_has_no_emissions(emissions_extension):
+    outputs = calculate_gross_emissions.calc_emissions_window(emissions_extension, 'biomass_soil',
+                                                              *tu.emissions_pixel_windows([0, 50], [0, 0]))
+
+    for output in outputs:
+        np.testing.assert_array_equal(output, np.zeros((1, 2)))
+
+def test_permanent_agriculture_node(emissions_extension):
+    all_gases, CO2_only, non_CO2, CH4_only, N2O_only, node_codes = \
+        calculate_gross_emissions.calc_emissions_window(emissions_extension, 'biomass_soil',
+                                                        *tu.emissions_pixel_windows([0, 50], [10, 10]))
+
+    np.testing.assert_array_equal(node_codes, np.array([[171, 171]]))
+
+    # Without soil carbon, only the non-soil carbon is emitted as CO2
+    np.testing.assert_allclose(CO2_only[0, 0], (100 + 26 + 6 + 2) * 44 / 12, rtol=1e-6)
+    assert N2O_only[0, 0] == 0
+    assert CH4_only[0, 1] == 0
+    assert CO2_only[0, 1] > CO2_only[0, 0]
+    assert N2O_only[0, 1] > 0
+    np.testing.assert_allclose(all_gases, CO2_only + non_CO2, rtol=1e-6)
+
+def test_emitted_pools_add_up(emissions_extension):
+    windows = tu.emissions_pixel_windows([0, 50], [10, 10])
+
+    biomass_soil = calculate_gross_emissions.calc_emissions_window(emissions_extension, 'biomass_soil', *windows)
+    biomass_only = calculate_gross_emissions.calc_emissions_window(emissions_extension, 'biomass_only', *windows)
+    soil_only = calculate_gross_emissions.calc_emissions_window(emissions_extension, 'soil_only', *windows)
+
+    # The emissions outputs of the two pool subsets add up to the emissions from both pools. Nodes don't change.
+    for both, biomass, soil in zip(biomass_soil[:5], biomass_only[:5], soil_only[:5]):
+        np.testing.assert_allclose(biomass + soil, both, rtol=1e-6)
+    np.testing.assert_array_equal(biomass_only[5], biomass_soil[5])
+
+def test_emitted_pools_in_one_pass_match_separate_passes(emissions_extension):
+    windows = tu.emissions_pixel_windows([0, 50], [10, 10])
+
+    outputs = calculate_gross_emissions.calc_emissions_window(emissions_extension, 'biomass_soil,biomass_only', *windows)
+    biomass_soil = calculate_gross_emissions.calc_emissions_window(emissions_extension, 'biomass_soil', *windows)
+    biomass_only = calculate_gross_emissions.calc_emissions_window(emissions_extension, 'biomass_only', *windows)
+
+    assert len(outputs) == 12
+    for output, separate_output in zip(outputs, biomass_soil + biomass_only):
+        np.testing.assert_array_equal(output, separate_output)
+
+def test_emission_factor_table_has_flowchart_constants(emissions_extension):
+    emission_factors = calculate_gross_emissions.emission_factor_table(emissions_extension)
+
+    # Every combination of the categorical inputs has one row
+    assert len(emission_factors) == 8 * 4 * 2 * 3 * 13
+    assert not emission_factors.duplicated(calculate_gross_emissions.emission_factor_table_columns[:5]).any()
+
+    # Permanent agriculture in the tropics with wet climate, outside IFL and not plantation (the pixels above)
+    factors = emission_factors.query('driver == 1 and ecozone == 1 and ifl_primary == 0 and plantation == 0 and climate == 1')
+    np.testing.assert_allclose(factors[['Cf', 'Gef_CO2', 'peat_drain_annual_CO2_only', 'flu']].values,
+                               [[0.55, 1580, 58, 0.83]], rtol=1e-6)
@@ -0,0 +1,37 @@
+import numpy as np
+
+from benchmarks.gross_emissions import make_window
+from emissions import calculate_gross_emissions
+from emissions import calculate_gross_emissions_numpy
+import test.test_utilities as tu
+
+
+def test_permanent_agriculture_node_without_extension():
+    all_gases, CO2_only, non_CO2, CH4_only, N2O_only, node_codes = \
+        calculate_gross_emissions_numpy.calc_emissions_window('biomass_soil', *tu.emissions_pixel_windows([0, 50], [10, 10]))
+
+    np.testing.assert_array_equal(node_codes, np.array([[171, 171]]))
+    np.testing.assert_allclose(CO2_only[0, 0], (100 + 26 + 6 + 2) * 44 / 12, rtol=1e-6)
+    assert N2O_only[0, 0] == 0
+    assert N2O_only[0, 1] > 0
+
+def test_numpy_matches_extension(emissions_extension):
+
+    # Random windows use every decision tree node
+    windows = make_window(20, 900, 0)
+    emitted_pools = 'biomass_soil,biomass_only,soil_only'
+
+    extension_outputs = calculate_gross_emissions.calc_emissions_window(emissions_extension, emitted_pools, *windows)
+    numpy_outputs = calculate_gross_emissions_numpy.calc_emissions_window(emitted_pools, *windows)
+
+    assert len(numpy_outputs) == len(extension_outputs) == 18
+    for extension_output, numpy_output in zip(extension_outputs, numpy_outputs):
+        assert numpy_output.dtype == extension_output.dtype
+        assert numpy_output.tobytes() == extension_output.tobytes()
+
+def test_numpy_emission_factor_table_matches_extension(emissions_extension):
+    extension_table = calculate_gross_emissions.emission_factor_table(emissions_extension)
+    numpy_table = calculate_gross_emissions_numpy.emission_factor_table()
+
+    assert list(numpy_table.columns) == calculate_gross_emissions.emission_factor_table_columns
+    np.testing.assert_array_equal(numpy_table.values, extension_table.values)
@@ -0,0 +1,47 @@
+import numpy as np
+
+import constants_and_names as cn
+from emissions import calculate_gross_emissions
+from emissions import calculate_gross_emissions_numpy
+import test.test_utilities as tu
+
+
+def test_summary_is_area_weighted_by_node_driver_and_loss_year():
+    windows = tu.emissions_pixel_windows([0, 50], [10, 12])
+    outputs = calculate_gross_emissions_numpy.calc_emissions_window('biomass_soil,biomass_only', *windows)
+
+    summary = calculate_gross_emissions.summarize_emissions_window('biomass_soil,biomass_only', outputs, windows[7],
+                                                                   windows[5], np.array([[769.3]]))
+
+    assert list(summary.columns) == calculate_gross_emissions.emissions_summary_columns
+    assert len(summary) == 4
+
+    pixel = summary.query('emitted_pools == "biomass_soil" and loss_year == 12').iloc[0]
+    assert (pixel['node_code'], pixel['driver'], pixel['pixels']) == (171, 1, 1)
+    np.testing.assert_allclose(pixel['area_ha'], 769.3 / cn.m2_per_ha)
+    np.testing.assert_allclose(pixel['all_gases_Mg_CO2e'], outputs[0][0, 1] * 769.3 / cn.m2_per_ha, rtol=1e-6)
+
+def test_merged_window_summaries_match_one_window():
+    windows = tu.emissions_pixel_windows([0, 50], [10, 10])
+    outputs = calculate_gross_emissions_numpy.calc_emissions_window('biomass_soil', *windows)
+    pixel_area = np.array([[700.0]])
+
+    summary = calculate_gross_emissions.summarize_emissions_window('biomass_soil', outputs, windows[7], windows[5], pixel_area)
+    column_summaries = [calculate_gross_emissions.summarize_emissions_window(
+        'biomass_soil', [output[:, [col]] for output in outputs], windows[7][:, [col]], windows[5][:, [col]], pixel_area)
+        for col in range(2)]
+
+    merged = calculate_gross_emissions.merge_emissions_summaries(column_summaries)
+
+    assert merged['pixels'].tolist() == [2]
+    np.testing.assert_allclose(merged.iloc[:, 4:].values.astype(float), summary.iloc[:, 4:].values.astype(float))
+
+def test_no_emissions_has_empty_summary():
+    windows = tu.emissions_pixel_windows([0, 50], [0, 0])
+    outputs = calculate_gross_emissions_numpy.calc_emissions_window('biomass_soil', *windows)
+
+    summary = calculate_gross_emissions.summarize_emissions_window('biomass_soil', outputs, windows[7], windows[5],
+                                                                   np.array([[700.0]]))
+
+    assert len(summary) == 0
+    assert list(summary.columns) == calculate_gross_emissions.emissions_summary_columns
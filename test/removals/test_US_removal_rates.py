@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from removals import US_removal_rates
+
+
+def test_gain_pixels_get_young_rate():
+    gain_table = pd.DataFrame({'FIA_region_code': [1, 2], 'forest_group_code': [10, 10],
+                               'growth_young': [3.0, 2.0], 'growth_middle': [1.5, np.nan], 'growth_old': [0.5, 0.2],
+                               'SD_young': [0.3, 0.2], 'SD_middle': [0.15, np.nan], 'SD_old': [np.nan, 0.02]})
+    rate_table = US_removal_rates.US_removal_rate_table(gain_table, ['growth', 'SD'])
+
+    # Pixels: middle age, gain with middle age, old age without a stdev, middle age without a rate,
+    # gain without an age category, no forest group
+    gain = np.array([[0, 1, 0, 0, 1, 0]], dtype='uint8')
+    age_cat = np.array([[2, 2, 3, 2, 0, 1]], dtype='uint8')
+    forest_group = np.array([[10, 10, 10, 10, 10, 0]], dtype='uint8')
+    region = np.array([[1, 1, 1, 2, 1, 1]], dtype='uint8')
+
+    rate, stdev = US_removal_rates.US_removal_rate_window(gain, age_cat, forest_group, region, rate_table)
+
+    np.testing.assert_array_equal(rate, np.array([[1.5, 3, 0.5, 0, 0, 0]], dtype='float32'))
+    np.testing.assert_array_equal(stdev, np.array([[0.15, 0.3, 0, 0, 0, 0]], dtype='float32'))
@@ -0,0 +1,39 @@
+import numpy as np
+
+import constants_and_names as cn
+from removals import annual_gain_rate_AGC_BGC_all_forest_types
+
+
+def rates(values, stdevs):
+    return np.array([values], dtype='float32'), np.array([stdevs], dtype='float32')
+
+def test_removal_factors_come_from_removal_forest_type_source(monkeypatch):
+    monkeypatch.setattr(cn, 'SENSIT_TYPE', 'std')
+
+    # Pixels: mangrove over Europe, Europe over planted forest, young secondary forest over IPCC,
+    # IPCC (not young forest), outside the model extent
+    model_extent = np.array([[1, 1, 1, 1, 0]], dtype='float32')
+    age_category = np.array([[0, 0, 1, 2, 1]], dtype='uint8')
+    BGB_AGB_ratio = np.full((1, 5), 0.25, dtype='float32')
+    mangrove_AGB, mangrove_stdev = rates([2, 0, 0, 0, 2], [0.2, 0.5, 0, 0, 0.2])
+    rate_windows = {
+        'mangrove': (mangrove_AGB, mangrove_AGB * 0.5, mangrove_stdev),
+        'europe': rates([4, 3, 0, 0, 0], [0.4, 0.6, 0, 0, 0]),
+        'plantations': rates([0, 1, 0, 0, 0], [0, 0.1, 0, 0, 0]),
+        'young': rates([0, 0, 1.5, 1.5, 1.5], [0, 0, 0.15, 0.15, 0.15]),
+        'ipcc': rates([0, 0, 2, 2, 2], [0, 0, 0.2, 0.2, 0.2])
+    }
+
+    removal_forest_type, AGC, BGC, AGC_BGC, stdev = annual_gain_rate_AGC_BGC_all_forest_types.annual_gain_rate_AGC_BGC_window(
+        model_extent, age_category, BGB_AGB_ratio, rate_windows)
+
+    np.testing.assert_array_equal(removal_forest_type,
+                                  [[cn.mangrove_rank, cn.europe_rank, cn.young_natural_rank, cn.old_natural_rank, 0]])
+    np.testing.assert_allclose(AGC, [[2 * cn.biomass_to_c_mangrove, 3 / 1.25, 1.5, 2 * cn.biomass_to_c_non_mangrove, 0]], rtol=1e-6)
+    np.testing.assert_allclose(BGC, [[1 * cn.biomass_to_c_mangrove, 3 - 3 / 1.25, 1.5 * 0.25,
+                                      2 * cn.biomass_to_c_non_mangrove * 0.25, 0]], rtol=1e-6)
+    np.testing.assert_array_equal(AGC_BGC, AGC + BGC)
+
+    # The mangrove standard deviation isn't used where mangroves don't have a removal factor
+    np.testing.assert_allclose(stdev, [[0.2 * cn.biomass_to_c_mangrove, 0.3 / 1.25, 0.15, 0.2 * cn.biomass_to_c_non_mangrove, 0]], rtol=1e-6)
+    assert [array.dtype for array in (AGC, BGC, AGC_BGC, stdev)] == [np.float32] * 4
@@ -0,0 +1,134 @@
+import glob
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+import constants_and_names as cn
+import universal_util as uu
+from removals import annual_gain_rate_AGC_BGC_all_forest_types
+from removals import annual_gain_rate_IPCC_defaults
+from removals import forest_age_category_IPCC
+from removals import fused_removals
+from removals import gain_year_count_all_forest_types
+from removals import gross_removals_all_forest_types
+
+
+tile_id = '00N_000E'
+
+# Lookup tables for two continent-ecozones, with IPCC removal factors by age category (10000, 20000, 30000)
+young_gain_table = uu.make_lookup_table({0: 0, 4001: 4.2, 4002: 1.3}, default=float('nan'), dtype='float64')
+gain_table_dict = uu.make_lookup_table({0: 0, 10000: 0, 20000: 0, 30000: 0, 4001: 0, 4002: 0,
+                                        14001: 1.1, 24001: 2.3, 34001: 3.7, 14002: 0.4, 24002: 0.9, 34002: 1.6})
+stdev_table_dict = uu.make_lookup_table({0: 0, 10000: 0, 20000: 0, 30000: 0, 4001: 0, 4002: 0,
+                                         14001: 0.1, 24001: 0.2, 34001: 0.3, 14002: 0.05, 24002: 0.15, 34002: 0.25})
+
+
+def make_input_tiles(skip=()):
+    """
+    Makes small input tiles with random values for all removals stages in the working directory, except the tiles in skip
+    """
+
+    rng = np.random.default_rng(0)
+    shape = (30, 40)
+
+    def rate():
+        return (rng.random(shape) * 5 * (rng.random(shape) > 0.5)).astype('float32')
+
+    # Loss tiles have the pattern before the tile id
+    inputs = {
+        f'{tile_id}_{cn.pattern_model_extent}.tif': (rng.random(shape) > 0.2).astype('float32'),
+        f'{tile_id}_{cn.pattern_gain_ec2}.tif': (rng.random(shape) > 0.7).astype('uint8'),
+        f'{cn.pattern_loss}_{tile_id}.tif': (rng.integers(0, cn.loss_years + 1, shape) * (rng.random(shape) > 0.6)).astype('uint8'),
+        f'{tile_id}_{cn.pattern_ifl_primary}.tif': (rng.random(shape) > 0.5).astype('uint8'),
+        f'{tile_id}_{cn.pattern_WHRC_biomass_2000_unmasked}.tif': (rng.random(shape) * 150).astype('float32'),
+        f'{tile_id}_{cn.pattern_cont_eco_processed}.tif': rng.choice([0, 4001, 4002], shape).astype('int16'),
+        f'{tile_id}_{cn.pattern_BGB_AGB_ratio}.tif': (0.2 + rng.random(shape) * 0.1).astype('float32'),
+        f'{tile_id}_{cn.pattern_annual_gain_AGC_natrl_forest_young}.tif': rate(),
+        f'{tile_id}_{cn.pattern_stdev_annual_gain_AGC_natrl_forest_young}.tif': rate(),
+        f'{tile_id}_{cn.pattern_annual_gain_AGC_BGC_planted_forest}.tif': rate(),
+        f'{tile_id}_{cn.pattern_stdev_annual_gain_AGC_BGC_planted_forest}.tif': rate(),
+        f'{tile_id}_{cn.pattern_annual_gain_AGB_mangrove}.tif': rate(),
+        f'{tile_id}_{cn.pattern_annual_gain_BGB_mangrove}.tif': rate(),
+        f'{tile_id}_{cn.pattern_stdev_annual_gain_AGB_mangrove}.tif': rate()
+    }
+
+    for tile, data in inputs.items():
+        if tile in skip:
+            continue
+        with rasterio.open(tile, 'w', driver='GTiff', height=shape[0], width=shape[1], count=1,
+                           dtype=data.dtype, crs='EPSG:4326', transform=from_origin(0, 0, 0.00025, 0.00025)) as dst:
+            dst.write(data, 1)
+
+
+def read_outputs(patterns):
+
+    outputs = {}
+
+    for pattern in patterns:
+        for tile in glob.glob(f'{tile_id}_{pattern}.tif'):
+            with rasterio.open(tile) as src:
+                tags = {key: value for key, value in src.tags().items() if key != 'date_created'}
+                outputs[pattern] = (src.read(1), src.dtypes[0], tags)
+
+    return outputs
+
+
+@pytest.mark.parametrize("skip", [(), (f'{tile_id}_{cn.pattern_cont_eco_processed}.tif',),
+                                  (f'{tile_id}_{cn.pattern_gain_ec2}.tif', f'{tile_id}_{cn.pattern_BGB_AGB_ratio}.tif')])
+def test_fused_removals_match_separate_stages(tmp_path, monkeypatch, skip):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cn, 'SENSIT_TYPE', 'std')
+    monkeypatch.setattr(cn, 'NO_UPLOAD', True)
+
+    patterns = {output: fused_removals.fused_removals_outputs[output][2] for output in fused_removals.fused_removals_outputs}
+
+    # Separate stages, each writing tiles that the next one reads
+    (tmp_path / 'separate').mkdir()
+    monkeypatch.chdir(tmp_path / 'separate')
+    make_input_tiles(skip)
+    forest_age_category_IPCC.forest_age_category(tile_id, young_gain_table, cn.pattern_age_cat_IPCC)
+    annual_gain_rate_IPCC_defaults.annual_gain_rate(tile_id, gain_table_dict, stdev_table_dict,
+        [cn.pattern_annual_gain_AGB_IPCC_defaults, cn.pattern_annual_gain_BGB_IPCC_defaults, cn.pattern_stdev_annual_gain_AGB_IPCC_defaults])
+    annual_gain_rate_AGC_BGC_all_forest_types.annual_gain_rate_AGC_BGC_all_forest_types(tile_id,
+        [cn.pattern_removal_forest_type, cn.pattern_annual_gain_AGC_all_types, cn.pattern_annual_gain_BGC_all_types,
+         cn.pattern_annual_gain_AGC_BGC_all_types, cn.pattern_stdev_annual_gain_AGC_all_types])
+    gain_year_count_all_forest_types.create_gain_year_count(tile_id, cn.pattern_gain_year_count)
+    gross_removals_all_forest_types.gross_removals_all_forest_types(tile_id,
+        [cn.pattern_cumul_gain_AGCO2_all_types, cn.pattern_cumul_gain_BGCO2_all_types, cn.pattern_cumul_gain_AGCO2_BGCO2_all_types])
+    separate = read_outputs(patterns.values())
+
+    # All stages in one pass, writing every output
+    (tmp_path / 'fused').mkdir()
+    monkeypatch.chdir(tmp_path / 'fused')
+    make_input_tiles(skip)
+    fused_removals.fused_removals(tile_id, fused_removals.removal_stages, young_gain_table, gain_table_dict,
+                                  stdev_table_dict, patterns)
+    fused = read_outputs(patterns.values())
+
+    assert fused.keys() == separate.keys()
+
+    # Removal factor compositing and gross removals have pixels to compare, so the comparison isn't of empty outputs
+    for pattern in [cn.pattern_removal_forest_type, cn.pattern_annual_gain_AGC_all_types, cn.pattern_annual_gain_BGC_all_types,
+                    cn.pattern_annual_gain_AGC_BGC_all_types, cn.pattern_stdev_annual_gain_AGC_all_types,
+                    cn.pattern_cumul_gain_AGCO2_all_types, cn.pattern_cumul_gain_BGCO2_all_types,
+                    cn.pattern_cumul_gain_AGCO2_BGCO2_all_types]:
+        assert np.count_nonzero(separate[pattern][0]) > 0, pattern
+
+    for pattern in separate:
+        np.testing.assert_array_equal(fused[pattern][0], separate[pattern][0], err_msg=pattern)
+        assert fused[pattern][1] == separate[pattern][1], pattern
+        assert fused[pattern][2] == separate[pattern][2], pattern
+
+def test_fused_removals_only_writes_requested_outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cn, 'SENSIT_TYPE', 'std')
+    monkeypatch.setattr(cn, 'NO_UPLOAD', True)
+    make_input_tiles()
+
+    fused_removals.fused_removals(tile_id, fused_removals.removal_stages, young_gain_table, gain_table_dict,
+                                  stdev_table_dict, {'gain_year_count': cn.pattern_gain_year_count,
+                                                     'cumul_gain_AGCO2_all_types': cn.pattern_cumul_gain_AGCO2_all_types})
+
+    outputs = read_outputs(fused_removals.fused_removals_outputs[output][2] for output in fused_removals.fused_removals_outputs)
+    assert set(outputs) == {cn.pattern_gain_year_count, cn.pattern_cumul_gain_AGCO2_all_types}
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+import constants_and_names as cn
+from removals import gain_year_count_all_forest_types
+
+
+# Pixels: no change, gain-only, loss-only, loss-and-gain, outside the model extent, loss-and-gain
+loss = np.array([[0, 0, 5, 5, 0, 3]], dtype='uint8')
+gain = np.array([[0, 1, 0, 1, 0, 1]], dtype='uint8')
+model_extent = np.array([[100, 100, 100, 100, 0, 100]], dtype='uint8')
+
+@pytest.mark.parametrize("sensit_type, expected", [
+    ('std', [cn.loss_years, cn.gain_years // 2, 4, 4 + (cn.loss_years - 4) // 2, 0, 2 + (cn.loss_years - 2) // 2]),
+    ('maxgain', [cn.loss_years, cn.loss_years, 4, cn.loss_years - 1, 0, cn.loss_years - 1]),
+    ('legal_Amazon_loss', [cn.loss_years, cn.loss_years, 4, 4 + (cn.loss_years - 4) // 2, 0, 2 + (cn.loss_years - 2) // 2])
+])
+def test_gain_year_count_window(monkeypatch, sensit_type, expected):
+    monkeypatch.setattr(cn, 'SENSIT_TYPE', sensit_type)
+
+    gain_year_count = gain_year_count_all_forest_types.gain_year_count_window(loss, gain, model_extent)
+
+    assert gain_year_count.dtype == np.uint8
+    np.testing.assert_array_equal(gain_year_count, np.array([expected]))
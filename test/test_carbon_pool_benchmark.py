@@ -0,0 +1,53 @@
+import json
+import os
+
+import pytest
+import rasterio
+
+import constants_and_names as cn
+from benchmarks import carbon_pools as carbon_pool_benchmark
+
+
+@pytest.fixture()
+def benchmark_settings(monkeypatch, tmp_path):
+    # The benchmark changes into the tile folder
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cn, 'NO_UPLOAD', True)
+    monkeypatch.setattr(cn, 'SENSIT_TYPE', 'std')
+
+
+def test_synthetic_tiles_are_striped_like_model_inputs(benchmark_settings, tmp_path):
+    carbon_pool_benchmark.make_synthetic_tiles('00N_000E', 20, 900, 0)
+
+    for name, tile in carbon_pool_benchmark.input_tile_names('00N_000E').items():
+        with rasterio.open(tmp_path / tile) as src:
+            assert src.shape == (20, 900)
+            assert src.block_shapes == [(1, 900)]
+            assert src.dtypes[0] == carbon_pool_benchmark.INPUT_DTYPES[name]
+
+def test_benchmark_reports_every_stage(benchmark_settings, tmp_path):
+    report_path = str(tmp_path / 'report.json')
+
+    carbon_pool_benchmark.main('00N_000E', 20, 900, 'loss,2000', str(tmp_path / 'tiles'), report_path,
+                               fused=True, baseline=None, tolerance=0.25, seed=0)
+
+    with open(report_path) as report_file:
+        report = json.load(report_file)
+
+    assert list(report['stages']) == ['create_AGC', 'create_BGC', 'create_deadwood_litter', 'create_soil_emis_extent',
+                                      'create_total_C', 'create_carbon_pools_fused']
+    for result in report['stages'].values():
+        assert result['wall_time_s'] > 0
+        assert result['peak_rss_MB'] > 0
+        assert result['bytes_written'] > 0
+
+    # The stages' outputs are in the tile folder
+    assert os.path.exists(tmp_path / 'tiles' / f'00N_000E_{cn.pattern_total_C_emis_year}.tif')
+
+def test_compare_to_baseline_flags_regressions():
+    baseline = {'stages': {'create_AGC': {'wall_time_s': 10, 'peak_rss_MB': 1000}}}
+    report = {'stages': {'create_AGC': {'wall_time_s': 14, 'peak_rss_MB': 1100},
+                         'create_BGC': {'wall_time_s': 10, 'peak_rss_MB': 1000}}}
+
+    assert carbon_pool_benchmark.compare_to_baseline(report, baseline, 0.25) == ['create_AGC wall_time_s: 10 -> 14']
+    assert carbon_pool_benchmark.compare_to_baseline(report, baseline, 0.5) == []
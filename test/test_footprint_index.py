@@ -0,0 +1,63 @@
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+import constants_and_names as cn
+import universal_util as uu
+
+
+def make_tile(tile, data, nodata=0):
+    with rasterio.open(tile, 'w', driver='GTiff', height=data.shape[0], width=data.shape[1], count=1,
+                       dtype=data.dtype, nodata=nodata, crs='EPSG:4326', transform=from_origin(0, 10, 0.25, 0.25)) as dst:
+        dst.write(data, 1)
+
+def test_tile_data_bounds(tmp_path):
+    data = np.zeros((40, 40), dtype='float32')
+    data[10:13, 5:30] = 1.5
+    data[20, 7] = 2
+    make_tile(tmp_path / '00N_000E_mangrove.tif', data)
+    make_tile(tmp_path / '00N_000E_europe.tif', np.zeros((40, 40), dtype='float32'))
+    make_tile(tmp_path / '00N_000E_us.tif', np.zeros((40, 40), dtype='float32'), nodata=None)
+
+    # Rows 10-20 and columns 5-29 have data
+    assert uu.tile_data_bounds(str(tmp_path / '00N_000E_mangrove.tif')) == (1.25, 4.75, 7.5, 7.5)
+    assert uu.tile_data_bounds(str(tmp_path / '00N_000E_europe.tif')) is None
+
+    # Without a nodata value of 0, the whole tile is the data footprint
+    assert uu.tile_data_bounds(str(tmp_path / '00N_000E_us.tif')) == (0, 0, 10, 10)
+
+def test_footprint_index_skips_tiles_and_windows_without_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cn, 'SENSIT_TYPE', 'std')
+
+    data = np.zeros((40, 40), dtype='float32')
+    data[10:13, 5:30] = 1.5
+    make_tile('00N_000E_mangrove.tif', data)
+    make_tile('00N_000E_mangrove_stdev.tif', data / 10)
+    make_tile('10N_000E_mangrove.tif', np.zeros((40, 40), dtype='float32'))
+    make_tile('10N_000E_mangrove_stdev.tif', np.zeros((40, 40), dtype='float32'))
+
+    uu.write_footprint_index('footprint_index.csv', {
+        'mangrove': {'00N_000E': uu.tile_data_bounds('00N_000E_mangrove.tif'),
+                     '10N_000E': uu.tile_data_bounds('10N_000E_mangrove.tif')}})
+    monkeypatch.setattr(cn, 'FOOTPRINT_INDEX', 'footprint_index.csv')
+
+    assert uu.tiles_with_data(['00N_000E', '10N_000E', '20N_000E'], 'mangrove') == ['00N_000E']
+    assert uu.tiles_with_data(['00N_000E', '10N_000E'], 'europe') == ['00N_000E', '10N_000E']
+    assert uu.footprint_tile_absent('20N_000E', 'mangrove')
+    assert not uu.footprint_tile_absent('20N_000E', 'europe')
+
+    # Removal factor tiles without data aren't opened
+    assert uu.open_optional_inputs(['10N_000E_mangrove.tif', '10N_000E_mangrove_stdev.tif'], '10N_000E', 'Mangrove') is None
+    srcs = uu.open_optional_inputs(['00N_000E_mangrove.tif', '00N_000E_mangrove_stdev.tif'], '00N_000E', 'Mangrove')
+
+    # The data bounding box is looked up once, when the tile is opened
+    assert srcs[0].data_bounds == (1.25, 6.75, 7.5, 7.5)
+
+    # Windows outside the data bounding box are the same as reading them, without reading them
+    with rasterio.open('00N_000E_mangrove.tif') as src:
+        for window in [rasterio.windows.Window(0, row_off, 40, 5) for row_off in range(0, 40, 5)]:
+            window_array = uu.read_optional_window(srcs[0], window, 'float32')
+            np.testing.assert_array_equal(window_array, src.read(1, window=window))
+            assert window_array.dtype == np.float32
+            assert window_array.flags.writeable == (window.row_off == 10)
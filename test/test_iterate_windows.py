@@ -0,0 +1,72 @@
+import argparse
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.io import MemoryFile
+
+import constants_and_names as cn
+import universal_util as uu
+
+
+# Striped test tile like the Hansen tiles (blocks of one full row)
+@pytest.fixture()
+def striped_tile():
+    with MemoryFile() as memfile:
+        with memfile.open(driver='GTiff', height=1000, width=300, count=1, dtype='float32', blockysize=1,
+                          transform=rasterio.transform.from_origin(0, 10, 0.01, 0.01)) as dst:
+            dst.write(np.arange(300000, dtype='float32').reshape(1, 1000, 300))
+        with memfile.open() as src:
+            yield src
+
+
+def test_window_rows_fits_memory_budget(monkeypatch):
+    monkeypatch.setattr(cn, 'WINDOW_MEMORY_BUDGET', 64)
+
+    # 40000 pixels x 4 bytes = 160000 bytes per row
+    assert uu.window_rows(40000, 1) == 419
+    # Rounds down to whole blocks
+    assert uu.window_rows(40000, 256) == 256
+    # Always at least one block
+    assert uu.window_rows(40000, 512, bytes_per_pixel=8) == 512
+
+def test_windows_cover_tile_once(striped_tile, monkeypatch):
+    monkeypatch.setattr(cn, 'WINDOW_MEMORY_BUDGET', 1)
+
+    windows = [window for idx, window in uu.iterate_windows(striped_tile, 'test', 'test')]
+
+    # 1 MB / (300 pixels x 4 bytes) = 873 rows
+    assert [(window.row_off, window.height) for window in windows] == [(0, 873), (873, 127)]
+    assert all(window.col_off == 0 and window.width == 300 for window in windows)
+
+    # Reading the windows gives back the whole tile
+    rows = np.concatenate([striped_tile.read(1, window=window) for window in windows])
+    np.testing.assert_array_equal(rows, striped_tile.read(1))
+
+@pytest.mark.parametrize('legacy_argument, legacy_constant', [(True, False), (False, True)])
+def test_legacy_windows_are_tile_blocks(striped_tile, monkeypatch, legacy_argument, legacy_constant):
+    monkeypatch.setattr(cn, 'LEGACY_WINDOWS', legacy_constant)
+
+    windows = list(uu.iterate_windows(striped_tile, 'test', 'test', legacy=legacy_argument))
+
+    assert windows == list(striped_tile.block_windows(1))
+
+def test_stage_scripts_set_tile_processing_arguments(monkeypatch):
+    for constant, value in [('WINDOW_MEMORY_BUDGET', 64), ('LEGACY_WINDOWS', False), ('MEMORY_BUDGET', None), ('MEMORY_PROFILE', '')]:
+        monkeypatch.setattr(cn, constant, value)
+
+    parser = argparse.ArgumentParser()
+    uu.add_tile_processing_arguments(parser, memory=False)
+    uu.set_tile_processing_arguments(parser.parse_args(['-wmb', '128', '-lw']))
+
+    assert cn.WINDOW_MEMORY_BUDGET == 128
+    assert cn.LEGACY_WINDOWS
+    assert cn.MEMORY_BUDGET is None
+
+    parser = argparse.ArgumentParser()
+    uu.add_tile_processing_arguments(parser)
+    uu.set_tile_processing_arguments(parser.parse_args(['-wmb', '64', '-mb', '200']))
+
+    assert cn.WINDOW_MEMORY_BUDGET == 64
+    assert not cn.LEGACY_WINDOWS
+    assert cn.MEMORY_BUDGET == 200
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+import universal_util as uu
+
+
+# Remaps codes the way the pool and removal factor scripts did before lookup tables
+def remap_with_loop(window, code_dict):
+    remapped = window.astype('float32')
+    for key, value in code_dict.items():
+        remapped[remapped == key] = value
+    return remapped
+
+
+def test_lookup_table_matches_loop_for_integer_window():
+    code_dict = {0.0: 0, 4003.0: 0.2, 4004.0: 0.96, 12001.0: 0.29, 30000.0: 0}
+    window = np.array([[0, 4003, 4004, 12001, 30000, 4003]], dtype='uint16')
+
+    result = uu.apply_lookup_table(window, uu.make_lookup_table(code_dict))
+
+    assert result.dtype == np.dtype('float32')
+    np.testing.assert_array_equal(result, remap_with_loop(window, code_dict))
+
+def test_lookup_table_matches_loop_for_float_window():
+    code_dict = {0.0: 0, 4003.0: 0.2, 4004.0: 0.96}
+    window = np.array([[0, 4003, 4004, 4003]], dtype='float32')
+
+    result = uu.apply_lookup_table(window, uu.make_lookup_table(code_dict))
+
+    np.testing.assert_array_equal(result, remap_with_loop(window, code_dict))
+
+def test_lookup_table_codes_not_in_dictionary_keep_their_value():
+    code_dict = {4003.0: 0.2, 4005.0: 0.96}
+    window = np.array([[1, 4003, 4004, 4005, 50000]], dtype='int32')
+
+    result = uu.apply_lookup_table(window, uu.make_lookup_table(code_dict))
+
+    np.testing.assert_array_equal(result, remap_with_loop(window, code_dict))
+    np.testing.assert_array_equal(result, np.array([[1, 0.2, 4004, 0.96, 50000]], dtype='float32'))
+
+def test_lookup_table_codes_not_in_dictionary_get_default():
+    code_dict = {4003.0: 0.2, 4005.0: 0.96}
+    window = np.array([[1, 4003, 4004, 4005, 50000]], dtype='int32')
+
+    result = uu.apply_lookup_table(window, uu.make_lookup_table(code_dict, default=0))
+
+    np.testing.assert_array_equal(result, np.array([[0, 0.2, 0, 0.96, 0]], dtype='float32'))
+
+def test_lookup_table_non_integer_codes_are_not_in_table():
+    code_dict = {4003.0: 0.2}
+    window = np.array([[4003, 4003.5, np.nan]], dtype='float32')
+
+    result = uu.apply_lookup_table(window, uu.make_lookup_table(code_dict, default=-1))
+
+    np.testing.assert_array_equal(result, np.array([[0.2, -1, -1]], dtype='float32'))
+
+def test_lookup_table_does_not_change_input_window():
+    window = np.array([[4003, 4004]], dtype='float32')
+
+    uu.apply_lookup_table(window, uu.make_lookup_table({4003.0: 0.2}))
+
+    np.testing.assert_array_equal(window, np.array([[4003, 4004]], dtype='float32'))
+
+def test_lookup_table_rejects_non_integer_keys():
+    with pytest.raises(Exception):
+        uu.make_lookup_table({4003.5: 0.2})
+
+def test_composite_lookup_table_looks_up_values_together():
+    code_dict = {(1, 5, 2): (0.5, 0.05), (2, 5, 2): (0.7, 0.07), (1, 12, 3): (1.1, 0.11)}
+    age = np.array([[1, 2, 1, 3, 0, 1]], dtype='uint8')
+    group = np.array([[5, 5, 12, 5, 5, 40]], dtype='uint8')
+    region = np.array([[2, 2, 3, 2, 2, 2]], dtype='uint8')
+
+    result = uu.apply_composite_lookup_table((age, group, region), uu.make_composite_lookup_table(code_dict))
+
+    assert result.dtype == np.dtype('float32')
+    np.testing.assert_array_equal(result[..., 0], np.array([[0.5, 0.7, 1.1, 0, 0, 0]], dtype='float32'))
+    np.testing.assert_array_equal(result[..., 1], np.array([[0.05, 0.07, 0.11, 0, 0, 0]], dtype='float32'))
+
+def test_composite_lookup_table_codes_outside_table_get_default():
+    lookup_table = uu.make_composite_lookup_table({(1, 2): 3.5}, default=np.nan)
+
+    result = uu.apply_composite_lookup_table((np.array([[1, 1, 2, -1]]), np.array([[2, 1, 2, 2]])), lookup_table)
+
+    np.testing.assert_array_equal(result, np.array([[3.5, np.nan, np.nan, np.nan]], dtype='float32'))
@@ -0,0 +1,77 @@
+import os
+import time
+from functools import partial
+
+import pytest
+
+import constants_and_names as cn
+import universal_util as uu
+
+
+# Stand-in for a tile function: writes a file for the tile, or fails for tiles named bad.
+# Sleeps so that the scheduler can measure its memory.
+def touch_tile(tile_id, folder):
+    time.sleep(0.1)
+    if tile_id == 'bad':
+        raise ValueError(f'{tile_id} failed')
+    open(os.path.join(folder, f'{tile_id}.txt'), 'w').close()
+
+
+@pytest.fixture()
+def scheduler_settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(cn, 'NO_UPLOAD', True)
+    monkeypatch.setattr(cn, 'SENSIT_TYPE', 'std')
+    monkeypatch.setattr(cn, 'count', 4)
+    monkeypatch.setattr(cn, 'MEMORY_BUDGET', 100)
+    monkeypatch.setattr(cn, 'MEMORY_POLL_INTERVAL', 0.01)
+    monkeypatch.setattr(cn, 'MEMORY_PROFILE', str(tmp_path / 'memory_profile.csv'))
+
+
+def test_map_tiles_runs_every_tile_and_profiles_memory(scheduler_settings, tmp_path):
+    tile_id_list = ['00N_000E', '00N_010E', '10N_000E', '10N_010E', '20N_000E']
+
+    uu.map_tiles(partial(touch_tile, folder=tmp_path), tile_id_list, 'test_stage')
+
+    assert sorted(os.listdir(tmp_path)) == sorted([f'{tile_id}.txt' for tile_id in tile_id_list] + ['memory_profile.csv'])
+
+    memory_profile = uu.read_memory_profile(cn.MEMORY_PROFILE)
+    assert sorted(memory_profile['test_stage']) == tile_id_list
+    assert all(peak > 0 for peak in memory_profile['test_stage'].values())
+
+def test_map_tiles_raises_for_failed_tiles(scheduler_settings, tmp_path):
+    with pytest.raises(Exception, match='bad'):
+        uu.map_tiles(partial(touch_tile, folder=tmp_path), ['00N_000E', 'bad'], 'test_stage')
+
+    # The other tiles still run
+    assert os.path.exists(tmp_path / '00N_000E.txt')
+
+def test_tile_memory_estimate_prefers_profile_then_measured_peaks(monkeypatch):
+    monkeypatch.setattr(cn, 'TILE_MEMORY_ESTIMATE', 40)
+
+    assert uu.tile_memory_estimate('00N_000E', {'00N_000E': 12.5}, {'10N_000E': 30}) == 12.5
+    assert uu.tile_memory_estimate('00N_010E', {'00N_000E': 12.5}, {'10N_000E': 30, '10N_010E': 20}) == 30
+    assert uu.tile_memory_estimate('00N_010E', {}, {}) == 40
+
+    # Peaks of the tiles that are still running are used before any tile has finished
+    assert uu.tile_memory_estimate('00N_010E', {}, {}, [6.5, 0]) == 6.5
+    assert uu.tile_memory_estimate('00N_010E', {}, {'10N_000E': 3}, [6.5]) == 6.5
+    assert uu.tile_memory_estimate('00N_010E', {}, {}, [0]) == 40
+
+# Stand-in for a tile function that splits tiles across threads: writes the number of threads it got
+def touch_tile_threads(tile_id, folder, threads=1):
+    with open(os.path.join(folder, f'{tile_id}.txt'), 'w') as tile:
+        tile.write(str(threads))
+
+def test_map_tiles_gives_remaining_processors_to_last_tiles(scheduler_settings, tmp_path):
+    uu.map_tiles(partial(touch_tile_threads, folder=tmp_path), ['00N_000E'], 'test_stage', threads_arg='threads')
+
+    with open(tmp_path / '00N_000E.txt') as tile:
+        assert tile.read() == '4'
+
+def test_tile_threads_shares_free_processors_among_pending_tiles(monkeypatch):
+    monkeypatch.setattr(cn, 'count', 96)
+
+    assert uu.tile_threads(200, 0) == 1
+    assert uu.tile_threads(3, 0) == 32
+    assert uu.tile_threads(2, 90) == 3
+    assert uu.tile_threads(1, 96) == 1
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import rasterio
+
+import universal_util as uu
+
+
+def test_missing_input_is_none(tmp_path):
+    assert uu.open_optional_input(str(tmp_path / '00N_000E_missing.tif'), '00N_000E', 'Missing') is None
+
+def test_missing_input_window_is_read_only_constant():
+    window = rasterio.windows.Window(0, 0, 300, 7)
+
+    BGB_AGB_ratio_window = uu.read_optional_window(None, window, 'float32', 0.26)
+
+    assert BGB_AGB_ratio_window.shape == (7, 300)
+    assert BGB_AGB_ratio_window.dtype == np.float32
+    assert np.all(BGB_AGB_ratio_window == np.float32(0.26))
+
+    # The constant window doesn't allocate a full array, so it can't be written to
+    with pytest.raises(ValueError):
+        BGB_AGB_ratio_window[0, 0] = 1
+
+def test_existing_input_window_is_read(tmp_path):
+    tile = str(tmp_path / '00N_000E_gain.tif')
+    with rasterio.open(tile, 'w', driver='GTiff', height=7, width=300, count=1, dtype='uint8',
+                       transform=rasterio.transform.from_origin(0, 10, 0.01, 0.01)) as dst:
+        dst.write(np.ones((1, 7, 300), dtype='uint8'))
+
+    gain_src = uu.open_optional_input(tile, '00N_000E', 'Gain')
+    gain_window = uu.read_optional_window(gain_src, rasterio.windows.Window(0, 2, 300, 3), 'uint8')
+
+    assert gain_window.shape == (3, 300)
+    assert np.all(gain_window == 1)
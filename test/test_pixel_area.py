@@ -0,0 +1,19 @@
+import numpy as np
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+import universal_util as uu
+
+
+def test_pixel_areas_add_up_to_the_earth():
+    pixel_area = uu.pixel_area_rows(from_origin(-180, 90, 1, 1), Window(0, 0, 360, 180))
+
+    # Surface area of the WGS84 ellipsoid (m2)
+    np.testing.assert_allclose(pixel_area.sum() * 360, 5.100656217e14, rtol=1e-9)
+    np.testing.assert_allclose(pixel_area[:90], pixel_area[::-1][:90])
+
+def test_hansen_pixel_area_at_the_equator():
+    pixel_area = uu.pixel_area_rows(from_origin(0, 10, 0.00025, 0.00025), Window(0, 39999, 40000, 1))
+
+    assert pixel_area.shape == (1, 1)
+    np.testing.assert_allclose(pixel_area[0, 0], 769.3, rtol=1e-4)
@@ -0,0 +1,22 @@
+import numpy as np
+from rasterio.windows import Window
+
+import universal_util as uu
+
+
+def test_nonzero_rows_are_tile_rows():
+    window_array = np.array([[0, 0], [0, 5], [0, 0], [1, 0]], dtype='float32')
+
+    np.testing.assert_array_equal(uu.nonzero_rows(window_array, Window(0, 100, 2, 4)), [101, 103])
+
+def test_row_ranges_round_trip():
+    rows = np.array([3, 0, 1, 2, 7, 9, 10])
+
+    row_ranges = uu.encode_row_ranges(rows)
+
+    assert row_ranges == '0-3,7-7,9-10'
+    np.testing.assert_array_equal(np.flatnonzero(uu.decode_row_ranges(row_ranges, 12)), [0, 1, 2, 3, 7, 9, 10])
+
+def test_no_rows():
+    assert uu.encode_row_ranges([]) == ''
+    assert not uu.decode_row_ranges('', 5).any()
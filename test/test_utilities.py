@@ -59,4 +59,12 @@ def assert_make_test_arrays_and_difference(original_raster, new_raster, tile_id,
     # https://numpy.org/doc/stable/reference/generated/numpy.testing.assert_equal.html#numpy.testing.assert_equal
     np.testing.assert_equal(array_original, array_new)
 
-    print('\n')
\ No newline at end of file
+    print('\n')
+
+
+# Two pixels on permanent agriculture (driver 1) in the tropics (ecozone 1) with wet climate (climate 1),
+# not peat, not burned and not plantation, i.e. node 171. The first has no soil carbon.
+def emissions_pixel_windows(soil, loss):
+    windows = {'agc': 100, 'bgc': 26, 'deadwood': 6, 'litter': 2, 'soil': soil, 'loss': loss, 'burn': 0,
+               'drivers': 1, 'peat': 0, 'ifl_primary': 0, 'ecozone': 1, 'climate': 1, 'plantation': 0}
+    return [np.broadcast_to(np.array(window, dtype='float32'), (1, 2)) for window in windows.values()]
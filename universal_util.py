@@ -12,6 +12,7 @@ from shutil import copyfile, move
 import os
 import multiprocessing
 from multiprocessing.pool import Pool
+import numpy as np
 from shutil import copy
 import re
 import pandas as pd
@@ -76,6 +77,11 @@ def initiate_log(tile_id_list):
     logging.info(f'AWS credentials supplied: {check_aws_creds()}')
     logging.info(f'Save intermediate outputs: {cn.SAVE_INTERMEDIATES}')
     logging.info(f'Use single processor: {cn.SINGLE_PROCESSOR}')
+    logging.info(f'Memory budget for each input window (MB): {cn.WINDOW_MEMORY_BUDGET}')
+    logging.info(f'Use legacy windows (tile blocks): {cn.LEGACY_WINDOWS}')
+    logging.info(f'Memory budget for tile tasks (GB): {cn.MEMORY_BUDGET}')
+    logging.info(f'Tile memory profile: {cn.MEMORY_PROFILE}')
+    logging.info(f'Tile footprint index: {cn.FOOTPRINT_INDEX}')
     logging.info(f'AWS ec2 instance type and AMI ID:')
 
     # https://stackoverflow.com/questions/13735051/how-to-capture-curl-output-to-a-file
@@ -578,6 +584,12 @@ def s3_flexible_download(source_dir, pattern, dest, sensit_type, tile_id_list):
 
         # Creates a full download name (path and file)
         for tile_id in tile_id_list:
+
+            # Doesn't try to download tiles that the footprint index says don't exist
+            if footprint_tile_absent(tile_id, pattern):
+                print_log(f'{tile_id}_{pattern} is not on s3 according to the footprint index. Not downloading.')
+                continue
+
             if pattern in [cn.pattern_tcd, cn.pattern_pixel_area, cn.pattern_loss]:   # For tiles that do not have the tile_id first
                 source = f'{source_dir}{pattern}_{tile_id}.tif'
             elif pattern in [cn.pattern_data_lake]:
@@ -1468,3 +1480,629 @@ def rewindow(tile_id, download_pattern_name, striped = False):
     end_of_fx_summary(start, tile_id, "{}_rewindow".format(download_pattern_name))
 
 
+# Converts a dictionary of codes to values (e.g., continent-ecozone codes to mangrove BGB:AGB ratios) into a lookup table.
+# The lookup table is a dense array with an entry for every code between the smallest and largest keys, so it can
+# be applied to a window with one indexed gather (apply_lookup_table) instead of one full scan of the window for each key,
+# as in `for key, value in dict.items(): window[window == key] = value`.
+# Keys must be whole numbers but can be floats (e.g., 4003.0), like the keys of the removal factor dictionaries.
+# If default is None, codes that aren't keys in the dictionary keep their own value, as with the loops this replaces.
+# Otherwise, codes that aren't keys in the dictionary get the default value.
+# Build the lookup table once per run (e.g., in the mp_ script) and pass it to the function that processes each tile.
+def make_lookup_table(code_dict, default=None, dtype='float32'):
+
+    if len(code_dict) == 0:
+        exception_log('Cannot make a lookup table from an empty dictionary')
+
+    keys = np.array(list(code_dict.keys()), dtype='float64')
+    values = np.array(list(code_dict.values()), dtype=dtype)
+
+    if not np.array_equal(keys, np.round(keys)):
+        exception_log('Lookup table keys must be whole numbers')
+
+    keys = keys.astype('int64')
+    min_key = int(keys.min())
+    max_key = int(keys.max())
+
+    # Codes that aren't keys either keep their own value or get the default value
+    if default is None:
+        table = np.arange(min_key, max_key + 1).astype(dtype)
+    else:
+        table = np.full(max_key - min_key + 1, default, dtype=dtype)
+
+    table[keys - min_key] = values
+
+    return table, min_key, default
+
+
+# Applies a lookup table from make_lookup_table to a window of codes.
+# Returns a new array with the lookup table's data type; the input window isn't changed.
+def apply_lookup_table(window, lookup_table):
+
+    table, min_key, default = lookup_table
+
+    # Position of each pixel's code in the lookup table.
+    # Non-integer codes in float windows (including NaN) are treated as codes that aren't in the lookup table.
+    with np.errstate(invalid='ignore'):
+        index = window.astype('int64') - min_key
+    in_table = (index >= 0) & (index < table.size)
+    if not np.issubdtype(window.dtype, np.integer):
+        in_table &= (index + min_key == window)
+
+    # Windows with only codes in the lookup table just need the gather
+    if in_table.all():
+        return table[index]
+
+    remapped = table[np.where(in_table, index, 0)]
+
+    if default is None:
+        remapped[~in_table] = window[~in_table]
+    else:
+        remapped[~in_table] = default
+
+    return remapped
+
+
+# Makes a dense lookup table of values keyed on combinations of codes from several rasters (e.g., forest age category,
+# forest group and region), so that a window's values can be looked up with one gather rather than by
+# comparing the window to each key. Keys of code_dict are tuples with a non-negative whole number code for each raster.
+# Values can be single values or sequences of values (e.g., removal factor and standard deviation) that are looked up together.
+# Combinations of codes that aren't keys get the default value.
+def make_composite_lookup_table(code_dict, default=0, dtype='float32'):
+
+    if len(code_dict) == 0:
+        exception_log('Cannot make a lookup table from an empty dictionary')
+
+    keys = np.array(list(code_dict.keys()), dtype='float64')
+    values = np.array(list(code_dict.values()), dtype=dtype)
+
+    if (keys.ndim != 2) or (not np.array_equal(keys, np.round(keys))) or (keys.min() < 0):
+        exception_log('Composite lookup table keys must be tuples of non-negative whole numbers')
+
+    keys = keys.astype('int64')
+
+    # One axis for each raster's codes, then an axis for the values if there are several values for each key
+    table = np.full(tuple(keys.max(axis=0) + 1) + values.shape[1:], default, dtype=dtype)
+    table[tuple(keys.T)] = values
+
+    return table, keys.shape[1], default
+
+
+# Applies a lookup table from make_composite_lookup_table to windows of integer codes, one window for each code in
+# the keys (in the same order). Returns a new array of each pixel's value, with the values in the last axis if
+# there are several values for each key.
+def apply_composite_lookup_table(windows, lookup_table):
+
+    table, code_count, default = lookup_table
+
+    if len(windows) != code_count:
+        exception_log(f'Composite lookup table needs {code_count} windows of codes but got {len(windows)}')
+
+    # Position of each pixel's combination of codes in the flattened lookup table.
+    # Pixels with a code outside of the table aren't in the table.
+    index = np.zeros(windows[0].shape, dtype='int64')
+    in_table = np.ones(windows[0].shape, dtype='bool')
+    for window, size in zip(windows, table.shape[:code_count]):
+        codes = window.astype('int64')
+        in_table &= (codes >= 0) & (codes < size)
+        index *= size
+        index += codes
+
+    flat_table = table.reshape((-1,) + table.shape[code_count:])
+
+    # Windows with only codes in the lookup table just need the gather
+    if in_table.all():
+        return flat_table[index]
+
+    looked_up = flat_table[np.where(in_table, index, 0)]
+    looked_up[~in_table] = default
+
+    return looked_up
+
+
+# Adds the command line arguments for how tiles are processed (window and memory budgets) that run_full_model.py and
+# the individual stage scripts share, so that each stage can be run on its own with them.
+# memory=False leaves out the arguments for scheduling tiles with map_tiles(), for scripts that don't use it.
+def add_tile_processing_arguments(parser, memory=True):
+
+    parser.add_argument('--window-memory-budget', '-wmb', type=int, default=cn.WINDOW_MEMORY_BUDGET,
+                        help='Memory (MB) for each input window in rasterio loops. Sets how many rows of a tile are processed at once.')
+    parser.add_argument('--legacy-windows', '-lw', action='store_true',
+                        help='Processes tiles in their own blocks (40000x1 strips) rather than in windows sized to the memory budget')
+
+    if memory:
+        parser.add_argument('--memory-budget', '-mb', type=float, required=False,
+                            help='Memory (GB) that tiles being processed at the same time can use. Default is 90%% of the machine memory.')
+        parser.add_argument('--memory-profile', '-mpf', required=False, default='',
+                            help='csv of peak memory by stage and tile from earlier runs. Peak memory from this run is added to it.')
+
+
+# Sets the global variables for the arguments from add_tile_processing_arguments()
+def set_tile_processing_arguments(args):
+
+    cn.WINDOW_MEMORY_BUDGET = args.window_memory_budget
+    cn.LEGACY_WINDOWS = args.legacy_windows
+
+    if 'memory_budget' in args:
+        cn.MEMORY_BUDGET = args.memory_budget
+        cn.MEMORY_PROFILE = args.memory_profile
+
+
+# Number of rows in each window from iterate_windows(). Windows are whole blocks of rows and use about
+# cn.WINDOW_MEMORY_BUDGET MB for each input with the given number of bytes per pixel
+# (e.g., 400 rows of a 40000-pixel-wide tile for 64 MB and 4-byte pixels).
+def window_rows(tile_width, block_height, bytes_per_pixel=4):
+
+    rows = int(cn.WINDOW_MEMORY_BUDGET * 1024 * 1024 // (tile_width * bytes_per_pixel))
+
+    # Rounds down to whole blocks but always uses at least one block
+    return max(1, rows // block_height) * block_height
+
+
+# Iterates over a tile in (index, window) pairs, like rasterio's block_windows(), for all the rasterio loops in the model.
+# Hansen tiles are striped (blocks of 40000x1 pixels), so block_windows() gives 40000 windows per tile, and each one pays
+# Python, rasterio and GDAL overhead for every input and output. These windows instead group whole blocks of rows
+# into chunks sized to cn.WINDOW_MEMORY_BUDGET (see window_rows()).
+# With legacy=True or cn.LEGACY_WINDOWS, the windows are exactly the blocks of the tile, as before.
+# legacy=True is for loops whose outputs depend on the window, e.g., filling pixels with the most common value in the window.
+# After the last window, reports the throughput of the stage in pixels/s so that the memory budget can be tuned.
+# When several threads read windows of the same tile at once (threads > 1), they share the memory budget,
+# so each window has 1/threads of the rows. The threads must take turns getting the next window.
+def iterate_windows(src, tile_id, stage, bytes_per_pixel=4, legacy=False, threads=1):
+
+    start = time.perf_counter()
+    pixels = 0
+
+    if legacy or cn.LEGACY_WINDOWS:
+        windows = src.block_windows(1)
+        window_type = 'tile blocks'
+    else:
+        rows = min(window_rows(src.width, src.block_shapes[0][0], bytes_per_pixel * threads), src.height)
+        windows = (((i, 0), rasterio.windows.Window(0, row_off, src.width, min(rows, src.height - row_off)))
+                   for i, row_off in enumerate(range(0, src.height, rows)))
+        window_type = f'{src.width}x{rows} windows'
+        if threads > 1:
+            window_type = f'{window_type} on {threads} threads'
+
+    for idx, window in windows:
+        pixels += window.width * window.height
+        yield idx, window
+
+    elapsed_time = time.perf_counter() - start
+    print_log(f'  {stage} throughput for {tile_id}: {pixels / max(elapsed_time, 1e-9):,.0f} pixels/s '
+              f'({pixels} pixels in {elapsed_time:.1f} s with {window_type})')
+
+
+# Reads the peak memory (GB) of each tile in each stage from a memory profile csv
+# (columns: stage, tile_id, peak_memory_GB), e.g., one written by map_tiles() in an earlier run.
+# Returns an empty profile if there isn't a profile file.
+def read_memory_profile(profile_path):
+
+    memory_profile = {}
+
+    if not profile_path or not os.path.exists(profile_path):
+        return memory_profile
+
+    with open(profile_path, newline='') as profile:
+        for row in csv.DictReader(profile):
+            memory_profile.setdefault(row['stage'], {})[row['tile_id']] = float(row['peak_memory_GB'])
+
+    return memory_profile
+
+
+# Writes the peak memory (GB) of each tile in each stage to a memory profile csv that read_memory_profile() can read
+def write_memory_profile(profile_path, memory_profile):
+
+    with open(profile_path, 'w', newline='') as profile:
+        writer = csv.writer(profile)
+        writer.writerow(['stage', 'tile_id', 'peak_memory_GB'])
+        for stage, tile_peaks in sorted(memory_profile.items()):
+            for tile_id, peak_memory in sorted(tile_peaks.items()):
+                writer.writerow([stage, tile_id, round(peak_memory, 3)])
+
+
+# Memory (GB) that the tile tasks of a stage can use together: cn.MEMORY_BUDGET if provided,
+# otherwise 90% of the machine's memory
+def memory_budget():
+
+    if cn.MEMORY_BUDGET:
+        return cn.MEMORY_BUDGET
+
+    return psutil.virtual_memory().total / 1024**3 * 0.9
+
+
+# Projected peak memory (GB) of a tile task: its peak in the memory profile if it has one, otherwise the largest peak
+# measured so far for the stage, including the peaks of the tiles that are still running (running_peaks).
+# cn.TILE_MEMORY_ESTIMATE is only used until the memory of a tile in the stage has been measured.
+def tile_memory_estimate(tile_id, stage_profile, stage_peaks, running_peaks=()):
+
+    if tile_id in stage_profile:
+        return stage_profile[tile_id]
+
+    measured_peak = max(list(stage_peaks.values()) + list(running_peaks), default=0)
+    if measured_peak > 0:
+        return measured_peak
+
+    return cn.TILE_MEMORY_ESTIMATE
+
+
+# Number of threads for the next tile that map_tiles() starts: the processors that the running tiles aren't using,
+# shared among the tiles that haven't started yet (including the next one). Many remaining tiles each get one thread,
+# i.e. the stage is parallel across tiles. The last few tiles get many threads each, i.e. parallel across rows in each tile,
+# so that a few large tiles (or a rerun of a few tiles) don't leave most of the processors idle.
+def tile_threads(n_pending, running_threads):
+
+    return max(1, (cn.count - running_threads) // max(1, n_pending))
+
+
+# Runs function(tile_id) for each tile in its own process, like multiprocessing.Pool.map(), but starts new tiles
+# only while the projected memory of the running tiles plus the next tile fits in the memory budget (memory_budget()).
+# This replaces the hard-coded numbers of processors for each stage, which depended on the machine and had to be
+# retuned whenever the input data changed.
+# The peak memory (RSS) of each tile, including its subprocesses, is measured during the run and used to project memory for the remaining tiles.
+# The memory that the tiles can use is the budget, or less if other processes on the machine leave less than that
+# (the memory the running tiles use now plus the memory that is still available), so only one check is needed per tile.
+# If cn.MEMORY_PROFILE is a csv path, peaks from earlier runs are read from it and the peaks from this run are saved to it.
+# At most cn.count tiles run at once. At least one tile always runs, even if its projected memory is over the budget.
+# If threads_arg is provided, function can also split each tile across threads, and function(tile_id, **{threads_arg: threads})
+# is run with the number of threads from tile_threads(). The tiles then use at most cn.count threads together.
+def map_tiles(function, tile_id_list, stage, threads_arg=None):
+
+    # Sensitivity analyses can use different inputs than the standard model, so their memory is profiled separately
+    if cn.SENSIT_TYPE != 'std':
+        stage = f'{stage}_{cn.SENSIT_TYPE}'
+
+    budget = memory_budget()
+    memory_profile = read_memory_profile(cn.MEMORY_PROFILE)
+    stage_profile = memory_profile.get(stage, {})
+    stage_peaks = {}
+
+    print_log(f'{stage}: scheduling {len(tile_id_list)} tiles within {round(budget, 1)} GB of memory on up to {cn.count} processors')
+
+    pending = list(tile_id_list)
+    running = {}
+    failed = []
+    max_running = 0
+
+    while pending or running:
+
+        # Updates the peak memory of the running tiles and collects the finished ones
+        for tile_id in list(running):
+            task = running[tile_id]
+            # Includes subprocesses of the tile, e.g., the C++ emissions executable
+            try:
+                tile_process = psutil.Process(task['process'].pid)
+                rss = sum(process.memory_info().rss for process in [tile_process] + tile_process.children(recursive=True))
+                task['rss'] = rss / 1024**3
+                task['peak'] = max(task['peak'], task['rss'])
+            except psutil.NoSuchProcess:
+                task['rss'] = 0
+
+            if not task['process'].is_alive():
+                task['process'].join()
+                if task['process'].exitcode != 0:
+                    failed.append(tile_id)
+                # Tiles that finished before their memory was measured don't have a peak
+                if task['peak'] > 0:
+                    stage_peaks[tile_id] = task['peak']
+                del running[tile_id]
+
+        # Starts tiles while their projected memory fits
+        while pending and sum(task['threads'] for task in running.values()) < cn.count:
+
+            estimate = tile_memory_estimate(pending[0], stage_profile, stage_peaks,
+                                            [task['peak'] for task in running.values()])
+            projected = sum(max(task['estimate'], task['peak']) for task in running.values())
+            available = psutil.virtual_memory().available / 1024**3
+            usable = min(budget, sum(task['rss'] for task in running.values()) + available)
+
+            if running and projected + estimate > usable:
+                break
+
+            threads = 1
+            kwargs = {}
+            if threads_arg:
+                threads = tile_threads(len(pending), sum(task['threads'] for task in running.values()))
+                kwargs = {threads_arg: threads}
+
+            tile_id = pending.pop(0)
+            process = multiprocessing.Process(target=function, args=(tile_id,), kwargs=kwargs)
+            process.start()
+            running[tile_id] = {'process': process, 'estimate': estimate, 'peak': 0, 'rss': 0, 'threads': threads}
+
+        max_running = max(max_running, len(running))
+
+        time.sleep(cn.MEMORY_POLL_INTERVAL)
+
+    if stage_peaks:
+        print_log(f'{stage}: largest tile peak memory {round(max(stage_peaks.values()), 2)} GB; '
+                  f'up to {max_running} tiles at once')
+
+    if cn.MEMORY_PROFILE:
+        memory_profile.setdefault(stage, {}).update(stage_peaks)
+        write_memory_profile(cn.MEMORY_PROFILE, memory_profile)
+
+    if failed:
+        exception_log(f'{stage} failed for tiles: {failed}')
+
+
+# Opens an input tile that may not exist for reading with read_optional_window().
+# Each optional input is resolved once per tile: returns the rasterio dataset, or None if the tile doesn't exist.
+# The tile's data bounding box from the footprint index is also resolved once, when the tile is opened (resolve_data_bounds()).
+# missing_note is added to the end of the log message if the tile doesn't exist (e.g., what is used instead).
+def open_optional_input(tile, tile_id, input_name, missing_note=''):
+
+    try:
+        src = rasterio.open(tile)
+        print_log(f'    {input_name} tile found for {tile_id}')
+        return resolve_data_bounds(src)
+    except rasterio.errors.RasterioIOError:
+        print_log(f'    {input_name} tile not found for {tile_id}{missing_note}')
+        return None
+
+
+# Reads a window of an input tile opened with open_optional_input().
+# If the tile doesn't exist, returns fill_value broadcast to the window's shape with the given data type.
+# The broadcast array is read-only and doesn't allocate memory for the window, unlike making an array of 0s for every
+# window of every missing input. dtype should be the data type of the input tile so that calculations
+# don't change data type depending on whether the tile exists.
+# If a footprint index is used (cn.FOOTPRINT_INDEX) and the window is outside the tile's data bounding box,
+# the window isn't read: it's 0s broadcast to the window's shape with the tile's data type, which is what reading it gives.
+def read_optional_window(src, window, dtype, fill_value=0):
+
+    if src is not None:
+        if window_has_data(src, window):
+            return src.read(1, window=window)
+        return np.broadcast_to(np.array(0, dtype=src.dtypes[0]), (window.height, window.width))
+
+    return np.broadcast_to(np.array(fill_value, dtype=dtype), (window.height, window.width))
+
+
+# Opens a set of input tiles that are only used together (e.g., a removal factor and its standard deviation).
+# Returns the list of rasterio datasets, or None if any of the tiles doesn't exist or
+# if the footprint index says the first tile (e.g., the removal factor) has no data, in which case it would never be used.
+def open_optional_inputs(tiles, tile_id, input_name):
+
+    if not tile_has_data(tiles[0]):
+        print_log(f'    {input_name} tile has no data for {tile_id} according to the footprint index')
+        return None
+
+    srcs = [open_optional_input(tile, tile_id, input_name) for tile in tiles]
+
+    if any(src is None for src in srcs):
+        return None
+
+    return srcs
+
+
+## Footprint index: which tiles of each input exist, whether they have data, and the bounding box of their data.
+## It's a csv (columns: pattern, tile_id, has_data, xmin, ymin, xmax, ymax) built by data_prep/mp_footprint_index.py
+## from s3 listings of the input folders and the data masks of the tiles. It's used with --footprint-index (cn.FOOTPRINT_INDEX).
+## Outside a tile's data bounding box, the tile reads as 0s. Tiles whose nodata value isn't 0 have the whole tile as the
+## bounding box, so reading them is never skipped. The index should be rebuilt when its inputs change.
+
+# Footprint indexes that have been read or written in this process, by absolute csv path.
+# Each index is only read once per process; write_footprint_index() updates the index it writes.
+footprint_indexes = {}
+
+# Reads a footprint index csv into {pattern: {tile_id: (xmin, ymin, xmax, ymax), or None if the tile has no data}}.
+# Tiles that aren't in the index for a pattern don't exist. Returns an empty index if there isn't an index file.
+def read_footprint_index(index_path):
+
+    if not index_path:
+        return {}
+
+    index_path = os.path.abspath(index_path)
+    if index_path in footprint_indexes:
+        return footprint_indexes[index_path]
+
+    footprint_index = {}
+
+    if not os.path.exists(index_path):
+        footprint_indexes[index_path] = footprint_index
+        return footprint_index
+
+    with open(index_path, newline='') as index:
+        for row in csv.DictReader(index):
+            bounds = None
+            if row['has_data'] == '1':
+                bounds = tuple(float(row[coord]) for coord in ['xmin', 'ymin', 'xmax', 'ymax'])
+            footprint_index.setdefault(row['pattern'], {})[row['tile_id']] = bounds
+
+    footprint_indexes[index_path] = footprint_index
+
+    return footprint_index
+
+
+# Writes a footprint index to a csv that read_footprint_index() can read
+def write_footprint_index(index_path, footprint_index):
+
+    with open(index_path, 'w', newline='') as index:
+        writer = csv.writer(index)
+        writer.writerow(['pattern', 'tile_id', 'has_data', 'xmin', 'ymin', 'xmax', 'ymax'])
+        for pattern, tile_bounds in sorted(footprint_index.items()):
+            for tile_id, bounds in sorted(tile_bounds.items()):
+                if bounds is None:
+                    writer.writerow([pattern, tile_id, 0, '', '', '', ''])
+                else:
+                    writer.writerow([pattern, tile_id, 1] + list(bounds))
+
+    footprint_indexes[os.path.abspath(index_path)] = footprint_index
+
+
+# Name of the tile with the given tile id and pattern on the spot machine, using the sensitivity analysis tile if there is one
+def footprint_tile_name(tile_id, pattern):
+
+    if pattern in [cn.pattern_tcd, cn.pattern_pixel_area, cn.pattern_loss]:   # For tiles that do not have the tile_id first
+        return f'{pattern}_{tile_id}.tif'
+
+    return sensit_tile_rename(cn.SENSIT_TYPE, tile_id, pattern)
+
+
+# Bounding box (xmin, ymin, xmax, ymax) of the pixels of a tile that aren't nodata, or None if the tile has no data
+# (like check_for_data()). The masks are read in windows, so the whole mask isn't in memory at once.
+def tile_data_bounds(tile):
+
+    with rasterio.open(tile) as src:
+
+        # Pixels outside the bounding box are only 0s if the nodata value is 0
+        if src.nodata != 0:
+            return tuple(src.bounds)
+
+        data_rows = []
+        data_cols = np.zeros(src.width, dtype=bool)
+
+        for idx, window in iterate_windows(src, get_tile_id(get_tile_name(tile)), 'tile_data_bounds', bytes_per_pixel=1):
+            msk = src.read_masks(1, window=window) > 0
+            rows = np.flatnonzero(msk.any(axis=1))
+            if rows.size > 0:
+                data_rows.extend([window.row_off + rows[0], window.row_off + rows[-1]])
+                data_cols |= msk.any(axis=0)
+
+        if not data_rows:
+            return None
+
+        cols = np.flatnonzero(data_cols)
+        data_window = rasterio.windows.Window(int(cols[0]), int(min(data_rows)), int(cols[-1] - cols[0] + 1),
+                                              int(max(data_rows) - min(data_rows) + 1))
+
+        return tuple(src.window_bounds(data_window))
+
+
+# Looks up a tile in the footprint index (cn.FOOTPRINT_INDEX) by its name.
+# Returns whether its pattern is in the index and, if so, its data bounding box (None if the tile doesn't exist or has no data).
+def tile_footprint(tile):
+
+    footprint_index = read_footprint_index(cn.FOOTPRINT_INDEX)
+    tile_name = get_tile_name(tile)
+    tile_id = re.search("[0-9]{2}[A-Z][_][0-9]{3}[A-Z]", tile_name)
+
+    if not footprint_index or tile_id is None:
+        return False, None
+
+    # Sensitivity analysis tiles are indexed under the pattern of the standard tile
+    tile_id = tile_id.group()
+    pattern = tile_name[:-4].replace(tile_id, '').strip('_')
+    if cn.SENSIT_TYPE != 'std' and pattern.endswith(f'_{cn.SENSIT_TYPE}'):
+        pattern = pattern[:-len(cn.SENSIT_TYPE) - 1]
+
+    if pattern not in footprint_index:
+        return False, None
+
+    return True, footprint_index[pattern].get(tile_id)
+
+
+# Whether a tile has data according to the footprint index. Tiles whose pattern isn't in the index are assumed to have data.
+def tile_has_data(tile):
+
+    indexed, bounds = tile_footprint(tile)
+
+    return (not indexed) or (bounds is not None)
+
+
+# Looks up the data bounding box of an opened tile in the footprint index and stores it on the dataset (src.data_bounds),
+# so that window_has_data() only has to check whether each window overlaps it.
+# Tiles whose pattern isn't in the index have the whole tile as their data bounding box. Tiles with no data have None.
+def resolve_data_bounds(src):
+
+    indexed, bounds = tile_footprint(src.name)
+    src.data_bounds = bounds if indexed else tuple(src.bounds)
+
+    return src
+
+
+# Whether a window of an opened tile overlaps the data bounding box of the tile in the footprint index.
+# The bounding box is resolved the first time for tiles that weren't opened with open_optional_input().
+def window_has_data(src, window):
+
+    if not hasattr(src, 'data_bounds'):
+        resolve_data_bounds(src)
+
+    bounds = src.data_bounds
+    if bounds is None:
+        return False
+
+    left, bottom, right, top = src.window_bounds(window)
+    xmin, ymin, xmax, ymax = bounds
+
+    return (left < xmax) & (right > xmin) & (bottom < ymax) & (top > ymin)
+
+
+# Drops the tiles that the footprint index says don't exist or have no data for the pattern,
+# e.g., for stages whose outputs are only where that input has data. The list is unchanged if the pattern isn't indexed.
+def tiles_with_data(tile_id_list, pattern):
+
+    footprint_index = read_footprint_index(cn.FOOTPRINT_INDEX)
+
+    if pattern not in footprint_index:
+        return tile_id_list
+
+    tiles_with_pattern_data = [tile_id for tile_id in tile_id_list if footprint_index[pattern].get(tile_id) is not None]
+
+    print_log(f'Footprint index: {len(tile_id_list) - len(tiles_with_pattern_data)} of {len(tile_id_list)} tiles '
+              f'have no {pattern} data. Not processing them.')
+
+    return tiles_with_pattern_data
+
+
+# Whether the footprint index says that there is no tile for the tile id and pattern on s3
+def footprint_tile_absent(tile_id, pattern):
+
+    footprint_index = read_footprint_index(cn.FOOTPRINT_INDEX)
+
+    return (pattern in footprint_index) and (tile_id not in footprint_index[pattern])
+
+
+# Rows of a window that have any pixels > 0, as row numbers in the tile. Used to build row indexes with encode_row_ranges().
+def nonzero_rows(window_array, window):
+
+    return window.row_off + np.flatnonzero((window_array > 0).any(axis=1))
+
+
+# Encodes row numbers of a tile as a compact string of ranges of consecutive rows, e.g., '0-15,20-400' (inclusive).
+# This is small enough to be a metadata tag on the tile it indexes, so the index goes wherever the tile goes (e.g., s3).
+def encode_row_ranges(rows):
+
+    rows = np.unique(np.asarray(rows, dtype='int64'))
+
+    if rows.size == 0:
+        return ''
+
+    # Starts and ends of the runs of consecutive rows
+    breaks = np.flatnonzero(np.diff(rows) > 1)
+    starts = np.concatenate([rows[:1], rows[breaks + 1]])
+    ends = np.concatenate([rows[breaks], rows[-1:]])
+
+    return ','.join(f'{start}-{end}' for start, end in zip(starts, ends))
+
+
+# Decodes a string from encode_row_ranges() into a boolean array with one value for each of the tile's rows
+def decode_row_ranges(row_ranges, height):
+
+    rows = np.zeros(height, dtype=bool)
+
+    for row_range in filter(None, row_ranges.split(',')):
+        start, end = row_range.split('-')
+        rows[int(start):int(end) + 1] = True
+
+    return rows
+
+
+# Area (m2) of the pixels in each row of a window of a tile in geographic coordinates (e.g., Hansen tiles),
+# on the WGS84 ellipsoid. Returns a (window height, 1) array, so it can be multiplied with the window's arrays.
+# Pixel area only depends on latitude, so it doesn't need to be read from the pixel area tiles.
+# Uses the area of the ellipsoid between the top and bottom latitudes of each row (authalic latitude formula).
+def pixel_area_rows(transform, window):
+
+    e = np.sqrt(cn.wgs84_flattening * (2 - cn.wgs84_flattening))
+
+    # Area between the equator and each latitude for a band 1 radian wide, divided by the semi-major axis squared
+    def band_area(lat):
+        sin_lat = np.sin(np.radians(lat))
+        return (1 - e ** 2) / 2 * (sin_lat / (1 - (e * sin_lat) ** 2) + np.arctanh(e * sin_lat) / e)
+
+    rows = np.arange(window.row_off, window.row_off + window.height + 1)
+    lat_edges = transform.f + rows * transform.e
+
+    area = np.abs(np.diff(band_area(lat_edges))) * np.radians(abs(transform.a)) * cn.wgs84_semi_major_axis ** 2
+
+    return area.reshape(-1, 1)